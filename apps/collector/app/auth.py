@@ -0,0 +1,195 @@
+"""API key authentication and tenant slug resolution with in-memory caching."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, ContextManager, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger("collector.auth")
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class TenantIdentity:
+    tenant_uuid: str
+    tenant_slug: str
+    api_key_id: Optional[str] = None
+
+
+class TTLCache(Generic[T]):
+    """Bounded LRU whose entries expire; ``None`` values are cached as negative results."""
+
+    def __init__(self, max_entries: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Optional[T]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    def get(self, key: str) -> object:
+        """Return the cached value (possibly ``None``) or ``_MISSING``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Optional[T], ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+ConnectionFactory = Callable[[], ContextManager]
+
+
+class TenantResolver:
+    """Resolves bearer tokens and tenant slugs to tenant UUIDs.
+
+    Lookups hit Postgres only on a cache miss; unknown tokens are negatively cached so a
+    misconfigured client cannot turn every request into a query. ``api_keys.last_used_at``
+    is recorded in memory and flushed in one batched UPDATE per interval.
+    """
+
+    def __init__(
+        self,
+        connection: ConnectionFactory,
+        *,
+        ttl_seconds: float = 300.0,
+        negative_ttl_seconds: float = 30.0,
+        max_entries: int = 10_000,
+        touch_interval_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._connection = connection
+        self._ttl = ttl_seconds
+        self._negative_ttl = negative_ttl_seconds
+        self._tokens: TTLCache[TenantIdentity] = TTLCache(max_entries, clock)
+        self._slugs: TTLCache[TenantIdentity] = TTLCache(max_entries, clock)
+        self._touch_interval = touch_interval_seconds
+        self._pending_touches: Dict[str, datetime] = {}
+        self._touch_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _token_key(token: str) -> str:
+        # Cache on a digest so raw API tokens are not retained in process memory.
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def authenticate(self, token: str) -> Optional[TenantIdentity]:
+        cache_key = self._token_key(token)
+        cached = self._tokens.get(cache_key)
+        if cached is _MISSING:
+            cached = self._lookup_token(token)
+            self._tokens.put(cache_key, cached, self._ttl if cached else self._negative_ttl)
+        if cached is not None:
+            self._record_use(cached)  # type: ignore[arg-type]
+        return cached  # type: ignore[return-value]
+
+    def resolve_slug(self, slug: str) -> Optional[TenantIdentity]:
+        cached = self._slugs.get(slug)
+        if cached is _MISSING:
+            cached = self._lookup_slug(slug)
+            self._slugs.put(slug, cached, self._ttl if cached else self._negative_ttl)
+        return cached  # type: ignore[return-value]
+
+    def is_cached(self, *, token: Optional[str] = None, slug: Optional[str] = None) -> bool:
+        """True when ``authenticate``/``resolve_slug`` would answer without touching Postgres."""
+        if token is not None and self._tokens.get(self._token_key(token)) is _MISSING:
+            return False
+        return slug is None or self._slugs.get(slug) is not _MISSING
+
+    def _lookup_token(self, token: str) -> Optional[TenantIdentity]:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT k.id::text, t.id::text, t.tenant_slug "
+                "FROM api_keys k JOIN tenants t ON t.id = k.tenant_id "
+                "WHERE k.api_token = %s",
+                (token,),
+            ).fetchone()
+        if not row:
+            return None
+        return TenantIdentity(tenant_uuid=row[1], tenant_slug=row[2], api_key_id=row[0])
+
+    def _lookup_slug(self, slug: str) -> Optional[TenantIdentity]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT id::text FROM tenants WHERE tenant_slug = %s", (slug,)).fetchone()
+        if not row:
+            return None
+        return TenantIdentity(tenant_uuid=row[0], tenant_slug=slug)
+
+    def _record_use(self, identity: TenantIdentity) -> None:
+        if not identity.api_key_id:
+            return
+        with self._touch_lock:
+            self._pending_touches[identity.api_key_id] = datetime.now(timezone.utc)
+        if self._flusher is None and self._touch_interval > 0:
+            self._start_flusher()
+
+    def _start_flusher(self) -> None:
+        with self._touch_lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name="api-key-touch", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self._touch_interval):
+            try:
+                self.flush_last_used()
+            except Exception:  # pragma: no cover - background best effort
+                logger.exception("Failed to flush api_keys.last_used_at")
+
+    def flush_last_used(self) -> int:
+        with self._touch_lock:
+            pending, self._pending_touches = self._pending_touches, {}
+        if not pending:
+            return 0
+        ids = list(pending)
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE api_keys SET last_used_at = touched.ts "
+                "FROM (SELECT unnest(%s::uuid[]) AS id, unnest(%s::timestamptz[]) AS ts) AS touched "
+                "WHERE api_keys.id = touched.id "
+                "AND (api_keys.last_used_at IS NULL OR api_keys.last_used_at < touched.ts)",
+                (ids, [pending[key_id] for key_id in ids]),
+            )
+        return len(ids)
+
+    def close(self) -> None:
+        self._stop.set()
+        try:
+            self.flush_last_used()
+        except Exception:  # pragma: no cover - shutdown best effort
+            logger.exception("Failed to flush api_keys.last_used_at on shutdown")
+
+
+def parse_bearer(header: Optional[str]) -> Optional[str]:
+    if not header:
+        return None
+    scheme, _, token = header.partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None
+    return token.strip()
+
+
+__all__ = ["TTLCache", "TenantIdentity", "TenantResolver", "parse_bearer"]
@@ -0,0 +1,168 @@
+"""Content-addressed storage for retrieval chunks and large text fields.
+
+Knowledge-base passages repeat across thousands of interactions, and the same
+prompt text shows up in create, output and feedback events. Before an event is
+stored, each text at :data:`EXTRACTED_PATHS` of at least ``min_bytes`` is
+replaced by ``{"$blob": "<sha256 hex>"}``. The body goes to ``event_blobs`` once
+per tenant and digest, and ``refcount`` counts the events that point at it.
+MinIO staging writes the body once, under ``<prefix>/blobs/``. Readers call
+:func:`rehydrate` with the bodies fetched for :func:`blob_refs`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import Counter
+from typing import Any, Callable, ContextManager, Dict, Iterable, List, Mapping, Tuple
+
+BLOB_KEY = "$blob"
+# Cheap pre-check on JSON text: only payloads containing this can hold references.
+BLOB_MARKER = f'"{BLOB_KEY}"'
+
+# "*" walks every element of a list.
+EXTRACTED_PATHS: Tuple[Tuple[str, ...], ...] = (
+    ("context", "retrieval_chunks", "*", "text"),
+    ("input", "text"),
+    ("output", "text"),
+    ("implicit", "edited_text"),
+)
+
+_SELECT_BLOBS = "SELECT digest, body FROM event_blobs WHERE tenant_id = %s AND digest = ANY(%s)"
+
+
+def blob_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def extract_blobs(payload: Dict[str, Any], min_bytes: int) -> Tuple[Dict[str, Any], Dict[str, str], List[str]]:
+    """Return ``(payload, bodies, refs)`` with large texts replaced by references.
+
+    Containers along extracted paths are copied, never mutated, so the caller's
+    payload is left intact. ``refs`` lists one digest per replaced field, repeats
+    included, and ``bodies`` maps each distinct digest to its text. With nothing
+    to extract the original payload is returned.
+    """
+    bodies: Dict[str, str] = {}
+    refs: List[str] = []
+    if min_bytes <= 0:
+        return payload, bodies, refs
+
+    def visit(node: Any, path: Tuple[str, ...]) -> Any:
+        key, rest = path[0], path[1:]
+        if key == "*":
+            if not isinstance(node, list):
+                return node
+            updated = [visit(item, rest) for item in node]
+            return updated if any(new is not old for new, old in zip(updated, node)) else node
+        if not isinstance(node, dict) or key not in node:
+            return node
+        value = node[key]
+        if rest:
+            replaced = visit(value, rest)
+        elif isinstance(value, str) and len(value) >= min_bytes and len(value.encode("utf-8")) >= min_bytes:
+            digest = blob_digest(value)
+            bodies[digest] = value
+            refs.append(digest)
+            replaced = {BLOB_KEY: digest}
+        else:
+            return node
+        return node if replaced is value else {**node, key: replaced}
+
+    for path in EXTRACTED_PATHS:
+        payload = visit(payload, path)
+    return payload, bodies, refs
+
+
+def blob_refs(payload: Any) -> List[str]:
+    """Digests referenced anywhere in ``payload``, in document order."""
+    found: List[str] = []
+
+    def walk(node: Any) -> None:
+        if isinstance(node, dict):
+            digest = node.get(BLOB_KEY)
+            if isinstance(digest, str) and len(node) == 1:
+                found.append(digest)
+                return
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(payload)
+    return found
+
+
+def rehydrate(payload: Any, bodies: Mapping[str, str]) -> Any:
+    """Copy of ``payload`` with each reference replaced by its body; unknown digests stay references."""
+    if isinstance(payload, dict):
+        digest = payload.get(BLOB_KEY)
+        if isinstance(digest, str) and len(payload) == 1:
+            return bodies.get(digest, payload)
+        return {key: rehydrate(value, bodies) for key, value in payload.items()}
+    if isinstance(payload, list):
+        return [rehydrate(value, bodies) for value in payload]
+    return payload
+
+
+def ref_counts(refs: Iterable[str]) -> Dict[str, int]:
+    return dict(Counter(refs))
+
+
+def fetch_blobs(conn: Any, tenant_uuid: str, digests: Iterable[str]) -> Dict[str, str]:
+    """Bodies for ``digests`` from ``event_blobs`` over a psycopg connection."""
+    wanted = sorted(set(digests))
+    if not wanted:
+        return {}
+    return {digest: body for digest, body in conn.execute(_SELECT_BLOBS, (tenant_uuid, wanted)).fetchall()}
+
+
+def fetch_referenced(conn: Any, tenant_uuid: str, payloads: Iterable[Any]) -> Dict[str, str]:
+    """Bodies for every reference in ``payloads``, in one query."""
+    return fetch_blobs(conn, tenant_uuid, (digest for payload in payloads for digest in blob_refs(payload)))
+
+
+class BlobReader:
+    """Rehydrates stored payloads, fetching each batch's bodies in one query.
+
+    ``connection`` is a pooled connection factory (``PersistenceLayer.connection``).
+    """
+
+    def __init__(self, connection: Callable[[], ContextManager]) -> None:
+        self._connection = connection
+
+    def bodies(self, tenant_uuid: str, payloads: Iterable[Any]) -> Dict[str, str]:
+        digests = {digest for payload in payloads for digest in blob_refs(payload)}
+        if not digests:
+            return {}
+        with self._connection() as conn:
+            return fetch_blobs(conn, tenant_uuid, digests)
+
+    def rehydrate(self, tenant_uuid: str, payloads: List[Any]) -> List[Any]:
+        bodies = self.bodies(tenant_uuid, payloads)
+        return [rehydrate(payload, bodies) for payload in payloads] if bodies else payloads
+
+
+def staging_object(prefix: str, digest: str) -> str:
+    """MinIO object name for a blob body staged alongside JSONL events.
+
+    Objects are shared across tenants: the name is the hash of the body, so only a
+    holder of the exact text can address it.
+    """
+    return f"{prefix}/blobs/{digest[:2]}/{digest}"
+
+
+__all__ = [
+    "BLOB_KEY",
+    "BLOB_MARKER",
+    "BlobReader",
+    "EXTRACTED_PATHS",
+    "blob_digest",
+    "blob_refs",
+    "extract_blobs",
+    "fetch_blobs",
+    "fetch_referenced",
+    "ref_counts",
+    "rehydrate",
+    "staging_object",
+]
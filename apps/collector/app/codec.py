@@ -0,0 +1,267 @@
+"""Schema-compiled event decoding for the ingest path.
+
+The event JSON schemas (``EVENT_SCHEMA_DIR``, default ``config/schemas/events``) are
+compiled at import into ``msgspec`` structs, so a request body is parsed and
+validated in C without building pydantic models. The payload kept for storage is
+the decoded dict itself: no ``model_dump`` round trip, and no copies. Fields a
+schema closes with ``additionalProperties: false`` are dropped, the same way
+pydantic ignores them. Absent optional fields are omitted rather than stored as
+``null``, and an explicit ``null`` is never accepted here.
+
+Bodies the compiled structs reject go to the pydantic models in :mod:`.schemas`.
+Those models are more lenient (defaults, coercions), so they decide the final
+verdict and produce FastAPI-style errors. Without ``msgspec`` installed, every
+body takes that path.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import (
+    Annotated,
+    Any,
+    Dict,
+    FrozenSet,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    Type,
+)
+
+from pydantic import BaseModel, ValidationError
+
+from . import schemas
+from .columnar import SCHEMA_DIR, SCHEMA_FILES
+
+try:  # Optional dependency for the compiled fast path
+    import msgspec  # type: ignore
+except ImportError:  # pragma: no cover - exercised only without msgspec
+    msgspec = None  # type: ignore
+
+MODELS: Dict[str, Type[BaseModel]] = {
+    "interaction.create": schemas.InteractionCreate,
+    "interaction.output": schemas.InteractionOutput,
+    "feedback.submit": schemas.FeedbackSubmit,
+    "task.result": schemas.TaskResult,
+}
+
+
+class EventDecodeError(ValueError):
+    """Body failed validation; ``errors`` follows pydantic's ``ValidationError.errors()``."""
+
+    def __init__(self, event_type: str, errors: Sequence[Mapping[str, Any]]) -> None:
+        super().__init__(f"Payload does not match the {event_type} schema")
+        self.event_type = event_type
+        self.errors = errors
+
+
+def _struct_name(path: str) -> str:
+    return "".join(part.capitalize() for part in path.replace(".", "_").split("_") if part) or "Event"
+
+
+def compile_type(schema: Mapping[str, Any], path: str = "event") -> Any:
+    """Translate a JSON Schema node into an equivalent ``msgspec`` type annotation."""
+    if msgspec is None:  # pragma: no cover - guarded by callers
+        raise ImportError("msgspec is required to compile event schemas")
+    kind = schema.get("type")
+    constraints: Dict[str, Any] = {}
+    if "enum" in schema:
+        annotation: Any = Literal[tuple(schema["enum"])]  # type: ignore[misc]
+    elif kind == "string":
+        annotation = datetime if schema.get("format") == "date-time" else str
+        if "minLength" in schema:
+            constraints["min_length"] = schema["minLength"]
+        if "maxLength" in schema:
+            constraints["max_length"] = schema["maxLength"]
+        if "pattern" in schema:
+            constraints["pattern"] = schema["pattern"]
+    elif kind in ("integer", "number"):
+        annotation = int if kind == "integer" else float
+        if "minimum" in schema:
+            constraints["ge"] = schema["minimum"]
+        if "maximum" in schema:
+            constraints["le"] = schema["maximum"]
+    elif kind == "boolean":
+        annotation = bool
+    elif kind == "array":
+        annotation = List[compile_type(schema.get("items", {}), path)]  # type: ignore[misc]
+    elif kind == "object" and schema.get("properties"):
+        required = set(schema.get("required", ()))
+        fields = []
+        for name, node in schema["properties"].items():
+            field_type = compile_type(node, f"{path}_{name}")
+            # Optional fields may be absent but not null: none of the schemas allow null.
+            fields.append((name, field_type) if name in required else (name, field_type, msgspec.UNSET))
+        # Unknown keys are ignored here and pruned from the dict afterwards.
+        annotation = msgspec.defstruct(_struct_name(path), fields, kw_only=True)
+    elif kind == "object":
+        annotation = Dict[str, Any]
+    else:
+        annotation = Any
+    if constraints:
+        annotation = Annotated[annotation, msgspec.Meta(**constraints)]
+    return annotation
+
+
+@dataclass(frozen=True)
+class _Pruner:
+    """Drops keys a closed (``additionalProperties: false``) object does not declare."""
+
+    allowed: Optional[FrozenSet[str]]
+    children: Mapping[str, "_Pruner"]
+    items: Optional["_Pruner"] = None
+
+    @classmethod
+    def compile(cls, schema: Mapping[str, Any]) -> Optional["_Pruner"]:
+        """Return a pruner, or ``None`` when nothing under ``schema`` is closed."""
+        if schema.get("type") == "array":
+            items = cls.compile(schema.get("items", {}))
+            return cls(None, {}, items) if items else None
+        properties = schema.get("properties") or {}
+        children = {name: child for name, node in properties.items() if (child := cls.compile(node))}
+        closed = schema.get("type") == "object" and schema.get("additionalProperties") is False
+        if not closed and not children:
+            return None
+        return cls(frozenset(properties) if closed else None, children)
+
+    def prune(self, value: Any) -> None:
+        if self.items is not None:
+            if isinstance(value, list):
+                for item in value:
+                    self.items.prune(item)
+            return
+        if not isinstance(value, dict):
+            return
+        if self.allowed is not None and not value.keys() <= self.allowed:
+            for key in value.keys() - self.allowed:
+                del value[key]
+        for name, child in self.children.items():
+            if name in value:
+                child.prune(value[name])
+
+
+class EventCodec:
+    """Decodes and validates one event type's request bodies into storage-ready dicts."""
+
+    def __init__(self, event_type: str, schema: Optional[Mapping[str, Any]], model: Type[BaseModel]) -> None:
+        self.event_type = event_type
+        self.schema = schema
+        self.model = model
+        if schema is None:
+            # No schema file (e.g. a container without config/): pydantic only.
+            self.required = frozenset(name for name, field in model.model_fields.items() if field.is_required())
+            self._pruner, self._struct = None, None
+            return
+        self.required = frozenset(schema.get("required", ()))
+        self._pruner = _Pruner.compile(schema)
+        self._struct = compile_type(schema, event_type) if msgspec is not None else None
+
+    def decode(self, body: bytes) -> Dict[str, Any]:
+        """Parse and validate a JSON request body."""
+        if self._struct is not None:
+            try:
+                accepted = self._fast_validate(_JSON_DECODER.decode(body))
+            except msgspec.DecodeError:
+                accepted = None
+            if accepted is not None:
+                return accepted
+        try:
+            return self._dump(self.model.model_validate_json(body))
+        except ValidationError as exc:
+            raise EventDecodeError(self.event_type, exc.errors()) from exc
+
+    def validate(self, payload: Any) -> Dict[str, Any]:
+        """Validate an already-parsed payload; the dict is pruned in place when accepted."""
+        accepted = self._fast_validate(payload) if self._struct is not None else None
+        if accepted is not None:
+            return accepted
+        try:
+            return self._dump(self.model.model_validate(payload))
+        except ValidationError as exc:
+            raise EventDecodeError(self.event_type, exc.errors()) from exc
+
+    def _fast_validate(self, payload: Any) -> Optional[Dict[str, Any]]:
+        try:
+            msgspec.convert(payload, self._struct)
+        except msgspec.ValidationError:
+            return None
+        if self._pruner is not None:
+            self._pruner.prune(payload)
+        return payload
+
+    @staticmethod
+    def _dump(model: BaseModel) -> Dict[str, Any]:
+        return model.model_dump(mode="json", exclude_unset=True)
+
+
+def load_codecs(schema_dir: Path = SCHEMA_DIR) -> Dict[str, EventCodec]:
+    codecs = {}
+    for event_type, filename in SCHEMA_FILES.items():
+        path = schema_dir / filename
+        schema = json.loads(path.read_text(encoding="utf-8")) if path.exists() else None
+        codecs[event_type] = EventCodec(event_type, schema, MODELS[event_type])
+    return codecs
+
+
+class EventDiscriminator:
+    """Picks the event type for an untyped payload without trial validation.
+
+    Each type's marker fields are the required fields no other schema requires
+    (``label`` for task results, ``output`` for outputs, and so on). The payload's
+    keys are matched against those markers. A type with no markers of its own,
+    feedback, is the fallback. An explicit ``event_type`` key or argument wins.
+    """
+
+    def __init__(self, codecs: Mapping[str, EventCodec]) -> None:
+        self._codecs = codecs
+        markers = {}
+        for event_type, codec in codecs.items():
+            others = set().union(*(other.required for name, other in codecs.items() if name != event_type))
+            markers[event_type] = codec.required - others
+        self.markers: Dict[str, FrozenSet[str]] = {name: frozenset(fields) for name, fields in markers.items()}
+        unmarked = [name for name, fields in self.markers.items() if not fields]
+        self.default: Optional[str] = unmarked[0] if len(unmarked) == 1 else None
+
+    def __call__(self, payload: Any, event_type: Optional[str] = None) -> Optional[str]:
+        if event_type is None and isinstance(payload, dict):
+            event_type = payload.get("event_type") if isinstance(payload.get("event_type"), str) else None
+        if event_type is not None:
+            return event_type if event_type in self._codecs else None
+        if not isinstance(payload, dict):
+            return None
+        keys = payload.keys()
+        for name, fields in self.markers.items():
+            if fields and not fields.isdisjoint(keys):
+                return name
+        return self.default
+
+
+_JSON_DECODER = msgspec.json.Decoder() if msgspec is not None else None
+_JSON_ENCODER = msgspec.json.Encoder() if msgspec is not None else None
+
+
+def encode_json(value: Any) -> bytes:
+    """Compact JSON bytes, through msgspec when available."""
+    if _JSON_ENCODER is not None:
+        return _JSON_ENCODER.encode(value)
+    return json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+
+
+CODECS = load_codecs()
+discriminate = EventDiscriminator(CODECS)
+
+__all__ = [
+    "CODECS",
+    "EventCodec",
+    "EventDecodeError",
+    "EventDiscriminator",
+    "compile_type",
+    "discriminate",
+    "encode_json",
+    "load_codecs",
+]
@@ -0,0 +1,204 @@
+"""Typed Arrow schemas for compacted events, derived from the shared JSON event schemas."""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pyarrow as pa
+
+SCHEMA_DIR = Path(
+    os.environ.get("EVENT_SCHEMA_DIR")
+    or Path(__file__).resolve().parents[3] / "config" / "schemas" / "events"
+)
+
+SCHEMA_FILES = {
+    "interaction.create": "interaction_create.json",
+    "interaction.output": "interaction_output.json",
+    "feedback.submit": "feedback_submit.json",
+    "task.result": "task_result.json",
+}
+
+PARTITION_COLUMNS = ("event_type", "tenant_id")
+DICTIONARY_COLUMNS = frozenset({"tenant_id", "policy_id", "skill"})
+
+_DICT_STRING = pa.dictionary(pa.int32(), pa.string())
+_TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+# Columns every event type carries, independent of its JSON schema.
+COMMON_FIELDS = (
+    pa.field("event_type", _DICT_STRING),
+    pa.field("tenant_id", _DICT_STRING),
+    pa.field("policy_id", _DICT_STRING),
+    pa.field("idempotency_key", pa.string()),
+    pa.field("ingested_at", _TIMESTAMP),
+    pa.field("occurred_at", _TIMESTAMP),
+)
+RAW_PAYLOAD_FIELD = pa.field("raw_payload", pa.string())
+
+# JSON paths already represented by a common column.
+_COVERED_PATHS = {("tenant_id",), ("idempotency_key",), ("version", "policy_id")}
+# Paths the schemas accept as extra properties but readers filter or weight by, so
+# they get a typed column instead of a match against ``raw_payload``. The SDK records
+# ``1 / rate`` for each sampled implicit signal under ``labels.sample_weights``.
+_SAMPLED_SIGNALS = ("edited_text", "sent", "time_to_send_ms", "escalated", "follow_up_count")
+_EXTRA_COLUMNS: Dict[str, Tuple[Tuple[Tuple[str, ...], pa.Field], ...]] = {
+    "interaction.output": ((("version", "status"), pa.field("version_status", _DICT_STRING)),),
+    "feedback.submit": tuple(
+        (("labels", "sample_weights", name), pa.field(f"labels_sample_weights_{name}", pa.float64()))
+        for name in _SAMPLED_SIGNALS
+    ),
+}
+
+
+def _column_name(path: Tuple[str, ...]) -> str:
+    return "_".join(path)
+
+
+def _arrow_type(name: str, spec: Dict[str, Any]) -> Optional[pa.DataType]:
+    json_type = spec.get("type")
+    if json_type == "string":
+        if spec.get("format") == "date-time":
+            return _TIMESTAMP
+        return _DICT_STRING if name in DICTIONARY_COLUMNS else pa.string()
+    if json_type == "integer":
+        bounds = spec.get("enum") or [spec.get("minimum"), spec.get("maximum")]
+        if all(isinstance(b, int) for b in bounds) and min(bounds) >= -128 and max(bounds) <= 127:
+            return pa.int8()
+        return pa.int64()
+    if json_type == "number":
+        return pa.float64()
+    if json_type == "boolean":
+        return pa.bool_()
+    return None
+
+
+def _flatten(properties: Dict[str, Any], prefix: Tuple[str, ...] = ()) -> List[Tuple[Tuple[str, ...], pa.Field]]:
+    """Flatten declared scalar properties into ``(json_path, field)`` pairs.
+
+    Objects with declared properties are recursed into; arrays and free-form objects
+    (``labels``, ``metadata``, ``retrieval_chunks``) only live in ``raw_payload``.
+    """
+    columns: List[Tuple[Tuple[str, ...], pa.Field]] = []
+    for key, spec in properties.items():
+        path = prefix + (key,)
+        if path in _COVERED_PATHS:
+            continue
+        if spec.get("type") == "object":
+            if spec.get("properties"):
+                columns.extend(_flatten(spec["properties"], path))
+            continue
+        name = _column_name(path)
+        arrow_type = _arrow_type(name, spec)
+        if arrow_type is not None:
+            columns.append((path, pa.field(name, arrow_type)))
+    return columns
+
+
+@lru_cache(maxsize=None)
+def _typed_columns(event_type: str) -> Tuple[Tuple[Tuple[str, ...], pa.Field], ...]:
+    filename = SCHEMA_FILES.get(event_type)
+    if not filename:
+        return ()
+    with (SCHEMA_DIR / filename).open("r", encoding="utf-8") as fh:
+        schema = json.load(fh)
+    return (*_flatten(schema.get("properties", {})), *_EXTRA_COLUMNS.get(event_type, ()))
+
+
+def arrow_schema(event_type: str, *, include_partitions: bool = False) -> pa.Schema:
+    """Arrow schema for compacted ``event_type`` files.
+
+    Partition columns are encoded in the object path, so they are omitted unless
+    ``include_partitions`` is set (e.g. when handing the schema to ``pyarrow.dataset``).
+    """
+    fields = [
+        f for f in COMMON_FIELDS if include_partitions or f.name not in PARTITION_COLUMNS
+    ]
+    fields.extend(field for _, field in _typed_columns(event_type))
+    fields.append(RAW_PAYLOAD_FIELD)
+    return pa.schema(fields)
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _lookup(payload: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    value: Any = payload
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _coerce(value: Any, arrow_type: pa.DataType) -> Any:
+    if value is None:
+        return None
+    if pa.types.is_timestamp(arrow_type):
+        return _parse_timestamp(value)
+    if pa.types.is_boolean(arrow_type):
+        return value if isinstance(value, bool) else None
+    if pa.types.is_integer(arrow_type):
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+    if pa.types.is_floating(arrow_type):
+        return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+    return value if isinstance(value, str) else json.dumps(value, separators=(",", ":"))
+
+
+def records_to_table(event_type: str, records: Iterable[dict]) -> pa.Table:
+    """Convert staged ``{"event_type", "ingested_at", "payload"}`` records into a typed table."""
+    schema = arrow_schema(event_type)
+    typed = _typed_columns(event_type)
+    columns: Dict[str, List[Any]] = {name: [] for name in schema.names}
+    for record in records:
+        payload = record.get("payload") or {}
+        ingested_at = _parse_timestamp(record.get("ingested_at"))
+        common = {
+            "policy_id": _lookup(payload, ("version", "policy_id")),
+            "idempotency_key": payload.get("idempotency_key"),
+            "ingested_at": ingested_at,
+            "occurred_at": _parse_timestamp(payload.get("created_at")) or ingested_at,
+        }
+        for name, value in common.items():
+            columns[name].append(value)
+        for path, field in typed:
+            columns[field.name].append(_coerce(_lookup(payload, path), field.type))
+        columns["raw_payload"].append(json.dumps(payload, separators=(",", ":"), default=str))
+    arrays = [pa.array(columns[field.name], type=field.type) for field in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def partition_records(records: Iterable[dict]) -> Dict[Tuple[str, str], List[dict]]:
+    """Group staged records by ``(event_type, tenant_id)`` partition."""
+    groups: Dict[Tuple[str, str], List[dict]] = {}
+    for record in records:
+        payload = record.get("payload") or {}
+        key = (record.get("event_type") or "unknown", payload.get("tenant_id") or "unknown")
+        groups.setdefault(key, []).append(record)
+    return groups
+
+
+__all__ = [
+    "COMMON_FIELDS",
+    "DICTIONARY_COLUMNS",
+    "PARTITION_COLUMNS",
+    "arrow_schema",
+    "partition_records",
+    "records_to_table",
+]
@@ -3,15 +3,24 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import logging
-from datetime import datetime
-from io import BytesIO
-from typing import Iterable, List
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from io import SEEK_CUR, SEEK_END, SEEK_SET, BytesIO, RawIOBase
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+from uuid import uuid4
 
 import pyarrow as pa
 import pyarrow.parquet as pq
 
+from .blobs import blob_refs, rehydrate, staging_object
+from .columnar import partition_records, records_to_table
 from .storage import PersistenceSettings
 
 try:  # pragma: no cover - optional dependency
@@ -23,6 +32,56 @@ except ImportError as exc:  # pragma: no cover - handled by CLI
 logger = logging.getLogger("collector.compaction")
 logging.basicConfig(level=logging.INFO)
 
+STAGED_EVENT_TYPES = (
+    "interaction.create",
+    "interaction.output",
+    "feedback.submit",
+    "task.result",
+)
+DEFAULT_FETCH_WORKERS = 16
+DEFAULT_BLOB_CACHE = 4096
+MANIFEST_NAME = "_manifest.json"
+MANIFEST_SAVE_ATTEMPTS = 5
+
+
+class ManifestConflict(RuntimeError):
+    """Another run saved the partition manifest after it was loaded."""
+
+
+@dataclass
+class CompactionManifest:
+    """Tracks which staging objects were already folded into a date partition."""
+
+    target_date: str
+    processed: set[str] = field(default_factory=set)
+    files: List[str] = field(default_factory=list)
+    stats: Dict[str, dict] = field(default_factory=dict)
+    generation: int = 0
+    updated_at: Optional[str] = None
+    # ETag of the stored object this manifest was loaded from; None when it did not exist.
+    etag: Optional[str] = None
+
+    @classmethod
+    def from_json(cls, target_date: str, data: dict) -> "CompactionManifest":
+        return cls(
+            target_date=target_date,
+            processed=set(data.get("processed", [])),
+            files=list(data.get("files", [])),
+            stats=dict(data.get("stats", {})),
+            generation=int(data.get("generation", 0)),
+            updated_at=data.get("updated_at"),
+        )
+
+    def to_json(self) -> dict:
+        return {
+            "date": self.target_date,
+            "processed": sorted(self.processed),
+            "files": list(self.files),
+            "stats": self.stats,
+            "generation": self.generation,
+            "updated_at": self.updated_at,
+        }
+
 
 def _build_client(settings: PersistenceSettings) -> Minio:
     if not settings.minio_endpoint or not settings.minio_bucket:
@@ -37,50 +96,332 @@ def _build_client(settings: PersistenceSettings) -> Minio:
     return client
 
 
-def _iter_staged_events(client: Minio, settings: PersistenceSettings, target_date: str) -> Iterable[dict]:
-    prefix = f"{settings.minio_prefix}/staging/"
-    for obj in client.list_objects(settings.minio_bucket, prefix=prefix, recursive=True):
-        if f"dt={target_date}" not in obj.object_name:
-            continue
-        response = client.get_object(settings.minio_bucket, obj.object_name)
+def _partition_prefix(settings: PersistenceSettings, target_date: str) -> str:
+    return f"{settings.minio_prefix}/parquet/dt={target_date}/"
+
+
+def _manifest_object(settings: PersistenceSettings, target_date: str) -> str:
+    return _partition_prefix(settings, target_date) + MANIFEST_NAME
+
+
+def load_manifest(client: Minio, settings: PersistenceSettings, target_date: str) -> CompactionManifest:
+    try:
+        response = client.get_object(settings.minio_bucket, _manifest_object(settings, target_date))
+    except S3Error as exc:
+        if exc.code in {"NoSuchKey", "NoSuchObject"}:
+            return CompactionManifest(target_date=target_date)
+        raise
+    try:
+        data = json.loads(response.read())
+        etag = _strip_etag(response.headers.get("ETag"))
+    finally:
+        response.close()
+        response.release_conn()
+    manifest = CompactionManifest.from_json(target_date, data)
+    manifest.etag = etag
+    return manifest
+
+
+def _strip_etag(etag: Optional[str]) -> Optional[str]:
+    return etag.strip('"') if etag else None
+
+
+def _stored_etag(client: Minio, settings: PersistenceSettings, target_date: str) -> Optional[str]:
+    try:
+        return _strip_etag(client.stat_object(settings.minio_bucket, _manifest_object(settings, target_date)).etag)
+    except S3Error as exc:
+        if exc.code in {"NoSuchKey", "NoSuchObject"}:
+            return None
+        raise
+
+
+def save_manifest(client: Minio, settings: PersistenceSettings, manifest: CompactionManifest) -> None:
+    """Write ``manifest`` unless another run saved the partition since it was loaded.
+
+    Raises ``ManifestConflict`` when the stored ETag no longer matches ``manifest.etag``.
+    The pinned MinIO client cannot send PutObject preconditions, so the ETag is compared
+    just before the PUT; that leaves a one-request window instead of a whole run.
+    """
+    # A single-object PUT is atomic, so readers see either the old or the new manifest.
+    stored = _stored_etag(client, settings, manifest.target_date)
+    if stored != manifest.etag:
+        raise ManifestConflict(f"Manifest for dt={manifest.target_date} changed since it was loaded")
+    manifest.updated_at = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    body = json.dumps(manifest.to_json(), separators=(",", ":")).encode("utf-8")
+    result = client.put_object(
+        bucket_name=settings.minio_bucket,
+        object_name=_manifest_object(settings, manifest.target_date),
+        data=BytesIO(body),
+        length=len(body),
+        content_type="application/json",
+    )
+    manifest.etag = _strip_etag(result.etag)
+
+
+def update_manifest(
+    client: Minio,
+    settings: PersistenceSettings,
+    target_date: str,
+    apply: Callable[[CompactionManifest], None],
+    attempts: int = MANIFEST_SAVE_ATTEMPTS,
+) -> CompactionManifest:
+    """Apply ``apply`` to the latest manifest and save it, retrying on conflicts.
+
+    Each attempt reloads the manifest, so entries written by an overlapping compact or
+    optimize run are kept. ``apply`` raises ``ManifestConflict`` itself when the other
+    run's changes make the update invalid; that error is not retried.
+    """
+    for attempt in range(attempts):
+        manifest = load_manifest(client, settings, target_date)
+        apply(manifest)
         try:
-            for line in response.stream(32 * 1024):
-                if not line:
+            save_manifest(client, settings, manifest)
+            return manifest
+        except ManifestConflict:
+            logger.info("Manifest for dt=%s changed concurrently; retrying (attempt %s)", target_date, attempt + 1)
+            time.sleep(0.05 * (attempt + 1))
+    raise ManifestConflict(f"Manifest for dt={target_date} kept changing after {attempts} attempts")
+
+
+def _staging_prefixes(settings: PersistenceSettings, target_date: str) -> List[str]:
+    return [
+        f"{settings.minio_prefix}/staging/{event_type}/dt={target_date}/"
+        for event_type in STAGED_EVENT_TYPES
+    ]
+
+
+def _list_staged_objects(client: Minio, settings: PersistenceSettings, target_date: str) -> List[str]:
+    names: List[str] = []
+    for prefix in _staging_prefixes(settings, target_date):
+        for obj in client.list_objects(settings.minio_bucket, prefix=prefix, recursive=True):
+            names.append(obj.object_name)
+    return names
+
+
+def _fetch_object(client: Minio, settings: PersistenceSettings, object_name: str) -> List[dict]:
+    response = client.get_object(settings.minio_bucket, object_name)
+    try:
+        body = response.read()
+    finally:
+        response.close()
+        response.release_conn()
+    return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+
+def _iter_staged_events(
+    client: Minio,
+    settings: PersistenceSettings,
+    object_names: Sequence[str],
+    max_workers: int = DEFAULT_FETCH_WORKERS,
+) -> Iterator[dict]:
+    if not object_names:
+        return
+    workers = max(1, min(max_workers, len(object_names)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="compaction-fetch") as pool:
+        for events in pool.map(lambda name: _fetch_object(client, settings, name), object_names):
+            yield from events
+
+
+def _dedupe_digest(tenant_id: str, event_type: str, idempotency_key: str) -> int:
+    raw = f"{tenant_id}\x1f{event_type}\x1f{idempotency_key}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "little")
+
+
+def _record_digest(record: dict) -> Optional[int]:
+    payload = record.get("payload") or {}
+    key = payload.get("idempotency_key")
+    if not key:
+        return None
+    # Same fallbacks as ``partition_records``, so digests match the keys read back from a partition path.
+    return _dedupe_digest(payload.get("tenant_id") or "unknown", record.get("event_type") or "unknown", key)
+
+
+class DedupeFilter:
+    """Drops records whose ``(tenant_id, event_type, idempotency_key)`` was already kept.
+
+    Only 64-bit digests of the current run's records are retained, and those records
+    are held in memory for the Parquet write anyway. Rows compacted by earlier runs are
+    streamed past these digests (see ``drop``) rather than loaded. Records without an
+    idempotency key are always kept.
+    """
+
+    def __init__(self) -> None:
+        self._seen: set[int] = set()
+        self.dropped = 0
+
+    def filter(self, records: Iterable[dict]) -> Iterator[dict]:
+        for record in records:
+            digest = _record_digest(record)
+            if digest is not None:
+                if digest in self._seen:
+                    self.dropped += 1
                     continue
-                event = json.loads(line)
-                yield event
+                self._seen.add(digest)
+            yield record
+
+    def drop(self, records: List[dict], compacted: set[int]) -> List[dict]:
+        """Remove ``records`` whose digest is in ``compacted``."""
+        if not compacted:
+            return records
+        kept = [record for record in records if _record_digest(record) not in compacted]
+        self.dropped += len(records) - len(kept)
+        return kept
+
+
+class StagedBlobs:
+    """Restores blob references in staged records from ``<prefix>/blobs/`` objects.
+
+    Parquet rows carry the full text, so typed columns and ``raw_payload`` match what
+    the client sent. The most recently used ``max_cached`` bodies are kept, since the
+    same retrieval chunks recur across a day's events.
+    """
+
+    def __init__(self, client: Minio, settings: PersistenceSettings, max_cached: int = DEFAULT_BLOB_CACHE) -> None:
+        self._client = client
+        self._settings = settings
+        self._max_cached = max_cached
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self.missing = 0
+
+    def _body(self, digest: str) -> Optional[str]:
+        body = self._cache.get(digest)
+        if body is not None:
+            self._cache.move_to_end(digest)
+            return body
+        try:
+            response = self._client.get_object(
+                self._settings.minio_bucket, staging_object(self._settings.minio_prefix, digest)
+            )
+        except S3Error as exc:
+            logger.warning("Blob %s is not staged (%s); its reference is kept", digest, exc)
+            self.missing += 1
+            return None
+        try:
+            body = response.read().decode("utf-8")
         finally:
             response.close()
             response.release_conn()
+        self._cache[digest] = body
+        if len(self._cache) > self._max_cached:
+            self._cache.popitem(last=False)
+        return body
 
+    def rehydrate(self, records: Iterable[dict]) -> Iterator[dict]:
+        for record in records:
+            refs = blob_refs(record.get("payload"))
+            if refs:
+                bodies = {}
+                for digest in set(refs):
+                    body = self._body(digest)
+                    if body is not None:
+                        bodies[digest] = body
+                record = {**record, "payload": rehydrate(record["payload"], bodies)}
+            yield record
 
-def _events_to_table(events: Iterable[dict]) -> pa.Table:
-    rows: List[dict] = []
-    for record in events:
-        payload = record.get("payload", {})
-        rows.append(
-            {
-                "event_type": record.get("event_type"),
-                "ingested_at": record.get("ingested_at"),
-                "tenant_id": payload.get("tenant_id"),
-                "skill": payload.get("skill"),
-                "policy_id": payload.get("version", {}).get("policy_id"),
-                "raw_payload": json.dumps(payload, separators=(",", ":")),
-            }
-        )
-    if not rows:
-        return pa.table({})
-    return pa.Table.from_pylist(rows)
+
+class _RangeReader(RawIOBase):
+    """Seekable file over a MinIO object that fetches only the byte ranges read.
+
+    Lets pyarrow read the Parquet footer and a single column chunk without
+    downloading whole files.
+    """
+
+    def __init__(self, client: Minio, bucket: Optional[str], object_name: str) -> None:
+        self._client = client
+        self._bucket = bucket
+        self._object_name = object_name
+        self._size: int = client.stat_object(bucket, object_name).size or 0
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = SEEK_SET) -> int:
+        base = {SEEK_SET: 0, SEEK_CUR: self._pos, SEEK_END: self._size}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self._size - self._pos
+        length = remaining if size is None or size < 0 else min(size, remaining)
+        if length <= 0:
+            return b""
+        response = self._client.get_object(self._bucket, self._object_name, offset=self._pos, length=length)
+        try:
+            data = response.read()
+        finally:
+            response.close()
+            response.release_conn()
+        self._pos += len(data)
+        return data
 
 
-def _upload_parquet(client: Minio, settings: PersistenceSettings, table: pa.Table, target_date: str) -> str:
+def _existing_keys(client: Minio, settings: PersistenceSettings, object_name: str) -> Iterator[Tuple[str, str, str]]:
+    """Yield dedupe keys already written to ``object_name`` by streaming one column."""
+    segments = dict(
+        part.split("=", 1) for part in object_name.split("/") if part.startswith(("event_type=", "tenant_id="))
+    )
+    event_type = unquote(segments.get("event_type", ""))
+    tenant_id = unquote(segments.get("tenant_id", ""))
+    source = pa.PythonFile(_RangeReader(client, settings.minio_bucket, object_name), mode="r")
+    for batch in pq.ParquetFile(source).iter_batches(columns=["idempotency_key"]):
+        for key in batch.column(0).to_pylist():
+            if key:
+                yield tenant_id, event_type, key
+
+
+def _compacted_digests(
+    client: Minio,
+    settings: PersistenceSettings,
+    object_names: Sequence[str],
+    wanted: set[int],
+    max_workers: int = DEFAULT_FETCH_WORKERS,
+) -> set[int]:
+    """Return the digests in ``wanted`` that already occur in the Parquet files ``object_names``."""
+
+    def scan(object_name: str) -> set[int]:
+        digests = (_dedupe_digest(*key) for key in _existing_keys(client, settings, object_name))
+        return {digest for digest in digests if digest in wanted}
+
+    found: set[int] = set()
+    if not object_names or not wanted:
+        return found
+    workers = max(1, min(max_workers, len(object_names)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="compaction-keys") as pool:
+        for hits in pool.map(scan, object_names):
+            found |= hits
+    return found
+
+
+def _partition_path(settings: PersistenceSettings, target_date: str, event_type: str, tenant_id: str) -> str:
+    return (
+        f"{_partition_prefix(settings, target_date)}"
+        f"event_type={quote(event_type, safe='')}/tenant_id={quote(tenant_id, safe='')}/"
+    )
+
+
+def _upload_parquet(
+    client: Minio,
+    settings: PersistenceSettings,
+    table: pa.Table,
+    target_date: str,
+    event_type: str,
+    tenant_id: str,
+) -> str:
     if table.num_rows == 0:
         raise ValueError("No events to compact")
     buffer = BytesIO()
     pq.write_table(table, buffer, compression="snappy")
+    # The random suffix keeps hourly incremental runs from overwriting each other.
     object_name = (
-        f"{settings.minio_prefix}/parquet/dt={target_date}/"
-        f"events-{datetime.utcnow().strftime('%H%M%S')}.parquet"
+        f"{_partition_path(settings, target_date, event_type, tenant_id)}"
+        f"events-{datetime.utcnow().strftime('%H%M%S')}-{uuid4().hex[:8]}.parquet"
     )
     buffer.seek(0)
     client.put_object(
@@ -93,23 +434,121 @@ def _upload_parquet(client: Minio, settings: PersistenceSettings, table: pa.Tabl
     return object_name
 
 
-def compact(target_date: str) -> str:
-    settings = PersistenceSettings.from_env()
-    client = _build_client(settings)
-    events = list(_iter_staged_events(client, settings, target_date))
-    table = _events_to_table(events)
-    object_name = _upload_parquet(client, settings, table, target_date)
-    logger.info("Compacted %s rows into %s", table.num_rows, object_name)
-    return object_name
+def compact(
+    target_date: str,
+    *,
+    settings: Optional[PersistenceSettings] = None,
+    client: Optional[Minio] = None,
+    max_workers: int = DEFAULT_FETCH_WORKERS,
+    full: bool = False,
+) -> List[str]:
+    """Compact staging objects for ``target_date`` that the manifest has not seen yet.
+
+    Output is partitioned as ``dt=<date>/event_type=<type>/tenant_id=<tenant>/`` with one
+    typed Parquet file per partition. Returns the uploaded object names (empty when there
+    was nothing new). ``full=True`` ignores the manifest and reprocesses every staged object.
+    """
+    settings = settings or PersistenceSettings.from_env()
+    client = client or _build_client(settings)
+    loaded = load_manifest(client, settings, target_date)
+    superseded: List[str] = list(loaded.files) if full else []
+    processed: set[str] = set() if full else loaded.processed
+
+    staged = _list_staged_objects(client, settings, target_date)
+    pending = [name for name in staged if name not in processed]
+    if not pending:
+        logger.info("No new staging objects for dt=%s (%s already compacted)", target_date, len(staged))
+        return []
+
+    dedupe = DedupeFilter()
+    staged_events = _iter_staged_events(client, settings, pending, max_workers=max_workers)
+    partitions = partition_records(dedupe.filter(staged_events))
+    if not full:
+        # The dedupe key includes the partition columns, so only files of the partitions
+        # this run touches can hold a duplicate; the rest of the day is never read.
+        for (event_type, tenant_id), records in partitions.items():
+            prefix = _partition_path(settings, target_date, event_type, tenant_id)
+            existing = [name for name in loaded.files if name.startswith(prefix)]
+            keyed = {digest for digest in map(_record_digest, records) if digest is not None}
+            compacted = _compacted_digests(client, settings, existing, keyed, max_workers=max_workers)
+            partitions[(event_type, tenant_id)] = dedupe.drop(records, compacted)
+    blobs = StagedBlobs(client, settings)
+    tables = {
+        (event_type, tenant_id): records_to_table(event_type, blobs.rehydrate(records))
+        for (event_type, tenant_id), records in partitions.items()
+        if records
+    }
+    object_names = [
+        _upload_parquet(client, settings, table, target_date, event_type, tenant_id)
+        for (event_type, tenant_id), table in tables.items()
+    ]
+
+    def record(manifest: CompactionManifest) -> None:
+        if full:
+            # A rebuild replaces everything it read, so any concurrent change would be lost.
+            if manifest.etag != loaded.etag:
+                raise ManifestConflict(f"Manifest for dt={target_date} changed during a full recompaction")
+            manifest.processed = set(pending)
+            manifest.files = list(object_names)
+            manifest.stats = {}
+            return
+        if manifest.processed.intersection(pending):
+            raise ManifestConflict(f"Another run compacted the same staging objects for dt={target_date}")
+        manifest.processed.update(pending)
+        manifest.files.extend(object_names)
+
+    try:
+        manifest = update_manifest(client, settings, target_date, record)
+    except ManifestConflict:
+        for object_name in object_names:
+            client.remove_object(settings.minio_bucket, object_name)
+        raise
+    for object_name in superseded:
+        if object_name not in manifest.files:
+            client.remove_object(settings.minio_bucket, object_name)
+    logger.info(
+        "Compacted %s rows from %s objects into %s partition files for dt=%s (%s duplicates dropped)",
+        sum(table.num_rows for table in tables.values()),
+        len(pending),
+        len(object_names),
+        target_date,
+        dedupe.dropped,
+    )
+    return object_names
+
+
+def _date_range(start: str, end: str) -> List[str]:
+    first = date.fromisoformat(start)
+    last = date.fromisoformat(end)
+    if last < first:
+        raise ValueError(f"End date {end} is before start date {start}")
+    return [(first + timedelta(days=offset)).isoformat() for offset in range((last - first).days + 1)]
+
+
+def compact_range(start: str, end: str, **kwargs) -> List[str]:
+    """Backfill every date in ``[start, end]`` (inclusive), reusing one client."""
+    settings = kwargs.pop("settings", None) or PersistenceSettings.from_env()
+    client = kwargs.pop("client", None) or _build_client(settings)
+    outputs: List[str] = []
+    for target_date in _date_range(start, end):
+        outputs.extend(compact(target_date, settings=settings, client=client, **kwargs))
+    return outputs
 
 
 def main() -> None:  # pragma: no cover - CLI wiring
     parser = argparse.ArgumentParser(description="Compact staged collector events into Parquet")
     parser.add_argument("--date", dest="date", help="ISO date (YYYY-MM-DD)", default=datetime.utcnow().strftime("%Y-%m-%d"))
+    parser.add_argument("--start", dest="start", help="First ISO date of a backfill range (inclusive)")
+    parser.add_argument("--end", dest="end", help="Last ISO date of a backfill range (inclusive); defaults to --date")
+    parser.add_argument("--workers", type=int, default=DEFAULT_FETCH_WORKERS, help="Concurrent staging fetches")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and reprocess all staged objects")
     args = parser.parse_args()
     try:
-        compact(args.date)
-    except (ValueError, S3Error) as exc:
+        if args.start:
+            compact_range(args.start, args.end or args.date, max_workers=args.workers, full=args.full)
+        else:
+            compact(args.date, max_workers=args.workers, full=args.full)
+    except (ValueError, S3Error, ManifestConflict) as exc:
         logger.error("Compaction failed: %s", exc)
         raise SystemExit(1) from exc
 
@@ -0,0 +1,143 @@
+"""Bulk event export streamed from a server-side cursor as NDJSON or Arrow IPC."""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from io import BytesIO
+from typing import Callable, ContextManager, Iterator, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+import pyarrow as pa
+
+from .blobs import BLOB_MARKER, fetch_referenced, rehydrate
+
+DEFAULT_BATCH_ROWS = 5000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# ``payload`` stays JSON text end to end: Postgres renders it once and neither format
+# parses it again on the way out. Only rows holding blob references are re-encoded.
+ARROW_SCHEMA = pa.schema(
+    [
+        pa.field("id", pa.int64(), nullable=False),
+        pa.field("event_type", pa.string()),
+        pa.field("policy_id", pa.string()),
+        pa.field("skill", pa.string()),
+        pa.field("occurred_at", pa.timestamp("us", tz="UTC"), nullable=False),
+        pa.field("payload", pa.string()),
+    ]
+)
+
+Row = Tuple[int, str, Optional[str], Optional[str], datetime, str]
+
+
+@dataclass(frozen=True)
+class ExportRequest:
+    tenant_uuid: str
+    start: datetime
+    end: datetime
+    event_type: Optional[str] = None
+    # Resume strictly after this ``(occurred_at, id)``; rows are ordered by the same pair.
+    after: Optional[Tuple[datetime, int]] = None
+
+
+def iter_row_batches(
+    connection: Callable[[], ContextManager],
+    request: ExportRequest,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+) -> Iterator[List[Row]]:
+    """Yield ``batch_rows``-sized lists from a named cursor; at most one batch is held."""
+    clauses = ["tenant_id = %s", "occurred_at >= %s", "occurred_at < %s"]
+    params: List[object] = [request.tenant_uuid, request.start, request.end]
+    if request.event_type:
+        clauses.append("event_type = %s")
+        params.append(request.event_type)
+    if request.after:
+        clauses.append("(occurred_at, id) > (%s, %s)")
+        params.extend(request.after)
+    statement = (
+        "SELECT id, event_type, policy_id, skill, occurred_at, payload::text FROM events WHERE "
+        + " AND ".join(clauses)
+        + " ORDER BY occurred_at, id"
+    )
+    with connection() as conn:
+        # Named cursors only live inside a transaction; pooled connections are autocommit.
+        with conn.transaction():
+            with conn.cursor(name=f"events_export_{uuid4().hex}") as cur:
+                cur.itersize = batch_rows
+                cur.execute(statement, params)
+                while True:
+                    rows = cur.fetchmany(batch_rows)
+                    if not rows:
+                        return
+                    if any(BLOB_MARKER in row[5] for row in rows):
+                        rows = _rehydrate_rows(conn, request.tenant_uuid, rows)
+                    yield rows
+
+
+def _rehydrate_rows(conn, tenant_uuid: str, rows: Sequence[Row]) -> List[Row]:
+    """Restore extracted texts (see blobs.py); rows without references keep Postgres' text."""
+    parsed = {index: json.loads(row[5]) for index, row in enumerate(rows) if BLOB_MARKER in row[5]}
+    bodies = fetch_referenced(conn, tenant_uuid, parsed.values())
+    restored = list(rows)
+    for index, payload in parsed.items():
+        text = json.dumps(rehydrate(payload, bodies), separators=(",", ":"), ensure_ascii=False)
+        restored[index] = (*rows[index][:5], text)
+    return restored
+
+
+def ndjson_chunks(batches: Iterator[Sequence[Row]]) -> Iterator[bytes]:
+    """One response chunk per batch; each line is a self-contained event."""
+    for rows in batches:
+        lines = []
+        for event_id, event_type, policy_id, skill, occurred_at, payload in rows:
+            head = json.dumps(
+                {
+                    "id": event_id,
+                    "event_type": event_type,
+                    "policy_id": policy_id,
+                    "skill": skill,
+                    "occurred_at": occurred_at.isoformat(),
+                },
+                separators=(",", ":"),
+            )
+            lines.append(f'{head[:-1]},"payload":{payload}}}\n')
+        yield "".join(lines).encode("utf-8")
+
+
+def _record_batch(rows: Sequence[Row]) -> pa.RecordBatch:
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, ARROW_SCHEMA)],
+        schema=ARROW_SCHEMA,
+    )
+
+
+def arrow_chunks(batches: Iterator[Sequence[Row]]) -> Iterator[bytes]:
+    """Arrow IPC stream: the schema message first, then one record batch per chunk."""
+    sink = BytesIO()
+    with pa.ipc.new_stream(sink, ARROW_SCHEMA) as writer:
+        for rows in batches:
+            writer.write_batch(_record_batch(rows))
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def _drain(sink: BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+__all__ = [
+    "ARROW_MEDIA_TYPE",
+    "ARROW_SCHEMA",
+    "ExportRequest",
+    "NDJSON_MEDIA_TYPE",
+    "arrow_chunks",
+    "iter_row_batches",
+    "ndjson_chunks",
+]
@@ -0,0 +1,211 @@
+"""Per-tenant ingest quotas and weighted fair scheduling of database writes.
+
+``TenantQuotas`` admits events through a token bucket per tenant, so a backfill
+or a runaway client is answered with ``429`` before it costs a decode-to-insert
+round trip. ``FairScheduler`` sits between the ingest handlers and the Postgres
+pool. When every write slot is busy, waiting requests are granted in
+self-clocked weighted fair queueing order, not arrival order. A tenant with
+weight ``w`` gets ``w`` times the write share of a weight-1 tenant while both
+have requests queued, and a tenant's burst waits behind its own earlier
+requests rather than everyone else's.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+
+class QuotaExceeded(Exception):
+    """The tenant is over its rate quota or its fair-queue share."""
+
+    def __init__(self, retry_after: float, reason: str) -> None:
+        super().__init__(f"Tenant ingest {reason} limit exceeded")
+        self.retry_after = retry_after
+        self.reason = reason
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+@dataclass(frozen=True)
+class Quota:
+    rate: float
+    burst: float
+
+
+class TenantQuotas:
+    """Token bucket per tenant: ``rate`` events/s sustained, ``burst`` events at once.
+
+    ``default`` applies to tenants without an override; ``None`` (or a rate of 0)
+    leaves them unlimited. Only ``max_tenants`` buckets are kept. The least
+    recently used one is dropped when a new tenant arrives, which at worst hands
+    that tenant a fresh, full bucket.
+    """
+
+    def __init__(
+        self,
+        default: Optional[Quota] = None,
+        overrides: Optional[Mapping[str, Quota]] = None,
+        *,
+        max_tenants: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._default = default if default is not None and default.rate > 0 else None
+        self._overrides = dict(overrides or {})
+        self._max_tenants = max_tenants
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self._default is not None or any(quota.rate > 0 for quota in self._overrides.values())
+
+    def quota(self, tenant: str) -> Optional[Quota]:
+        quota = self._overrides.get(tenant, self._default)
+        return quota if quota is not None and quota.rate > 0 else None
+
+    def check(self, tenant: str, cost: float = 1.0) -> None:
+        """Take ``cost`` tokens or raise :class:`QuotaExceeded` with the wait until they refill."""
+        quota = self.quota(tenant)
+        if quota is None:
+            return
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(tenant)
+            if bucket is None:
+                if len(self._buckets) >= self._max_tenants:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[tenant] = [quota.burst, now]
+            else:
+                self._buckets.move_to_end(tenant)
+                bucket[0] = min(quota.burst, bucket[0] + (now - bucket[1]) * quota.rate)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return
+            deficit = cost - bucket[0]
+        raise QuotaExceeded(deficit / quota.rate, "rate")
+
+
+def build_quotas(
+    rate: float,
+    burst: float = 0.0,
+    overrides: Optional[Mapping[str, Tuple[float, float]]] = None,
+) -> TenantQuotas:
+    """Quotas from settings; a burst of 0 allows one second of ``rate``."""
+
+    def quota(rate: float, burst: float) -> Quota:
+        return Quota(rate, burst or max(rate, 1.0))
+
+    return TenantQuotas(
+        quota(rate, burst) if rate > 0 else None,
+        {tenant: quota(*limits) for tenant, limits in (overrides or {}).items()},
+    )
+
+
+class FairScheduler:
+    """Grants at most ``slots`` concurrent writes, queueing the rest fairly per tenant.
+
+    Each request is tagged on arrival with a virtual finish time:
+    ``max(V, tenant's last tag) + cost / weight``, where ``V`` is the tag of the
+    last granted request. Free slots go to the smallest tag. A tenant may have
+    at most ``max_queued`` requests waiting; beyond that :meth:`acquire` raises
+    :class:`QuotaExceeded`. Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        slots: int,
+        *,
+        weights: Optional[Mapping[str, float]] = None,
+        max_queued: int = 1000,
+    ) -> None:
+        if slots < 1:
+            raise ValueError("slots must be at least 1")
+        if any(weight <= 0 for weight in (weights or {}).values()):
+            raise ValueError("tenant weights must be positive")
+        self._slots = slots
+        self._weights = dict(weights or {})
+        self._max_queued = max_queued
+        self._active = 0
+        self._virtual = 0.0
+        self._finish: Dict[str, float] = {}
+        self._queued: Dict[str, int] = {}
+        self._heap: List[Tuple[float, int, str, "asyncio.Future[None]"]] = []
+        self._seq = itertools.count()
+
+    @property
+    def slots(self) -> int:
+        return self._slots
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return sum(self._queued.values())
+
+    def weight(self, tenant: str) -> float:
+        return self._weights.get(tenant, 1.0)
+
+    async def acquire(self, tenant: str, cost: float = 1.0) -> None:
+        tag = max(self._virtual, self._finish.get(tenant, 0.0)) + cost / self.weight(tenant)
+        if self._active < self._slots:
+            # release() fills every free slot, so anything still queued was abandoned.
+            self._heap.clear()
+            self._grant(tenant, tag)
+            return
+        if self._queued.get(tenant, 0) >= self._max_queued:
+            raise QuotaExceeded(1.0, "queue")
+        self._finish[tenant] = tag
+        self._queued[tenant] = self._queued.get(tenant, 0) + 1
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (tag, next(self._seq), tenant, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # granted just as the request was abandoned
+            else:
+                future.cancel()
+                self._dequeued(tenant)
+            raise
+
+    def release(self) -> None:
+        self._active -= 1
+        while self._heap and self._active < self._slots:
+            tag, _, tenant, future = heapq.heappop(self._heap)
+            if future.cancelled():
+                continue
+            self._dequeued(tenant)
+            self._grant(tenant, tag)
+            future.set_result(None)
+
+    def _grant(self, tenant: str, tag: float) -> None:
+        self._active += 1
+        self._virtual = tag
+        self._finish[tenant] = max(self._finish.get(tenant, 0.0), tag)
+        if len(self._finish) > 4 * self._slots + 1024:
+            # Tags at or below V no longer influence anyone's next tag.
+            self._finish = {name: finish for name, finish in self._finish.items() if finish > self._virtual}
+
+    def _dequeued(self, tenant: str) -> None:
+        remaining = self._queued.get(tenant, 0) - 1
+        if remaining > 0:
+            self._queued[tenant] = remaining
+        else:
+            self._queued.pop(tenant, None)
+
+
+__all__ = ["FairScheduler", "Quota", "QuotaExceeded", "TenantQuotas", "build_quotas"]
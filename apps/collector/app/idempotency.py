@@ -0,0 +1,110 @@
+"""In-memory recent idempotency key cache for the collector write path."""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from .metrics import IDEMPOTENCY_DB_ROUNDTRIPS_AVOIDED, IDEMPOTENCY_LOOKUPS
+
+CacheKey = Tuple[str, str, str]
+
+
+def _digest(key: CacheKey) -> int:
+    raw = "\x1f".join(key).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=16).digest(), "little")
+
+
+class BloomFilter:
+    """Two-generation rotating bloom filter over pre-hashed 128-bit digests.
+
+    When the active generation reaches ``capacity`` insertions it becomes the previous
+    generation and a fresh one takes over, so memory stays bounded while recently
+    inserted keys remain visible for at least one full generation.
+    """
+
+    def __init__(self, capacity: int, bits_per_key: int = 10, hashes: int = 7) -> None:
+        self._capacity = max(1, capacity)
+        self._bits = max(64, self._capacity * bits_per_key)
+        self._hashes = hashes
+        self._active = bytearray(self._bits // 8 + 1)
+        self._previous: Optional[bytearray] = None
+        self._count = 0
+
+    def _positions(self, digest: int) -> list[int]:
+        h1 = digest & 0xFFFFFFFFFFFFFFFF
+        h2 = (digest >> 64) | 1
+        return [(h1 + i * h2) % self._bits for i in range(self._hashes)]
+
+    @staticmethod
+    def _test(bits: bytearray, positions: list[int]) -> bool:
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in positions)
+
+    def add(self, digest: int) -> None:
+        if self._count >= self._capacity:
+            self._previous = self._active
+            self._active = bytearray(len(self._active))
+            self._count = 0
+        for pos in self._positions(digest):
+            self._active[pos >> 3] |= 1 << (pos & 7)
+        self._count += 1
+
+    def might_contain(self, digest: int) -> bool:
+        positions = self._positions(digest)
+        if self._test(self._active, positions):
+            return True
+        return self._previous is not None and self._test(self._previous, positions)
+
+
+class RecentKeyCache:
+    """Remembers ``(tenant, event_type, idempotency_key)`` triples known to be persisted.
+
+    The LRU is authoritative: a hit means Postgres already holds the event, so the write
+    can be answered without a round trip. The bloom filter sits in front of it so the
+    common case, a never-seen key, is rejected with a lock-free bit test.
+    """
+
+    def __init__(self, max_entries: int = 100_000, bloom_capacity: Optional[int] = None) -> None:
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[int, None]" = OrderedDict()
+        self._bloom = BloomFilter(bloom_capacity or max_entries * 4)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0
+
+    def seen(self, tenant_id: str, event_type: str, key: str) -> bool:
+        if not self.enabled:
+            return False
+        digest = _digest((tenant_id, event_type, key))
+        if not self._bloom.might_contain(digest):
+            IDEMPOTENCY_LOOKUPS.labels(result="miss").inc()
+            return False
+        with self._lock:
+            hit = digest in self._entries
+            if hit:
+                self._entries.move_to_end(digest)
+        IDEMPOTENCY_LOOKUPS.labels(result="hit" if hit else "miss").inc()
+        if hit:
+            IDEMPOTENCY_DB_ROUNDTRIPS_AVOIDED.inc()
+        return hit
+
+    def remember(self, tenant_id: str, event_type: str, key: str) -> None:
+        if not self.enabled:
+            return
+        digest = _digest((tenant_id, event_type, key))
+        with self._lock:
+            self._bloom.add(digest)
+            self._entries[digest] = None
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+__all__ = ["BloomFilter", "RecentKeyCache"]
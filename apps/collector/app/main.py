@@ -1,15 +1,66 @@
 from __future__ import annotations
 
+import json
 import logging
-from typing import Any, Dict
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List
 
-from fastapi import FastAPI, Header, HTTPException, Response
+import psycopg
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import ValidationError
+from fastapi.responses import StreamingResponse
+from prometheus_client import generate_latest
 
-from . import schemas
+from .auth import TenantIdentity, TenantResolver, parse_bearer
+from .codec import CODECS, EventDecodeError, discriminate
+from .compaction import _build_client
+from .encoding import (
+    SUPPORTED_ENCODINGS,
+    BodyTooLarge,
+    MalformedBody,
+    UnsupportedEncoding,
+    decode_body,
+)
+from .export import (
+    ARROW_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    ExportRequest,
+    arrow_chunks,
+    iter_row_batches,
+    ndjson_chunks,
+)
+from .fairness import FairScheduler, QuotaExceeded, build_quotas
+from .journal import Journal, JournalFull, JournalReplayer
+from .metrics import (
+    INGEST_BODY_BYTES,
+    INGEST_EVENTS,
+    INGEST_THROTTLED,
+    JOURNAL_REJECTIONS,
+    JOURNAL_STATS,
+    STAGE_DURATION,
+    TAIL_STATS,
+    TOP_TENANTS,
+    TOP_THROTTLED_TENANTS,
+    VALIDATION_FAILURES,
+    WRITE_QUEUE_STATS,
+    observe_stage,
+)
 from .pii import build_scrubber
+from .query import EventQuery, HybridEventQuery, ParquetEventSource, PostgresEventSource
+from .rollups import (
+    MAX_STATS_HOURS,
+    RollupWorker,
+    load_stats,
+    load_watermark,
+    summarize,
+    truncate_hour,
+)
 from .storage import PersistenceLayer, PersistenceSettings
+from .tail import EventTail, TailFilter, stream
 
 logger = logging.getLogger("collector")
 logging.basicConfig(level=logging.INFO)
@@ -20,7 +71,78 @@ scrubber = build_scrubber(
     enabled=settings.pii_scrub_enabled,
     allowlist=settings.pii_tenant_allowlist,
     redaction_token=settings.pii_redaction_token,
+    skip_fields=settings.pii_tenant_skip_fields,
+)
+tenants = TenantResolver(
+    storage.connection,
+    ttl_seconds=settings.auth_cache_ttl_seconds,
+    negative_ttl_seconds=settings.auth_negative_ttl_seconds,
+    touch_interval_seconds=settings.auth_touch_interval_seconds,
+)
+TOP_TENANTS.configure(settings.metrics_top_tenants)
+TOP_THROTTLED_TENANTS.configure(settings.metrics_top_tenants)
+quotas = build_quotas(settings.tenant_rate_limit, settings.tenant_burst, settings.tenant_quotas)
+write_scheduler = FairScheduler(
+    settings.fair_write_slots or settings.async_db_pool_max_size,
+    weights=settings.tenant_weights,
+    max_queued=settings.fair_queue_depth,
 )
+WRITE_QUEUE_STATS.track(write_scheduler)
+
+
+def _cold_source() -> ParquetEventSource | None:
+    if not settings.minio_enabled:
+        return None
+    if not settings.minio_endpoint or not settings.minio_bucket:
+        logger.warning("MinIO enabled but endpoint/bucket not configured; event queries read Postgres only")
+        return None
+    return ParquetEventSource(_build_client(settings), settings)
+
+
+events_query = HybridEventQuery(
+    hot=PostgresEventSource(storage.connection),
+    cold=_cold_source(),
+    hot_window=timedelta(days=settings.query_hot_days),
+    max_span=timedelta(days=settings.query_max_days),
+)
+journal = (
+    Journal(
+        settings.journal_dir,
+        segment_bytes=settings.journal_segment_bytes,
+        max_bytes=settings.journal_max_bytes,
+        fsync_delay=settings.journal_fsync_delay_ms / 1000.0,
+        alarm_ratio=settings.journal_alarm_ratio,
+    )
+    if settings.journal_dir
+    else None
+)
+replayer = (
+    JournalReplayer(
+        journal,
+        lambda record: storage.write_event(**record),
+        permanent_errors=(psycopg.DataError, psycopg.IntegrityError),
+    )
+    if journal is not None
+    else None
+)
+JOURNAL_STATS.track(journal)
+rollups = (
+    RollupWorker(
+        storage.connection,
+        batch_size=settings.rollup_batch_size,
+        settle_seconds=settings.rollup_settle_seconds,
+        interval=settings.rollup_interval_seconds,
+    )
+    if settings.rollup_interval_seconds > 0
+    else None
+)
+
+tail = (
+    EventTail(settings.tail_buffer_size, max_subscribers=settings.tail_max_subscribers)
+    if settings.tail_buffer_size > 0
+    else None
+)
+TAIL_STATS.track(tail)
 
 app = FastAPI(title="RLaaS Telemetry Collector", version="0.1.0")
 
@@ -33,11 +155,55 @@ app.add_middleware(
 )
 
 
+INGEST_ROUTES = {
+    "/v1/interaction.create": "interaction.create",
+    "/v1/interaction.output": "interaction.output",
+    "/v1/feedback.submit": "feedback.submit",
+    "/v1/task_result": "task.result",
+}
+
+
+@app.exception_handler(RequestValidationError)
+async def count_validation_failures(request: Request, exc: RequestValidationError) -> Response:
+    event_type = INGEST_ROUTES.get(request.url.path)
+    if event_type:
+        VALIDATION_FAILURES.labels(event_type=event_type).inc()
+        INGEST_EVENTS.labels(event_type=event_type, outcome="rejected").inc()
+    return await request_validation_exception_handler(request, exc)
+
+
 def _apply_idempotency(payload: Dict[str, Any], header_key: str | None) -> Dict[str, Any]:
-    cleaned = dict(payload)
-    if header_key and not cleaned.get("idempotency_key"):
-        cleaned["idempotency_key"] = header_key
-    return cleaned
+    """Fill ``idempotency_key`` from the header; the freshly decoded payload is updated in place."""
+    if header_key and not payload.get("idempotency_key"):
+        payload["idempotency_key"] = header_key
+    return payload
+
+
+async def _decode_event(event_type: str, request: Request) -> Dict[str, Any]:
+    body = await request.body()
+    INGEST_BODY_BYTES.labels(event_type=event_type, kind="wire").inc(len(body))
+    with observe_stage(event_type, "decode"):
+        try:
+            body = decode_body(body, request.headers.get("content-encoding"), settings.max_body_bytes)
+        except (UnsupportedEncoding, BodyTooLarge, MalformedBody) as exc:
+            INGEST_EVENTS.labels(event_type=event_type, outcome="rejected").inc()
+            if isinstance(exc, UnsupportedEncoding):
+                headers = {"Accept-Encoding": ", ".join(("identity",) + SUPPORTED_ENCODINGS)}
+                raise HTTPException(status_code=415, detail=str(exc), headers=headers) from exc
+            raise HTTPException(status_code=413 if isinstance(exc, BodyTooLarge) else 400, detail=str(exc)) from exc
+        INGEST_BODY_BYTES.labels(event_type=event_type, kind="decoded").inc(len(body))
+        try:
+            return CODECS[event_type].decode(body)
+        except EventDecodeError as exc:
+            raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in exc.errors]) from exc
+
+
+def _event_body(event_type: str) -> Dict[str, Any]:
+    """Document the request body from the event JSON schema, since handlers read raw bytes."""
+    schema = CODECS[event_type].schema
+    if schema is None:
+        return {}
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
 
 
 def _scrub_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -45,6 +211,149 @@ def _scrub_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
     return scrubber.scrub(payload, tenant_id=tenant_id)
 
 
+async def authenticate(authorization: str | None = Header(default=None)) -> TenantIdentity | None:
+    """Resolve the bearer token to a tenant; anonymous requests are allowed unless auth is required."""
+    token = parse_bearer(authorization)
+    if token is None:
+        if settings.auth_required:
+            raise HTTPException(status_code=401, detail="Missing bearer token", headers={"WWW-Authenticate": "Bearer"})
+        return None
+    try:
+        # Cache hits stay on the event loop; only a Postgres lookup borrows a worker thread.
+        if tenants.is_cached(token=token):
+            identity = tenants.authenticate(token)
+        else:
+            identity = await run_in_threadpool(tenants.authenticate, token)
+    except Exception as exc:  # pragma: no cover - defensive logging
+        logger.exception("Failed to authenticate API key")
+        raise HTTPException(status_code=503, detail="Authentication unavailable") from exc
+    if identity is None:
+        raise HTTPException(status_code=401, detail="Invalid API key", headers={"WWW-Authenticate": "Bearer"})
+    return identity
+
+
+async def require_identity(identity: TenantIdentity | None = Depends(authenticate)) -> TenantIdentity:
+    """Read endpoints return stored payloads, so they need a valid API key even when ingest does not."""
+    if identity is None:
+        raise HTTPException(status_code=401, detail="Missing bearer token", headers={"WWW-Authenticate": "Bearer"})
+    return identity
+
+
+def _resolve_tenant(tenant_slug: str, identity: TenantIdentity | None) -> TenantIdentity:
+    if identity is not None:
+        if identity.tenant_slug != tenant_slug:
+            raise HTTPException(status_code=403, detail="API key is not valid for this tenant")
+        return identity
+    try:
+        resolved = tenants.resolve_slug(tenant_slug)
+    except Exception as exc:  # pragma: no cover - defensive logging
+        logger.exception("Failed to resolve tenant %s", tenant_slug)
+        raise HTTPException(status_code=503, detail="Tenant resolution unavailable") from exc
+    if resolved is None:
+        raise HTTPException(status_code=404, detail="Unknown tenant")
+    return resolved
+
+
+async def _resolve_tenant_async(tenant_slug: str, identity: TenantIdentity | None) -> TenantIdentity:
+    if identity is not None or tenants.is_cached(slug=tenant_slug):
+        return _resolve_tenant(tenant_slug, identity)
+    return await run_in_threadpool(_resolve_tenant, tenant_slug, identity)
+
+
+async def _ingest(
+    event_type: str,
+    request: Request,
+    idempotency_key: str | None,
+    identity: TenantIdentity | None,
+) -> Dict[str, str]:
+    started = time.perf_counter()
+    try:
+        payload = _apply_idempotency(await _decode_event(event_type, request), idempotency_key)
+        try:
+            tenant = await _resolve_tenant_async(payload["tenant_id"], identity)
+        except HTTPException:
+            INGEST_EVENTS.labels(event_type=event_type, outcome="rejected").inc()
+            raise
+        try:
+            quotas.check(tenant.tenant_slug)
+        except QuotaExceeded as exc:
+            raise _throttled(event_type, tenant, exc) from exc
+        with observe_stage(event_type, "scrub"):
+            cleaned = _scrub_payload(payload)
+        if journal is not None:
+            # append() blocks on fsync, so it runs off the event loop.
+            await run_in_threadpool(_journal_event, event_type, cleaned, idempotency_key, tenant)
+            _publish(event_type, tenant, cleaned)
+            return {"status": "accepted"}
+        try:
+            with observe_stage(event_type, "queue"):
+                await write_scheduler.acquire(tenant.tenant_slug)
+        except QuotaExceeded as exc:
+            raise _throttled(event_type, tenant, exc) from exc
+        try:
+            inserted = await storage.write_event_async(
+                event_type=event_type,
+                payload=cleaned,
+                idempotency_key=idempotency_key,
+                tenant_uuid=tenant.tenant_uuid,
+            )
+        except Exception as exc:  # pragma: no cover - defensive logging
+            INGEST_EVENTS.labels(event_type=event_type, outcome="error").inc()
+            logger.exception("Failed to persist %s", event_type)
+            raise HTTPException(status_code=500, detail="Persistence failure") from exc
+        finally:
+            write_scheduler.release()
+    finally:
+        STAGE_DURATION.labels(event_type=event_type, stage="request").observe(time.perf_counter() - started)
+    INGEST_EVENTS.labels(event_type=event_type, outcome="accepted" if inserted else "duplicate").inc()
+    if inserted:
+        TOP_TENANTS.record(tenant.tenant_slug)
+        _publish(event_type, tenant, cleaned)
+    logger.debug("%s %s", event_type, cleaned)
+    return {"status": "accepted"}
+
+
+def _publish(event_type: str, tenant: TenantIdentity, payload: Dict[str, Any]) -> None:
+    """Hand an accepted event to live-tail subscribers (no-op when the tail is disabled)."""
+    if tail is not None:
+        tail.publish(tenant.tenant_uuid, event_type, payload)
+
+
+def _throttled(event_type: str, tenant: TenantIdentity, exc: QuotaExceeded) -> HTTPException:
+    INGEST_EVENTS.labels(event_type=event_type, outcome="throttled").inc()
+    INGEST_THROTTLED.labels(event_type=event_type, reason=exc.reason).inc()
+    TOP_THROTTLED_TENANTS.record(tenant.tenant_slug)
+    return HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": exc.retry_after_header})
+
+
+def _journal_event(
+    event_type: str,
+    payload: Dict[str, Any],
+    idempotency_key: str | None,
+    tenant: TenantIdentity,
+) -> None:
+    """Acknowledge once the event is durable in the local journal; the replayer persists it."""
+    record = {
+        "event_type": event_type,
+        "payload": payload,
+        "idempotency_key": idempotency_key,
+        "tenant_uuid": tenant.tenant_uuid,
+    }
+    try:
+        with observe_stage(event_type, "journal"):
+            journal.append(record)  # type: ignore[union-attr]
+    except JournalFull as exc:
+        INGEST_EVENTS.labels(event_type=event_type, outcome="error").inc()
+        JOURNAL_REJECTIONS.labels(event_type=event_type).inc()
+        raise HTTPException(status_code=503, detail="Ingest journal full", headers={"Retry-After": "30"}) from exc
+    except Exception as exc:  # pragma: no cover - defensive logging
+        INGEST_EVENTS.labels(event_type=event_type, outcome="error").inc()
+        logger.exception("Failed to journal %s", event_type)
+        raise HTTPException(status_code=500, detail="Journal failure") from exc
+    INGEST_EVENTS.labels(event_type=event_type, outcome="accepted").inc()
+    TOP_TENANTS.record(tenant.tenant_slug)
+
+
 @app.get("/healthz")
 def health() -> Dict[str, str]:
     return {"status": "ok", "service": "collector"}
@@ -52,91 +361,217 @@ def health() -> Dict[str, str]:
 
 @app.get("/metrics")
 def metrics() -> Response:
-    body = "collector_ingest_total 0\n"
-    return Response(content=body, media_type="text/plain; version=0.0.4")
+    return Response(content=generate_latest(), media_type="text/plain; version=0.0.4")
 
 
-@app.post("/v1/interaction.create", status_code=202)
-def interaction_create(
-    event: schemas.InteractionCreate,
+@app.post("/v1/interaction.create", status_code=202, openapi_extra=_event_body("interaction.create"))
+async def interaction_create(
+    request: Request,
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    identity: TenantIdentity | None = Depends(authenticate),
 ) -> Dict[str, str]:
-    payload = _apply_idempotency(event.model_dump(), idempotency_key)
-    cleaned = _scrub_payload(payload)
-    try:
-        storage.write_event(event_type="interaction.create", payload=cleaned, idempotency_key=idempotency_key)
-    except Exception as exc:  # pragma: no cover - defensive logging
-        logger.exception("Failed to persist interaction.create")
-        raise HTTPException(status_code=500, detail="Persistence failure") from exc
-    logger.info("interaction.create %s", cleaned)
-    return {"status": "accepted"}
+    return await _ingest("interaction.create", request, idempotency_key, identity)
 
 
-@app.post("/v1/interaction.output", status_code=202)
-def interaction_output(
-    event: schemas.InteractionOutput,
+@app.post("/v1/interaction.output", status_code=202, openapi_extra=_event_body("interaction.output"))
+async def interaction_output(
+    request: Request,
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    identity: TenantIdentity | None = Depends(authenticate),
 ) -> Dict[str, str]:
-    payload = _apply_idempotency(event.model_dump(), idempotency_key)
-    cleaned = _scrub_payload(payload)
-    try:
-        storage.write_event(event_type="interaction.output", payload=cleaned, idempotency_key=idempotency_key)
-    except Exception as exc:  # pragma: no cover
-        logger.exception("Failed to persist interaction.output")
-        raise HTTPException(status_code=500, detail="Persistence failure") from exc
-    logger.info("interaction.output %s", cleaned)
-    return {"status": "accepted"}
+    return await _ingest("interaction.output", request, idempotency_key, identity)
 
 
-@app.post("/v1/feedback.submit", status_code=202)
-def feedback_submit(
-    event: schemas.FeedbackSubmit,
+@app.post("/v1/feedback.submit", status_code=202, openapi_extra=_event_body("feedback.submit"))
+async def feedback_submit(
+    request: Request,
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    identity: TenantIdentity | None = Depends(authenticate),
 ) -> Dict[str, str]:
-    payload = _apply_idempotency(event.model_dump(), idempotency_key)
-    cleaned = _scrub_payload(payload)
-    try:
-        storage.write_event(event_type="feedback.submit", payload=cleaned, idempotency_key=idempotency_key)
-    except Exception as exc:  # pragma: no cover
-        logger.exception("Failed to persist feedback.submit")
-        raise HTTPException(status_code=500, detail="Persistence failure") from exc
-    logger.info("feedback.submit %s", cleaned)
-    return {"status": "accepted"}
+    return await _ingest("feedback.submit", request, idempotency_key, identity)
 
 
-@app.post("/v1/task_result", status_code=202)
-def task_result(
-    event: schemas.TaskResult,
+@app.post("/v1/task_result", status_code=202, openapi_extra=_event_body("task.result"))
+async def task_result(
+    request: Request,
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    identity: TenantIdentity | None = Depends(authenticate),
 ) -> Dict[str, str]:
-    payload = _apply_idempotency(event.model_dump(), idempotency_key)
-    cleaned = _scrub_payload(payload)
+    return await _ingest("task.result", request, idempotency_key, identity)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _ndjson(rows: Iterator[Dict[str, Any]]) -> Iterator[bytes]:
+    for row in rows:
+        yield (json.dumps(row, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+
+@app.get("/v1/events")
+def query_events(
+    tenant_id: str,
+    start: datetime,
+    end: datetime | None = None,
+    event_type: str | None = None,
+    policy_id: str | None = None,
+    limit: int = Query(default=1000, ge=1, le=100_000),
+    identity: TenantIdentity = Depends(require_identity),
+) -> StreamingResponse:
+    """Stream a tenant's events in ``occurred_at`` order as NDJSON, across hot and cold storage."""
+    tenant = _resolve_tenant(tenant_id, identity)
+    query = EventQuery(
+        tenant=tenant,
+        start=start,
+        end=end or datetime.now(timezone.utc),
+        event_type=event_type,
+        policy_id=policy_id,
+    )
     try:
-        storage.write_event(event_type="task.result", payload=cleaned, idempotency_key=idempotency_key)
-    except Exception as exc:  # pragma: no cover
-        logger.exception("Failed to persist task.result")
-        raise HTTPException(status_code=500, detail="Persistence failure") from exc
-    logger.info("task.result %s", cleaned)
-    return {"status": "accepted"}
+        rows = events_query.run(query, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return StreamingResponse(_ndjson(rows), media_type="application/x-ndjson")
+
+
+@app.get("/v1/events/stream")
+async def stream_events(
+    tenant_id: str,
+    event_type: List[str] | None = Query(default=None),
+    policy_id: str | None = None,
+    last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
+    identity: TenantIdentity = Depends(require_identity),
+) -> StreamingResponse:
+    """Tail a tenant's events as Server-Sent Events as this collector accepts them.
+
+    Served from an in-memory ring, so only events accepted by this replica since it
+    started are seen. Repeat ``event_type`` to follow several types. A reconnecting
+    client resumes after ``Last-Event-ID`` while that event is still buffered; a
+    ``skipped`` event reports how many were missed by falling behind.
+    """
+    if tail is None:
+        raise HTTPException(status_code=404, detail="Live tail is disabled")
+    tenant = _resolve_tenant(tenant_id, identity)
+    unknown = sorted(set(event_type or ()) - set(CODECS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown event type: {', '.join(unknown)}")
+    if tail.full:
+        raise HTTPException(status_code=503, detail="Too many live tail subscribers", headers={"Retry-After": "5"})
+    selector = TailFilter(tenant.tenant_uuid, frozenset(event_type) if event_type else None, policy_id)
+    return StreamingResponse(
+        stream(tail, selector, tail.resume_point(last_event_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/v1/export")
+def export_events(
+    tenant_id: str,
+    start: datetime,
+    end: datetime | None = None,
+    event_type: str | None = None,
+    output: str = Query(default="ndjson", alias="format", pattern="^(ndjson|arrow)$"),
+    after_time: datetime | None = None,
+    after_id: int | None = None,
+    batch_size: int = Query(default=5000, ge=1, le=50_000),
+    identity: TenantIdentity = Depends(require_identity),
+) -> StreamingResponse:
+    """Stream every matching Postgres event ordered by ``(occurred_at, id)``.
+
+    Pass the last received row's ``occurred_at``/``id`` as ``after_time``/``after_id`` to
+    resume an interrupted export without gaps or duplicates.
+    """
+    tenant = _resolve_tenant(tenant_id, identity)
+    if (after_time is None) != (after_id is None):
+        raise HTTPException(status_code=400, detail="after_time and after_id must be given together")
+    request = ExportRequest(
+        tenant_uuid=tenant.tenant_uuid,
+        start=_as_utc(start),
+        end=_as_utc(end) if end else datetime.now(timezone.utc),
+        event_type=event_type,
+        after=(_as_utc(after_time), after_id) if after_time is not None else None,  # type: ignore[arg-type]
+    )
+    if request.start >= request.end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    batches = iter_row_batches(storage.connection, request, batch_rows=batch_size)
+    if output == "arrow":
+        return StreamingResponse(arrow_chunks(batches), media_type=ARROW_MEDIA_TYPE)
+    return StreamingResponse(ndjson_chunks(batches), media_type=NDJSON_MEDIA_TYPE)
+
+
+@app.get("/v1/stats/policies")
+def policy_stats(
+    tenant_id: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    policy_id: str | None = None,
+    hourly: bool = False,
+    identity: TenantIdentity = Depends(require_identity),
+) -> Dict[str, Any]:
+    """Per-policy latency, cost, feedback and shadow stats from the hourly rollups.
+
+    Covers the hours overlapping ``[start, end)``; by default the current hour. Reads
+    one rollup row per policy and hour, never raw events.
+    """
+    tenant = _resolve_tenant(tenant_id, identity)
+    end = _as_utc(end) if end else datetime.now(timezone.utc)
+    start = truncate_hour(_as_utc(start) if start else end - timedelta(microseconds=1))
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if end - start > timedelta(hours=MAX_STATS_HOURS):
+        raise HTTPException(status_code=400, detail=f"At most {MAX_STATS_HOURS} hours per request")
+    with storage.connection() as conn:
+        rows = load_stats(conn, tenant.tenant_uuid, start, end, policy_id)
+        watermark = load_watermark(conn)
+    return {
+        "tenant_id": tenant.tenant_slug,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "rolled_up_at": watermark[1].isoformat() if watermark else None,
+        "policies": summarize(rows, hourly=hourly),
+    }
 
 
 @app.post("/v1/validate", status_code=200)
-def validate_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
-    """Utility endpoint to check arbitrary payloads against supported event schemas."""
-    for model in (
-        schemas.InteractionCreate,
-        schemas.InteractionOutput,
-        schemas.FeedbackSubmit,
-        schemas.TaskResult,
-    ):
-        try:
-            model.model_validate(payload)  # type: ignore[attr-defined]
-            return {"event_type": model.__name__, "valid": True}
-        except ValidationError:
-            continue
-    raise HTTPException(status_code=400, detail="Payload does not match any collector schema")
+async def validate_payload(payload: Dict[str, Any], event_type: str | None = None) -> Dict[str, Any]:
+    """Check a payload against the event schema its fields (or ``event_type``) select.
+
+    The type comes from ``event_type`` (query or payload key) or, failing that, from
+    the fields only one schema requires. It is never found by trying each model.
+    """
+    resolved = discriminate(payload, event_type)
+    if resolved is None:
+        raise HTTPException(status_code=400, detail="Payload does not match any collector schema")
+    codec = CODECS[resolved]
+    try:
+        codec.validate(payload)
+    except EventDecodeError as exc:
+        first = exc.errors[0] if exc.errors else {"loc": (), "msg": "invalid"}
+        where = ".".join(str(part) for part in first["loc"]) or "payload"
+        raise HTTPException(
+            status_code=400, detail=f"Payload does not match the {codec.model.__name__} schema: {where}: {first['msg']}"
+        ) from exc
+    return {"event_type": codec.model.__name__, "valid": True}
+
+
+@app.on_event("startup")
+async def startup_event() -> None:
+    if replayer is not None:
+        replayer.start()
+    if rollups is not None:
+        rollups.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
+    if replayer is not None:
+        replayer.stop()
+    if rollups is not None:
+        rollups.stop()
+    if journal is not None:
+        journal.close()
+    tenants.close()
+    await storage.aclose()
     storage.close()
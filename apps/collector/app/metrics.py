@@ -0,0 +1,318 @@
+"""Prometheus metrics exported by the telemetry collector."""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+# Labels are limited to event type, pipeline stage and outcome, so series counts stay
+# fixed no matter how many tenants ingest. Per-tenant volume is the opt-in TOP_TENANTS.
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+INGEST_EVENTS = Counter(
+    "collector_ingest_events_total",
+    "Ingest requests by event type and outcome (accepted, duplicate, rejected, throttled, error)",
+    ["event_type", "outcome"],
+)
+VALIDATION_FAILURES = Counter(
+    "collector_validation_failures_total",
+    "Ingest payloads rejected by schema validation",
+    ["event_type"],
+)
+STAGE_DURATION = Histogram(
+    "collector_stage_duration_seconds",
+    "Time spent per ingest stage (request, decode, scrub, queue, journal, postgres, minio)",
+    ["event_type", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "collector_stage_errors_total",
+    "Failures per ingest stage",
+    ["event_type", "stage"],
+)
+IDEMPOTENCY_LOOKUPS = Counter(
+    "collector_idempotency_cache_lookups_total",
+    "Recent idempotency key cache lookups",
+    ["result"],
+)
+IDEMPOTENCY_DB_ROUNDTRIPS_AVOIDED = Counter(
+    "collector_idempotency_db_roundtrips_avoided_total",
+    "Duplicate events answered from the recent key cache without touching Postgres",
+)
+IDEMPOTENCY_DB_CONFLICTS = Counter(
+    "collector_idempotency_db_conflicts_total",
+    "Duplicate events detected by the Postgres unique index (cache misses)",
+    ["event_type"],
+)
+INGEST_BODY_BYTES = Counter(
+    "collector_ingest_body_bytes_total",
+    "Ingest request body bytes as received (wire) and after Content-Encoding decoding (decoded)",
+    ["event_type", "kind"],
+)
+JOURNAL_REJECTIONS = Counter(
+    "collector_journal_rejections_total",
+    "Ingest requests refused with 503 because the journal disk budget was exhausted",
+    ["event_type"],
+)
+INGEST_THROTTLED = Counter(
+    "collector_ingest_throttled_total",
+    "Ingest requests refused with 429 (rate: tenant quota, queue: fair write queue share full)",
+    ["event_type", "reason"],
+)
+BLOB_BYTES = Counter(
+    "collector_blob_bytes_total",
+    "Text bytes replaced by blob references (referenced) and bodies stored for the first time per tenant (stored)",
+    ["event_type", "outcome"],
+)
+ROLLUP_EVENTS = Counter(
+    "collector_rollup_events_total",
+    "Events folded into the hourly policy rollups",
+    ["event_type"],
+)
+ROLLUP_FAILURES = Counter(
+    "collector_rollup_failures_total",
+    "Rollup batches rolled back and retried",
+)
+TAIL_SKIPPED = Counter(
+    "collector_tail_skipped_events_total",
+    "Buffered events overwritten before a slow live-tail subscriber read them",
+)
+JOURNAL_REPLAY_FAILURES = Counter(
+    "collector_journal_replay_failures_total",
+    "Journal replay failures (retry: transient, batch retried; dead_letter: record skipped)",
+    ["kind"],
+)
+
+
+@contextmanager
+def observe_stage(event_type: str, stage: str) -> Iterator[None]:
+    """Time a stage into ``STAGE_DURATION`` and count exceptions escaping it."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(event_type=event_type, stage=stage).inc()
+        raise
+    finally:
+        STAGE_DURATION.labels(event_type=event_type, stage=stage).observe(time.perf_counter() - start)
+
+
+class PoolStatsCollector(Collector):
+    """Exposes ``psycopg_pool`` statistics at scrape time, labelled by pool name.
+
+    Reading ``get_stats()`` on scrape costs nothing on the request path, and pools are
+    swapped in by ``track`` so tests and restarts never re-register metrics.
+    """
+
+    GAUGES = (
+        ("collector_db_pool_size", "Connections currently open", "pool_size"),
+        ("collector_db_pool_max", "Configured maximum pool size", "pool_max"),
+        ("collector_db_pool_available", "Idle connections ready for use", "pool_available"),
+        ("collector_db_pool_requests_waiting", "Requests queued for a connection", "requests_waiting"),
+    )
+
+    def __init__(self) -> None:
+        self._pools: Dict[str, Any] = {}
+
+    def track(self, pool: Any, name: str = "sync") -> None:
+        self._pools[name] = pool
+
+    def collect(self):
+        if not self._pools:
+            return []
+        families = [GaugeMetricFamily(metric, doc, labels=["pool"]) for metric, doc, _ in self.GAUGES]
+        wait = CounterMetricFamily("collector_db_pool_wait_seconds", "Time spent waiting for a connection", labels=["pool"])
+        errors = CounterMetricFamily(
+            "collector_db_pool_request_errors", "Connection requests that failed or timed out", labels=["pool"]
+        )
+        for name, pool in self._pools.items():
+            stats: Dict[str, int] = pool.get_stats()
+            for family, (_, _, key) in zip(families, self.GAUGES):
+                family.add_metric([name], stats.get(key, 0))
+            # Cumulative counters only appear in get_stats() once they are non-zero.
+            wait.add_metric([name], stats.get("requests_wait_ms", 0) / 1000.0)
+            errors.add_metric([name], stats.get("requests_errors", 0))
+        return [*families, wait, errors]
+
+
+class JournalStatsCollector(Collector):
+    """Exposes journal size, replay lag and the disk budget alarm at scrape time."""
+
+    def __init__(self) -> None:
+        self._journal: Optional[Any] = None
+
+    def track(self, journal: Any) -> None:
+        self._journal = journal
+
+    def collect(self):
+        journal = self._journal
+        if journal is None:
+            return []
+        return [
+            GaugeMetricFamily("collector_journal_bytes", "Bytes retained in journal segments", value=journal.retained_bytes),
+            GaugeMetricFamily("collector_journal_budget_bytes", "Configured journal disk budget", value=journal.max_bytes),
+            GaugeMetricFamily(
+                "collector_journal_lag_bytes", "Journaled bytes not yet replayed to storage", value=journal.lag_bytes
+            ),
+            GaugeMetricFamily(
+                "collector_journal_alarm",
+                "1 when journal usage is at or above the alarm ratio of its budget",
+                value=1 if journal.alarm else 0,
+            ),
+        ]
+
+
+class WriteQueueStatsCollector(Collector):
+    """Exposes fair write scheduler occupancy at scrape time."""
+
+    def __init__(self) -> None:
+        self._scheduler: Optional[Any] = None
+
+    def track(self, scheduler: Any) -> None:
+        self._scheduler = scheduler
+
+    def collect(self):
+        scheduler = self._scheduler
+        if scheduler is None:
+            return []
+        return [
+            GaugeMetricFamily("collector_write_slots", "Concurrent ingest writes allowed", value=scheduler.slots),
+            GaugeMetricFamily("collector_write_slots_in_use", "Ingest writes currently holding a slot", value=scheduler.active),
+            GaugeMetricFamily(
+                "collector_write_queue_depth", "Ingest writes waiting for a slot in fair-queue order", value=scheduler.queued
+            ),
+        ]
+
+
+class TailStatsCollector(Collector):
+    """Exposes live-tail subscribers and ring occupancy at scrape time."""
+
+    def __init__(self) -> None:
+        self._tail: Optional[Any] = None
+
+    def track(self, tail: Any) -> None:
+        self._tail = tail
+
+    def collect(self):
+        tail = self._tail
+        if tail is None:
+            return []
+        return [
+            GaugeMetricFamily("collector_tail_subscribers", "Open /v1/events/stream connections", value=tail.subscribers),
+            GaugeMetricFamily("collector_tail_buffered_events", "Events held in the live-tail ring", value=tail.buffered),
+        ]
+
+
+class TopTenants(Collector):
+    """Bounded heavy-hitter counter for a per-tenant quantity (Space-Saving).
+
+    At most ``top_n * slack`` tenants are tracked; when full, a new tenant replaces the
+    smallest counter and inherits its count, so estimates only err upwards. Only the
+    ``top_n`` largest are exported, plus an ``__other__`` remainder, which keeps the
+    label set bounded whatever the tenant count. Disabled when ``top_n`` is 0.
+    """
+
+    OTHER = "__other__"
+
+    def __init__(
+        self,
+        top_n: int = 0,
+        slack: int = 8,
+        *,
+        name: str = "collector_tenant_ingest_events",
+        documentation: str = "Accepted events for the highest-volume tenants (estimated, opt-in)",
+    ) -> None:
+        self._slack = slack
+        self._name = name
+        self._documentation = documentation
+        self._lock = threading.Lock()
+        self.configure(top_n)
+
+    def configure(self, top_n: int) -> None:
+        with self._lock:
+            self._top_n = max(0, top_n)
+            self._capacity = self._top_n * self._slack
+            self._counts: Dict[str, int] = {}
+            self._total = 0
+
+    def record(self, tenant: str, amount: int = 1) -> None:
+        if not self._top_n:
+            return
+        with self._lock:
+            self._total += amount
+            if tenant in self._counts:
+                self._counts[tenant] += amount
+            elif len(self._counts) < self._capacity:
+                self._counts[tenant] = amount
+            else:
+                victim = min(self._counts, key=self._counts.__getitem__)
+                self._counts[tenant] = self._counts.pop(victim) + amount
+
+    def top(self) -> Dict[str, int]:
+        with self._lock:
+            ranked = sorted(self._counts.items(), key=lambda item: item[1], reverse=True)[: self._top_n]
+            total = self._total
+        top = dict(ranked)
+        if top or total:
+            top[self.OTHER] = max(0, total - sum(top.values()))
+        return top
+
+    def collect(self):
+        if not self._top_n:
+            return []
+        family = CounterMetricFamily(self._name, self._documentation, labels=["tenant"])
+        for tenant, count in self.top().items():
+            family.add_metric([tenant], count)
+        return [family]
+
+
+POOL_STATS = PoolStatsCollector()
+JOURNAL_STATS = JournalStatsCollector()
+WRITE_QUEUE_STATS = WriteQueueStatsCollector()
+TAIL_STATS = TailStatsCollector()
+TOP_TENANTS = TopTenants()
+TOP_THROTTLED_TENANTS = TopTenants(
+    name="collector_tenant_throttled_requests",
+    documentation="Ingest requests refused with 429 for the most-throttled tenants (estimated, opt-in)",
+)
+REGISTRY.register(POOL_STATS)
+REGISTRY.register(JOURNAL_STATS)
+REGISTRY.register(WRITE_QUEUE_STATS)
+REGISTRY.register(TAIL_STATS)
+REGISTRY.register(TOP_TENANTS)
+REGISTRY.register(TOP_THROTTLED_TENANTS)
+
+__all__ = [
+    "BLOB_BYTES",
+    "IDEMPOTENCY_DB_CONFLICTS",
+    "IDEMPOTENCY_DB_ROUNDTRIPS_AVOIDED",
+    "IDEMPOTENCY_LOOKUPS",
+    "INGEST_EVENTS",
+    "INGEST_THROTTLED",
+    "JOURNAL_REJECTIONS",
+    "JOURNAL_REPLAY_FAILURES",
+    "JOURNAL_STATS",
+    "POOL_STATS",
+    "ROLLUP_EVENTS",
+    "ROLLUP_FAILURES",
+    "STAGE_DURATION",
+    "STAGE_ERRORS",
+    "TAIL_SKIPPED",
+    "TAIL_STATS",
+    "TOP_TENANTS",
+    "TOP_THROTTLED_TENANTS",
+    "VALIDATION_FAILURES",
+    "WRITE_QUEUE_STATS",
+    "JournalStatsCollector",
+    "PoolStatsCollector",
+    "TailStatsCollector",
+    "TopTenants",
+    "WriteQueueStatsCollector",
+    "observe_stage",
+]
@@ -0,0 +1,340 @@
+"""Rewrite a compacted date partition into sorted, target-size Parquet files."""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .compaction import (
+    DEFAULT_FETCH_WORKERS,
+    CompactionManifest,
+    ManifestConflict,
+    S3Error,
+    _build_client,
+    _date_range,
+    load_manifest,
+    update_manifest,
+)
+from .storage import PersistenceSettings
+
+try:  # pragma: no cover - optional dependency
+    from minio import Minio  # type: ignore
+except ImportError as exc:  # pragma: no cover - handled by CLI
+    raise SystemExit("python-minio is required for optimization") from exc
+
+logger = logging.getLogger("collector.optimize")
+
+# Sorting on the lookup column gives every output file a narrow interaction_id range
+# that no other file of the partition overlaps, so the manifest bounds prune lookups.
+LOOKUP_COLUMN = "interaction_id"
+SORT_KEYS = (LOOKUP_COLUMN,)
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class OptimizeOptions:
+    target_file_bytes: int = 128 * 1024 * 1024
+    row_group_rows: int = 64 * 1024
+    data_page_bytes: int = 1024 * 1024
+    compression: str = "zstd"
+    max_workers: int = DEFAULT_FETCH_WORKERS
+    merge_batch_rows: int = 16 * 1024
+
+
+def _partition_dir(object_name: str) -> str:
+    return object_name.rsplit("/", 1)[0] + "/"
+
+
+def _sort_key(table: pa.Table) -> pa.Array:
+    # Nulls sort first as "" so the merge below can compare plain strings.
+    if LOOKUP_COLUMN not in table.schema.names:
+        return pa.nulls(table.num_rows, pa.string()).fill_null("")
+    return table[LOOKUP_COLUMN].combine_chunks().cast(pa.string()).fill_null("")
+
+
+def _sort(table: pa.Table) -> pa.Table:
+    if table.num_rows < 2:
+        return table
+    return table.take(pc.sort_indices(_sort_key(table)))
+
+
+def _sorted_run(
+    client: Minio, settings: PersistenceSettings, object_name: str, workdir: str
+) -> Tuple[str, int, int]:
+    """Download one source file, sort it and spill it to ``workdir`` as a sorted run.
+
+    Returns ``(path, rows, source_bytes)``; only one source file is held in memory.
+    """
+    download = os.path.join(workdir, f"src-{uuid4().hex}.parquet")
+    response = client.get_object(settings.minio_bucket, object_name)
+    try:
+        with open(download, "wb") as fh:
+            for chunk in iter(lambda: response.read(DOWNLOAD_CHUNK_BYTES), b""):
+                fh.write(chunk)
+    finally:
+        response.close()
+        response.release_conn()
+    source_bytes = os.path.getsize(download)
+    table = _sort(pq.read_table(download))
+    os.remove(download)
+    path = os.path.join(workdir, f"run-{uuid4().hex}.parquet")
+    pq.write_table(table, path, compression="none")
+    return path, table.num_rows, source_bytes
+
+
+def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    columns = []
+    for field in schema:
+        if field.name in table.schema.names:
+            column = table[field.name]
+            columns.append(column if column.type == field.type else column.cast(field.type))
+        else:
+            columns.append(pa.nulls(table.num_rows, field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _merge_runs(paths: Sequence[str], schema: pa.Schema, batch_rows: int) -> Iterator[pa.Table]:
+    """K-way merge of sorted runs, holding at most one batch per run in memory.
+
+    Each round emits every buffered row whose key is at or below the smallest
+    buffered maximum; no row still unread can sort before those, so the
+    concatenation of the sorted rounds is globally sorted.
+    """
+    readers = [pq.ParquetFile(path).iter_batches(batch_size=batch_rows) for path in paths]
+
+    def refill(index: int) -> Optional[pa.Table]:
+        for batch in readers[index]:
+            if batch.num_rows:
+                return _conform(pa.Table.from_batches([batch]), schema)
+        return None
+
+    buffers: List[Optional[pa.Table]] = [refill(index) for index in range(len(readers))]
+    while any(buffer is not None for buffer in buffers):
+        bound = min(_sort_key(buffer)[-1].as_py() for buffer in buffers if buffer is not None)
+        pieces = []
+        for index, buffer in enumerate(buffers):
+            if buffer is None:
+                continue
+            take = pc.sum(pc.less_equal(_sort_key(buffer), bound)).as_py() or 0
+            if take:
+                pieces.append(buffer.slice(0, take))
+            rest = buffer.slice(take)
+            buffers[index] = rest if rest.num_rows else refill(index)
+        yield _sort(pa.concat_tables(pieces))
+
+
+def _open_writer(path: str, schema: pa.Schema, options: OptimizeOptions) -> pq.ParquetWriter:
+    keys = [name for name in SORT_KEYS if name in schema.names]
+    return pq.ParquetWriter(
+        path,
+        schema,
+        compression=options.compression,
+        data_page_size=options.data_page_bytes,
+        write_statistics=True,
+        write_page_index=True,
+        sorting_columns=pq.SortingColumn.from_ordering(schema, [(k, "ascending") for k in keys]) or None,
+    )
+
+
+def _merge_bounds(stats: dict, chunk: pa.Table) -> None:
+    stats["rows"] += chunk.num_rows
+    if LOOKUP_COLUMN not in chunk.schema.names:
+        return
+    bounds = pc.min_max(chunk[LOOKUP_COLUMN])
+    low, high = bounds["min"].as_py(), bounds["max"].as_py()
+    if low is None:
+        return
+    key_min, key_max = f"{LOOKUP_COLUMN}_min", f"{LOOKUP_COLUMN}_max"
+    stats[key_min] = low if stats.get(key_min) is None else min(stats[key_min], low)
+    stats[key_max] = high if stats.get(key_max) is None else max(stats[key_max], high)
+
+
+def _upload(client: Minio, settings: PersistenceSettings, path: str, object_name: str) -> int:
+    size = os.path.getsize(path)
+    with open(path, "rb") as fh:
+        client.put_object(
+            bucket_name=settings.minio_bucket,
+            object_name=object_name,
+            data=fh,
+            length=size,
+            content_type="application/octet-stream",
+        )
+    return size
+
+
+def _rewrite_partition(
+    client: Minio,
+    settings: PersistenceSettings,
+    partition: str,
+    sources: Sequence[str],
+    run_name: str,
+    options: OptimizeOptions,
+) -> Dict[str, dict]:
+    """External merge sort of ``sources`` into target-size files under ``partition``.
+
+    Sources are sorted one at a time into local runs, then merged batch by batch, so
+    memory is bounded by the worker count times a source file plus one batch per run.
+    """
+    with tempfile.TemporaryDirectory(prefix="optimize-") as workdir:
+        workers = max(1, min(options.max_workers, len(sources)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="optimize-fetch") as pool:
+            runs = list(pool.map(lambda name: _sorted_run(client, settings, name, workdir), sources))
+        paths = [path for path, _, _ in runs]
+        total_rows = sum(rows for _, rows, _ in runs)
+        if total_rows == 0:
+            return {}
+        schema = pa.unify_schemas([pq.read_schema(path) for path in paths])
+        bytes_per_row = max(1.0, sum(size for _, _, size in runs) / total_rows)
+        rows_per_file = max(1, int(options.target_file_bytes / bytes_per_row))
+
+        outputs: Dict[str, dict] = {}
+        writer: Optional[pq.ParquetWriter] = None
+        local = os.path.join(workdir, "output.parquet")
+        stats: dict = {}
+        object_name = ""
+
+        def finish() -> None:
+            assert writer is not None
+            writer.close()
+            outputs[object_name] = {**stats, "bytes": _upload(client, settings, local, object_name)}
+
+        for merged in _merge_runs(paths, schema, options.merge_batch_rows):
+            offset = 0
+            while offset < merged.num_rows:
+                if writer is None:
+                    object_name = f"{partition}{run_name}-{len(outputs):05d}.parquet"
+                    writer = _open_writer(local, schema, options)
+                    stats = {"rows": 0}
+                chunk = merged.slice(offset, rows_per_file - stats["rows"])
+                writer.write_table(chunk, row_group_size=options.row_group_rows)
+                _merge_bounds(stats, chunk)
+                offset += chunk.num_rows
+                if stats["rows"] >= rows_per_file:
+                    finish()
+                    writer = None
+        if writer is not None:
+            finish()
+    return outputs
+
+
+def optimize(
+    target_date: str,
+    *,
+    settings: Optional[PersistenceSettings] = None,
+    client: Optional[Minio] = None,
+    options: OptimizeOptions = OptimizeOptions(),
+) -> CompactionManifest:
+    """Merge the small files of ``dt=<target_date>`` into sorted, target-size files.
+
+    New files are written under a fresh generation name, the manifest is swapped in a
+    single PUT, and only then are the superseded files deleted. Readers that resolve
+    files through the manifest never observe a half-written partition. Files that a
+    concurrent compaction adds meanwhile are kept; if another optimize replaced any of
+    the sources first, the new files are discarded and ``ManifestConflict`` is raised.
+    """
+    settings = settings or PersistenceSettings.from_env()
+    client = client or _build_client(settings)
+    manifest = load_manifest(client, settings, target_date)
+    if not manifest.files:
+        logger.info("Nothing to optimize for dt=%s", target_date)
+        return manifest
+
+    by_partition: Dict[str, List[str]] = defaultdict(list)
+    for object_name in manifest.files:
+        by_partition[_partition_dir(object_name)].append(object_name)
+
+    superseded = list(manifest.files)
+    generation = manifest.generation + 1
+    # The run suffix keeps overlapping runs from overwriting each other's output.
+    run_name = f"part-g{generation:04d}-{uuid4().hex[:8]}"
+    new_stats: Dict[str, dict] = {}
+    for partition, sources in sorted(by_partition.items()):
+        new_stats.update(_rewrite_partition(client, settings, partition, sources, run_name, options))
+
+    def swap(current: CompactionManifest) -> None:
+        if current.generation != manifest.generation or not set(superseded) <= set(current.files):
+            raise ManifestConflict(f"Another run rewrote dt={target_date} while it was being optimized")
+        added = [name for name in current.files if name not in superseded]
+        current.stats = {**{name: current.stats[name] for name in added if name in current.stats}, **new_stats}
+        current.files = list(new_stats) + added
+        current.generation = generation
+
+    try:
+        manifest = update_manifest(client, settings, target_date, swap)
+    except ManifestConflict:
+        for object_name in new_stats:
+            client.remove_object(settings.minio_bucket, object_name)
+        raise
+
+    for object_name in superseded:
+        if object_name in new_stats:
+            continue
+        try:
+            client.remove_object(settings.minio_bucket, object_name)
+        except S3Error as exc:  # pragma: no cover - network side effects
+            logger.warning("Failed to remove superseded file %s: %s", object_name, exc)
+
+    logger.info(
+        "Optimized dt=%s: %s files -> %s files (generation %s)",
+        target_date,
+        len(superseded),
+        len(new_stats),
+        generation,
+    )
+    return manifest
+
+
+def files_for_interaction(manifest: CompactionManifest, interaction_id: str) -> List[str]:
+    """Files whose ``interaction_id`` range can contain ``interaction_id``.
+
+    Files without recorded bounds (fresh compaction output) are always included.
+    """
+    candidates: List[str] = []
+    for object_name in manifest.files:
+        stats = manifest.stats.get(object_name, {})
+        low = stats.get(f"{LOOKUP_COLUMN}_min")
+        high = stats.get(f"{LOOKUP_COLUMN}_max")
+        if low is None or high is None or low <= interaction_id <= high:
+            candidates.append(object_name)
+    return candidates
+
+
+def main() -> None:  # pragma: no cover - CLI wiring
+    parser = argparse.ArgumentParser(description="Merge and sort compacted Parquet partitions")
+    parser.add_argument("--date", dest="date", help="ISO date (YYYY-MM-DD)", default=datetime.utcnow().strftime("%Y-%m-%d"))
+    parser.add_argument("--start", dest="start", help="First ISO date of a range (inclusive)")
+    parser.add_argument("--end", dest="end", help="Last ISO date of a range (inclusive); defaults to --date")
+    parser.add_argument("--target-mb", type=int, default=128, help="Target output file size in MiB")
+    parser.add_argument("--row-group-rows", type=int, default=64 * 1024, help="Rows per Parquet row group")
+    parser.add_argument("--workers", type=int, default=DEFAULT_FETCH_WORKERS, help="Concurrent downloads")
+    args = parser.parse_args()
+    options = OptimizeOptions(
+        target_file_bytes=args.target_mb * 1024 * 1024,
+        row_group_rows=args.row_group_rows,
+        max_workers=args.workers,
+    )
+    dates = _date_range(args.start, args.end or args.date) if args.start else [args.date]
+    try:
+        settings = PersistenceSettings.from_env()
+        client = _build_client(settings)
+        for target_date in dates:
+            optimize(target_date, settings=settings, client=client, options=options)
+    except (ValueError, S3Error, ManifestConflict) as exc:
+        logger.error("Optimization failed: %s", exc)
+        raise SystemExit(1) from exc
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
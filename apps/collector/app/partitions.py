@@ -0,0 +1,405 @@
+"""Partition maintenance for the range-partitioned ``events`` table."""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from io import BytesIO
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from psycopg import Connection, connect, sql
+
+from .blobs import staging_object
+from .storage import PersistenceSettings
+
+logger = logging.getLogger("collector.partitions")
+
+GRANULARITIES = ("day", "month")
+DEFAULT_PREMAKE_DAYS = 14
+DEFAULT_DELETE_BATCH = 10_000
+PARENT_TABLE = "events"
+DEFAULT_PARTITION = "events_default"
+KEY_TABLE = "event_idempotency_keys"
+BLOB_TABLE = "event_blobs"
+
+# Dropping a partition skips the row trigger that releases blob references on DELETE,
+# so a detached partition's references are released explicitly, in the drop's transaction.
+_RELEASE_PARTITION_BLOBS = """
+UPDATE event_blobs b
+SET refcount = b.refcount - r.n
+FROM (
+    SELECT tenant_id, ref, count(*) AS n
+    FROM {partition}, unnest(blob_refs) AS ref
+    GROUP BY tenant_id, ref
+) r
+WHERE b.tenant_id = r.tenant_id AND b.digest = r.ref
+"""
+
+# Partitions that were detached but not dropped, e.g. when a run was interrupted in
+# between. create_events_partition creates and attaches in one transaction, so an
+# unattached events_p* table is never a partition that is still being created.
+_DETACHED_PARTITIONS = """
+SELECT relname FROM pg_class
+WHERE relkind = 'r' AND NOT relispartition AND relname ~ '^events_p[0-9]+$'
+ORDER BY relname
+"""
+
+_UNUSED_DIGESTS = """
+SELECT digest FROM unnest(%s::text[]) AS u(digest)
+WHERE NOT EXISTS (SELECT 1 FROM event_blobs b WHERE b.digest = u.digest)
+"""
+
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+@dataclass(frozen=True)
+class PartitionInfo:
+    name: str
+    lower: Optional[datetime]
+    upper: Optional[datetime]
+    total_bytes: int = 0
+    estimated_rows: int = 0
+
+    @property
+    def is_default(self) -> bool:
+        return self.lower is None
+
+
+@dataclass(frozen=True)
+class RetentionPlan:
+    drop: List[PartitionInfo]
+    # (tenant_id, cutoff) pairs for tenants whose retention is shorter than the
+    # longest one: their rows are deleted from partitions that are not yet dropped.
+    purge: List[Tuple[str, datetime]]
+    drop_cutoff: datetime
+
+
+def _as_utc(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def partition_bounds(day: date, granularity: str = "day") -> Tuple[str, datetime, datetime]:
+    """Name and ``[lower, upper)`` bounds of the partition containing ``day``."""
+    if granularity == "day":
+        return f"events_p{day:%Y%m%d}", _as_utc(day), _as_utc(day + timedelta(days=1))
+    if granularity == "month":
+        first = day.replace(day=1)
+        following = (first + timedelta(days=32)).replace(day=1)
+        return f"events_p{first:%Y%m}", _as_utc(first), _as_utc(following)
+    raise ValueError(f"Unknown partition granularity {granularity!r}; expected one of {GRANULARITIES}")
+
+
+def planned_partitions(
+    today: date, days_ahead: int = DEFAULT_PREMAKE_DAYS, granularity: str = "day"
+) -> List[Tuple[str, datetime, datetime]]:
+    """Partitions that must exist to cover ``today`` through ``today + days_ahead``."""
+    planned: Dict[str, Tuple[str, datetime, datetime]] = {}
+    for offset in range(days_ahead + 1):
+        bounds = partition_bounds(today + timedelta(days=offset), granularity)
+        planned.setdefault(bounds[0], bounds)
+    return list(planned.values())
+
+
+def _parse_bound(raw: str) -> datetime:
+    parsed = datetime.fromisoformat(raw)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def list_partitions(conn: Connection) -> List[PartitionInfo]:
+    rows = conn.execute(
+        """
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), pg_total_relation_size(c.oid),
+               GREATEST(c.reltuples, 0)::bigint
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        ORDER BY c.relname
+        """,
+        (PARENT_TABLE,),
+    ).fetchall()
+    partitions: List[PartitionInfo] = []
+    for name, bound, total_bytes, estimated_rows in rows:
+        match = _BOUND_RE.search(bound or "")
+        lower = _parse_bound(match.group(1)) if match else None
+        upper = _parse_bound(match.group(2)) if match else None
+        partitions.append(PartitionInfo(name, lower, upper, int(total_bytes or 0), int(estimated_rows or 0)))
+    return partitions
+
+
+def _uncovered(
+    lower: datetime, upper: datetime, covered: Sequence[Tuple[datetime, datetime]]
+) -> List[Tuple[datetime, datetime]]:
+    """Sub-ranges of ``[lower, upper)`` that none of the ``covered`` ranges overlap."""
+    gaps: List[Tuple[datetime, datetime]] = []
+    cursor = lower
+    for start, end in sorted(covered):
+        if end <= cursor or start >= upper:
+            continue
+        if start > cursor:
+            gaps.append((cursor, start))
+        cursor = end
+    if cursor < upper:
+        gaps.append((cursor, upper))
+    return gaps
+
+
+def ensure_partitions(
+    conn: Connection,
+    *,
+    today: Optional[date] = None,
+    days_ahead: int = DEFAULT_PREMAKE_DAYS,
+    granularity: str = "day",
+) -> List[str]:
+    """Create the partitions covering the next ``days_ahead`` days; returns new names.
+
+    Creating partitions ahead of time keeps ``CREATE``/``ATTACH`` off the ingest path
+    and keeps fresh rows out of the default partition. Ranges already covered by
+    partitions of another granularity (e.g. the daily ones ``init.sql`` bootstraps
+    before switching to monthly) are skipped and only the gaps around them created.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    covered = [(p.lower, p.upper) for p in list_partitions(conn) if p.lower is not None and p.upper is not None]
+    created: List[str] = []
+    for planned_name, planned_lower, planned_upper in planned_partitions(today, days_ahead, granularity):
+        for lower, upper in _uncovered(planned_lower, planned_upper, covered):
+            whole = (lower, upper) == (planned_lower, planned_upper)
+            name = planned_name if whole else f"events_p{lower:%Y%m%d}"
+            row = conn.execute("SELECT create_events_partition(%s, %s, %s)", (name, lower, upper)).fetchone()
+            covered.append((lower, upper))
+            if row and row[0]:
+                created.append(name)
+                logger.info("Created partition %s [%s, %s)", name, lower.isoformat(), upper.isoformat())
+    return created
+
+
+def plan_retention(
+    partitions: Sequence[PartitionInfo],
+    tenant_retention: Dict[str, int],
+    default_days: int,
+    now: datetime,
+) -> RetentionPlan:
+    """Decide which partitions to drop and which tenants need row-level purges.
+
+    Partitions are shared by all tenants, so a partition is dropped only once it is
+    older than the longest retention in effect. Tenants with a shorter retention have
+    their expired rows deleted from the partitions that are still kept.
+    """
+    longest = max([default_days, *tenant_retention.values()])
+    drop_cutoff = now - timedelta(days=longest)
+    drop = [p for p in partitions if p.upper is not None and p.upper <= drop_cutoff]
+    purge_days = {tenant: days for tenant, days in tenant_retention.items() if days < longest}
+    purge = [(tenant, now - timedelta(days=days)) for tenant, days in sorted(purge_days.items())]
+    if default_days < longest:
+        # "*" stands for every tenant without an explicit retention_days.
+        purge.append(("*", now - timedelta(days=default_days)))
+    return RetentionPlan(drop=drop, purge=purge, drop_cutoff=drop_cutoff)
+
+
+def _tenant_retention(conn: Connection) -> Dict[str, int]:
+    rows = conn.execute("SELECT id::text, retention_days FROM tenants WHERE retention_days IS NOT NULL").fetchall()
+    return {tenant_id: int(days) for tenant_id, days in rows}
+
+
+def _delete_in_batches(conn: Connection, table: str, where: sql.Composable, params: Iterable, batch: int) -> int:
+    # Small batches keep each statement's locks and WAL burst short next to live ingest.
+    query = sql.SQL(
+        "DELETE FROM {table} WHERE ctid = ANY(ARRAY(SELECT ctid FROM {table} WHERE {where} LIMIT {batch}))"
+    ).format(table=sql.Identifier(table), where=where, batch=sql.Literal(batch))
+    params = tuple(params)
+    total = 0
+    while True:
+        deleted = conn.execute(query, params).rowcount
+        total += max(deleted, 0)
+        if deleted < batch:
+            return total
+
+
+def _purge_unreferenced_blobs(conn: Connection, batch: int) -> Set[str]:
+    """Delete blob bodies no event references any more; returns their digests."""
+    query = sql.SQL(
+        "DELETE FROM {table} WHERE ctid = ANY(ARRAY(SELECT ctid FROM {table} WHERE refcount <= 0 LIMIT {batch}))"
+        " RETURNING digest"
+    ).format(table=sql.Identifier(BLOB_TABLE), batch=sql.Literal(batch))
+    digests: Set[str] = set()
+    while True:
+        rows = conn.execute(query).fetchall()
+        digests.update(digest for (digest,) in rows)
+        if len(rows) < batch:
+            return digests
+
+
+def sweep_blob_objects(conn: Connection, client: Any, settings: PersistenceSettings, digests: Iterable[str]) -> int:
+    """Remove the staged MinIO bodies of ``digests`` that no tenant references any more.
+
+    Staged bodies are shared across tenants, so a digest is only removed once no
+    ``event_blobs`` row is left for it. Ingest writes the body after committing its
+    row, so a digest that reappears while the sweep runs is staged again from Postgres
+    afterwards: its own write may have landed before the removal.
+    """
+    candidates = sorted(digests)
+    if not candidates:
+        return 0
+    unused = [digest for (digest,) in conn.execute(_UNUSED_DIGESTS, (candidates,)).fetchall()]
+    for digest in unused:
+        client.remove_object(settings.minio_bucket, staging_object(settings.minio_prefix, digest))
+    revived = conn.execute(
+        "SELECT DISTINCT ON (digest) digest, body FROM event_blobs WHERE digest = ANY(%s)", (unused,)
+    ).fetchall()
+    for digest, body in revived:
+        data = body.encode("utf-8")
+        client.put_object(
+            bucket_name=settings.minio_bucket,
+            object_name=staging_object(settings.minio_prefix, digest),
+            data=BytesIO(data),
+            length=len(data),
+            content_type="text/plain; charset=utf-8",
+        )
+    return len(unused) - len(revived)
+
+
+def _release_and_drop(conn: Connection, name: str) -> None:
+    with conn.transaction():
+        conn.execute(sql.SQL(_RELEASE_PARTITION_BLOBS).format(partition=sql.Identifier(name)))
+        conn.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(name)))
+
+
+def _tenant_filter(
+    column: str, tenant: str, cutoff: datetime, tenant_days: Dict[str, int]
+) -> Tuple[sql.Composable, Tuple]:
+    older = sql.SQL("{} < %s").format(sql.Identifier(column))
+    if tenant == "*":
+        return sql.SQL("{} AND NOT (tenant_id = ANY(%s::uuid[]))").format(older), (cutoff, list(tenant_days))
+    return sql.SQL("{} AND tenant_id = %s").format(older), (cutoff, tenant)
+
+
+def _purge_targets(partitions: Sequence[PartitionInfo], cutoff: datetime) -> List[str]:
+    """Partitions that can hold rows older than ``cutoff``."""
+    return [p.name for p in partitions if p.is_default or (p.lower is not None and p.lower < cutoff)]
+
+
+def apply_retention(
+    conn: Connection,
+    *,
+    default_days: int,
+    now: Optional[datetime] = None,
+    dry_run: bool = False,
+    batch_size: int = DEFAULT_DELETE_BATCH,
+    client: Any = None,
+    settings: Optional[PersistenceSettings] = None,
+) -> RetentionPlan:
+    """Detach and drop expired partitions, purge rows past per-tenant retention, then unreferenced blobs.
+
+    With a MinIO ``client`` and its ``settings`` the staged bodies of purged blobs are
+    removed too; without one they stay in the bucket.
+    """
+    now = now or datetime.now(timezone.utc)
+    partitions = list_partitions(conn)
+    tenant_days = _tenant_retention(conn)
+    plan = plan_retention(partitions, tenant_days, default_days, now)
+    if dry_run:
+        return plan
+
+    for (name,) in conn.execute(_DETACHED_PARTITIONS).fetchall():
+        _release_and_drop(conn, name)
+        logger.info("Dropped partition %s left detached by an earlier run", name)
+    for partition in plan.drop:
+        # DETACH locks ``events`` ACCESS EXCLUSIVE, blocking ingest, so it commits on its
+        # own; releasing the references scans the whole partition and runs afterwards.
+        with conn.transaction():
+            conn.execute(
+                sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+                    sql.Identifier(PARENT_TABLE), sql.Identifier(partition.name)
+                )
+            )
+        _release_and_drop(conn, partition.name)
+        logger.info("Dropped partition %s (%s bytes)", partition.name, partition.total_bytes)
+
+    remaining = [p for p in partitions if p not in plan.drop]
+    removed = _delete_in_batches(
+        conn, DEFAULT_PARTITION, sql.SQL("occurred_at < %s"), (plan.drop_cutoff,), batch_size
+    )
+    removed_keys = _delete_in_batches(conn, KEY_TABLE, sql.SQL("created_at < %s"), (plan.drop_cutoff,), batch_size)
+    for tenant, cutoff in plan.purge:
+        # Deleting partition by partition lets each statement prune to a single table.
+        where, params = _tenant_filter("occurred_at", tenant, cutoff, tenant_days)
+        for name in _purge_targets(remaining, cutoff):
+            removed += _delete_in_batches(conn, name, where, params, batch_size)
+        where, params = _tenant_filter("created_at", tenant, cutoff, tenant_days)
+        removed_keys += _delete_in_batches(conn, KEY_TABLE, where, params, batch_size)
+    # Deleted rows released their references through the trigger; drop what is unused.
+    purged_digests = _purge_unreferenced_blobs(conn, batch_size)
+    removed_objects = 0
+    if client is not None and settings is not None:
+        removed_objects = sweep_blob_objects(conn, client, settings, purged_digests)
+    logger.info(
+        "Retention applied: dropped=%s purged_rows=%s purged_keys=%s purged_blobs=%s removed_blob_objects=%s",
+        len(plan.drop),
+        removed,
+        removed_keys,
+        len(purged_digests),
+        removed_objects,
+    )
+    return plan
+
+
+def format_report(partitions: Sequence[PartitionInfo]) -> str:
+    lines = [f"{'partition':<20} {'from':<26} {'to':<26} {'rows~':>12} {'size':>12}"]
+    for p in partitions:
+        lower = p.lower.isoformat() if p.lower else "DEFAULT"
+        upper = p.upper.isoformat() if p.upper else ""
+        lines.append(f"{p.name:<20} {lower:<26} {upper:<26} {p.estimated_rows:>12} {_human(p.total_bytes):>12}")
+    total = sum(p.total_bytes for p in partitions)
+    lines.append(f"{len(partitions)} partitions, {_human(total)} total")
+    return "\n".join(lines)
+
+
+def _human(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TiB"
+
+
+def main() -> None:  # pragma: no cover - CLI wiring
+    parser = argparse.ArgumentParser(description="Maintain partitions of the events table")
+    parser.add_argument("command", choices=("ensure", "retention", "report", "all"))
+    settings = PersistenceSettings.from_env()
+    parser.add_argument("--days-ahead", type=int, default=DEFAULT_PREMAKE_DAYS, help="Days of partitions to pre-create")
+    parser.add_argument("--granularity", choices=GRANULARITIES, default=settings.partition_granularity)
+    parser.add_argument(
+        "--retention-days", type=int, default=settings.retention_days, help="Default retention for tenants without one"
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_DELETE_BATCH, help="Rows per purge DELETE")
+    parser.add_argument("--dry-run", action="store_true", help="Print the retention plan without applying it")
+    args = parser.parse_args()
+
+    client = None
+    if settings.minio_enabled and settings.minio_endpoint and settings.minio_bucket:
+        from .compaction import _build_client
+
+        client = _build_client(settings)
+    with connect(settings.postgres_dsn, autocommit=True) as conn:
+        if args.command in ("ensure", "all"):
+            ensure_partitions(conn, days_ahead=args.days_ahead, granularity=args.granularity)
+        if args.command in ("retention", "all"):
+            plan = apply_retention(
+                conn,
+                default_days=args.retention_days,
+                dry_run=args.dry_run,
+                batch_size=args.batch_size,
+                client=client,
+                settings=settings,
+            )
+            if args.dry_run:
+                print(f"drop (older than {plan.drop_cutoff.isoformat()}): {[p.name for p in plan.drop]}")
+                print(f"purge: {[(tenant, cutoff.isoformat()) for tenant, cutoff in plan.purge]}")
+        if args.command in ("report", "all"):
+            print(format_report(list_partitions(conn)))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -3,58 +3,157 @@
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass
-from typing import Any, Iterable
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Mapping, Optional
 
 EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
 PHONE_RE = re.compile(r"(?:\+?\d{1,3}[\s-]?)?(?:\(\d{3}\)|\d{3})[\s-]?\d{3}[\s-]?\d{4}")
-CREDIT_CARD_RE = re.compile(r"\b(?:\d[ -]*?){13,16}\b")
+# Equivalent to ``\b(?:\d[ -]*?){13,16}\b``: separators and digits are disjoint, so
+# every separator run up to the 13th digit is forced. After that the lazy separators
+# never win, because stopping before a separator always satisfies ``\b``; only
+# contiguous digits can extend the match. Anchoring each repetition on a digit removes
+# the lazy-quantifier backtracking.
+CREDIT_CARD_RE = re.compile(r"\b\d(?:[ -]*\d){12}\d{0,3}\b")
 SSN_RE = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
 
 PATTERNS = (EMAIL_RE, PHONE_RE, CREDIT_CARD_RE, SSN_RE)
 
+# One pass over the string answers "can anything match?"; most strings are clean.
+COMBINED_RE = re.compile("|".join(f"(?:{pattern.pattern})" for pattern in PATTERNS))
+
+# Minimum digits each numeric pattern needs before it can possibly match.
+_MIN_DIGITS = ((PHONE_RE, 10), (CREDIT_CARD_RE, 13), (SSN_RE, 9))
+_MIN_ANY_DIGITS = min(count for _, count in _MIN_DIGITS)
+_STRIP_DIGITS = str.maketrans("", "", "0123456789")
+
+
+def _digit_count(value: str) -> int:
+    # str.translate runs in C; ``sum(c.isdigit() ...)`` would be an interpreted loop.
+    if value.isascii():
+        return len(value) - len(value.translate(_STRIP_DIGITS))
+    # ``\d`` matches every Unicode decimal digit (fullwidth, Arabic-Indic, ...), and
+    # str.isdecimal tests exactly that category, so the prefilter never undercounts.
+    return sum(map(str.isdecimal, value))
+
 
 @dataclass(frozen=True)
 class ScrubConfig:
     enabled: bool = True
     tenant_allowlist: tuple[str, ...] = ()
     redaction_token: str = "[REDACTED]"
+    # tenant -> field names or dotted paths whose values are left untouched; "*" applies to all tenants.
+    tenant_skip_fields: Mapping[str, frozenset[str]] = field(default_factory=dict)
 
 
 class PayloadScrubber:
     def __init__(self, config: ScrubConfig) -> None:
         self._config = config
+        self._token = config.redaction_token
 
     def scrub(self, payload: Any, tenant_id: str | None = None) -> Any:
         if not self._config.enabled:
             return payload
         if tenant_id and tenant_id in self._config.tenant_allowlist:
             return payload
+        skip = self._skip_fields(tenant_id)
+        if skip:
+            return self._scrub_with_skips(payload, skip, "")
         return self._scrub_recursive(payload)
 
+    def _skip_fields(self, tenant_id: str | None) -> frozenset[str]:
+        skips = self._config.tenant_skip_fields
+        if not skips:
+            return frozenset()
+        return skips.get("*", frozenset()) | (skips.get(tenant_id, frozenset()) if tenant_id else frozenset())
+
     def _scrub_recursive(self, value: Any) -> Any:
+        """Scrub ``value``, returning the original object when nothing changed."""
         if isinstance(value, str):
             return self._scrub_string(value)
         if isinstance(value, dict):
-            return {k: self._scrub_recursive(v) for k, v in value.items()}
-        if isinstance(value, list):
-            return [self._scrub_recursive(item) for item in value]
-        if isinstance(value, tuple):
-            return tuple(self._scrub_recursive(item) for item in value)
+            changed: Optional[dict] = None
+            for key, item in value.items():
+                scrubbed = self._scrub_recursive(item)
+                if scrubbed is not item:
+                    if changed is None:
+                        changed = dict(value)
+                    changed[key] = scrubbed
+            return value if changed is None else changed
+        if isinstance(value, (list, tuple)):
+            items: Optional[list] = None
+            for index, item in enumerate(value):
+                scrubbed = self._scrub_recursive(item)
+                if scrubbed is not item:
+                    if items is None:
+                        items = list(value)
+                    items[index] = scrubbed
+            if items is None:
+                return value
+            return items if isinstance(value, list) else tuple(items)
         return value
 
+    def _scrub_with_skips(self, value: Any, skip: frozenset[str], path: str) -> Any:
+        if isinstance(value, dict):
+            changed: Optional[dict] = None
+            for key, item in value.items():
+                child = f"{path}.{key}" if path else str(key)
+                if key in skip or child in skip:
+                    continue
+                scrubbed = self._scrub_with_skips(item, skip, child)
+                if scrubbed is not item:
+                    if changed is None:
+                        changed = dict(value)
+                    changed[key] = scrubbed
+            return value if changed is None else changed
+        if isinstance(value, (list, tuple)):
+            items: Optional[list] = None
+            for index, item in enumerate(value):
+                scrubbed = self._scrub_with_skips(item, skip, path)
+                if scrubbed is not item:
+                    if items is None:
+                        items = list(value)
+                    items[index] = scrubbed
+            if items is None:
+                return value
+            return items if isinstance(value, list) else tuple(items)
+        return self._scrub_recursive(value)
+
     def _scrub_string(self, value: str) -> str:
+        has_at = "@" in value
+        digits = _digit_count(value)
+        if not has_at and digits < _MIN_ANY_DIGITS:
+            return value
+        # Strings containing "@" usually hold an address, so skip straight to substitution.
+        if not has_at and COMBINED_RE.search(value) is None:
+            return value
+        # Something can match: apply the patterns in their original order so results are
+        # identical to sequential substitution, skipping those that cannot match.
         scrubbed = value
-        for pattern in PATTERNS:
-            scrubbed = pattern.sub(self._config.redaction_token, scrubbed)
+        if has_at:
+            scrubbed, replaced = EMAIL_RE.subn(self._token, scrubbed)
+            if replaced:
+                digits = _digit_count(scrubbed)
+        for pattern, min_digits in _MIN_DIGITS:
+            if digits < min_digits:
+                continue
+            scrubbed, replaced = pattern.subn(self._token, scrubbed)
+            if replaced:
+                digits = _digit_count(scrubbed)
         return scrubbed
 
 
-def build_scrubber(*, enabled: bool, allowlist: Iterable[str], redaction_token: str) -> PayloadScrubber:
+def build_scrubber(
+    *,
+    enabled: bool,
+    allowlist: Iterable[str],
+    redaction_token: str,
+    skip_fields: Mapping[str, Iterable[str]] | None = None,
+) -> PayloadScrubber:
     config = ScrubConfig(
         enabled=enabled,
         tenant_allowlist=tuple(allowlist),
         redaction_token=redaction_token,
+        tenant_skip_fields={tenant: frozenset(fields) for tenant, fields in (skip_fields or {}).items()},
     )
     return PayloadScrubber(config=config)
 
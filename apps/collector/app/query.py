@@ -0,0 +1,337 @@
+"""Time-range event queries spanning hot Postgres rows and cold compacted Parquet."""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional
+from urllib.parse import quote
+from uuid import uuid4
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from psycopg.rows import dict_row
+from pyarrow import fs as pafs
+
+from .auth import TenantIdentity
+from .blobs import fetch_referenced, rehydrate
+from .columnar import COMMON_FIELDS, RAW_PAYLOAD_FIELD
+from .compaction import Minio, S3Error, _RangeReader, load_manifest
+from .storage import PersistenceSettings
+
+logger = logging.getLogger("collector.query")
+
+# Compaction partitions by ingestion date while queries filter on occurred_at. Rows are
+# searched in the dt partitions up to this far on either side of their occurred_at day.
+LATE_ARRIVAL = timedelta(days=1)
+DEFAULT_BATCH_ROWS = 1000
+
+_COMMON = {f.name: f for f in COMMON_FIELDS}
+_PARTITIONING = ds.partitioning(
+    pa.schema([("dt", pa.string()), ("event_type", pa.string()), ("tenant_id", pa.string())]),
+    flavor="hive",
+)
+# Columns every compacted file carries, whatever its event type; the hive path supplies the rest.
+_SCAN_SCHEMA = pa.schema(
+    [_COMMON["occurred_at"], _COMMON["policy_id"], RAW_PAYLOAD_FIELD, *_PARTITIONING.schema]
+)
+
+
+@dataclass(frozen=True)
+class EventQuery:
+    tenant: TenantIdentity
+    start: datetime
+    end: datetime
+    event_type: Optional[str] = None
+    policy_id: Optional[str] = None
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class PostgresEventSource:
+    """Streams rows from ``events`` through a named server-side cursor."""
+
+    def __init__(self, connection: Callable[[], ContextManager], batch_rows: int = DEFAULT_BATCH_ROWS) -> None:
+        self._connection = connection
+        self._batch_rows = batch_rows
+
+    def scan(self, query: EventQuery, start: datetime, end: datetime) -> Iterator[dict]:
+        clauses = ["tenant_id = %s", "occurred_at >= %s", "occurred_at < %s"]
+        params: List[object] = [query.tenant.tenant_uuid, start, end]
+        if query.event_type:
+            clauses.append("event_type = %s")
+            params.append(query.event_type)
+        if query.policy_id:
+            clauses.append("policy_id = %s")
+            params.append(query.policy_id)
+        statement = (
+            "SELECT event_type, policy_id, occurred_at, payload FROM events WHERE "
+            + " AND ".join(clauses)
+            + " ORDER BY occurred_at, id"
+        )
+        with self._connection() as conn:
+            # Named cursors only live inside a transaction; pooled connections are autocommit.
+            with conn.transaction():
+                with conn.cursor(name=f"events_query_{uuid4().hex}", row_factory=dict_row) as cur:
+                    cur.itersize = self._batch_rows
+                    cur.execute(statement, params)
+                    while True:
+                        rows = cur.fetchmany(self._batch_rows)
+                        if not rows:
+                            return
+                        # One lookup per batch restores extracted texts (see blobs.py).
+                        bodies = fetch_referenced(conn, query.tenant.tenant_uuid, [row["payload"] for row in rows])
+                        for row in rows:
+                            yield {
+                                "source": "postgres",
+                                "event_type": row["event_type"],
+                                "tenant_id": query.tenant.tenant_slug,
+                                "policy_id": row["policy_id"],
+                                "occurred_at": row["occurred_at"],
+                                "payload": rehydrate(row["payload"], bodies) if bodies else row["payload"],
+                            }
+
+
+class MinioFileSystemHandler(pafs.FileSystemHandler):
+    """Read-only pyarrow filesystem over one MinIO bucket.
+
+    Files are opened through ranged GETs, so dataset scans fetch only the footers, row
+    groups and columns that survive predicate and projection pushdown.
+    """
+
+    def __init__(self, client: Minio, bucket: Optional[str]) -> None:
+        self._client = client
+        self._bucket = bucket
+
+    def get_type_name(self) -> str:
+        return "minio"
+
+    def normalize_path(self, path: str) -> str:
+        return path.lstrip("/")
+
+    def equals(self, other: object) -> bool:
+        return isinstance(other, MinioFileSystemHandler) and other._bucket == self._bucket
+
+    def get_file_info(self, paths: List[str]) -> List[pafs.FileInfo]:
+        infos = []
+        for path in paths:
+            try:
+                size = self._client.stat_object(self._bucket, path).size
+            except S3Error:
+                infos.append(pafs.FileInfo(path, pafs.FileType.NotFound))
+                continue
+            infos.append(pafs.FileInfo(path, pafs.FileType.File, size=size))
+        return infos
+
+    def get_file_info_selector(self, selector: pafs.FileSelector) -> List[pafs.FileInfo]:
+        prefix = selector.base_dir.rstrip("/") + "/"
+        objects = self._client.list_objects(self._bucket, prefix=prefix, recursive=selector.recursive)
+        return [pafs.FileInfo(obj.object_name, pafs.FileType.File) for obj in objects]
+
+    def open_input_file(self, path: str) -> pa.PythonFile:
+        return pa.PythonFile(_RangeReader(self._client, self._bucket, path), mode="r")
+
+    def open_input_stream(self, path: str) -> pa.PythonFile:
+        return self.open_input_file(path)
+
+    def _read_only(self, *args, **kwargs):
+        raise NotImplementedError("MinioFileSystemHandler is read-only")
+
+    create_dir = delete_dir = delete_dir_contents = delete_root_dir_contents = _read_only
+    delete_file = move = copy_file = open_output_stream = open_append_stream = _read_only
+
+
+class ParquetEventSource:
+    """Scans compacted Parquet through ``pyarrow.dataset`` with pushdown.
+
+    File lists come from the per-date manifests, so a concurrent ``optimize`` swap is
+    never observed half-done. Tenant and event type prune whole directories; the time
+    and policy predicates skip row groups using Parquet statistics.
+    """
+
+    def __init__(self, client: Minio, settings: PersistenceSettings, batch_rows: int = DEFAULT_BATCH_ROWS) -> None:
+        self._client = client
+        self._settings = settings
+        self._filesystem = pafs.PyFileSystem(MinioFileSystemHandler(client, settings.minio_bucket))
+        self._base_dir = f"{settings.minio_prefix}/parquet"
+        self._batch_rows = batch_rows
+
+    def _files(self, day: date, query: EventQuery) -> List[str]:
+        # Prune by path before pyarrow sees the list: dataset discovery stats every file.
+        tenant_dir = f"/tenant_id={quote(query.tenant.tenant_slug, safe='')}/"
+        type_dir = f"/event_type={quote(query.event_type, safe='')}/" if query.event_type else "/"
+        files = load_manifest(self._client, self._settings, day.isoformat()).files
+        return [name for name in files if tenant_dir in name and type_dir in name]
+
+    def _filter(self, query: EventQuery, start: datetime, end: datetime) -> ds.Expression:
+        expression = (
+            (ds.field("tenant_id") == query.tenant.tenant_slug)
+            & (ds.field("occurred_at") >= pa.scalar(start, _COMMON["occurred_at"].type))
+            & (ds.field("occurred_at") < pa.scalar(end, _COMMON["occurred_at"].type))
+        )
+        if query.event_type:
+            expression &= ds.field("event_type") == query.event_type
+        if query.policy_id:
+            expression &= ds.field("policy_id").cast(pa.string()) == query.policy_id
+        return expression
+
+    def _scan_day(self, day: date, query: EventQuery, expression: ds.Expression) -> Iterator[pa.RecordBatch]:
+        files = self._files(day, query)
+        if not files:
+            return
+        dataset = ds.dataset(
+            files,
+            schema=_SCAN_SCHEMA,
+            format="parquet",
+            filesystem=self._filesystem,
+            partitioning=_PARTITIONING,
+            partition_base_dir=self._base_dir,
+        )
+        for batch in dataset.to_batches(
+            columns=["event_type", "policy_id", "occurred_at", "raw_payload"],
+            filter=expression,
+            batch_size=self._batch_rows,
+        ):
+            if batch.num_rows:
+                yield batch
+
+    def scan(self, query: EventQuery, start: datetime, end: datetime, limit: Optional[int] = None) -> Iterator[dict]:
+        """Yield rows in ``occurred_at`` order while holding at most a few days in memory.
+
+        Each dt partition is read once, batch by batch; a day's rows are released as soon
+        as every dt partition that can still contain that day (``LATE_ARRIVAL``) has been
+        scanned. With a ``limit`` each pending day keeps only its earliest rows still
+        needed, and scanning stops once ``limit`` rows have been yielded.
+        """
+        expression = self._filter(query, start, end)
+        pending: Dict[date, _DayBuffer] = {}
+        remaining = limit
+        first_day = start.date() - LATE_ARRIVAL
+        last_day = (end - timedelta(microseconds=1)).date() + LATE_ARRIVAL
+        day = first_day
+        while day <= last_day:
+            for batch in self._scan_day(day, query, expression):
+                occurred = pc.cast(batch.column("occurred_at"), pa.date32())
+                for occurred_day in pc.unique(occurred).to_pylist():
+                    mask = pc.equal(occurred, pa.scalar(occurred_day, pa.date32()))
+                    pending.setdefault(occurred_day, _DayBuffer(remaining)).add(batch.filter(mask))
+            for complete in sorted(d for d in pending if d + LATE_ARRIVAL <= day):
+                for row in self._emit(query, pending.pop(complete).rows()):
+                    yield row
+                    if remaining is not None:
+                        remaining -= 1
+                        if remaining == 0:
+                            return
+                for buffer in pending.values():
+                    buffer.cap = remaining
+            day += timedelta(days=1)
+        for leftover in sorted(pending):
+            for row in self._emit(query, pending.pop(leftover).rows()):
+                yield row
+                if remaining is not None:
+                    remaining -= 1
+                    if remaining == 0:
+                        return
+
+    def _emit(self, query: EventQuery, ordered: pa.Table) -> Iterator[dict]:
+        for batch in ordered.to_batches(max_chunksize=self._batch_rows):
+            for row in batch.to_pylist():
+                yield {
+                    "source": "parquet",
+                    "event_type": row["event_type"],
+                    "tenant_id": query.tenant.tenant_slug,
+                    "policy_id": row["policy_id"],
+                    "occurred_at": row["occurred_at"],
+                    "payload": json.loads(row["raw_payload"]) if row["raw_payload"] else {},
+                }
+
+
+class _DayBuffer:
+    """Matching rows of one ``occurred_at`` day, trimmed to the earliest ``cap`` rows.
+
+    Batches are sorted and truncated once twice ``cap`` rows are buffered, so memory
+    stays proportional to the query limit rather than to the day's volume.
+    """
+
+    def __init__(self, cap: Optional[int]) -> None:
+        self.cap = cap
+        self._batches: List[pa.RecordBatch] = []
+        self._rows = 0
+
+    def add(self, batch: pa.RecordBatch) -> None:
+        self._batches.append(batch)
+        self._rows += batch.num_rows
+        if self.cap is not None and self._rows > 2 * self.cap:
+            trimmed = self.rows()
+            self._batches = trimmed.to_batches()
+            self._rows = trimmed.num_rows
+
+    def rows(self) -> pa.Table:
+        merged = pa.Table.from_batches(self._batches)
+        ordered = merged.take(pc.sort_indices(merged, sort_keys=[("occurred_at", "ascending")]))
+        return ordered.slice(0, self.cap) if self.cap is not None else ordered
+
+
+class HybridEventQuery:
+    """Routes the recent window to Postgres and everything older to Parquet.
+
+    The cold range ends exactly where the hot range begins, so the concatenated stream
+    is ordered by ``occurred_at`` and rows are never returned twice, even before old
+    partitions are evicted from Postgres. Without a cold source Postgres serves it all.
+    Ranges longer than ``max_span`` are rejected before either store is touched.
+    """
+
+    def __init__(
+        self,
+        hot: PostgresEventSource,
+        cold: Optional[ParquetEventSource],
+        hot_window: timedelta,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        max_span: Optional[timedelta] = None,
+    ) -> None:
+        self._hot = hot
+        self._cold = cold
+        self._hot_window = hot_window
+        self._clock = clock
+        self._max_span = max_span
+
+    def boundary(self) -> datetime:
+        return self._clock() - self._hot_window
+
+    def run(self, query: EventQuery, limit: Optional[int] = None) -> Iterator[dict]:
+        start, end = _utc(query.start), _utc(query.end)
+        if start >= end:
+            raise ValueError("start must be before end")
+        if self._max_span is not None and end - start > self._max_span:
+            raise ValueError(f"Range exceeds the maximum of {self._max_span.days} days")
+        boundary = self.boundary() if self._cold is not None else start
+        stream: Iterator[dict] = iter(())
+        if start < boundary:
+            cold_end = min(end, boundary)
+            logger.debug("Cold scan tenant=%s [%s, %s)", query.tenant.tenant_slug, start, cold_end)
+            stream = self._cold.scan(query, start, cold_end, limit=limit)  # type: ignore[union-attr]
+        if end > boundary:
+            hot_start = max(start, boundary)
+            stream = _chain(stream, lambda: self._hot.scan(query, hot_start, end))
+        return islice(stream, limit) if limit is not None else stream
+
+
+def _chain(first: Iterator[dict], second: Callable[[], Iterator[dict]]) -> Iterator[dict]:
+    # The hot scan is opened lazily so a limit satisfied by cold rows never borrows a connection.
+    yield from first
+    yield from second()
+
+
+__all__ = [
+    "EventQuery",
+    "HybridEventQuery",
+    "MinioFileSystemHandler",
+    "ParquetEventSource",
+    "PostgresEventSource",
+]
@@ -0,0 +1,533 @@
+"""Hourly per-policy rollups maintained incrementally from an ``events.id`` watermark.
+
+``RollupWorker`` folds events with ids above the watermark into
+``policy_hourly_stats`` rows keyed by ``(tenant, policy, hour)``. The rows hold
+counts, latency sums and sketches, token and dollar costs, feedback tallies and
+shadow ``comparison.match`` counts. The upsert and the watermark advance commit
+together, so every event is counted exactly once. ``/v1/stats/policies`` reads
+the rows by primary key and never touches ``events``.
+
+Ids are handed out before the inserting statement commits. The worker therefore
+stops at the sequence position observed at least ``settle_seconds`` earlier, so
+an insert still in flight is not stepped over.
+
+Feedback and task results carry no policy. They are credited to the policy that
+served the interaction, found through its non-shadow ``interaction.output``
+event. Events whose interaction has not been seen are counted under
+``UNATTRIBUTED``. Latency and cost come from ``interaction.output`` events,
+shadow outputs included; ``interactions`` counts ``interaction.create`` events.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from psycopg import connect
+
+from .metrics import ROLLUP_EVENTS, ROLLUP_FAILURES
+from .storage import PersistenceSettings
+
+logger = logging.getLogger("collector.rollups")
+
+ROLLUP_NAME = "policy_hourly_stats"
+UNATTRIBUTED = ""
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_SETTLE_SECONDS = 5.0
+MAX_STATS_HOURS = 31 * 24
+
+# Latency buckets are powers of GAMMA, so any quantile is within 1% of a recorded
+# value whatever the range (DDSketch); sketches merge by adding bucket counts.
+SKETCH_RELATIVE_ACCURACY = 0.01
+_GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+
+class LatencySketch:
+    """Mergeable latency histogram over logarithmic buckets; values are milliseconds.
+
+    Bucket ``i`` holds values in ``(GAMMA**(i-1), GAMMA**i]``; values up to 1 ms share
+    bucket 0. Serialized as ``{"<bucket>": count}``, the JSONB form that
+    ``merge_latency_sketch()`` adds in Postgres.
+    """
+
+    def __init__(self, buckets: Optional[Dict[int, int]] = None) -> None:
+        self.buckets: Dict[int, int] = dict(buckets or {})
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def add(self, value: float, count: int = 1) -> None:
+        index = math.ceil(math.log(value) / _LOG_GAMMA) if value > 1 else 0
+        self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def merge(self, other: "LatencySketch") -> None:
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                break
+        return 1.0 if index == 0 else 2 * _GAMMA**index / (_GAMMA + 1)
+
+    def to_json(self) -> Dict[str, int]:
+        return {str(index): count for index, count in self.buckets.items()}
+
+    @classmethod
+    def from_json(cls, data: Optional[Dict[str, Any]]) -> "LatencySketch":
+        return cls({int(index): int(count) for index, count in (data or {}).items()})
+
+
+@dataclass
+class PolicyStats:
+    """Additive counters for one ``(tenant, policy, hour)``, or a merge of several."""
+
+    interactions: int = 0
+    outputs: int = 0
+    shadow_outputs: int = 0
+    latency_count: int = 0
+    latency_sum_ms: float = 0.0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    cost_dollars: float = 0.0
+    feedback: int = 0
+    thumbs_up: int = 0
+    thumbs_down: int = 0
+    rating_count: int = 0
+    rating_sum: int = 0
+    escalations: int = 0
+    shadow_comparisons: int = 0
+    shadow_matches: int = 0
+    task_results: int = 0
+    task_correct: int = 0
+    latency_sketch: LatencySketch = field(default_factory=LatencySketch)
+
+    def merge(self, other: "PolicyStats") -> None:
+        for name in COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.latency_sketch.merge(other.latency_sketch)
+
+    def summary(self) -> Dict[str, Any]:
+        sketch = self.latency_sketch
+        votes = self.thumbs_up + self.thumbs_down
+        return {
+            "interactions": self.interactions,
+            "outputs": self.outputs,
+            "shadow_outputs": self.shadow_outputs,
+            "latency_ms": {
+                "count": self.latency_count,
+                "mean": _ratio(self.latency_sum_ms, self.latency_count),
+                "p50": sketch.quantile(0.5),
+                "p95": sketch.quantile(0.95),
+                "p99": sketch.quantile(0.99),
+            },
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "cost_dollars": self.cost_dollars,
+            "feedback": {
+                "count": self.feedback,
+                "thumbs_up": self.thumbs_up,
+                "thumbs_down": self.thumbs_down,
+                "thumbs_up_rate": _ratio(self.thumbs_up, votes),
+                "mean_rating": _ratio(self.rating_sum, self.rating_count),
+                "escalations": self.escalations,
+            },
+            "shadow": {
+                "comparisons": self.shadow_comparisons,
+                "matches": self.shadow_matches,
+                "match_rate": _ratio(self.shadow_matches, self.shadow_comparisons),
+            },
+            "tasks": {
+                "results": self.task_results,
+                "correct": self.task_correct,
+                "accuracy": _ratio(self.task_correct, self.task_results),
+            },
+        }
+
+
+COUNTERS: Tuple[str, ...] = tuple(f.name for f in fields(PolicyStats) if f.name != "latency_sketch")
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return numerator / denominator if denominator else None
+
+
+class EventRow(NamedTuple):
+    """The columns and payload fields (as JSON text) a rollup needs, extracted by Postgres."""
+
+    id: int
+    tenant_id: str
+    event_type: str
+    policy_id: Optional[str]
+    occurred_at: datetime
+    interaction_id: Optional[str]
+    ms_total: Optional[str]
+    tokens_in: Optional[str]
+    tokens_out: Optional[str]
+    dollars: Optional[str]
+    status: Optional[str]
+    match: Optional[str]
+    thumb: Optional[str]
+    rating: Optional[str]
+    escalated: Optional[str]
+    correct: Optional[str]
+
+
+StatsKey = Tuple[str, str, datetime]
+
+# Only the fields below leave Postgres; payload text, chunks and blobs stay behind.
+# Values are read as text and converted in Python, so one malformed payload cannot
+# fail the batch on a cast.
+_SELECT_EVENTS = """
+SELECT id, tenant_id::text, event_type, policy_id, occurred_at,
+       payload->>'interaction_id',
+       payload->'timings'->>'ms_total',
+       payload->'costs'->>'tokens_in',
+       payload->'costs'->>'tokens_out',
+       payload->'costs'->>'dollars',
+       payload->'version'->>'status',
+       payload->'version'->'comparison'->>'match',
+       payload->'explicit'->>'thumb',
+       payload->'explicit'->>'rating',
+       payload->'implicit'->>'escalated',
+       payload->'label'->>'correct'
+FROM events
+WHERE id > %s AND id <= %s
+ORDER BY id
+LIMIT %s
+"""
+
+_SERVED_BY = """
+SELECT DISTINCT ON (payload->>'interaction_id') payload->>'interaction_id', policy_id
+FROM events
+WHERE tenant_id = %s AND event_type = 'interaction.output'
+  AND payload->>'interaction_id' = ANY(%s)
+  AND payload->'version'->>'status' IS DISTINCT FROM 'shadow'
+ORDER BY payload->>'interaction_id', id
+"""
+
+_SEQUENCE_POSITION = "SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM events_id_seq"
+_ENSURE_WATERMARK = "INSERT INTO rollup_watermarks (name) VALUES (%s) ON CONFLICT (name) DO NOTHING"
+# SKIP LOCKED: with several collectors running workers, one folds while the others pass.
+_LOCK_WATERMARK = "SELECT last_event_id FROM rollup_watermarks WHERE name = %s FOR UPDATE SKIP LOCKED"
+_ADVANCE_WATERMARK = "UPDATE rollup_watermarks SET last_event_id = %s, updated_at = NOW() WHERE name = %s"
+
+_UPSERT_STATS = (
+    "INSERT INTO policy_hourly_stats (tenant_id, policy_id, hour, "
+    + ", ".join(COUNTERS)
+    + ", latency_sketch) VALUES (%(tenant_id)s, %(policy_id)s, %(hour)s, "
+    + ", ".join(f"%({name})s" for name in COUNTERS)
+    + ", %(latency_sketch)s::jsonb) ON CONFLICT (tenant_id, policy_id, hour) DO UPDATE SET "
+    + ", ".join(f"{name} = policy_hourly_stats.{name} + EXCLUDED.{name}" for name in COUNTERS)
+    + ", latency_sketch = merge_latency_sketch(policy_hourly_stats.latency_sketch, EXCLUDED.latency_sketch)"
+    + ", updated_at = NOW()"
+)
+
+_SELECT_WATERMARK = "SELECT last_event_id, updated_at FROM rollup_watermarks WHERE name = %s"
+_SELECT_STATS = (
+    "SELECT policy_id, hour, "
+    + ", ".join(COUNTERS)
+    + ", latency_sketch FROM policy_hourly_stats WHERE tenant_id = %s AND hour >= %s AND hour < %s"
+)
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def truncate_hour(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def fold(rows: Iterable[EventRow], served_by: Dict[Tuple[str, str], str]) -> Dict[StatsKey, PolicyStats]:
+    """Aggregate events into per-``(tenant, policy, hour)`` deltas.
+
+    ``served_by`` maps ``(tenant, interaction_id)`` to the serving policy for feedback
+    and task results.
+    """
+    stats: Dict[StatsKey, PolicyStats] = {}
+    for row in rows:
+        if row.event_type in ("feedback.submit", "task.result"):
+            policy = served_by.get((row.tenant_id, row.interaction_id or ""), UNATTRIBUTED)
+        else:
+            policy = row.policy_id or UNATTRIBUTED
+        key = (row.tenant_id, policy, truncate_hour(row.occurred_at))
+        entry = stats.get(key)
+        if entry is None:
+            entry = stats[key] = PolicyStats()
+        if row.event_type == "interaction.create":
+            entry.interactions += 1
+        elif row.event_type == "interaction.output":
+            entry.outputs += 1
+            ms_total = _number(row.ms_total)
+            if ms_total is not None:
+                entry.latency_count += 1
+                entry.latency_sum_ms += ms_total
+                entry.latency_sketch.add(ms_total)
+            entry.tokens_in += int(_number(row.tokens_in) or 0)
+            entry.tokens_out += int(_number(row.tokens_out) or 0)
+            entry.cost_dollars += _number(row.dollars) or 0.0
+            if row.status == "shadow":
+                entry.shadow_outputs += 1
+                if row.match is not None:
+                    entry.shadow_comparisons += 1
+                    entry.shadow_matches += row.match == "true"
+        elif row.event_type == "feedback.submit":
+            entry.feedback += 1
+            thumb = _number(row.thumb)
+            entry.thumbs_up += thumb == 1
+            entry.thumbs_down += thumb == -1
+            rating = _number(row.rating)
+            if rating is not None:
+                entry.rating_count += 1
+                entry.rating_sum += int(rating)
+            entry.escalations += row.escalated == "true"
+        elif row.event_type == "task.result":
+            entry.task_results += 1
+            entry.task_correct += row.correct == "true"
+    return stats
+
+
+def _upsert_params(key: StatsKey, stats: PolicyStats) -> Dict[str, Any]:
+    tenant_id, policy_id, hour = key
+    params: Dict[str, Any] = {name: getattr(stats, name) for name in COUNTERS}
+    params.update(
+        tenant_id=tenant_id,
+        policy_id=policy_id,
+        hour=hour,
+        latency_sketch=json.dumps(stats.latency_sketch.to_json(), separators=(",", ":")),
+    )
+    return params
+
+
+class RollupWorker:
+    """Folds new events into ``policy_hourly_stats``, on demand or on a background thread.
+
+    ``connection`` is a pooled connection factory (``PersistenceLayer.connection``).
+    Failures roll the batch back; the next run retries from the same watermark.
+    """
+
+    def __init__(
+        self,
+        connection: Callable[[], ContextManager],
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+        interval: float = 60.0,
+        max_backoff: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._connection = connection
+        self._batch_size = batch_size
+        self._settle_seconds = settle_seconds
+        self._interval = interval
+        self._max_backoff = max_backoff
+        self._clock = clock
+        self._observed: Deque[Tuple[float, int]] = deque()
+        self._horizon_id = 0
+        self._ready = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _horizon(self, conn: Any) -> int:
+        """Highest id every insert has had ``settle_seconds`` to commit (or abort)."""
+        now = self._clock()
+        self._observed.append((now, conn.execute(_SEQUENCE_POSITION).fetchone()[0]))
+        while self._observed and now - self._observed[0][0] >= self._settle_seconds:
+            self._horizon_id = self._observed.popleft()[1]
+        return self._horizon_id
+
+    def _served_by(self, conn: Any, rows: List[EventRow]) -> Dict[Tuple[str, str], str]:
+        wanted: Dict[str, set] = {}
+        for row in rows:
+            if row.event_type in ("feedback.submit", "task.result") and row.interaction_id:
+                wanted.setdefault(row.tenant_id, set()).add(row.interaction_id)
+        served: Dict[Tuple[str, str], str] = {}
+        for tenant_id, interaction_ids in wanted.items():
+            for interaction_id, policy_id in conn.execute(_SERVED_BY, (tenant_id, sorted(interaction_ids))).fetchall():
+                served[(tenant_id, interaction_id)] = policy_id or UNATTRIBUTED
+        return served
+
+    def run_once(self) -> int:
+        """Fold one batch and return how many events it held."""
+        with self._connection() as conn:
+            if not self._ready:
+                conn.execute(_ENSURE_WATERMARK, (ROLLUP_NAME,))
+                self._ready = True
+            horizon = self._horizon(conn)
+            with conn.transaction():
+                locked = conn.execute(_LOCK_WATERMARK, (ROLLUP_NAME,)).fetchone()
+                if locked is None or locked[0] >= horizon:
+                    return 0
+                rows = [EventRow(*row) for row in conn.execute(_SELECT_EVENTS, (locked[0], horizon, self._batch_size)).fetchall()]
+                stats = fold(rows, self._served_by(conn, rows))
+                if stats:
+                    with conn.cursor() as cur:
+                        cur.executemany(_UPSERT_STATS, [_upsert_params(key, entry) for key, entry in stats.items()])
+                # A short batch reached the horizon; ids between its last row and the
+                # horizon belong to aborted inserts and are skipped with it.
+                watermark = rows[-1].id if len(rows) == self._batch_size else horizon
+                conn.execute(_ADVANCE_WATERMARK, (watermark, ROLLUP_NAME))
+        for row in rows:
+            ROLLUP_EVENTS.labels(event_type=row.event_type).inc()
+        return len(rows)
+
+    def run_until_caught_up(self) -> int:
+        total = 0
+        while True:
+            consumed = self.run_once()
+            total += consumed
+            if consumed < self._batch_size:
+                return total
+
+    def _run(self) -> None:
+        backoff = self._interval
+        while not self._stop.is_set():
+            try:
+                self.run_until_caught_up()
+            except Exception as exc:
+                ROLLUP_FAILURES.inc()
+                logger.warning("Rollup failed, retrying in %.1fs: %s", backoff, exc)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self._max_backoff)
+                continue
+            backoff = self._interval
+            self._stop.wait(self._interval)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="collector-rollups", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def load_stats(
+    conn: Any,
+    tenant_uuid: str,
+    start: datetime,
+    end: datetime,
+    policy_id: Optional[str] = None,
+) -> List[Tuple[str, datetime, PolicyStats]]:
+    """Rollup rows for the hours overlapping ``[start, end)``, by policy then hour."""
+    statement = _SELECT_STATS
+    params: List[Any] = [tenant_uuid, truncate_hour(start), end]
+    if policy_id is not None:
+        statement += " AND policy_id = %s"
+        params.append(policy_id)
+    rows = conn.execute(statement + " ORDER BY policy_id, hour", params).fetchall()
+    loaded = []
+    for row in rows:
+        counters = dict(zip(COUNTERS, row[2 : 2 + len(COUNTERS)]))
+        stats = PolicyStats(**counters, latency_sketch=LatencySketch.from_json(row[-1]))
+        loaded.append((row[0], row[1], stats))
+    return loaded
+
+
+def load_watermark(conn: Any) -> Optional[Tuple[int, datetime]]:
+    """``(last_event_id, updated_at)`` of the last committed fold."""
+    row = conn.execute(_SELECT_WATERMARK, (ROLLUP_NAME,)).fetchone()
+    return (row[0], row[1]) if row else None
+
+
+def summarize(rows: Iterable[Tuple[str, datetime, PolicyStats]], *, hourly: bool = False) -> List[Dict[str, Any]]:
+    """One entry per policy with merged totals and, if ``hourly``, the per-hour rows."""
+    merged: Dict[str, PolicyStats] = {}
+    hours: Dict[str, List[Dict[str, Any]]] = {}
+    for policy_id, hour, stats in rows:
+        merged.setdefault(policy_id, PolicyStats()).merge(stats)
+        if hourly:
+            hours.setdefault(policy_id, []).append({"hour": hour.isoformat(), **stats.summary()})
+    result = []
+    for policy_id, stats in merged.items():
+        entry = {"policy_id": policy_id or None, **stats.summary()}
+        if hourly:
+            entry["hours"] = hours[policy_id]
+        result.append(entry)
+    return result
+
+
+def main() -> None:  # pragma: no cover - CLI wiring
+    parser = argparse.ArgumentParser(description="Maintain hourly per-policy rollups of the events table")
+    parser.add_argument("command", choices=("once", "run", "rebuild"))
+    settings = PersistenceSettings.from_env()
+    parser.add_argument("--batch-size", type=int, default=settings.rollup_batch_size)
+    parser.add_argument("--settle-seconds", type=float, default=settings.rollup_settle_seconds)
+    parser.add_argument("--interval", type=float, default=settings.rollup_interval_seconds or 60.0)
+    args = parser.parse_args()
+
+    with connect(settings.postgres_dsn, autocommit=True) as conn:
+
+        @contextmanager
+        def connection() -> Iterator[Any]:
+            yield conn
+
+        if args.command == "rebuild":
+            with conn.transaction():
+                conn.execute("DELETE FROM policy_hourly_stats")
+                conn.execute(_ENSURE_WATERMARK, (ROLLUP_NAME,))
+                conn.execute(_ADVANCE_WATERMARK, (0, ROLLUP_NAME))
+        worker = RollupWorker(
+            connection, batch_size=args.batch_size, settle_seconds=args.settle_seconds, interval=args.interval
+        )
+        if args.command == "run":
+            worker._run()
+            return
+        worker.run_once()  # first sight of the sequence; settle before folding up to it
+        time.sleep(args.settle_seconds)
+        print(f"Folded {worker.run_until_caught_up()} events into {ROLLUP_NAME}")
+
+
+__all__ = [
+    "LatencySketch",
+    "PolicyStats",
+    "RollupWorker",
+    "UNATTRIBUTED",
+    "fold",
+    "load_stats",
+    "load_watermark",
+    "summarize",
+    "truncate_hour",
+]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -2,17 +2,27 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
 import os
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
 from io import BytesIO
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, ContextManager, Dict, Optional, Tuple
 from uuid import uuid4
 
+import psycopg
+from psycopg import AsyncConnection, Connection
+from psycopg.adapt import Dumper
 from psycopg.rows import dict_row
-from psycopg_pool import ConnectionPool
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from .blobs import extract_blobs, ref_counts, staging_object
+from .codec import encode_json
+from .idempotency import RecentKeyCache
+from .metrics import BLOB_BYTES, IDEMPOTENCY_DB_CONFLICTS, POOL_STATS, observe_stage
 
 try:  # Optional dependency enabled via MINIO_ENABLED
     from minio import Minio  # type: ignore
@@ -38,6 +48,42 @@ class PersistenceSettings:
     pii_scrub_enabled: bool = True
     pii_tenant_allowlist: tuple[str, ...] = ()
     pii_redaction_token: str = "[REDACTED]"
+    pii_tenant_skip_fields: Dict[str, tuple[str, ...]] = field(default_factory=dict)
+    idempotency_cache_size: int = 100_000
+    auth_required: bool = False
+    auth_cache_ttl_seconds: float = 300.0
+    auth_negative_ttl_seconds: float = 30.0
+    auth_touch_interval_seconds: float = 60.0
+    retention_days: int = 90
+    partition_granularity: str = "day"
+    query_hot_days: int = 7
+    query_max_days: int = 31
+    metrics_top_tenants: int = 0
+    journal_dir: Optional[str] = None
+    journal_segment_bytes: int = 64 * 1024 * 1024
+    journal_max_bytes: int = 1024 * 1024 * 1024
+    journal_fsync_delay_ms: float = 0.0
+    journal_alarm_ratio: float = 0.8
+    db_pool_min_size: int = 4
+    db_pool_max_size: int = 8
+    db_pool_timeout_seconds: float = 30.0
+    async_db_pool_min_size: int = 4
+    async_db_pool_max_size: int = 32
+    minio_workers: int = 8
+    minio_max_pending: int = 256
+    max_body_bytes: int = 8 * 1024 * 1024
+    tenant_rate_limit: float = 0.0
+    tenant_burst: float = 0.0
+    tenant_quotas: Dict[str, tuple[float, float]] = field(default_factory=dict)
+    tenant_weights: Dict[str, float] = field(default_factory=dict)
+    fair_write_slots: int = 0
+    fair_queue_depth: int = 1000
+    blob_min_bytes: int = 256
+    rollup_interval_seconds: float = 60.0
+    rollup_batch_size: int = 5000
+    rollup_settle_seconds: float = 5.0
+    tail_buffer_size: int = 2048
+    tail_max_subscribers: int = 32
 
     @classmethod
     def from_env(cls) -> "PersistenceSettings":
@@ -77,18 +123,190 @@ class PersistenceSettings:
                 t.strip() for t in os.environ.get("COLLECTOR_PII_ALLOWLIST", "").split(",") if t.strip()
             ),
             pii_redaction_token=os.environ.get("COLLECTOR_PII_REDACTION", "[REDACTED]"),
+            pii_tenant_skip_fields=_parse_skip_fields(os.environ.get("COLLECTOR_PII_SKIP_FIELDS", "")),
+            idempotency_cache_size=int(os.environ.get("COLLECTOR_IDEMPOTENCY_CACHE_SIZE", "100000")),
+            auth_required=os.environ.get("COLLECTOR_AUTH_REQUIRED", "false").lower() == "true",
+            auth_cache_ttl_seconds=float(os.environ.get("COLLECTOR_AUTH_CACHE_TTL", "300")),
+            auth_negative_ttl_seconds=float(os.environ.get("COLLECTOR_AUTH_NEGATIVE_TTL", "30")),
+            auth_touch_interval_seconds=float(os.environ.get("COLLECTOR_AUTH_TOUCH_INTERVAL", "60")),
+            retention_days=int(os.environ.get("COLLECTOR_RETENTION_DAYS", "90")),
+            partition_granularity=os.environ.get("COLLECTOR_PARTITION_GRANULARITY", "day"),
+            query_hot_days=int(os.environ.get("COLLECTOR_QUERY_HOT_DAYS", "7")),
+            query_max_days=int(os.environ.get("COLLECTOR_QUERY_MAX_DAYS", "31")),
+            metrics_top_tenants=int(os.environ.get("COLLECTOR_METRICS_TOP_TENANTS", "0")),
+            journal_dir=os.environ.get("COLLECTOR_JOURNAL_DIR") or None,
+            journal_segment_bytes=int(os.environ.get("COLLECTOR_JOURNAL_SEGMENT_BYTES", str(64 * 1024 * 1024))),
+            journal_max_bytes=int(os.environ.get("COLLECTOR_JOURNAL_MAX_BYTES", str(1024 * 1024 * 1024))),
+            journal_fsync_delay_ms=float(os.environ.get("COLLECTOR_JOURNAL_FSYNC_DELAY_MS", "0")),
+            journal_alarm_ratio=float(os.environ.get("COLLECTOR_JOURNAL_ALARM_RATIO", "0.8")),
+            db_pool_min_size=int(os.environ.get("COLLECTOR_DB_POOL_MIN", "4")),
+            db_pool_max_size=int(os.environ.get("COLLECTOR_DB_POOL_MAX", "8")),
+            db_pool_timeout_seconds=float(os.environ.get("COLLECTOR_DB_POOL_TIMEOUT", "30")),
+            async_db_pool_min_size=int(os.environ.get("COLLECTOR_ASYNC_DB_POOL_MIN", "4")),
+            async_db_pool_max_size=int(os.environ.get("COLLECTOR_ASYNC_DB_POOL_MAX", "32")),
+            minio_workers=int(os.environ.get("COLLECTOR_MINIO_WORKERS", "8")),
+            minio_max_pending=int(os.environ.get("COLLECTOR_MINIO_MAX_PENDING", "256")),
+            max_body_bytes=int(os.environ.get("COLLECTOR_MAX_BODY_BYTES", str(8 * 1024 * 1024))),
+            tenant_rate_limit=float(os.environ.get("COLLECTOR_TENANT_RATE_LIMIT", "0")),
+            tenant_burst=float(os.environ.get("COLLECTOR_TENANT_BURST", "0")),
+            tenant_quotas=_parse_tenant_quotas(os.environ.get("COLLECTOR_TENANT_QUOTAS", "")),
+            tenant_weights=_parse_tenant_weights(os.environ.get("COLLECTOR_TENANT_WEIGHTS", "")),
+            fair_write_slots=int(os.environ.get("COLLECTOR_FAIR_WRITE_SLOTS", "0")),
+            fair_queue_depth=int(os.environ.get("COLLECTOR_FAIR_QUEUE_DEPTH", "1000")),
+            blob_min_bytes=int(os.environ.get("COLLECTOR_BLOB_MIN_BYTES", "256")),
+            rollup_interval_seconds=float(os.environ.get("COLLECTOR_ROLLUP_INTERVAL", "60")),
+            rollup_batch_size=int(os.environ.get("COLLECTOR_ROLLUP_BATCH_SIZE", "5000")),
+            rollup_settle_seconds=float(os.environ.get("COLLECTOR_ROLLUP_SETTLE_SECONDS", "5")),
+            tail_buffer_size=int(os.environ.get("COLLECTOR_TAIL_BUFFER_SIZE", "2048")),
+            tail_max_subscribers=int(os.environ.get("COLLECTOR_TAIL_MAX_SUBSCRIBERS", "32")),
         )
 
 
+def _parse_skip_fields(raw: str) -> Dict[str, tuple[str, ...]]:
+    """Parse ``tenant=field,other.path;*=field`` into a tenant -> fields mapping."""
+    parsed: Dict[str, tuple[str, ...]] = {}
+    for entry in raw.split(";"):
+        tenant, _, fields = entry.partition("=")
+        names = tuple(name.strip() for name in fields.split(",") if name.strip())
+        if tenant.strip() and names:
+            parsed[tenant.strip()] = names
+    return parsed
+
+
+def _parse_tenant_quotas(raw: str) -> Dict[str, tuple[float, float]]:
+    """Parse ``tenant=rate[:burst];other=rate`` into a tenant -> (rate, burst) mapping."""
+    parsed: Dict[str, tuple[float, float]] = {}
+    for entry in raw.split(";"):
+        tenant, _, limits = entry.partition("=")
+        if not tenant.strip() or not limits.strip():
+            continue
+        rate, _, burst = limits.partition(":")
+        parsed[tenant.strip()] = (float(rate), float(burst) if burst.strip() else 0.0)
+    return parsed
+
+
+def _parse_tenant_weights(raw: str) -> Dict[str, float]:
+    """Parse ``tenant=weight;other=weight`` into a tenant -> weight mapping."""
+    parsed: Dict[str, float] = {}
+    for entry in raw.split(";"):
+        tenant, _, weight = entry.partition("=")
+        if tenant.strip() and weight.strip():
+            parsed[tenant.strip()] = float(weight)
+    return parsed
+
+
+class EncodedJson(bytes):
+    """JSON text that is already encoded; sent to Postgres as ``jsonb`` without re-serializing."""
+
+
+class _EncodedJsonDumper(Dumper):
+    oid = psycopg.postgres.types["jsonb"].oid
+
+    def dump(self, obj: bytes) -> bytes:
+        return obj
+
+
+psycopg.adapters.register_dumper(EncodedJson, _EncodedJsonDumper)
+
+
+_INSERT_EVENT = """
+INSERT INTO events (tenant_id, event_type, payload, policy_id, skill, occurred_at, idempotency_key)
+VALUES (%(tenant_id)s, %(event_type)s, %(payload)s::jsonb, %(policy_id)s, %(skill)s, %(occurred_at)s, %(key)s)
+RETURNING events.id
+"""
+
+# The key claim and the event insert run as one statement: a replay loses the claim
+# (DO NOTHING, no dead tuple) and the event insert then selects no rows.
+_INSERT_KEYED_EVENT = """
+WITH claimed AS (
+    INSERT INTO event_idempotency_keys (tenant_id, event_type, idempotency_key)
+    VALUES (%(tenant_id)s, %(event_type)s, %(key)s)
+    ON CONFLICT (tenant_id, event_type, idempotency_key) DO NOTHING
+    RETURNING 1
+)
+INSERT INTO events (tenant_id, event_type, payload, policy_id, skill, occurred_at, idempotency_key)
+SELECT %(tenant_id)s::uuid, %(event_type)s::text, %(payload)s::jsonb, %(policy_id)s::text, %(skill)s::text,
+       %(occurred_at)s::timestamptz, %(key)s::text
+FROM claimed
+RETURNING events.id
+"""
+
+# Variants for payloads with extracted blobs (see blobs.py). Bodies are upserted in
+# digest order, so concurrent writers lock shared rows in the same order. ``new_blobs``
+# lists the digests this tenant had not stored before; only those are staged to MinIO.
+_UPSERT_BLOBS = """
+stored AS (
+    INSERT INTO event_blobs (tenant_id, digest, body, size_bytes, refcount)
+    SELECT %(tenant_id)s::uuid, b.digest, b.body, octet_length(b.body), b.refs
+    FROM unnest(%(blob_digests)s::text[], %(blob_bodies)s::text[], %(blob_counts)s::bigint[]) AS b(digest, body, refs){guard}
+    ON CONFLICT (tenant_id, digest) DO UPDATE
+    SET refcount = event_blobs.refcount + EXCLUDED.refcount, last_referenced_at = NOW()
+    RETURNING digest, xmax = 0 AS fresh
+)
+"""
+
+_INSERT_EVENT_WITH_BLOBS = (
+    "WITH"
+    + _UPSERT_BLOBS.format(guard="")
+    + """INSERT INTO events (tenant_id, event_type, payload, policy_id, skill, occurred_at, idempotency_key, blob_refs)
+VALUES (%(tenant_id)s, %(event_type)s, %(payload)s::jsonb, %(policy_id)s, %(skill)s, %(occurred_at)s, %(key)s,
+        %(blob_refs)s::text[])
+RETURNING events.id, ARRAY(SELECT digest FROM stored WHERE fresh) AS new_blobs
+"""
+)
+
+# A replay loses the claim, so neither the blob references nor the event are written.
+_INSERT_KEYED_EVENT_WITH_BLOBS = (
+    """
+WITH claimed AS (
+    INSERT INTO event_idempotency_keys (tenant_id, event_type, idempotency_key)
+    VALUES (%(tenant_id)s, %(event_type)s, %(key)s)
+    ON CONFLICT (tenant_id, event_type, idempotency_key) DO NOTHING
+    RETURNING 1
+),"""
+    + _UPSERT_BLOBS.format(guard="\n    WHERE EXISTS (SELECT 1 FROM claimed)")
+    + """INSERT INTO events (tenant_id, event_type, payload, policy_id, skill, occurred_at, idempotency_key, blob_refs)
+SELECT %(tenant_id)s::uuid, %(event_type)s::text, %(payload)s::jsonb, %(policy_id)s::text, %(skill)s::text,
+       %(occurred_at)s::timestamptz, %(key)s::text, %(blob_refs)s::text[]
+FROM claimed
+RETURNING events.id, ARRAY(SELECT digest FROM stored WHERE fresh) AS new_blobs
+"""
+)
+
+
 class PersistenceLayer:
+    """Postgres + MinIO sink with a sync pool and an asyncio pool for ingest.
+
+    The sync pool serves tenant lookups, reads, exports and the journal replayer; the
+    async pool serves ``write_event_async`` so in-flight inserts are not capped by
+    Starlette's threadpool. MinIO's client is blocking, so async staging runs on a
+    dedicated executor, with at most ``minio_max_pending`` uploads queued or running.
+    """
+
     def __init__(self, settings: PersistenceSettings) -> None:
         self._settings = settings
         self._pool = ConnectionPool(
             conninfo=settings.postgres_dsn,
             kwargs={"autocommit": True},
+            min_size=settings.db_pool_min_size,
+            max_size=max(settings.db_pool_min_size, settings.db_pool_max_size),
+            timeout=settings.db_pool_timeout_seconds,
             open=False,
         )
+        self._async_pool = AsyncConnectionPool(
+            conninfo=settings.postgres_dsn,
+            kwargs={"autocommit": True},
+            min_size=settings.async_db_pool_min_size,
+            max_size=max(settings.async_db_pool_min_size, settings.async_db_pool_max_size),
+            timeout=settings.db_pool_timeout_seconds,
+            open=False,
+        )
+        POOL_STATS.track(self._pool, "sync")
+        POOL_STATS.track(self._async_pool, "async")
         self._minio = self._init_minio_client(settings) if settings.minio_enabled else None
+        self._minio_executor = ThreadPoolExecutor(max_workers=settings.minio_workers, thread_name_prefix="minio-stage")
+        self._minio_slots: Optional[asyncio.Semaphore] = None
+        self._recent_keys = RecentKeyCache(max_entries=settings.idempotency_cache_size)
         logger.info(
             "PersistenceLayer initialized (minio_enabled=%s, minio_bucket=%s, prefix=%s)",
             settings.minio_enabled,
@@ -120,77 +338,198 @@ class PersistenceLayer:
         logger.info("MinIO staging enabled bucket=%s prefix=%s", settings.minio_bucket, settings.minio_prefix)
         return client
 
-    def write_event(self, event_type: str, payload: Dict[str, Any], idempotency_key: Optional[str] = None) -> None:
-        tenant_id = payload.get("tenant_id")
+    def connection(self) -> ContextManager[Connection]:
+        """Borrow a pooled autocommit connection, opening the pool on first use."""
+        if self._pool.closed:
+            self._pool.open()
+        return self._pool.connection()
+
+    @asynccontextmanager
+    async def async_connection(self) -> AsyncIterator[AsyncConnection]:
+        """Borrow a pooled autocommit asyncio connection, opening the pool on first use."""
+        if self._async_pool.closed:
+            await self._async_pool.open()
+        async with self._async_pool.connection() as conn:
+            yield conn
+
+    def write_event(
+        self,
+        event_type: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        tenant_uuid: Optional[str] = None,
+    ) -> bool:
+        """Persist an event and stage it to MinIO.
+
+        ``tenant_uuid`` is the resolved ``tenants.id`` stored in ``events.tenant_id``;
+        the payload keeps the tenant slug the client sent.
+
+        Returns ``True`` for a fresh insert and ``False`` for an idempotent replay of an
+        event that is already stored; replays are never staged again.
+        """
+        prepared = self._prepare_insert(event_type, payload, idempotency_key, tenant_uuid)
+        if prepared is None:
+            return False
+        statement, params = prepared
+        with observe_stage(event_type, "postgres"), self.connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(statement, params)
+                row = cur.fetchone()
+        inserted = row is not None
+        new_blobs = self._record_insert(params, row)
+
+        if inserted and self._settings.minio_enabled and self._minio:
+            self._stage_to_minio(event_type, params["payload"], new_blobs)
+        return inserted
+
+    async def write_event_async(
+        self,
+        event_type: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        tenant_uuid: Optional[str] = None,
+    ) -> bool:
+        """Asyncio variant of :meth:`write_event` with the same return contract."""
+        prepared = self._prepare_insert(event_type, payload, idempotency_key, tenant_uuid)
+        if prepared is None:
+            return False
+        statement, params = prepared
+        with observe_stage(event_type, "postgres"):
+            async with self.async_connection() as conn:
+                async with conn.cursor(row_factory=dict_row) as cur:
+                    await cur.execute(statement, params)
+                    row = await cur.fetchone()
+        inserted = row is not None
+        new_blobs = self._record_insert(params, row)
+
+        if inserted and self._settings.minio_enabled and self._minio:
+            if self._minio_slots is None:
+                self._minio_slots = asyncio.Semaphore(self._settings.minio_max_pending)
+            async with self._minio_slots:
+                await asyncio.get_running_loop().run_in_executor(
+                    self._minio_executor, self._stage_to_minio, event_type, params["payload"], new_blobs
+                )
+        return inserted
+
+    def _prepare_insert(
+        self,
+        event_type: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str],
+        tenant_uuid: Optional[str],
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Build the insert statement and params, or ``None`` for a cached replay.
+
+        Large texts are swapped for blob references first (``blob_min_bytes``). The
+        payload is encoded once here; Postgres and MinIO staging reuse the bytes.
+        """
+        tenant_id: str = tenant_uuid or payload["tenant_id"]
         policy_id = payload.get("version", {}).get("policy_id")
         skill = payload.get("skill")
         occurred_at = self._coerce_datetime(payload.get("created_at"))
 
         key = idempotency_key or payload.get("idempotency_key")
         if key:
-            payload = {**payload, "idempotency_key": key}
+            if payload.get("idempotency_key") != key:
+                payload = {**payload, "idempotency_key": key}
+            if self._recent_keys.seen(tenant_id, event_type, key):
+                logger.debug("Duplicate event type=%s tenant=%s answered from cache", event_type, tenant_id)
+                return None
 
-        if self._pool.closed:
-            self._pool.open()
+        payload, bodies, refs = extract_blobs(payload, self._settings.blob_min_bytes)
+        params = {
+            "tenant_id": tenant_id,
+            "event_type": event_type,
+            "payload": EncodedJson(encode_json(payload)),
+            "policy_id": policy_id,
+            "skill": skill,
+            "occurred_at": occurred_at,
+            "key": key,
+        }
+        if not refs:
+            return (_INSERT_KEYED_EVENT if key else _INSERT_EVENT), params
 
-        with self._pool.connection() as conn:
-            with conn.cursor(row_factory=dict_row) as cur:
-                cur.execute(
-                    """
-                    INSERT INTO events (tenant_id, event_type, payload, policy_id, skill, occurred_at, idempotency_key)
-                    VALUES (%s, %s, %s::jsonb, %s, %s, %s, %s)
-                    ON CONFLICT ON CONSTRAINT uniq_events_idempotency
-                    DO UPDATE SET payload = events.payload
-                    RETURNING events.id
-                    """,
-                    (
-                        tenant_id,
-                        event_type,
-                        json.dumps(payload),
-                        policy_id,
-                        skill,
-                        occurred_at,
-                        key,
-                    ),
-                )
-                cur.fetchone()
+        digests = sorted(bodies)
+        counts = ref_counts(refs)
+        params.update(
+            blob_digests=digests,
+            blob_bodies=[bodies[digest] for digest in digests],
+            blob_counts=[counts[digest] for digest in digests],
+            blob_refs=refs,
+        )
+        return (_INSERT_KEYED_EVENT_WITH_BLOBS if key else _INSERT_EVENT_WITH_BLOBS), params
+
+    def _record_insert(self, params: Dict[str, Any], row: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Bookkeeping after the insert; returns the blob bodies this tenant stored for the first time."""
+        tenant_id, event_type, key = params["tenant_id"], params["event_type"], params["key"]
+        inserted = row is not None
+        if key:
+            self._recent_keys.remember(tenant_id, event_type, key)
+        if not inserted:
+            IDEMPOTENCY_DB_CONFLICTS.labels(event_type=event_type).inc()
+        new_blobs: Dict[str, str] = {}
+        if row is not None and "blob_refs" in params:
+            bodies = dict(zip(params["blob_digests"], params["blob_bodies"]))
+            sizes = {digest: len(body.encode("utf-8")) for digest, body in bodies.items()}
+            new_blobs = {digest: bodies[digest] for digest in row.get("new_blobs") or ()}
+            BLOB_BYTES.labels(event_type=event_type, outcome="referenced").inc(
+                sum(sizes[digest] for digest in params["blob_refs"])
+            )
+            BLOB_BYTES.labels(event_type=event_type, outcome="stored").inc(sum(sizes[digest] for digest in new_blobs))
         logger.info(
-            "Persisted event type=%s tenant=%s (idempotency=%s)",
+            "Persisted event type=%s tenant=%s (idempotency=%s, inserted=%s)",
             event_type,
             tenant_id,
             key,
+            inserted,
         )
+        return new_blobs
 
-        if self._settings.minio_enabled and self._minio:
-            self._stage_to_minio(event_type=event_type, payload=payload)
-
-    def _stage_to_minio(self, event_type: str, payload: Dict[str, Any]) -> None:
+    def _stage_to_minio(self, event_type: str, payload: bytes, blobs: Optional[Dict[str, str]] = None) -> None:
         assert self._minio is not None  # for type checking
+        # Bodies go first, so compaction never sees a reference it cannot resolve.
+        for digest, body in (blobs or {}).items():
+            data = body.encode("utf-8")
+            try:
+                with observe_stage(event_type, "minio"):
+                    self._minio.put_object(
+                        bucket_name=self._settings.minio_bucket,
+                        object_name=staging_object(self._settings.minio_prefix, digest),
+                        data=BytesIO(data),
+                        length=len(data),
+                        content_type="text/plain; charset=utf-8",
+                    )
+            except S3Error as exc:  # pragma: no cover - network side effects
+                logger.error("Failed to stage blob %s to MinIO: %s", digest, exc)
         partition = datetime.utcnow().strftime("dt=%Y-%m-%d")
         object_name = (
             f"{self._settings.minio_prefix}/staging/{event_type}/{partition}/"
             f"{uuid4().hex}.jsonl"
         )
-        staged_payload = {
-            "event_type": event_type,
-            "ingested_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
-            "payload": payload,
-        }
-        body = (json.dumps(staged_payload, separators=(",", ":")) + "\n").encode("utf-8")
+        envelope = encode_json(
+            {"event_type": event_type, "ingested_at": datetime.utcnow().isoformat(timespec="seconds") + "Z"}
+        )
+        # Splice the already-encoded payload into the envelope instead of re-encoding it.
+        line = envelope[:-1] + b',"payload":' + payload + b"}\n"
         try:
-            self._minio.put_object(
-                bucket_name=self._settings.minio_bucket,
-                object_name=object_name,
-                data=BytesIO(body),
-                length=len(body),
-                content_type="application/json",
-            )
+            with observe_stage(event_type, "minio"):
+                self._minio.put_object(
+                    bucket_name=self._settings.minio_bucket,
+                    object_name=object_name,
+                    data=BytesIO(line),
+                    length=len(line),
+                    content_type="application/json",
+                )
             logger.debug("Staged event to MinIO object=%s", object_name)
         except S3Error as exc:  # pragma: no cover - network side effects
             logger.error("Failed to stage event to MinIO: %s", exc)
 
     def close(self) -> None:
         self._pool.close()
+        self._minio_executor.shutdown(wait=True)
+
+    async def aclose(self) -> None:
+        await self._async_pool.close()
 
     @staticmethod
     def _coerce_datetime(value: Optional[str]) -> datetime:
@@ -0,0 +1,193 @@
+"""Live event tail: a bounded in-memory ring that ingest publishes into and SSE reads from.
+
+Publishing is a slot assignment, so ingest is never slowed by subscribers. Each
+subscriber keeps its own cursor (a sequence number) and filters while it reads,
+on its own coroutine. A subscriber that falls more than ``capacity`` events
+behind is skipped ahead to the oldest buffered event, and it is told how many
+events it missed. Nothing is queued per subscriber and nothing touches the
+database. Must be used from a single event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncGenerator, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from .metrics import TAIL_SKIPPED
+
+HEARTBEAT_SECONDS = 15.0
+READ_BATCH = 256
+
+
+class TailEntry:
+    __slots__ = ("seq", "tenant_uuid", "event_type", "policy_id", "payload", "received_at", "_frame")
+
+    def __init__(
+        self,
+        seq: int,
+        tenant_uuid: str,
+        event_type: str,
+        policy_id: Optional[str],
+        payload: Dict[str, Any],
+        received_at: float,
+    ) -> None:
+        self.seq = seq
+        self.tenant_uuid = tenant_uuid
+        self.event_type = event_type
+        self.policy_id = policy_id
+        self.payload = payload
+        self.received_at = received_at
+        self._frame: Optional[bytes] = None
+
+    def frame(self) -> bytes:
+        """The SSE frame, encoded by the first subscriber that needs it and then shared."""
+        if self._frame is None:
+            data = json.dumps(
+                {
+                    "seq": self.seq,
+                    "event_type": self.event_type,
+                    "policy_id": self.policy_id,
+                    "received_at": datetime.fromtimestamp(self.received_at, timezone.utc).isoformat(),
+                    "payload": self.payload,
+                },
+                separators=(",", ":"),
+                default=str,
+            )
+            self._frame = f"id: {self.seq}\nevent: {self.event_type}\ndata: {data}\n\n".encode("utf-8")
+            self.payload = None  # type: ignore[assignment]
+        return self._frame
+
+
+@dataclass(frozen=True)
+class TailFilter:
+    tenant_uuid: str
+    event_types: Optional[FrozenSet[str]] = None
+    policy_id: Optional[str] = None
+
+    def matches(self, entry: TailEntry) -> bool:
+        return (
+            entry.tenant_uuid == self.tenant_uuid
+            and (self.event_types is None or entry.event_type in self.event_types)
+            and (self.policy_id is None or entry.policy_id == self.policy_id)
+        )
+
+
+class EventTail:
+    """Ring of the last ``capacity`` accepted events, numbered from 1."""
+
+    def __init__(
+        self,
+        capacity: int,
+        *,
+        max_subscribers: int = 32,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._capacity = capacity
+        self._slots: List[Optional[TailEntry]] = [None] * capacity
+        self._next = 1
+        self._wakeup: Optional[asyncio.Event] = None
+        self._clock = clock
+        self.max_subscribers = max_subscribers
+        self.subscribers = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def latest(self) -> int:
+        return self._next - 1
+
+    @property
+    def oldest(self) -> int:
+        return max(1, self._next - self._capacity)
+
+    @property
+    def buffered(self) -> int:
+        return min(self._next - 1, self._capacity)
+
+    @property
+    def full(self) -> bool:
+        return self.subscribers >= self.max_subscribers
+
+    def publish(self, tenant_uuid: str, event_type: str, payload: Dict[str, Any]) -> None:
+        """Buffer an accepted event; ``payload`` must not be mutated afterwards."""
+        seq = self._next
+        self._next = seq + 1
+        policy_id = (payload.get("version") or {}).get("policy_id")
+        self._slots[seq % self._capacity] = TailEntry(seq, tenant_uuid, event_type, policy_id, payload, self._clock())
+        if self._wakeup is not None:
+            self._wakeup.set()
+            self._wakeup = None
+
+    def read(self, after: int, limit: int = READ_BATCH) -> Tuple[int, List[TailEntry], int]:
+        """Entries after ``after``: ``(skipped, entries, cursor)``.
+
+        ``skipped`` counts events that were overwritten before this reader got to
+        them (before filtering). ``cursor`` is the ``after`` for the next call.
+        """
+        skipped = 0
+        oldest = self.oldest
+        if after + 1 < oldest and self._next > 1:
+            skipped = oldest - after - 1
+            after = oldest - 1
+        stop = min(self._next, after + 1 + limit)
+        entries = [self._slots[seq % self._capacity] for seq in range(after + 1, stop)]
+        return skipped, entries, max(after, stop - 1)  # type: ignore[return-value]
+
+    async def wait(self, after: int, timeout: float) -> bool:
+        """Wait until an event after ``after`` is published; ``False`` on timeout."""
+        if self.latest > after:
+            return True
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def resume_point(self, last_event_id: Optional[str]) -> int:
+        """Cursor for a new subscriber: after ``Last-Event-ID`` if given, else only new events."""
+        try:
+            after = int(last_event_id) if last_event_id else self.latest
+        except ValueError:
+            after = self.latest
+        return min(max(after, 0), self.latest)  # ids from before a restart start over
+
+
+async def stream(
+    tail: EventTail,
+    selector: TailFilter,
+    after: int,
+    *,
+    heartbeat: float = HEARTBEAT_SECONDS,
+    batch: int = READ_BATCH,
+) -> AsyncGenerator[bytes, None]:
+    """SSE frames for ``selector`` from ``after`` on, with keep-alive comments when idle."""
+    tail.subscribers += 1
+    try:
+        yield b": connected\n\n"
+        while True:
+            skipped, entries, after = tail.read(after, batch)
+            if skipped:
+                TAIL_SKIPPED.inc(skipped)
+                yield f'event: skipped\ndata: {{"skipped":{skipped}}}\n\n'.encode("utf-8")
+            frames = [entry.frame() for entry in entries if selector.matches(entry)]
+            if frames:
+                yield b"".join(frames)
+            elif entries:
+                await asyncio.sleep(0)  # a busy ring of other tenants' events must not hog the loop
+            elif not await tail.wait(after, heartbeat):
+                yield b": keep-alive\n\n"
+    finally:
+        tail.subscribers -= 1
+
+
+__all__ = ["HEARTBEAT_SECONDS", "EventTail", "TailEntry", "TailFilter", "stream"]
@@ -0,0 +1,148 @@
+"""Bytes on the wire and ingest throughput per request ``Content-Encoding``.
+
+For representative events of each type, reports the body size per encoding and
+the client-side compression cost. It also reports collector-side decoding
+(``decode_body`` and the compiled codec) and the resulting in-process events/s.
+With ``--url`` it also posts the events to a running collector (see
+``bench_ingest``) and reports end-to-end requests/s and total wire bytes per
+encoding. Run from the repository root::
+
+    python -m apps.collector.benchmarks.bench_compression --iterations 500
+    python -m apps.collector.benchmarks.bench_compression --url http://localhost:8100 --requests 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from apps.collector.app.codec import CODECS
+from apps.collector.app.encoding import SUPPORTED_ENCODINGS, decode_body
+from apps.collector.benchmarks.bench_decode import (
+    feedback_payload,
+    output_payload,
+    task_result_payload,
+)
+from apps.collector.benchmarks.bench_pii import retrieval_payload
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover - zstd rows are skipped
+    zstandard = None  # type: ignore
+
+ROUTES = {
+    "interaction.create": "/v1/interaction.create",
+    "interaction.output": "/v1/interaction.output",
+    "feedback.submit": "/v1/feedback.submit",
+    "task.result": "/v1/task_result",
+}
+LIMIT = 8 * 1024 * 1024
+
+
+def _compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    compressors: Dict[str, Callable[[bytes], bytes]] = {
+        "identity": lambda body: body,
+        "gzip": lambda body: gzip.compress(body, compresslevel=6, mtime=0),
+    }
+    if zstandard is not None and "zstd" in SUPPORTED_ENCODINGS:
+        compressors["zstd"] = lambda body: zstandard.ZstdCompressor(level=3).compress(body)
+    return compressors
+
+
+def _per_event_us(fn: Callable[[], object], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def offline(samples: Dict[str, bytes], iterations: int) -> None:
+    print(f"{'event type':<20}{'encoding':<10}{'bytes':>8}{'ratio':>7}{'compress us':>13}{'decode us':>11}{'events/s':>10}")
+    for event_type, body in samples.items():
+        codec = CODECS[event_type]
+        for encoding, compress in _compressors().items():
+            wire = compress(body)
+            header: Optional[str] = None if encoding == "identity" else encoding
+            compress_us = _per_event_us(lambda: compress(body), iterations)
+            decode_us = _per_event_us(lambda: codec.decode(decode_body(wire, header, LIMIT)), iterations)
+            print(
+                f"{event_type:<20}{encoding:<10}{len(wire):>8}{len(body) / len(wire):>6.1f}x"
+                f"{compress_us:>13.1f}{decode_us:>11.1f}{1e6 / (compress_us + decode_us):>10.0f}"
+            )
+
+
+async def live(args: argparse.Namespace, samples: Dict[str, bytes]) -> None:
+    headers = {"Content-Type": "application/json"}
+    if args.api_key:
+        headers["Authorization"] = f"Bearer {args.api_key}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    run_id = uuid.uuid4().hex[:8]
+    print(f"\n{'encoding':<10}{'requests':>9}{'wire MiB':>10}{'req/s':>9}{'errors':>8}")
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, limits=limits, timeout=60.0) as client:
+        for encoding, compress in _compressors().items():
+            items = list(samples.items())
+            counter = iter(range(args.requests))
+            stats = {"bytes": 0, "errors": 0}
+
+            async def worker() -> None:
+                for n in counter:
+                    event_type, body = items[n % len(items)]
+                    # Compression is part of the client's per-request cost, so it is timed too.
+                    wire = compress(body)
+                    request_headers = {"Idempotency-Key": f"{run_id}-{encoding}-{n}"}
+                    if encoding != "identity":
+                        request_headers["Content-Encoding"] = encoding
+                    stats["bytes"] += len(wire)
+                    try:
+                        response = await client.post(ROUTES[event_type], content=wire, headers=request_headers)
+                        stats["errors"] += response.status_code != 202
+                    except httpx.HTTPError:
+                        stats["errors"] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+            print(
+                f"{encoding:<10}{args.requests:>9}{stats['bytes'] / 2**20:>10.2f}"
+                f"{args.requests / elapsed:>9.1f}{stats['errors']:>8}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--url", default=None, help="collector base URL for the end-to-end run")
+    parser.add_argument("--tenant", default="acme-support", help="tenant slug from config/db/seed.sql")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    payloads = {
+        "interaction.create": retrieval_payload(rng),
+        "interaction.output": output_payload(rng),
+        "feedback.submit": feedback_payload(rng),
+        "task.result": task_result_payload(rng),
+    }
+    samples: Dict[str, bytes] = {}
+    for event_type, payload in payloads.items():
+        payload["tenant_id"] = args.tenant
+        samples[event_type] = json.dumps(payload, separators=(",", ":")).encode()
+
+    offline(samples, args.iterations)
+    if args.url:
+        asyncio.run(live(args, samples))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Per-event CPU cost of the ingest decode/encode path, before and after schema compilation.
+
+``legacy`` does what the handlers did before: pydantic validation, ``model_dump``,
+an idempotency copy, and one ``json.dumps`` each for Postgres and the staging
+envelope. ``compiled`` runs ``EventCodec.decode``, fills the key in place, encodes
+the payload once and splices it into the envelope. Both include PII scrubbing
+unless ``--no-scrub`` is given. ``validate`` compares trial validation across all
+models with discriminator dispatch. Run from the repository root::
+
+    python -m apps.collector.benchmarks.bench_decode --iterations 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+from pydantic import ValidationError
+
+from apps.collector.app.codec import CODECS, MODELS, discriminate, encode_json
+from apps.collector.app.pii import build_scrubber
+from apps.collector.benchmarks.bench_pii import pii_ticket_payload, retrieval_payload
+
+
+def task_result_payload(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "tenant_id": "acme-support",
+        "interaction_id": f"i-{rng.randint(1, 10**6)}",
+        "label": {"correct": rng.random() > 0.5, "f1": rng.random()},
+        "created_at": "2025-01-01T12:00:00Z",
+    }
+
+
+def feedback_payload(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "tenant_id": "acme-support",
+        "interaction_id": f"i-{rng.randint(1, 10**6)}",
+        "explicit": {"thumb": rng.choice([-1, 1]), "comment": "Looks good, sending now"},
+        "implicit": {"sent": True, "time_to_send_ms": rng.randint(100, 90_000)},
+    }
+
+
+def output_payload(rng: random.Random) -> Dict[str, Any]:
+    payload = pii_ticket_payload(rng)
+    payload.update(
+        {
+            "timings": {"ms_total": 640},
+            "costs": {"tokens_in": 900, "tokens_out": 180},
+            "version": {"policy_id": "support-draft-v0", "base_model": "llama-3.1"},
+        }
+    )
+    return payload
+
+
+def _envelope(event_type: str) -> Dict[str, Any]:
+    return {"event_type": event_type, "ingested_at": datetime.utcnow().isoformat(timespec="seconds") + "Z"}
+
+
+def legacy_path(event_type: str, body: bytes, scrub: Callable[[Any], Any]) -> bytes:
+    payload = MODELS[event_type].model_validate_json(body).model_dump(mode="json")
+    payload = dict(payload)
+    payload["idempotency_key"] = "bench-key"
+    cleaned = scrub(payload)
+    json.dumps(cleaned)  # Postgres JSONB parameter
+    return (json.dumps({**_envelope(event_type), "payload": cleaned}, separators=(",", ":")) + "\n").encode()
+
+
+def compiled_path(event_type: str, body: bytes, scrub: Callable[[Any], Any]) -> bytes:
+    payload = CODECS[event_type].decode(body)
+    payload["idempotency_key"] = "bench-key"
+    encoded = encode_json(scrub(payload))  # shared by Postgres and staging
+    return encode_json(_envelope(event_type))[:-1] + b',"payload":' + encoded + b"}\n"
+
+
+def legacy_validate(payload: Dict[str, Any]) -> str:
+    for model in MODELS.values():
+        try:
+            model.model_validate(payload)
+            return model.__name__
+        except ValidationError:
+            continue
+    return ""
+
+
+def dispatch_validate(payload: Dict[str, Any]) -> str:
+    event_type = discriminate(payload)
+    if event_type is None:
+        return ""
+    CODECS[event_type].validate(payload)
+    return CODECS[event_type].model.__name__
+
+
+def _per_event_us(fn: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-scrub", action="store_true", help="measure decode/encode without PII scrubbing")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    scrubber = build_scrubber(enabled=not args.no_scrub, allowlist=(), redaction_token="[REDACTED]")
+    scrub = scrubber.scrub
+    samples = {
+        "interaction.create": retrieval_payload(rng),
+        "interaction.output": output_payload(rng),
+        "feedback.submit": feedback_payload(rng),
+        "task.result": task_result_payload(rng),
+    }
+
+    print(f"{'event type':<20}{'bytes':>8}{'legacy us':>12}{'compiled us':>13}{'speedup':>9}")
+    for event_type, sample in samples.items():
+        body = json.dumps(sample).encode()
+        legacy_line = json.loads(legacy_path(event_type, body, scrub))
+        compiled_line = json.loads(compiled_path(event_type, body, scrub))
+        # Legacy payloads also carry pydantic defaults (nulls, empty metadata); scalars must agree.
+        for key, value in compiled_line["payload"].items():
+            assert isinstance(value, dict) or legacy_line["payload"][key] == value, key
+        legacy = _per_event_us(lambda: legacy_path(event_type, body, scrub), args.iterations)
+        compiled = _per_event_us(lambda: compiled_path(event_type, body, scrub), args.iterations)
+        print(f"{event_type:<20}{len(body):>8}{legacy:>12.1f}{compiled:>13.1f}{legacy / compiled:>8.1f}x")
+
+    print()
+    print(f"{'/v1/validate':<20}{'':>8}{'trial us':>12}{'dispatch us':>13}{'speedup':>9}")
+    for event_type, sample in samples.items():
+        assert legacy_validate(sample) and dispatch_validate(sample)
+        trial = _per_event_us(lambda: legacy_validate(dict(sample)), args.iterations)
+        dispatch = _per_event_us(lambda: dispatch_validate(dict(sample)), args.iterations)
+        print(f"{event_type:<20}{'':>8}{trial:>12.1f}{dispatch:>13.1f}{trial / dispatch:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measure collector ingest throughput at increasing client concurrency.
+
+Needs a running collector backed by a local Postgres (``make up`` or ``uvicorn
+apps.collector.app.main:app --port 8100``). Every request carries a unique
+``Idempotency-Key`` so each one performs a real insert. Run from the repository root::
+
+    python -m apps.collector.benchmarks.bench_ingest --concurrency 1,8,32,128,256 --requests 2000
+
+Compare runs with different ``COLLECTOR_ASYNC_DB_POOL_MAX`` values to size the pool;
+throughput should keep climbing past the 40 in-flight requests a threadpool allowed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+import httpx
+
+
+def _payload(tenant: str, n: int) -> Dict[str, object]:
+    return {
+        "tenant_id": tenant,
+        "interaction_id": f"bench-{n}",
+        "note": "bench_ingest",
+        "label": {"correct": n % 2 == 0, "f1": (n % 100) / 100, "kpi_delta": (n % 7) - 3.0},
+    }
+
+
+async def _run_level(
+    client: httpx.AsyncClient, tenant: str, concurrency: int, total: int, run_id: str
+) -> Tuple[float, List[float], int]:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for n in counter:
+            headers = {"Idempotency-Key": f"{run_id}-{concurrency}-{n}"}
+            started = time.perf_counter()
+            try:
+                response = await client.post("/v1/task_result", json=_payload(tenant, n), headers=headers)
+                ok = response.status_code == 202
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies, errors
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    headers = {"Authorization": f"Bearer {args.api_key}"} if args.api_key else {}
+    limits = httpx.Limits(max_connections=max(args.levels), max_keepalive_connections=max(args.levels))
+    run_id = uuid.uuid4().hex[:8]
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, limits=limits, timeout=60.0) as client:
+        # Warm the collector's pools and tenant cache before timing anything.
+        await _run_level(client, args.tenant, min(args.levels), args.warmup, f"{run_id}-warmup")
+        print(f"{'concurrency':>11} {'requests':>9} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for concurrency in args.levels:
+            elapsed, latencies, errors = await _run_level(client, args.tenant, concurrency, args.requests, run_id)
+            print(
+                f"{concurrency:>11} {args.requests:>9} {args.requests / elapsed:>10.1f} "
+                f"{statistics.median(latencies) * 1000:>8.2f} {_percentile(latencies, 0.99) * 1000:>8.2f} {errors:>7}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8100")
+    parser.add_argument("--tenant", default="acme-support", help="tenant slug from config/db/seed.sql")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--concurrency", default="1,8,32,64,128,256")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=200)
+    args = parser.parse_args()
+    args.levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark the collector PII scrubber against the original four-pass implementation.
+
+Run from the repository root::
+
+    python -m apps.collector.benchmarks.bench_pii --iterations 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+from typing import Any, Callable, Dict, List
+
+from apps.collector.app.pii import build_scrubber
+
+LEGACY_PATTERNS = (
+    re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+"),
+    re.compile(r"(?:\+?\d{1,3}[\s-]?)?(?:\(\d{3}\)|\d{3})[\s-]?\d{3}[\s-]?\d{4}"),
+    re.compile(r"\b(?:\d[ -]*?){13,16}\b"),
+    re.compile(r"\b\d{3}-\d{2}-\d{4}\b"),
+)
+
+WORDS = (
+    "refund policy customer account billing invoice subscription shipping order escalate "
+    "agent response template warranty replacement portal password reset verify identity"
+).split()
+
+
+def legacy_scrub(value: Any, token: str) -> Any:
+    """Reference copy of the pre-optimisation scrubber (rebuilds every container)."""
+    if isinstance(value, str):
+        for pattern in LEGACY_PATTERNS:
+            value = pattern.sub(token, value)
+        return value
+    if isinstance(value, dict):
+        return {k: legacy_scrub(v, token) for k, v in value.items()}
+    if isinstance(value, list):
+        return [legacy_scrub(item, token) for item in value]
+    return value
+
+
+def _prose(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def retrieval_payload(rng: random.Random, chunks: int = 20) -> Dict[str, Any]:
+    return {
+        "tenant_id": "acme-support",
+        "user_id": "agent-42",
+        "skill": "support_draft_email",
+        "input": {"text": _prose(rng, 80), "metadata": {"channel": "email"}},
+        "context": {
+            "retrieval_chunks": [
+                {"id": f"kb-{i}", "text": _prose(rng, 180), "score": rng.random(), "source": "kb"}
+                for i in range(chunks)
+            ],
+            "customer_tier": "gold",
+        },
+        "version": {"policy_id": "support-draft-v0", "base_model": "llama-3.1"},
+        "timings": {"ms_total": 812},
+        "costs": {"tokens_in": 2048, "tokens_out": 256},
+    }
+
+
+def pii_ticket_payload(rng: random.Random) -> Dict[str, Any]:
+    text = (
+        f"{_prose(rng, 40)} Please reach me at jane.doe@example.com or +1 (555) 123-4567. "
+        f"My card 4242 4242 4242 4242 was charged twice, SSN 123-45-6789 on file. {_prose(rng, 40)}"
+    )
+    return {"tenant_id": "acme-support", "interaction_id": "i-1", "output": {"text": text}}
+
+
+def digit_heavy_payload(rng: random.Random) -> Dict[str, Any]:
+    log = "\n".join(
+        f"2025-01-{rng.randint(1, 28):02d} order={rng.randint(10**11, 10**12)} sku={rng.randint(1000, 9999)}"
+        for _ in range(200)
+    )
+    return {"tenant_id": "acme-support", "interaction_id": "i-2", "output": {"text": log}}
+
+
+def _time(fn: Callable[[Any], Any], payloads: List[Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for payload in payloads:
+            fn(payload)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    token = "[REDACTED]"
+    scrubber = build_scrubber(enabled=True, allowlist=(), redaction_token=token)
+    suites = {
+        "retrieval_context": [retrieval_payload(rng) for _ in range(10)],
+        "pii_ticket": [pii_ticket_payload(rng) for _ in range(10)],
+        "digit_heavy_log": [digit_heavy_payload(rng) for _ in range(10)],
+    }
+
+    print(f"{'suite':<20}{'legacy us/evt':>15}{'engine us/evt':>15}{'speedup':>10}{'MB/s':>10}")
+    for name, payloads in suites.items():
+        for payload in payloads:
+            assert scrubber.scrub(payload) == legacy_scrub(payload, token), f"mismatch in {name}"
+        size_mb = sum(len(json.dumps(p)) for p in payloads) * args.iterations / 1e6
+        events = len(payloads) * args.iterations
+        legacy = _time(lambda p: legacy_scrub(p, token), payloads, args.iterations)
+        engine = _time(scrubber.scrub, payloads, args.iterations)
+        print(
+            f"{name:<20}{legacy / events * 1e6:>15.1f}{engine / events * 1e6:>15.1f}"
+            f"{legacy / engine:>9.1f}x{size_mb / engine:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
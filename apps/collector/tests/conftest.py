@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+from minio.error import S3Error
+
+from apps.collector.app.storage import PersistenceSettings
+
+
+def _etag(body: bytes) -> str:
+    return hashlib.md5(body).hexdigest()
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, etag: str | None = None) -> None:
+        self._body = body
+        self.headers = {"ETag": f'"{etag}"'} if etag else {}
+        self._offset = 0
+
+    def read(self, amt: int | None = None) -> bytes:
+        end = len(self._body) if amt is None else self._offset + amt
+        chunk = self._body[self._offset : end]
+        self._offset += len(chunk)
+        return chunk
+
+    def close(self) -> None:
+        return None
+
+    def release_conn(self) -> None:
+        return None
+
+
+class FakeMinio:
+    """In-memory stand-in for the subset of ``minio.Minio`` the collector uses."""
+
+    def __init__(self) -> None:
+        self.objects: dict[str, bytes] = {}
+        self.list_prefixes: list[str] = []
+        self.gets: list[str] = []
+
+    def list_objects(self, bucket, prefix="", recursive=False):
+        self.list_prefixes.append(prefix)
+        return [SimpleNamespace(object_name=name) for name in sorted(self.objects) if name.startswith(prefix)]
+
+    def get_object(self, bucket, name, offset=0, length=0):
+        if name not in self.objects:
+            raise S3Error("NoSuchKey", "missing", name, None, None, None)
+        self.gets.append(name)
+        body = self.objects[name]
+        return FakeResponse(body[offset : offset + length] if length else body[offset:], _etag(body))
+
+    def stat_object(self, bucket, name):
+        if name not in self.objects:
+            raise S3Error("NoSuchKey", "missing", name, None, None, None)
+        return SimpleNamespace(size=len(self.objects[name]), etag=_etag(self.objects[name]))
+
+    def put_object(self, bucket_name, object_name, data, length, content_type=None):
+        self.objects[object_name] = data.read(length)
+        return SimpleNamespace(etag=_etag(self.objects[object_name]))
+
+    def remove_object(self, bucket_name, object_name):
+        self.objects.pop(object_name, None)
+
+
+@pytest.fixture()
+def settings() -> PersistenceSettings:
+    return PersistenceSettings(postgres_dsn="postgresql://test", minio_bucket="bucket", minio_prefix="events")
+
+
+@pytest.fixture()
+def fake_minio() -> FakeMinio:
+    return FakeMinio()
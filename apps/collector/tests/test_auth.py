@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.collector.app import main
+from apps.collector.app.auth import TenantIdentity, TenantResolver, parse_bearer
+
+TENANT_UUID = "00000000-0000-0000-0000-000000000001"
+KEY_ID = "00000000-0000-0000-0000-0000000000aa"
+
+
+class FakeResult:
+    def __init__(self, row) -> None:
+        self._row = row
+
+    def fetchone(self):
+        return self._row
+
+
+class FakeDB:
+    def __init__(self) -> None:
+        self.queries: list[tuple[str, tuple]] = []
+
+    def execute(self, query: str, params: tuple) -> FakeResult:
+        self.queries.append((query, params))
+        if "FROM api_keys" in query:
+            return FakeResult((KEY_ID, TENANT_UUID, "acme") if params[0] == "good-token" else None)
+        if "FROM tenants" in query:
+            return FakeResult((TENANT_UUID,) if params[0] == "acme" else None)
+        return FakeResult(None)
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def count(self, fragment: str) -> int:
+        return sum(fragment in query for query, _ in self.queries)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def db() -> FakeDB:
+    return FakeDB()
+
+
+@pytest.fixture()
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture()
+def resolver(db: FakeDB, clock: Clock) -> TenantResolver:
+    return TenantResolver(db.connection, ttl_seconds=60, negative_ttl_seconds=5, touch_interval_seconds=0, clock=clock)
+
+
+def test_token_lookups_are_cached(resolver: TenantResolver, db: FakeDB, clock: Clock) -> None:
+    first = resolver.authenticate("good-token")
+    second = resolver.authenticate("good-token")
+
+    assert first == second == TenantIdentity(tenant_uuid=TENANT_UUID, tenant_slug="acme", api_key_id=KEY_ID)
+    assert db.count("FROM api_keys") == 1
+
+    clock.now = 61
+    resolver.authenticate("good-token")
+    assert db.count("FROM api_keys") == 2
+
+
+def test_bad_tokens_are_negatively_cached(resolver: TenantResolver, db: FakeDB, clock: Clock) -> None:
+    assert resolver.authenticate("bad-token") is None
+    assert resolver.authenticate("bad-token") is None
+    assert db.count("FROM api_keys") == 1
+
+    clock.now = 6
+    resolver.authenticate("bad-token")
+    assert db.count("FROM api_keys") == 2
+
+
+def test_last_used_updates_are_batched(resolver: TenantResolver, db: FakeDB) -> None:
+    for _ in range(5):
+        resolver.authenticate("good-token")
+
+    assert db.count("UPDATE api_keys") == 0
+    assert resolver.flush_last_used() == 1
+    assert db.count("UPDATE api_keys") == 1
+    assert resolver.flush_last_used() == 0
+
+
+def test_slug_resolution_is_cached(resolver: TenantResolver, db: FakeDB) -> None:
+    identity = resolver.resolve_slug("acme")
+    assert identity is not None and identity.tenant_uuid == TENANT_UUID
+    assert resolver.resolve_slug("acme") == identity
+    assert resolver.resolve_slug("missing") is None
+    assert db.count("FROM tenants") == 2
+
+
+def test_is_cached_reports_lookups_that_skip_postgres(resolver: TenantResolver) -> None:
+    assert not resolver.is_cached(slug="acme") and not resolver.is_cached(token="good-token")
+
+    resolver.resolve_slug("acme")
+    resolver.authenticate("good-token")
+
+    assert resolver.is_cached(slug="acme") and resolver.is_cached(token="good-token")
+    assert not resolver.is_cached(token="good-token", slug="other")
+
+
+def test_parse_bearer() -> None:
+    assert parse_bearer("Bearer abc") == "abc"
+    assert parse_bearer("bearer abc ") == "abc"
+    assert parse_bearer("Basic abc") is None
+    assert parse_bearer(None) is None
+
+
+@pytest.fixture()
+def api(monkeypatch, resolver: TenantResolver):
+    writes: list[dict] = []
+
+    async def fake_write_event(event_type, payload, idempotency_key=None, tenant_uuid=None):
+        writes.append({"event_type": event_type, "payload": payload, "tenant_uuid": tenant_uuid})
+        return True
+
+    monkeypatch.setattr(main, "tenants", resolver)
+    monkeypatch.setattr(main.storage, "write_event_async", fake_write_event)
+    return TestClient(main.app), writes
+
+
+TASK = {"tenant_id": "acme", "interaction_id": "i-1", "label": {"correct": True}}
+
+
+def test_ingest_resolves_tenant_uuid_from_token(api) -> None:
+    client, writes = api
+    response = client.post("/v1/task_result", json=TASK, headers={"Authorization": "Bearer good-token"})
+
+    assert response.status_code == 202
+    assert writes[0]["tenant_uuid"] == TENANT_UUID
+    assert writes[0]["payload"]["tenant_id"] == "acme"
+
+
+def test_ingest_rejects_invalid_token_and_tenant_mismatch(api) -> None:
+    client, writes = api
+    bad = client.post("/v1/task_result", json=TASK, headers={"Authorization": "Bearer bad-token"})
+    mismatch = client.post(
+        "/v1/task_result",
+        json={**TASK, "tenant_id": "globex"},
+        headers={"Authorization": "Bearer good-token"},
+    )
+
+    assert bad.status_code == 401
+    assert mismatch.status_code == 403
+    assert writes == []
+
+
+def test_anonymous_ingest_resolves_slug_unless_auth_required(api, monkeypatch) -> None:
+    client, writes = api
+    assert client.post("/v1/task_result", json=TASK).status_code == 202
+    assert writes[0]["tenant_uuid"] == TENANT_UUID
+    assert client.post("/v1/task_result", json={**TASK, "tenant_id": "missing"}).status_code == 404
+
+    monkeypatch.setattr(main.settings, "auth_required", True)
+    assert client.post("/v1/task_result", json=TASK).status_code == 401
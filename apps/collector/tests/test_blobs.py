@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import copy
+import json
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pytest
+
+from apps.collector.app import export
+from apps.collector.app.blobs import (
+    BLOB_KEY,
+    blob_digest,
+    blob_refs,
+    extract_blobs,
+    rehydrate,
+    staging_object,
+)
+from apps.collector.app.compaction import StagedBlobs
+from apps.collector.app.storage import PersistenceLayer, PersistenceSettings
+
+CHUNK = "Refunds are issued to the original payment method within 5 business days. " * 8
+PROMPT = "Customer writes: my order arrived damaged, what are my options? " * 6
+EVENT = {
+    "tenant_id": "acme",
+    "skill": "support",
+    "input": {"text": PROMPT},
+    "context": {"retrieval_chunks": [{"id": "kb-1", "text": CHUNK}, {"id": "kb-2", "text": "short"}, {"text": CHUNK}]},
+    "version": {"policy_id": "p-1"},
+}
+
+
+def test_large_texts_are_replaced_by_references() -> None:
+    original = copy.deepcopy(EVENT)
+
+    payload, bodies, refs = extract_blobs(EVENT, min_bytes=256)
+
+    chunk, prompt = blob_digest(CHUNK), blob_digest(PROMPT)
+    assert payload["input"] == {"text": {BLOB_KEY: prompt}}
+    assert [c["text"] for c in payload["context"]["retrieval_chunks"]] == [{BLOB_KEY: chunk}, "short", {BLOB_KEY: chunk}]
+    assert payload["context"]["retrieval_chunks"][0]["id"] == "kb-1"
+    assert bodies == {chunk: CHUNK, prompt: PROMPT}
+    assert sorted(refs) == sorted(blob_refs(payload)) == sorted([chunk, chunk, prompt])
+    assert EVENT == original  # the caller's payload is not mutated
+    assert rehydrate(payload, bodies) == EVENT
+
+
+def test_small_payloads_and_disabled_extraction_are_untouched() -> None:
+    small = {"tenant_id": "acme", "input": {"text": "hi"}, "context": {"retrieval_chunks": [{"text": "tiny"}]}}
+
+    assert extract_blobs(small, 256) == (small, {}, [])
+    assert extract_blobs(EVENT, 0) == (EVENT, {}, [])
+
+
+def test_unknown_references_stay_references() -> None:
+    payload = {"input": {"text": {BLOB_KEY: "abc"}}, "labels": {BLOB_KEY: "x", "other": 1}}
+
+    assert rehydrate(payload, {}) == payload
+    assert blob_refs(payload) == ["abc"]  # objects with other keys are not references
+
+
+class FakeBlobDB:
+    """Tracks blob refcounts the way the ``stored`` CTE does and returns ``new_blobs``."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        self.queries: list[str] = []
+        self.params: list[dict] = []
+        self.refcounts: dict[tuple[str, str], int] = {}
+        self.keys: set[tuple] = set()
+        self._row: dict | None = None
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def cursor(self, row_factory=None):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def execute(self, query, params) -> None:
+        self.queries.append(query)
+        self.params.append(params)
+        unique = (params["tenant_id"], params["event_type"], params["key"])
+        if params["key"] is not None and unique in self.keys:
+            self._row = None
+            return
+        self.keys.add(unique)
+        fresh = []
+        for digest, count in zip(params.get("blob_digests", ()), params.get("blob_counts", ())):
+            slot = (params["tenant_id"], digest)
+            if slot not in self.refcounts:
+                fresh.append(digest)
+            self.refcounts[slot] = self.refcounts.get(slot, 0) + count
+        self._row = {"id": len(self.queries), "new_blobs": fresh}
+
+    def fetchone(self):
+        return self._row
+
+
+@pytest.fixture()
+def layer(fake_minio) -> PersistenceLayer:
+    persistence = PersistenceLayer(
+        settings=PersistenceSettings(postgres_dsn="postgresql://test", minio_enabled=True, minio_bucket="bucket")
+    )
+    persistence._pool = FakeBlobDB()  # type: ignore[assignment]
+    persistence._minio = fake_minio
+    return persistence
+
+
+def test_events_store_references_and_bodies_once(layer: PersistenceLayer) -> None:
+    layer.write_event("interaction.create", EVENT, idempotency_key="k1", tenant_uuid="t-1")
+    layer.write_event("interaction.create", EVENT, idempotency_key="k2", tenant_uuid="t-1")
+    layer.write_event("interaction.create", EVENT, idempotency_key="k2", tenant_uuid="t-1")  # replay
+
+    db = layer._pool
+    query = " ".join(db.queries[0].split())
+    assert "INSERT INTO event_blobs" in query and "WHERE EXISTS (SELECT 1 FROM claimed)" in query
+    stored = json.loads(bytes(db.params[0]["payload"]))
+    assert CHUNK not in json.dumps(stored) and stored["idempotency_key"] == "k1"
+    assert db.params[0]["blob_digests"] == sorted([blob_digest(CHUNK), blob_digest(PROMPT)])
+    # The replay is answered from the key cache, so references are counted twice, not three times.
+    assert db.refcounts == {("t-1", blob_digest(CHUNK)): 4, ("t-1", blob_digest(PROMPT)): 2}
+
+    objects = layer._minio.objects  # type: ignore[union-attr]
+    blobs = sorted(name for name in objects if "/blobs/" in name)
+    assert blobs == sorted(staging_object("events", digest) for digest in (blob_digest(CHUNK), blob_digest(PROMPT)))
+    assert objects[staging_object("events", blob_digest(CHUNK))] == CHUNK.encode()
+    staged = [json.loads(objects[name]) for name in objects if "/staging/" in name]
+    assert len(staged) == 2 and all(blob_refs(line["payload"]) for line in staged)
+
+
+def test_events_without_large_texts_keep_the_plain_insert(layer: PersistenceLayer) -> None:
+    layer.write_event("task.result", {"tenant_id": "acme", "interaction_id": "i-1"}, tenant_uuid="t-1")
+
+    assert "event_blobs" not in layer._pool.queries[0] and "blob_digests" not in layer._pool.params[0]
+
+
+class FakeBlobResult:
+    def __init__(self, rows) -> None:
+        self._rows = rows
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeBlobConnection:
+    def __init__(self, bodies: dict[str, str]) -> None:
+        self.bodies = bodies
+        self.lookups: list[tuple] = []
+
+    def execute(self, query, params):
+        tenant, digests = params
+        self.lookups.append((tenant, digests))
+        return FakeBlobResult([(digest, self.bodies[digest]) for digest in digests if digest in self.bodies])
+
+
+def test_export_rows_are_rehydrated_with_one_lookup_per_batch() -> None:
+    payload, bodies, _ = extract_blobs(EVENT, 256)
+    conn = FakeBlobConnection(bodies)
+    at = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    rows = [
+        (1, "interaction.create", "p-1", "support", at, json.dumps(payload)),
+        (2, "task.result", None, None, at, '{"tenant_id": "acme"}'),
+    ]
+
+    restored = export._rehydrate_rows(conn, "t-1", rows)
+
+    assert json.loads(restored[0][5]) == EVENT and restored[0][:5] == rows[0][:5]
+    assert restored[1] is rows[1]
+    assert conn.lookups == [("t-1", sorted(bodies))]
+
+
+def test_compaction_restores_texts_from_staged_blobs(fake_minio, settings) -> None:
+    payload, bodies, _ = extract_blobs(EVENT, 256)
+    chunk = blob_digest(CHUNK)
+    fake_minio.objects[staging_object("events", chunk)] = CHUNK.encode()
+    records = [{"event_type": "interaction.create", "payload": payload} for _ in range(3)]
+
+    blobs = StagedBlobs(fake_minio, settings)
+    restored = list(blobs.rehydrate(records))
+
+    # The prompt body was never staged: its reference is kept rather than failing the run.
+    assert restored[0]["payload"]["context"] == EVENT["context"]
+    assert restored[0]["payload"]["input"] == payload["input"]
+    assert fake_minio.gets == [staging_object("events", chunk)]  # cached after the first fetch
+    assert blobs.missing == 3
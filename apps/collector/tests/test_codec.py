@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Iterator, Mapping, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from apps.collector.app import codec, main
+from apps.collector.app.auth import TenantIdentity
+from apps.collector.app.codec import CODECS, EventDecodeError, discriminate
+
+pytest.importorskip("msgspec")
+
+ACME = TenantIdentity(tenant_uuid="00000000-0000-0000-0000-000000000001", tenant_slug="acme")
+OUTPUT = {
+    "tenant_id": "acme",
+    "interaction_id": "i-1",
+    "output": {"text": "hi", "tool_calls": [{"tool_name": "search", "arguments": {"q": "x"}, "debug": 1}], "extra": 2},
+    "timings": {"ms_total": 5},
+    "costs": {"tokens_in": 1, "tokens_out": 2},
+    "version": {"policy_id": "p1", "base_model": "m", "lora": "a"},
+    "unknown": True,
+}
+
+
+def test_fast_path_keeps_open_objects_and_prunes_closed_ones(monkeypatch) -> None:
+    monkeypatch.setattr(CODECS["interaction.output"].model, "model_validate_json", None)  # must not be reached
+
+    payload = CODECS["interaction.output"].decode(json.dumps(OUTPUT).encode())
+
+    assert "unknown" not in payload
+    assert payload["output"]["extra"] == 2 and payload["version"]["lora"] == "a"
+    assert payload["output"]["tool_calls"] == [{"tool_name": "search", "arguments": {"q": "x"}}]
+    assert "trace_id" not in payload and "created_at" not in payload
+
+
+def test_schema_constraints_are_compiled() -> None:
+    task = CODECS["task.result"]
+
+    with pytest.raises(EventDecodeError) as excinfo:
+        task.decode(b'{"tenant_id": "", "interaction_id": "i", "label": {"f1": 2}}')
+
+    failed = {error["loc"] for error in excinfo.value.errors}
+    assert ("tenant_id",) in failed and ("label", "f1") in failed
+
+
+def test_lenient_bodies_fall_back_to_pydantic() -> None:
+    # The schema requires ``context``; the pydantic model defaults it, and coerces "1".
+    body = {
+        "tenant_id": "acme",
+        "user_id": "u",
+        "skill": "s",
+        "input": {"text": "hi"},
+        "version": {"policy_id": "p1", "base_model": "m"},
+        "timings": {"ms_total": "1"},
+        "costs": {"tokens_in": 1, "tokens_out": 2},
+    }
+
+    payload = CODECS["interaction.create"].decode(json.dumps(body).encode())
+
+    assert payload["timings"]["ms_total"] == 1
+
+
+def _example(schema: Mapping[str, Any]) -> Any:
+    """A value every constraint of ``schema`` accepts, with all optional properties present."""
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "string":
+        if schema.get("format") == "date-time":
+            return "2025-01-01T00:00:00Z"
+        return "x" * max(1, schema.get("minLength", 1))
+    if kind in ("integer", "number"):
+        return schema.get("minimum", 0)
+    if kind == "boolean":
+        return True
+    if kind == "array":
+        return [_example(schema.get("items", {}))]
+    if kind == "object":
+        return {name: _example(node) for name, node in (schema.get("properties") or {}).items()}
+    return "x"
+
+
+def _with_nulls(
+    schema: Mapping[str, Any], value: Any, path: Tuple[str, ...] = ()
+) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    """Yield ``(path, copy of value)`` with each declared property in turn set to null."""
+    for name, node in (schema.get("properties") or {}).items():
+        variant = json.loads(json.dumps(value))
+        target = variant
+        for key in path:
+            target = target[key]
+        target[name] = None
+        yield (*path, name), variant
+        yield from _with_nulls(node, value, (*path, name))
+
+
+@pytest.mark.parametrize("event_type", sorted(CODECS))
+def test_fast_path_is_never_more_lenient_than_the_model(event_type: str) -> None:
+    event_codec = CODECS[event_type]
+    assert event_codec.schema is not None
+    example = _example(event_codec.schema)
+    assert event_codec._fast_validate(json.loads(json.dumps(example))) is not None
+    event_codec.model.model_validate_json(json.dumps(example))
+
+    for path, variant in _with_nulls(event_codec.schema, example):
+        if event_codec._fast_validate(json.loads(json.dumps(variant))) is None:
+            continue
+        try:
+            event_codec.model.model_validate_json(json.dumps(variant))
+        except ValidationError as exc:
+            pytest.fail(f"fast path accepted null at {'.'.join(path)}, the model rejects it: {exc}")
+
+
+def test_discriminator_is_derived_from_required_fields() -> None:
+    assert discriminate.markers["task.result"] == {"label"}
+    assert discriminate.markers["interaction.output"] == {"output"}
+    assert discriminate.default == "feedback.submit"
+    assert discriminate({"tenant_id": "a", "interaction_id": "i", "label": {}}) == "task.result"
+    assert discriminate({"tenant_id": "a", "interaction_id": "i", "explicit": {"thumb": 1}}) == "feedback.submit"
+    assert discriminate({"event_type": "interaction.output"}) == "interaction.output"
+    assert discriminate({}, event_type="bogus") is None
+
+
+def test_encode_json_is_compact() -> None:
+    assert codec.encode_json({"a": [1, "b"]}) == b'{"a":[1,"b"]}'
+
+
+@pytest.fixture()
+def api(monkeypatch):
+    writes: list[dict] = []
+
+    async def write_event_async(**kwargs):
+        writes.append(kwargs)
+        return True
+
+    monkeypatch.setattr(main.tenants, "resolve_slug", lambda slug: ACME if slug == "acme" else None)
+    monkeypatch.setattr(main.storage, "write_event_async", write_event_async)
+    return TestClient(main.app), writes
+
+
+def test_ingest_stores_the_decoded_payload(api) -> None:
+    client, writes = api
+
+    response = client.post("/v1/interaction.output", json=OUTPUT, headers={"Idempotency-Key": "k-1"})
+
+    assert response.status_code == 202
+    assert writes[0]["payload"]["idempotency_key"] == "k-1"
+    assert "unknown" not in writes[0]["payload"]
+    invalid = client.post("/v1/interaction.output", content=b"{", headers={"content-type": "application/json"})
+    assert invalid.status_code == 422 and invalid.json()["detail"][0]["loc"][0] == "body"
+
+
+def test_validate_dispatches_on_discriminator(api) -> None:
+    client, _ = api
+    task = {"tenant_id": "acme", "interaction_id": "i-1", "label": {"correct": True}}
+
+    assert client.post("/v1/validate", json=task).json() == {"event_type": "TaskResult", "valid": True}
+    bad = client.post("/v1/validate", json={**task, "label": {"f1": 3}})
+    assert bad.status_code == 400 and "TaskResult" in bad.json()["detail"]
+    assert client.post("/v1/validate?event_type=feedback.submit", json=task).json()["event_type"] == "FeedbackSubmit"
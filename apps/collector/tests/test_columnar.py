@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+
+import pyarrow as pa
+
+from apps.collector.app.columnar import (
+    arrow_schema,
+    partition_records,
+    records_to_table,
+)
+
+
+def _record(event_type: str, payload: dict) -> dict:
+    return {"event_type": event_type, "ingested_at": "2025-01-01T12:00:00Z", "payload": payload}
+
+
+def test_schema_flattens_declared_scalars() -> None:
+    schema = arrow_schema("interaction.output")
+
+    assert schema.field("timings_ms_total").type == pa.int64()
+    assert schema.field("costs_dollars").type == pa.float64()
+    assert schema.field("version_base_model").type == pa.string()
+    assert schema.field("version_status").type == pa.dictionary(pa.int32(), pa.string())
+    assert arrow_schema("feedback.submit").field("labels_sample_weights_sent").type == pa.float64()
+    assert pa.types.is_dictionary(schema.field("policy_id").type)
+    assert "tenant_id" not in schema.names and "event_type" not in schema.names
+    assert "output_tool_calls" not in schema.names
+    assert "tenant_id" in arrow_schema("interaction.output", include_partitions=True).names
+
+
+def test_feedback_and_task_columns_are_native() -> None:
+    feedback = arrow_schema("feedback.submit")
+    task = arrow_schema("task.result")
+
+    assert feedback.field("explicit_thumb").type == pa.int8()
+    assert feedback.field("explicit_rating").type == pa.int8()
+    assert feedback.field("implicit_edited_text").type == pa.string()
+    assert feedback.field("implicit_sent").type == pa.bool_()
+    assert task.field("label_f1").type == pa.float64()
+    assert task.field("label_resolved").type == pa.bool_()
+
+
+def test_records_to_table_extracts_values() -> None:
+    payload = {
+        "tenant_id": "acme",
+        "interaction_id": "i-1",
+        "explicit": {"thumb": 1, "rating": 4},
+        "implicit": {"edited_text": "fixed", "sent": True, "time_to_send_ms": 1200},
+        "labels": {"reason": "tone"},
+        "idempotency_key": "k-1",
+        "created_at": "2025-01-01T11:59:00Z",
+    }
+
+    table = records_to_table("feedback.submit", [_record("feedback.submit", payload)])
+    row = table.to_pylist()[0]
+
+    assert row["interaction_id"] == "i-1"
+    assert row["explicit_thumb"] == 1
+    assert row["implicit_time_to_send_ms"] == 1200
+    assert row["idempotency_key"] == "k-1"
+    assert row["occurred_at"].isoformat() == "2025-01-01T11:59:00+00:00"
+    assert json.loads(row["raw_payload"])["labels"] == {"reason": "tone"}
+
+
+def test_occurred_at_falls_back_to_ingested_at() -> None:
+    table = records_to_table(
+        "task.result",
+        [_record("task.result", {"tenant_id": "acme", "interaction_id": "i", "label": {"correct": True}})],
+    )
+    row = table.to_pylist()[0]
+    assert row["occurred_at"] == row["ingested_at"]
+    assert row["label_correct"] is True
+
+
+def test_partition_records_groups_by_type_and_tenant() -> None:
+    groups = partition_records(
+        [
+            _record("task.result", {"tenant_id": "acme"}),
+            _record("task.result", {"tenant_id": "globex"}),
+            _record("task.result", {"tenant_id": "acme"}),
+        ]
+    )
+    assert {key: len(rows) for key, rows in groups.items()} == {
+        ("task.result", "acme"): 2,
+        ("task.result", "globex"): 1,
+    }
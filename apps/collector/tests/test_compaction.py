@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+from io import BytesIO
+
+import pyarrow.parquet as pq
+import pytest
+
+from apps.collector.app import compaction
+from apps.collector.app.storage import PersistenceSettings
+
+
+def _stage(client, event_type: str, target_date: str, name: str, tenant: str = "acme") -> str:
+    object_name = f"events/staging/{event_type}/dt={target_date}/{name}.jsonl"
+    record = {"event_type": event_type, "ingested_at": f"{target_date}T00:00:00Z", "payload": {"tenant_id": tenant}}
+    client.objects[object_name] = (json.dumps(record) + "\n").encode("utf-8")
+    return object_name
+
+
+def _read_parquet(client, name: str):
+    return pq.read_table(BytesIO(client.objects[name]))
+
+
+def test_compact_lists_exact_prefixes_and_skips_other_dates(settings: PersistenceSettings, fake_minio) -> None:
+    client = fake_minio
+    _stage(client, "interaction.create", "2025-01-01", "a")
+    _stage(client, "feedback.submit", "2025-01-01", "b")
+    _stage(client, "interaction.create", "2025-01-02", "c")
+
+    outputs = compaction.compact("2025-01-01", settings=settings, client=client, max_workers=4)
+
+    assert sorted(outputs) == [
+        name for name in sorted(client.objects) if name.endswith(".parquet")
+    ]
+    assert [name.split("/")[3] for name in sorted(outputs)] == [
+        "event_type=feedback.submit",
+        "event_type=interaction.create",
+    ]
+    assert all(name.startswith("events/parquet/dt=2025-01-01/") for name in outputs)
+    assert sum(_read_parquet(client, name).num_rows for name in outputs) == 2
+    assert all("dt=2025-01-01/" in prefix for prefix in client.list_prefixes)
+    assert not any("dt=2025-01-02" in name for name in client.gets)
+
+
+def test_incremental_run_only_touches_new_objects(settings: PersistenceSettings, fake_minio) -> None:
+    client = fake_minio
+    _stage(client, "interaction.create", "2025-01-01", "a")
+    first = compaction.compact("2025-01-01", settings=settings, client=client)
+
+    assert compaction.compact("2025-01-01", settings=settings, client=client) == []
+
+    new_object = _stage(client, "task.result", "2025-01-01", "b")
+    client.gets.clear()
+    second = compaction.compact("2025-01-01", settings=settings, client=client)
+
+    assert len(second) == 1 and second != first
+    assert _read_parquet(client, second[0]).num_rows == 1
+    assert new_object in client.gets
+    assert not any(name.endswith("a.jsonl") for name in client.gets)
+
+    manifest = compaction.load_manifest(client, settings, "2025-01-01")
+    assert manifest.files == first + second
+    assert len(manifest.processed) == 2
+
+
+def test_compact_range_backfills_each_date(settings: PersistenceSettings, fake_minio) -> None:
+    client = fake_minio
+    _stage(client, "interaction.create", "2025-01-01", "a")
+    _stage(client, "interaction.create", "2025-01-03", "b")
+
+    outputs = compaction.compact_range("2025-01-01", "2025-01-03", settings=settings, client=client)
+
+    assert [name.split("/")[2] for name in outputs] == ["dt=2025-01-01", "dt=2025-01-03"]
+
+
+def test_partition_paths_split_tenants(settings: PersistenceSettings, fake_minio) -> None:
+    client = fake_minio
+    _stage(client, "interaction.create", "2025-01-01", "a", tenant="acme")
+    _stage(client, "interaction.create", "2025-01-01", "b", tenant="globex")
+
+    outputs = compaction.compact("2025-01-01", settings=settings, client=client)
+
+    assert sorted(name.split("/")[4] for name in outputs) == ["tenant_id=acme", "tenant_id=globex"]
+
+
+def test_date_range_rejects_inverted_bounds() -> None:
+    with pytest.raises(ValueError):
+        compaction._date_range("2025-01-03", "2025-01-01")
+
+
+def _stage_keyed(client, name: str, key: str | None, tenant: str = "acme") -> None:
+    payload = {"tenant_id": tenant, "interaction_id": name, "label": {"correct": True}}
+    if key:
+        payload["idempotency_key"] = key
+    record = {"event_type": "task.result", "ingested_at": "2025-01-01T00:00:00Z", "payload": payload}
+    object_name = f"events/staging/task.result/dt=2025-01-01/{name}.jsonl"
+    client.objects[object_name] = (json.dumps(record) + "\n").encode("utf-8")
+
+
+def _rows(client, names: list[str]) -> list[dict]:
+    return [row for name in names for row in _read_parquet(client, name).to_pylist()]
+
+
+def test_compaction_dedupes_within_a_run(settings: PersistenceSettings, fake_minio) -> None:
+    _stage_keyed(fake_minio, "a", "k1")
+    _stage_keyed(fake_minio, "b", "k1")
+    _stage_keyed(fake_minio, "c", "k1", tenant="globex")
+    _stage_keyed(fake_minio, "d", None)
+    _stage_keyed(fake_minio, "e", None)
+
+    outputs = compaction.compact("2025-01-01", settings=settings, client=fake_minio)
+
+    assert len(_rows(fake_minio, outputs)) == 4
+
+
+def test_compaction_dedupes_against_existing_files(settings: PersistenceSettings, fake_minio) -> None:
+    _stage_keyed(fake_minio, "a", "k1")
+    first = compaction.compact("2025-01-01", settings=settings, client=fake_minio)
+    _stage_keyed(fake_minio, "b", "k1")
+    _stage_keyed(fake_minio, "c", "k2")
+
+    second = compaction.compact("2025-01-01", settings=settings, client=fake_minio)
+
+    assert [row["idempotency_key"] for row in _rows(fake_minio, second)] == ["k2"]
+    assert len(_rows(fake_minio, first + second)) == 2
+
+
+def test_incremental_dedupe_reads_only_partitions_the_run_touches(settings: PersistenceSettings, fake_minio) -> None:
+    _stage_keyed(fake_minio, "a", "k1")
+    _stage_keyed(fake_minio, "b", "k2", tenant="globex")
+    acme, globex = sorted(compaction.compact("2025-01-01", settings=settings, client=fake_minio))
+    _stage_keyed(fake_minio, "c", "k2", tenant="globex")
+    _stage_keyed(fake_minio, "d", None)
+    fake_minio.gets.clear()
+
+    second = compaction.compact("2025-01-01", settings=settings, client=fake_minio)
+
+    assert globex in fake_minio.gets and acme not in fake_minio.gets  # unkeyed acme rows need no lookup
+    assert [row["idempotency_key"] for row in _rows(fake_minio, second)] == [None]
+
+
+def test_full_recompaction_replaces_previous_outputs(settings: PersistenceSettings, fake_minio) -> None:
+    _stage_keyed(fake_minio, "a", "k1")
+    first = compaction.compact("2025-01-01", settings=settings, client=fake_minio)
+
+    rebuilt = compaction.compact("2025-01-01", settings=settings, client=fake_minio, full=True)
+
+    assert first[0] not in fake_minio.objects
+    assert compaction.load_manifest(fake_minio, settings, "2025-01-01").files == rebuilt
+    assert len(_rows(fake_minio, rebuilt)) == 1
+
+
+def test_save_manifest_rejects_stale_copies(settings: PersistenceSettings, fake_minio) -> None:
+    _stage(fake_minio, "interaction.create", "2025-01-01", "a")
+    compaction.compact("2025-01-01", settings=settings, client=fake_minio)
+    first = compaction.load_manifest(fake_minio, settings, "2025-01-01")
+    second = compaction.load_manifest(fake_minio, settings, "2025-01-01")
+
+    first.files.append("events/parquet/dt=2025-01-01/extra.parquet")
+    compaction.save_manifest(fake_minio, settings, first)
+    second.processed.add("events/staging/other.jsonl")
+
+    with pytest.raises(compaction.ManifestConflict):
+        compaction.save_manifest(fake_minio, settings, second)
+    assert compaction.load_manifest(fake_minio, settings, "2025-01-01").files == first.files
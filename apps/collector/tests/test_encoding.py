@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.collector.app import main
+from apps.collector.app.auth import TenantIdentity
+from apps.collector.app.encoding import (
+    BodyTooLarge,
+    MalformedBody,
+    UnsupportedEncoding,
+    decode_body,
+)
+
+ACME = TenantIdentity(tenant_uuid="00000000-0000-0000-0000-000000000001", tenant_slug="acme")
+TASK = {"tenant_id": "acme", "interaction_id": "i-1", "label": {"correct": True}, "notes": "x" * 4000}
+
+
+def test_gzip_round_trip_and_identity_passthrough() -> None:
+    body = json.dumps(TASK).encode()
+
+    assert decode_body(gzip.compress(body), "gzip", limit=len(body)) == body
+    assert decode_body(body, None, limit=len(body)) == body
+    assert decode_body(body, "identity", limit=len(body)) == body
+    with pytest.raises(BodyTooLarge):
+        decode_body(body, None, limit=len(body) - 1)
+
+
+def test_zstd_round_trip() -> None:
+    zstandard = pytest.importorskip("zstandard")
+    body = json.dumps(TASK).encode()
+
+    assert decode_body(zstandard.ZstdCompressor().compress(body), "zstd", limit=len(body)) == body
+
+
+def test_zstd_reads_every_frame_within_the_limit() -> None:
+    zstandard = pytest.importorskip("zstandard")
+    compressor = zstandard.ZstdCompressor()
+    first, second = b'{"tenant_id": "acme", ', b'"interaction_id": "i-1"}'
+    body = compressor.compress(first) + compressor.compress(second)
+
+    assert decode_body(body, "zstd", limit=len(first + second)) == first + second
+    with pytest.raises(BodyTooLarge):
+        decode_body(body + compressor.compress(b"\0" * 4096), "zstd", limit=1024)
+
+
+def test_bomb_is_refused_without_full_expansion() -> None:
+    bomb = gzip.compress(b"\0" * (64 * 1024 * 1024))  # ~64 KiB on the wire
+
+    with pytest.raises(BodyTooLarge):
+        decode_body(bomb, "gzip", limit=1024 * 1024)
+
+
+def test_corrupt_and_unknown_encodings_are_rejected() -> None:
+    with pytest.raises(MalformedBody):
+        decode_body(b"not gzip at all", "gzip", limit=1024)
+    with pytest.raises(UnsupportedEncoding):
+        decode_body(b"{}", "br", limit=1024)
+
+
+@pytest.fixture()
+def api(monkeypatch):
+    writes: list[dict] = []
+
+    async def write_event_async(**kwargs):
+        writes.append(kwargs)
+        return True
+
+    monkeypatch.setattr(main.tenants, "resolve_slug", lambda slug: ACME if slug == "acme" else None)
+    monkeypatch.setattr(main.storage, "write_event_async", write_event_async)
+    monkeypatch.setattr(main.settings, "max_body_bytes", 64 * 1024)
+    return TestClient(main.app), writes
+
+
+def test_ingest_accepts_compressed_bodies_and_enforces_the_cap(api) -> None:
+    client, writes = api
+    headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+
+    accepted = client.post("/v1/task_result", content=gzip.compress(json.dumps(TASK).encode()), headers=headers)
+    bomb = client.post("/v1/task_result", content=gzip.compress(b" " * (1024 * 1024)), headers=headers)
+    unknown = client.post("/v1/task_result", content=b"{}", headers={**headers, "Content-Encoding": "br"})
+    plain = client.post("/v1/task_result", content=b" " * (65 * 1024), headers={"Content-Type": "application/json"})
+
+    assert accepted.status_code == 202 and writes[0]["payload"]["interaction_id"] == "i-1"
+    assert bomb.status_code == 413 and plain.status_code == 413
+    assert unknown.status_code == 415 and "gzip" in unknown.headers["Accept-Encoding"]
+    assert len(writes) == 1
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.collector.app import export, main
+from apps.collector.app.auth import TenantIdentity
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+ACME = TenantIdentity(tenant_uuid="00000000-0000-0000-0000-000000000001", tenant_slug="acme")
+
+
+def _rows(count: int, start_id: int = 1):
+    return [
+        (start_id + i, "task.result", "p1", "support", T0 + timedelta(seconds=i), json.dumps({"n": start_id + i}))
+        for i in range(count)
+    ]
+
+
+class FakeNamedCursor:
+    def __init__(self, db: "FakeDB", name: str) -> None:
+        self._db = db
+        db.cursor_names.append(name)
+        self.itersize = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+    def execute(self, query, params):
+        self._db.statements.append((" ".join(query.split()), list(params)))
+        self._remaining = list(self._db.rows)
+
+    def fetchmany(self, size):
+        self._db.fetch_sizes.append(size)
+        batch, self._remaining = self._remaining[:size], self._remaining[size:]
+        return batch
+
+
+class FakeDB:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+        self.statements: list[tuple[str, list]] = []
+        self.cursor_names: list[str] = []
+        self.fetch_sizes: list[int] = []
+        self.transactions = 0
+
+    @contextmanager
+    def transaction(self):
+        self.transactions += 1
+        yield
+
+    def cursor(self, name=None):
+        assert name, "exports must use a named server-side cursor"
+        return FakeNamedCursor(self, name)
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+
+def test_row_batches_use_named_cursor_and_keyset_resume() -> None:
+    db = FakeDB(_rows(5))
+    request = export.ExportRequest(ACME.tenant_uuid, T0, T0 + timedelta(days=1), after=(T0, 7))
+
+    batches = list(export.iter_row_batches(db.connection, request, batch_rows=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert db.transactions == 1 and db.cursor_names[0].startswith("events_export_")
+    statement, params = db.statements[0]
+    assert "(occurred_at, id) > (%s, %s)" in statement
+    assert statement.endswith("ORDER BY occurred_at, id")
+    assert params[-2:] == [T0, 7]
+
+
+def test_ndjson_lines_embed_payload_text_verbatim() -> None:
+    chunks = list(export.ndjson_chunks(iter([_rows(2), _rows(1, start_id=3)])))
+
+    assert len(chunks) == 2
+    events = [json.loads(line) for chunk in chunks for line in chunk.decode().splitlines()]
+    assert [event["id"] for event in events] == [1, 2, 3]
+    assert events[0]["payload"] == {"n": 1}
+    assert events[1]["occurred_at"] == (T0 + timedelta(seconds=1)).isoformat()
+
+
+def test_arrow_chunks_form_one_ipc_stream() -> None:
+    body = b"".join(export.arrow_chunks(iter([_rows(2), _rows(3, start_id=3)])))
+
+    table = pa.ipc.open_stream(body).read_all()
+
+    assert table.schema == export.ARROW_SCHEMA
+    assert table.column("id").to_pylist() == [1, 2, 3, 4, 5]
+    assert json.loads(table.column("payload")[4].as_py()) == {"n": 5}
+
+
+@pytest.fixture()
+def api(monkeypatch):
+    db = FakeDB(_rows(3))
+    monkeypatch.setattr(main.storage, "connection", db.connection)
+    monkeypatch.setattr(main.tenants, "authenticate", lambda token: ACME if token == "acme-token" else None)
+    monkeypatch.setattr(main.tenants, "is_cached", lambda **kwargs: True)
+    monkeypatch.setattr(main.tenants, "resolve_slug", lambda slug: ACME if slug == "acme" else None)
+    return TestClient(main.app, headers={"Authorization": "Bearer acme-token"}), db
+
+
+def test_export_endpoint_streams_both_formats(api) -> None:
+    client, db = api
+    params = {"tenant_id": "acme", "start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"}
+
+    ndjson = client.get("/v1/export", params=params)
+    arrow = client.get("/v1/export", params={**params, "format": "arrow", "batch_size": 2})
+
+    assert ndjson.headers["content-type"].startswith(export.NDJSON_MEDIA_TYPE)
+    assert len(ndjson.text.splitlines()) == 3
+    assert arrow.headers["content-type"].startswith(export.ARROW_MEDIA_TYPE)
+    assert pa.ipc.open_stream(arrow.content).read_all().num_rows == 3
+    assert db.fetch_sizes[-1] == 2
+
+
+def test_export_endpoint_validates_cursor_and_range(api) -> None:
+    client, _ = api
+    base = {"tenant_id": "acme", "start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"}
+
+    assert client.get("/v1/export", params={**base, "after_id": 5}).status_code == 400
+    assert client.get("/v1/export", params={**base, "end": "2024-12-31T00:00:00Z"}).status_code == 400
+    assert client.get("/v1/export", params={**base, "format": "csv"}).status_code == 422
+    assert client.get("/v1/export", params={**base, "tenant_id": "globex"}).status_code == 403
+
+
+def test_export_endpoint_rejects_anonymous_reads(api, monkeypatch) -> None:
+    client, db = api
+    monkeypatch.setattr(main.settings, "auth_required", False)
+    params = {"tenant_id": "acme", "start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"}
+
+    anonymous = client.get("/v1/export", params=params, headers={"Authorization": ""})
+    invalid = client.get("/v1/export", params=params, headers={"Authorization": "Bearer wrong"})
+
+    assert anonymous.status_code == 401 and invalid.status_code == 401
+    assert db.fetch_sizes == []
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from apps.collector.app import main
+from apps.collector.app.auth import TenantIdentity
+from apps.collector.app.fairness import (
+    FairScheduler,
+    Quota,
+    QuotaExceeded,
+    TenantQuotas,
+    build_quotas,
+)
+from apps.collector.app.storage import PersistenceSettings
+
+ACME = TenantIdentity(tenant_uuid="00000000-0000-0000-0000-000000000001", tenant_slug="acme")
+TASK = {"tenant_id": "acme", "interaction_id": "i-1", "label": {"correct": True}}
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_allows_burst_then_refills() -> None:
+    clock = FakeClock()
+    quotas = TenantQuotas(Quota(rate=10, burst=3), clock=clock)
+
+    for _ in range(3):
+        quotas.check("acme")
+    with pytest.raises(QuotaExceeded) as excinfo:
+        quotas.check("acme")
+    assert excinfo.value.retry_after == pytest.approx(0.1)
+    assert excinfo.value.retry_after_header == "1"
+
+    clock.now = 0.1
+    quotas.check("acme")
+    quotas.check("other")  # buckets are per tenant
+
+
+def test_overrides_and_unlimited_tenants() -> None:
+    quotas = build_quotas(0, overrides={"bulk": (2, 0), "vip": (0, 0)})
+
+    assert quotas.enabled
+    quotas.check("bulk")
+    quotas.check("bulk")
+    with pytest.raises(QuotaExceeded):
+        quotas.check("bulk")
+    for _ in range(100):
+        quotas.check("vip")
+        quotas.check("anyone")
+    assert not build_quotas(0).enabled
+
+
+def test_bucket_table_is_bounded() -> None:
+    quotas = TenantQuotas(Quota(rate=1, burst=1), max_tenants=2)
+    for tenant in ("a", "b", "c"):
+        quotas.check(tenant)
+
+    assert list(quotas._buckets) == ["b", "c"]
+
+
+def test_settings_parse_quotas_and_weights(monkeypatch) -> None:
+    monkeypatch.setenv("COLLECTOR_TENANT_QUOTAS", "acme=500:2000; bulk=50 ;broken")
+    monkeypatch.setenv("COLLECTOR_TENANT_WEIGHTS", "acme=4;bulk=0.5")
+
+    settings = PersistenceSettings.from_env()
+
+    assert settings.tenant_quotas == {"acme": (500.0, 2000.0), "bulk": (50.0, 0.0)}
+    assert settings.tenant_weights == {"acme": 4.0, "bulk": 0.5}
+
+
+async def _drain(scheduler: FairScheduler, arrivals: list[str]) -> list[str]:
+    """Queue ``arrivals`` behind a held slot, then record the order writes are granted."""
+    granted: list[str] = []
+    await scheduler.acquire("holder")
+
+    async def write(tenant: str) -> None:
+        await scheduler.acquire(tenant)
+        granted.append(tenant)
+        await asyncio.sleep(0)
+        scheduler.release()
+
+    tasks = [asyncio.create_task(write(tenant)) for tenant in arrivals]
+    await asyncio.sleep(0)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return granted
+
+
+def test_backlog_does_not_starve_other_tenants() -> None:
+    scheduler = FairScheduler(1)
+    arrivals = ["bulk"] * 20 + ["acme"] * 3
+
+    granted = asyncio.run(_drain(scheduler, arrivals))
+
+    # First come first served would put acme last; fair queueing interleaves it.
+    assert max(i for i, tenant in enumerate(granted) if tenant == "acme") < 6
+
+
+def test_weights_set_the_share_while_backlogged() -> None:
+    scheduler = FairScheduler(1, weights={"gold": 3})
+    arrivals = ["bronze"] * 40 + ["gold"] * 40
+
+    granted = asyncio.run(_drain(scheduler, arrivals))
+
+    assert Counter(granted[:40]) == {"gold": 30, "bronze": 10}
+    assert scheduler.active == 0 and scheduler.queued == 0
+
+
+def test_queue_depth_is_limited_per_tenant() -> None:
+    async def run() -> None:
+        scheduler = FairScheduler(1, max_queued=2)
+        await scheduler.acquire("holder")
+        waiters = [asyncio.create_task(scheduler.acquire("bulk")) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(QuotaExceeded) as excinfo:
+            await scheduler.acquire("bulk")
+        assert excinfo.value.reason == "queue"
+        other = asyncio.create_task(scheduler.acquire("acme"))
+        await asyncio.sleep(0)
+        assert scheduler.queued == 3
+        for task in (other, *waiters):
+            task.cancel()
+        await asyncio.gather(other, *waiters, return_exceptions=True)
+        assert scheduler.queued == 0
+        scheduler.release()
+        await asyncio.wait_for(scheduler.acquire("acme"), 1)  # abandoned waiters do not hold the slot
+
+    asyncio.run(run())
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture()
+def api(monkeypatch):
+    monkeypatch.setattr(main.tenants, "resolve_slug", lambda slug: ACME if slug == "acme" else None)
+    monkeypatch.setattr(main, "quotas", TenantQuotas(Quota(rate=0.01, burst=2)))
+    monkeypatch.setattr(main, "journal", None)
+
+    async def write_event_async(**kwargs):
+        return True
+
+    monkeypatch.setattr(main.storage, "write_event_async", write_event_async)
+    main.TOP_THROTTLED_TENANTS.configure(5)
+    yield TestClient(main.app)
+    main.TOP_THROTTLED_TENANTS.configure(0)
+
+
+def test_over_quota_tenant_gets_429_with_retry_after(api) -> None:
+    before = _sample("collector_ingest_throttled_total", event_type="task.result", reason="rate")
+
+    statuses = [api.post("/v1/task_result", json=TASK) for _ in range(3)]
+
+    assert [response.status_code for response in statuses] == [202, 202, 429]
+    assert int(statuses[2].headers["Retry-After"]) >= 1
+    assert _sample("collector_ingest_throttled_total", event_type="task.result", reason="rate") == before + 1
+    assert _sample("collector_tenant_throttled_requests_total", tenant="acme") == 1
+    assert main.write_scheduler.active == 0
+    assert b"collector_write_queue_depth" in api.get("/metrics").content
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from apps.collector.app.idempotency import BloomFilter, RecentKeyCache, _digest
+
+
+def test_recent_key_cache_hits_after_remember() -> None:
+    cache = RecentKeyCache(max_entries=10)
+
+    assert not cache.seen("acme", "interaction.create", "k1")
+    cache.remember("acme", "interaction.create", "k1")
+
+    assert cache.seen("acme", "interaction.create", "k1")
+    assert not cache.seen("acme", "interaction.output", "k1")
+    assert not cache.seen("globex", "interaction.create", "k1")
+
+
+def test_recent_key_cache_evicts_least_recently_used() -> None:
+    cache = RecentKeyCache(max_entries=2)
+    cache.remember("acme", "t", "a")
+    cache.remember("acme", "t", "b")
+    assert cache.seen("acme", "t", "a")
+    cache.remember("acme", "t", "c")
+
+    assert len(cache) == 2
+    assert cache.seen("acme", "t", "a")
+    assert not cache.seen("acme", "t", "b")
+
+
+def test_disabled_cache_never_hits() -> None:
+    cache = RecentKeyCache(max_entries=0)
+    cache.remember("acme", "t", "a")
+    assert not cache.seen("acme", "t", "a")
+
+
+def test_bloom_filter_rotation_keeps_previous_generation() -> None:
+    bloom = BloomFilter(capacity=4)
+    digests = [_digest(("acme", "t", str(i))) for i in range(8)]
+    for digest in digests:
+        bloom.add(digest)
+
+    assert all(bloom.might_contain(digest) for digest in digests[4:])
+    false_positives = sum(bloom.might_contain(_digest(("other", "t", str(i)))) for i in range(1000))
+    assert false_positives < 50
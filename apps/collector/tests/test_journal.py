@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.collector.app import journal as journal_module
+from apps.collector.app import main
+from apps.collector.app.auth import TenantIdentity
+from apps.collector.app.journal import (
+    DEAD_LETTER_FILE,
+    Journal,
+    JournalFull,
+    JournalReplayer,
+)
+from apps.collector.app.metrics import JournalStatsCollector
+
+ACME = TenantIdentity(tenant_uuid="00000000-0000-0000-0000-000000000001", tenant_slug="acme")
+TASK = {"tenant_id": "acme", "interaction_id": "i-1", "label": {"correct": True}}
+
+
+def _segments(directory) -> list[str]:
+    return sorted(name for name in os.listdir(directory) if name.endswith(".seg"))
+
+
+def test_reopen_resumes_from_committed_offset(tmp_path) -> None:
+    journal = Journal(str(tmp_path))
+    offsets = [journal.append({"n": n}) for n in range(3)]
+    entries = journal.read(journal.committed, max_records=10)
+    journal.commit(entries[0].next_offset)
+    journal.close()
+
+    reopened = Journal(str(tmp_path))
+
+    assert reopened.committed == offsets[0]
+    assert [entry.record["n"] for entry in reopened.read(reopened.committed, 10)] == [1, 2]
+    assert reopened.end == offsets[-1]
+
+
+def test_torn_tail_is_truncated_on_reopen(tmp_path) -> None:
+    journal = Journal(str(tmp_path))
+    end = journal.append({"n": 1})
+    journal.close()
+    with open(tmp_path / _segments(tmp_path)[-1], "ab") as handle:
+        handle.write(b"\x40\x00\x00\x00garbage")  # header promising 64 bytes, then a crash
+
+    reopened = Journal(str(tmp_path))
+    reopened.append({"n": 2})
+
+    assert [entry.record["n"] for entry in reopened.read(0, 10)] == [1, 2]
+    assert reopened.read(0, 10)[1].offset == end
+
+
+def test_segments_roll_and_are_deleted_once_replayed(tmp_path) -> None:
+    journal = Journal(str(tmp_path), segment_bytes=64, max_bytes=400)
+    for n in range(6):
+        journal.append({"n": n, "pad": "x" * 20})
+    assert len(_segments(tmp_path)) > 2
+
+    with pytest.raises(JournalFull):
+        for n in range(20):
+            journal.append({"n": n, "pad": "x" * 20})
+
+    applied = JournalReplayer(journal, lambda record: None, batch_size=1000).run_once()
+
+    assert applied > 0 and journal.lag_bytes == 0
+    assert len(_segments(tmp_path)) == 1
+    journal.append({"n": "after"})
+
+
+def test_concurrent_appends_share_fsyncs(tmp_path, monkeypatch) -> None:
+    journal = Journal(str(tmp_path), fsync_delay=0.002)
+    calls = {"fsync": 0}
+    real_fsync = os.fsync
+
+    def counting_fsync(fd):
+        calls["fsync"] += 1
+        real_fsync(fd)
+
+    monkeypatch.setattr(journal_module.os, "fsync", counting_fsync)
+
+    def writer(worker: int) -> None:
+        for n in range(25):
+            journal.append({"worker": worker, "n": n})
+
+    threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(journal.read(0, 1000)) == 200
+    assert calls["fsync"] < 200
+
+
+def test_replayer_retries_transient_errors_and_dead_letters_bad_records(tmp_path) -> None:
+    journal = Journal(str(tmp_path))
+    for n in range(4):
+        journal.append({"n": n})
+    delivered: list[int] = []
+    outages = iter([True, False])
+
+    def sink(record) -> None:
+        if record["n"] == 1 and next(outages, False):
+            raise ConnectionError("postgres down")
+        if record["n"] == 2:
+            raise ValueError("bad payload")
+        delivered.append(record["n"])
+
+    replayer = JournalReplayer(journal, sink, permanent_errors=(ValueError,))
+
+    with pytest.raises(ConnectionError):
+        replayer.run_once()
+    assert delivered == [0] and journal.lag_bytes > 0
+
+    assert replayer.run_once() == 3
+    assert delivered == [0, 1, 3] and journal.lag_bytes == 0
+    dead = [json.loads(line) for line in (tmp_path / DEAD_LETTER_FILE).read_text().splitlines()]
+    assert [entry["record"]["n"] for entry in dead] == [2]
+
+
+def test_stats_collector_raises_alarm_near_budget(tmp_path) -> None:
+    journal = Journal(str(tmp_path), max_bytes=100, alarm_ratio=0.5)
+    collector = JournalStatsCollector()
+    collector.track(journal)
+    journal.append({"pad": "x" * 60})
+
+    samples = {sample.name: sample.value for family in collector.collect() for sample in family.samples}
+
+    assert samples["collector_journal_alarm"] == 1
+    assert samples["collector_journal_lag_bytes"] == journal.end
+    assert samples["collector_journal_budget_bytes"] == 100
+
+
+@pytest.fixture()
+def journaled_api(monkeypatch, tmp_path):
+    journal = Journal(str(tmp_path), max_bytes=2048)
+    monkeypatch.setattr(main, "journal", journal)
+    monkeypatch.setattr(main.tenants, "resolve_slug", lambda slug: ACME if slug == "acme" else None)
+
+    def unavailable(**kwargs):
+        raise AssertionError("ingest must not touch Postgres while journaling")
+
+    monkeypatch.setattr(main.storage, "write_event", unavailable)
+    monkeypatch.setattr(main.storage, "write_event_async", unavailable)
+    return TestClient(main.app), journal
+
+
+def test_ingest_acknowledges_from_journal_and_sheds_load_when_full(journaled_api) -> None:
+    client, journal = journaled_api
+
+    response = client.post("/v1/task_result", json=TASK, headers={"Idempotency-Key": "k-1"})
+
+    assert response.status_code == 202
+    (entry,) = journal.read(0, 10)
+    assert entry.record["tenant_uuid"] == ACME.tenant_uuid
+    assert entry.record["idempotency_key"] == "k-1"
+    assert entry.record["event_type"] == "task.result"
+
+    statuses = [client.post("/v1/task_result", json=TASK).status_code for _ in range(20)]
+    full = client.post("/v1/task_result", json=TASK)
+
+    assert 503 in statuses and full.status_code == 503
+    assert full.headers["Retry-After"] == "30"
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from apps.collector.app import main
+from apps.collector.app.auth import TenantIdentity
+from apps.collector.app.metrics import PoolStatsCollector, TopTenants, observe_stage
+
+ACME = TenantIdentity(tenant_uuid="00000000-0000-0000-0000-000000000001", tenant_slug="acme")
+TASK = {"tenant_id": "acme", "interaction_id": "i-1", "label": {"correct": True}}
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_top_tenants_bounds_exported_labels() -> None:
+    top = TopTenants(top_n=2, slack=2)
+    for tenant, count in {"a": 50, "b": 30, "c": 5, "d": 3, "e": 1}.items():
+        top.record(tenant, count)
+
+    exported = top.top()
+
+    assert set(exported) == {"a", "b", TopTenants.OTHER}
+    assert exported["a"] == 50 and exported["b"] == 30
+    assert sum(exported.values()) == 89
+
+
+def test_top_tenants_disabled_by_default() -> None:
+    top = TopTenants()
+    top.record("a")
+
+    assert top.top() == {} and top.collect() == []
+
+
+def test_pool_collector_reports_saturation() -> None:
+    class FakePool:
+        def get_stats(self):
+            return {"pool_size": 4, "pool_max": 4, "pool_available": 0, "requests_waiting": 3, "requests_wait_ms": 1500}
+
+    collector = PoolStatsCollector()
+    collector.track(FakePool())
+
+    samples = {sample.name: sample.value for family in collector.collect() for sample in family.samples}
+
+    assert samples["collector_db_pool_requests_waiting"] == 3
+    assert samples["collector_db_pool_available"] == 0
+    assert samples["collector_db_pool_wait_seconds_total"] == 1.5
+    assert samples["collector_db_pool_request_errors_total"] == 0
+
+
+def test_observe_stage_counts_errors() -> None:
+    before = _sample("collector_stage_errors_total", event_type="task.result", stage="unit")
+
+    with pytest.raises(RuntimeError):
+        with observe_stage("task.result", "unit"):
+            raise RuntimeError("boom")
+
+    assert _sample("collector_stage_errors_total", event_type="task.result", stage="unit") == before + 1
+    assert _sample("collector_stage_duration_seconds_count", event_type="task.result", stage="unit") >= 1
+
+
+@pytest.fixture()
+def api(monkeypatch):
+    outcomes = iter([True, False])
+    monkeypatch.setattr(main.tenants, "resolve_slug", lambda slug: ACME if slug == "acme" else None)
+
+    async def write_event_async(**kwargs):
+        return next(outcomes)
+
+    monkeypatch.setattr(main.storage, "write_event_async", write_event_async)
+    return TestClient(main.app)
+
+
+def test_ingest_outcomes_and_stages_are_counted(api) -> None:
+    labels = {"event_type": "task.result"}
+    before = {
+        outcome: _sample("collector_ingest_events_total", outcome=outcome, **labels)
+        for outcome in ("accepted", "duplicate", "rejected")
+    }
+    validation_before = _sample("collector_validation_failures_total", **labels)
+    scrub_before = _sample("collector_stage_duration_seconds_count", stage="scrub", **labels)
+
+    api.post("/v1/task_result", json=TASK)
+    api.post("/v1/task_result", json=TASK)
+    api.post("/v1/task_result", json={**TASK, "tenant_id": "unknown"})
+    assert api.post("/v1/task_result", json={"tenant_id": "acme"}).status_code == 422
+
+    assert _sample("collector_ingest_events_total", outcome="accepted", **labels) == before["accepted"] + 1
+    assert _sample("collector_ingest_events_total", outcome="duplicate", **labels) == before["duplicate"] + 1
+    assert _sample("collector_ingest_events_total", outcome="rejected", **labels) == before["rejected"] + 2
+    assert _sample("collector_validation_failures_total", **labels) == validation_before + 1
+    assert _sample("collector_stage_duration_seconds_count", stage="scrub", **labels) == scrub_before + 2
+    assert b"collector_db_pool_size" in api.get("/metrics").content
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+import random
+from io import BytesIO
+
+import pyarrow.parquet as pq
+import pytest
+
+from apps.collector.app import compaction
+from apps.collector.app import optimize as optimize_module
+from apps.collector.app.compaction import ManifestConflict
+from apps.collector.app.optimize import OptimizeOptions, files_for_interaction, optimize
+from apps.collector.app.storage import PersistenceSettings
+
+
+def _stage_outputs(client, count: int, policy: str, ids=None) -> None:
+    for index in range(count):
+        name = f"events/staging/interaction.output/dt=2025-01-01/{policy}-{index}.jsonl"
+        interaction_id = ids[index] if ids else f"{policy}-{index:03d}"
+        record = {
+            "event_type": "interaction.output",
+            "ingested_at": "2025-01-01T00:00:00Z",
+            "payload": {
+                "tenant_id": "acme",
+                "interaction_id": interaction_id,
+                "output": {"text": "hello"},
+                "timings": {"ms_total": index},
+                "costs": {"tokens_in": 1, "tokens_out": 1},
+                "version": {"policy_id": policy, "base_model": "llama"},
+            },
+        }
+        client.objects[name] = (json.dumps(record) + "\n").encode("utf-8")
+
+
+def _compact_runs(client, settings: PersistenceSettings) -> list[str]:
+    _stage_outputs(client, 3, "policy-b")
+    first = compaction.compact("2025-01-01", settings=settings, client=client)
+    _stage_outputs(client, 3, "policy-a")
+    second = compaction.compact("2025-01-01", settings=settings, client=client)
+    return first + second
+
+
+def test_optimize_merges_sorts_and_swaps_manifest(settings: PersistenceSettings, fake_minio) -> None:
+    originals = _compact_runs(fake_minio, settings)
+    assert len(originals) == 2
+
+    manifest = optimize("2025-01-01", settings=settings, client=fake_minio)
+
+    assert manifest.generation == 1
+    assert len(manifest.files) == 1
+    assert not any(name in fake_minio.objects for name in originals)
+    reloaded = compaction.load_manifest(fake_minio, settings, "2025-01-01")
+    assert reloaded.files == manifest.files
+
+    parquet = pq.ParquetFile(BytesIO(fake_minio.objects[manifest.files[0]]))
+    rows = parquet.read().to_pylist()
+    assert [row["interaction_id"] for row in rows] == sorted(row["interaction_id"] for row in rows)
+    assert parquet.metadata.row_group(0).column(0).statistics is not None
+    assert manifest.stats[manifest.files[0]]["interaction_id_min"] == "policy-a-000"
+
+
+def test_optimize_splits_to_target_size(settings: PersistenceSettings, fake_minio) -> None:
+    _compact_runs(fake_minio, settings)
+
+    manifest = optimize(
+        "2025-01-01",
+        settings=settings,
+        client=fake_minio,
+        options=OptimizeOptions(target_file_bytes=1, row_group_rows=2),
+    )
+
+    assert len(manifest.files) == 6
+    assert sum(stats["rows"] for stats in manifest.stats.values()) == 6
+
+
+def test_files_for_interaction_prunes_by_bounds(settings: PersistenceSettings, fake_minio) -> None:
+    _compact_runs(fake_minio, settings)
+    manifest = optimize(
+        "2025-01-01",
+        settings=settings,
+        client=fake_minio,
+        options=OptimizeOptions(target_file_bytes=1),
+    )
+
+    matches = files_for_interaction(manifest, "policy-b-001")
+
+    assert len(matches) == 1
+    assert manifest.stats[matches[0]]["interaction_id_min"] == "policy-b-001"
+
+
+def test_incremental_compaction_after_optimize_appends(settings: PersistenceSettings, fake_minio) -> None:
+    _compact_runs(fake_minio, settings)
+    optimize("2025-01-01", settings=settings, client=fake_minio)
+    _stage_outputs(fake_minio, 1, "policy-c")
+
+    added = compaction.compact("2025-01-01", settings=settings, client=fake_minio)
+    manifest = compaction.load_manifest(fake_minio, settings, "2025-01-01")
+
+    assert len(added) == 1
+    assert len(manifest.files) == 2
+    assert files_for_interaction(manifest, "policy-c-000") == added
+
+
+def test_streaming_merge_sorts_across_runs(settings: PersistenceSettings, fake_minio) -> None:
+    rng = random.Random(7)
+    ids = [f"{rng.getrandbits(64):016x}" for _ in range(40)]
+    for batch in range(4):
+        _stage_outputs(fake_minio, 10, f"policy-{batch}", ids=ids[batch * 10 : (batch + 1) * 10])
+        compaction.compact("2025-01-01", settings=settings, client=fake_minio)
+
+    manifest = optimize(
+        "2025-01-01",
+        settings=settings,
+        client=fake_minio,
+        options=OptimizeOptions(target_file_bytes=1, merge_batch_rows=3),
+    )
+    manifest = optimize(
+        "2025-01-01",
+        settings=settings,
+        client=fake_minio,
+        options=OptimizeOptions(target_file_bytes=10**9, merge_batch_rows=3),
+    )
+
+    assert len(manifest.files) == 1
+    rows = pq.read_table(BytesIO(fake_minio.objects[manifest.files[0]])).column("interaction_id").to_pylist()
+    assert rows == sorted(ids)
+
+
+def test_optimize_keeps_files_compacted_during_the_run(
+    settings: PersistenceSettings, fake_minio, monkeypatch
+) -> None:
+    _compact_runs(fake_minio, settings)
+    rewrite = optimize_module._rewrite_partition
+    added: list[str] = []
+
+    def rewrite_then_compact(*args, **kwargs):
+        outputs = rewrite(*args, **kwargs)
+        if not added:
+            _stage_outputs(fake_minio, 1, "policy-c")
+            added.extend(compaction.compact("2025-01-01", settings=settings, client=fake_minio))
+        return outputs
+
+    monkeypatch.setattr(optimize_module, "_rewrite_partition", rewrite_then_compact)
+    manifest = optimize("2025-01-01", settings=settings, client=fake_minio)
+
+    reloaded = compaction.load_manifest(fake_minio, settings, "2025-01-01")
+    assert len(added) == 1
+    assert reloaded.files == manifest.files
+    assert added[0] in reloaded.files and len(reloaded.files) == 2
+    assert any(name.endswith("policy-c-0.jsonl") for name in reloaded.processed)
+    assert all(name in fake_minio.objects for name in reloaded.files)
+
+
+def test_compaction_keeps_an_optimize_that_lands_during_the_run(
+    settings: PersistenceSettings, fake_minio, monkeypatch
+) -> None:
+    _compact_runs(fake_minio, settings)
+    _stage_outputs(fake_minio, 1, "policy-c")
+    upload = compaction._upload_parquet
+    optimized: list[str] = []
+
+    def upload_then_optimize(*args, **kwargs):
+        name = upload(*args, **kwargs)
+        if not optimized:
+            optimized.extend(optimize("2025-01-01", settings=settings, client=fake_minio).files)
+        return name
+
+    monkeypatch.setattr(compaction, "_upload_parquet", upload_then_optimize)
+    added = compaction.compact("2025-01-01", settings=settings, client=fake_minio)
+
+    manifest = compaction.load_manifest(fake_minio, settings, "2025-01-01")
+    assert manifest.generation == 1
+    assert manifest.files == optimized + added
+    assert len(manifest.processed) == 7
+
+
+def test_overlapping_optimize_is_rejected_and_cleaned_up(
+    settings: PersistenceSettings, fake_minio, monkeypatch
+) -> None:
+    _compact_runs(fake_minio, settings)
+    rewrite = optimize_module._rewrite_partition
+    winner: list[str] = []
+    loser: list[str] = []
+
+    def rewrite_then_race(*args, **kwargs):
+        outputs = rewrite(*args, **kwargs)
+        if not winner:
+            monkeypatch.setattr(optimize_module, "_rewrite_partition", rewrite)
+            winner.extend(optimize("2025-01-01", settings=settings, client=fake_minio).files)
+            loser.extend(outputs)
+        return outputs
+
+    monkeypatch.setattr(optimize_module, "_rewrite_partition", rewrite_then_race)
+    with pytest.raises(ManifestConflict):
+        optimize("2025-01-01", settings=settings, client=fake_minio)
+
+    assert compaction.load_manifest(fake_minio, settings, "2025-01-01").files == winner
+    assert loser and not any(name in fake_minio.objects for name in loser)
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+
+import pytest
+from psycopg import sql
+
+from apps.collector.app import partitions
+from apps.collector.app.blobs import staging_object
+from apps.collector.app.partitions import PartitionInfo
+
+NOW = datetime(2025, 6, 15, 12, 0, tzinfo=timezone.utc)
+
+
+def _render(query) -> str:
+    # Composable.as_string() needs a live connection to quote identifiers.
+    if isinstance(query, str):
+        return query
+    if isinstance(query, sql.Composed):
+        return "".join(_render(part) for part in query)
+    if isinstance(query, sql.Identifier):
+        return ".".join(f'"{name}"' for name in query._obj)
+    if isinstance(query, sql.Literal):
+        return str(query._obj)
+    return query.as_string(None)
+
+
+class FakeResult:
+    def __init__(self, rows=None, rowcount: int = 0) -> None:
+        self._rows = rows or []
+        self.rowcount = rowcount
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConnection:
+    def __init__(self, catalog=(), retention=(), existing=(), detached=(), blobs=()) -> None:
+        self.catalog = list(catalog)
+        self.retention = list(retention)
+        self.existing = set(existing)
+        self.detached = list(detached)
+        # (digest, refcount, body) rows of event_blobs, across tenants.
+        self.blobs = list(blobs)
+        self.statements: list[tuple[str, tuple]] = []
+
+    def execute(self, query, params=()):
+        text = _render(query)
+        self.statements.append((" ".join(text.split()), tuple(params)))
+        if "create_events_partition" in text:
+            name = params[0]
+            created = name not in self.existing
+            self.existing.add(name)
+            return FakeResult([(created,)])
+        if "pg_inherits" in text:
+            return FakeResult(self.catalog)
+        if "retention_days" in text:
+            return FakeResult(self.retention)
+        if "relispartition" in text:
+            return FakeResult([(name,) for name in self.detached])
+        if "RETURNING digest" in text:
+            purged = [digest for digest, refcount, _ in self.blobs if refcount <= 0]
+            self.blobs = [blob for blob in self.blobs if blob[1] > 0]
+            return FakeResult([(digest,) for digest in purged], rowcount=len(purged))
+        if "unnest(%s::text[])" in text:
+            live = {digest for digest, _, _ in self.blobs}
+            return FakeResult([(digest,) for digest in params[0] if digest not in live])
+        if "DISTINCT ON (digest)" in text:
+            return FakeResult(sorted({digest: body for digest, _, body in self.blobs if digest in params[0]}.items()))
+        return FakeResult(rowcount=0)
+
+    @contextmanager
+    def transaction(self):
+        self.statements.append(("BEGIN", ()))
+        yield
+        self.statements.append(("COMMIT", ()))
+
+    def executed(self, prefix: str) -> list[tuple[str, tuple]]:
+        return [(query, params) for query, params in self.statements if query.startswith(prefix)]
+
+
+def _bound(lower: str, upper: str) -> str:
+    return f"FOR VALUES FROM ('{lower} 00:00:00+00') TO ('{upper} 00:00:00+00')"
+
+
+def test_partition_bounds_by_granularity() -> None:
+    name, lower, upper = partitions.partition_bounds(date(2025, 1, 31))
+    assert name == "events_p20250131"
+    assert (lower, upper) == (
+        datetime(2025, 1, 31, tzinfo=timezone.utc),
+        datetime(2025, 2, 1, tzinfo=timezone.utc),
+    )
+
+    name, lower, upper = partitions.partition_bounds(date(2024, 12, 15), "month")
+    assert name == "events_p202412"
+    assert upper == datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    with pytest.raises(ValueError):
+        partitions.partition_bounds(date(2025, 1, 1), "week")
+
+
+def test_ensure_partitions_only_reports_new_ones() -> None:
+    conn = FakeConnection(existing={"events_p20250615"})
+
+    created = partitions.ensure_partitions(conn, today=date(2025, 6, 15), days_ahead=2)
+
+    assert created == ["events_p20250616", "events_p20250617"]
+    assert len(conn.executed("SELECT create_events_partition")) == 3
+
+
+def test_monthly_partitions_fill_around_existing_daily_ones() -> None:
+    # init.sql bootstraps daily partitions; a monthly range over them could not be attached.
+    daily = [_daily(f"2025-06-{day:02}", f"2025-06-{day + 1:02}") for day in range(14, 23)]
+    catalog = [(p.name, _bound(f"{p.lower:%Y-%m-%d}", f"{p.upper:%Y-%m-%d}"), 0, 0) for p in daily]
+    conn = FakeConnection(catalog=[("events_default", "DEFAULT", 0, 0), *catalog])
+
+    created = partitions.ensure_partitions(conn, today=date(2025, 6, 15), days_ahead=20, granularity="month")
+
+    assert created == ["events_p20250601", "events_p20250623", "events_p202507"]
+    bounds = [(f"{lower:%Y-%m-%d}", f"{upper:%Y-%m-%d}") for _, (_, lower, upper) in conn.executed("SELECT create")]
+    assert bounds == [("2025-06-01", "2025-06-14"), ("2025-06-23", "2025-07-01"), ("2025-07-01", "2025-08-01")]
+
+    conn.catalog += [(name, _bound(lower, upper), 0, 0) for name, (lower, upper) in zip(created, bounds)]
+    assert partitions.ensure_partitions(conn, today=date(2025, 6, 16), days_ahead=2) == []
+
+
+def test_monthly_plan_collapses_days_into_one_partition() -> None:
+    planned = partitions.planned_partitions(date(2025, 6, 20), days_ahead=14, granularity="month")
+
+    assert [name for name, _, _ in planned] == ["events_p202506", "events_p202507"]
+
+
+def test_list_partitions_parses_bounds_and_default() -> None:
+    conn = FakeConnection(
+        catalog=[
+            ("events_default", "DEFAULT", 8192, 0),
+            ("events_p20250101", _bound("2025-01-01", "2025-01-02"), 1 << 20, 1000),
+        ]
+    )
+
+    default, daily = partitions.list_partitions(conn)
+
+    assert default.is_default and default.upper is None
+    assert daily.lower == datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert daily.total_bytes == 1 << 20 and daily.estimated_rows == 1000
+    assert "events_p20250101" in partitions.format_report([default, daily])
+
+
+def _daily(day: str, next_day: str) -> PartitionInfo:
+    return PartitionInfo(
+        f"events_p{day.replace('-', '')}",
+        datetime.fromisoformat(f"{day}T00:00:00+00:00"),
+        datetime.fromisoformat(f"{next_day}T00:00:00+00:00"),
+    )
+
+
+def test_partitions_are_kept_for_the_longest_tenant_retention() -> None:
+    old = _daily("2025-03-01", "2025-03-02")
+    recent = _daily("2025-06-01", "2025-06-02")
+
+    plan = partitions.plan_retention([old, recent], {"tenant-b": 120}, default_days=30, now=NOW)
+
+    assert plan.drop == []
+    assert [tenant for tenant, _ in plan.purge] == ["*"]
+
+    plan = partitions.plan_retention([old, recent], {"tenant-a": 7}, default_days=30, now=NOW)
+
+    assert plan.drop == [old]
+    assert [tenant for tenant, _ in plan.purge] == ["tenant-a"]
+
+
+def test_apply_retention_drops_then_purges_short_retention_tenants() -> None:
+    conn = FakeConnection(
+        catalog=[
+            ("events_default", "DEFAULT", 0, 0),
+            ("events_p20250301", _bound("2025-03-01", "2025-03-02"), 0, 0),
+            ("events_p20250610", _bound("2025-06-10", "2025-06-11"), 0, 0),
+            ("events_p20250614", _bound("2025-06-14", "2025-06-15"), 0, 0),
+        ],
+        retention=[("tenant-a", 3)],
+    )
+
+    partitions.apply_retention(conn, default_days=30, now=NOW, batch_size=100)
+
+    assert [q for q, _ in conn.executed("ALTER TABLE")] == ['ALTER TABLE "events" DETACH PARTITION "events_p20250301"']
+    assert [q for q, _ in conn.executed("DROP TABLE")] == ['DROP TABLE "events_p20250301"']
+    drop = [q.split()[0] for q, _ in conn.statements[conn.statements.index(("BEGIN", ())) :]][:7]
+    # The detach commits before the partition's blob references are released and it is dropped.
+    assert drop == ["BEGIN", "ALTER", "COMMIT", "BEGIN", "UPDATE", "DROP", "COMMIT"]
+    assert 'FROM "events_p20250301", unnest(blob_refs)' in conn.executed("UPDATE event_blobs")[0][0]
+    assert conn.executed('DELETE FROM "event_blobs"')[-1][0].endswith("WHERE refcount <= 0 LIMIT 100)) RETURNING digest")
+    tenant_deletes = [
+        query.split('"')[1] for query, params in conn.executed("DELETE FROM") if "tenant-a" in params
+    ]
+    # Only partitions that can hold rows older than the tenant's cutoff are touched.
+    assert tenant_deletes == ["events_default", "events_p20250610", "event_idempotency_keys"]
+
+
+def test_partitions_left_detached_are_released_and_dropped() -> None:
+    conn = FakeConnection(detached=["events_p20250228"])
+
+    plan = partitions.apply_retention(conn, default_days=30, now=NOW)
+
+    assert plan.drop == [] and not conn.executed("ALTER TABLE")
+    assert [q for q, _ in conn.executed("DROP TABLE")] == ['DROP TABLE "events_p20250228"']
+    assert 'FROM "events_p20250228", unnest(blob_refs)' in conn.executed("UPDATE event_blobs")[0][0]
+
+
+def test_purged_blobs_are_removed_from_minio_unless_still_used(settings, fake_minio) -> None:
+    # "shared" is released by one tenant but still referenced by another.
+    conn = FakeConnection(blobs=[("gone", 0, "old"), ("shared", 0, "text"), ("shared", 2, "text"), ("kept", 1, "x")])
+    for digest in ("gone", "shared", "kept"):
+        fake_minio.objects[staging_object(settings.minio_prefix, digest)] = b"body"
+
+    partitions.apply_retention(conn, default_days=30, now=NOW, client=fake_minio, settings=settings)
+
+    remaining = {name.rsplit("/", 1)[-1] for name in fake_minio.objects}
+    assert remaining == {"shared", "kept"}
+
+
+def test_sweep_restages_bodies_ingested_again_during_the_sweep(settings, fake_minio) -> None:
+    conn = FakeConnection()
+    object_name = staging_object(settings.minio_prefix, "back")
+    fake_minio.objects[object_name] = b"body"
+    execute_query = conn.execute
+
+    def execute(query, params=()):
+        result = execute_query(query, params)
+        if "unnest(%s::text[])" in _render(query):
+            # Ingested again right after the check: the row and the object are back.
+            conn.blobs.append(("back", 1, "body"))
+        return result
+
+    conn.execute = execute  # type: ignore[method-assign]
+
+    assert partitions.sweep_blob_objects(conn, fake_minio, settings, {"back"}) == 0
+    assert fake_minio.objects[object_name] == b"body"
+
+
+def test_dry_run_changes_nothing() -> None:
+    conn = FakeConnection(catalog=[("events_p20250101", _bound("2025-01-01", "2025-01-02"), 0, 0)])
+
+    plan = partitions.apply_retention(conn, default_days=30, now=NOW, dry_run=True)
+
+    assert [p.name for p in plan.drop] == ["events_p20250101"]
+    assert not conn.executed("ALTER TABLE") and not conn.executed("DELETE FROM")
@@ -1,5 +1,10 @@
 from __future__ import annotations
 
+import random
+import re
+
+import pytest
+
 from apps.collector.app.pii import PayloadScrubber, ScrubConfig, build_scrubber
 
 
@@ -32,3 +37,93 @@ def test_disabled_scrubber_returns_payload() -> None:
     scrubber = build_scrubber(enabled=False, allowlist=(), redaction_token="[x]")
     payload = {"email": "user@example.com"}
     assert scrubber.scrub(payload)["email"] == "user@example.com"
+
+
+LEGACY_PATTERNS = (
+    re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+"),
+    re.compile(r"(?:\+?\d{1,3}[\s-]?)?(?:\(\d{3}\)|\d{3})[\s-]?\d{3}[\s-]?\d{4}"),
+    re.compile(r"\b(?:\d[ -]*?){13,16}\b"),
+    re.compile(r"\b\d{3}-\d{2}-\d{4}\b"),
+)
+
+
+def _legacy_scrub(value: str, token: str) -> str:
+    for pattern in LEGACY_PATTERNS:
+        value = pattern.sub(token, value)
+    return value
+
+
+@pytest.mark.parametrize("token", ["[REDACTED]", "***", "<pii-0>"])
+def test_scrubber_matches_sequential_reference(token: str) -> None:
+    rng = random.Random(1234)
+    alphabet = "0123456789" * 4 + "\uff15\u0663\u096a" * 4 + "  --()+@._abcXYZ\n"
+    scrubber = build_scrubber(enabled=True, allowlist=(), redaction_token=token)
+    samples = [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        for _ in range(3000)
+    ]
+    samples += [
+        "4242 4242 4242 4242",
+        "4242-4242-4242-4242-4242",
+        "1234567890123-4",
+        "12345678901234 -56",
+        "SSN 123-45-6789, call +1 (555) 123-4567 or mail a.b@c.io",
+        "order 12345678901234567890 shipped",
+        "\uff15\uff15\uff15-\uff11\uff12\uff13-\uff14\uff15\uff16\uff17",
+        "SSN \u0661\u0662\u0663-\u0664\u0665-\u0666\u0667\u0668\u0669",
+        "card \u0664\u0662\u0664\u0662 \u0664\u0662\u0664\u0662 \u0664\u0662\u0664\u0662 \u0664\u0662\u0664\u0662",
+        "\u0968\u0966\u0968\u096c \u0966\u096b\u0966 \u0967\u0968\u0969\u096a mail caf\u00e9@x.io",
+        "caf\u00e9 \u00b2\u00b3\u00b9 no digits here",
+    ]
+    for sample in samples:
+        assert scrubber.scrub(sample) == _legacy_scrub(sample, token), sample
+
+
+def test_non_ascii_digits_are_redacted() -> None:
+    scrubber = build_scrubber(enabled=True, allowlist=(), redaction_token="***")
+
+    assert scrubber.scrub("call \uff15\uff15\uff15-\uff11\uff12\uff13-\uff14\uff15\uff16\uff17") == "call ***"
+    assert scrubber.scrub("\u0661\u0662\u0663-\u0664\u0665-\u0666\u0667\u0668\u0669") == "***"
+
+
+def test_clean_payload_is_returned_without_copying() -> None:
+    scrubber = build_scrubber(enabled=True, allowlist=(), redaction_token="***")
+    payload = {"tenant_id": "acme", "context": {"chunks": [{"text": "refund policy v2"}]}, "n": 3}
+
+    assert scrubber.scrub(payload) is payload
+
+
+def test_only_changed_branches_are_copied() -> None:
+    scrubber = build_scrubber(enabled=True, allowlist=(), redaction_token="***")
+    clean = {"text": "no pii here"}
+    payload = {"clean": clean, "dirty": ["mail user@example.com"]}
+
+    scrubbed = scrubber.scrub(payload)
+
+    assert scrubbed is not payload
+    assert scrubbed["clean"] is clean
+    assert scrubbed["dirty"] == ["mail ***"]
+    assert payload["dirty"] == ["mail user@example.com"]
+
+
+def test_tenant_skip_fields() -> None:
+    scrubber = build_scrubber(
+        enabled=True,
+        allowlist=(),
+        redaction_token="***",
+        skip_fields={"acme": ["trace_id", "context.order"], "*": ["idempotency_key"]},
+    )
+    payload = {
+        "trace_id": "555-123-9876",
+        "idempotency_key": "555-123-9876",
+        "context": {"order": "555-123-9876", "note": "555-123-9876"},
+    }
+
+    acme = scrubber.scrub(payload, tenant_id="acme")
+    other = scrubber.scrub(payload, tenant_id="globex")
+
+    assert acme["trace_id"] == "555-123-9876"
+    assert acme["context"] == {"order": "555-123-9876", "note": "***"}
+    assert other["trace_id"] == "***"
+    assert other["context"]["order"] == "***"
+    assert other["idempotency_key"] == "555-123-9876"
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from apps.collector.app import compaction
+from apps.collector.app.auth import TenantIdentity
+from apps.collector.app.query import EventQuery, HybridEventQuery, ParquetEventSource
+
+ACME = TenantIdentity(tenant_uuid="00000000-0000-0000-0000-000000000001", tenant_slug="acme")
+
+
+def _utc(value: str) -> datetime:
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+def _stage(client, name: str, staged_on: str, created_at: str, *, tenant="acme", event_type="task.result", policy="p1"):
+    payload = {
+        "tenant_id": tenant,
+        "interaction_id": name,
+        "created_at": created_at,
+        "version": {"policy_id": policy},
+        "label": {"correct": True},
+    }
+    record = {"event_type": event_type, "ingested_at": f"{staged_on}T12:00:00Z", "payload": payload}
+    object_name = f"events/staging/{event_type}/dt={staged_on}/{name}.jsonl"
+    client.objects[object_name] = (json.dumps(record) + "\n").encode("utf-8")
+
+
+def _compact(settings, client, *dates: str) -> None:
+    for target_date in dates:
+        compaction.compact(target_date, settings=settings, client=client)
+
+
+def _query(**kwargs) -> EventQuery:
+    kwargs.setdefault("start", _utc("2025-01-01T00:00:00"))
+    kwargs.setdefault("end", _utc("2025-01-10T00:00:00"))
+    return EventQuery(tenant=ACME, **kwargs)
+
+
+def test_cold_scan_pushes_down_tenant_type_policy_and_time(settings, fake_minio) -> None:
+    _stage(fake_minio, "a", "2025-01-02", "2025-01-02T08:00:00Z")
+    _stage(fake_minio, "b", "2025-01-02", "2025-01-02T09:00:00Z", tenant="globex")
+    _stage(fake_minio, "c", "2025-01-02", "2025-01-02T10:00:00Z", policy="p2")
+    _stage(fake_minio, "d", "2025-01-02", "2025-01-02T11:00:00Z", event_type="feedback.submit")
+    _stage(fake_minio, "e", "2025-01-03", "2025-01-03T08:00:00Z")
+    _compact(settings, fake_minio, "2025-01-02", "2025-01-03")
+    source = ParquetEventSource(fake_minio, settings)
+    window = (_utc("2025-01-02T00:00:00"), _utc("2025-01-03T00:00:00"))
+
+    rows = list(source.scan(_query(event_type="task.result", policy_id="p1"), *window))
+
+    assert [row["payload"]["interaction_id"] for row in rows] == ["a"]
+    assert rows[0]["source"] == "parquet" and rows[0]["policy_id"] == "p1"
+    assert rows[0]["occurred_at"] == _utc("2025-01-02T08:00:00")
+    assert not any("tenant_id=globex" in name for name in fake_minio.gets)
+
+
+def test_cold_scan_orders_late_arrivals_across_partitions(settings, fake_minio) -> None:
+    _stage(fake_minio, "late", "2025-01-03", "2025-01-02T23:00:00Z")
+    _stage(fake_minio, "early", "2025-01-02", "2025-01-02T01:00:00Z")
+    _stage(fake_minio, "next", "2025-01-03", "2025-01-03T00:30:00Z")
+    _compact(settings, fake_minio, "2025-01-02", "2025-01-03")
+
+    rows = ParquetEventSource(fake_minio, settings).scan(_query(), _utc("2025-01-01"), _utc("2025-01-05"))
+
+    assert [row["payload"]["interaction_id"] for row in rows] == ["early", "late", "next"]
+
+
+def test_cold_scan_stops_once_the_limit_is_reached(settings, fake_minio) -> None:
+    _stage(fake_minio, "a", "2025-01-02", "2025-01-02T03:00:00Z")
+    _stage(fake_minio, "b", "2025-01-02", "2025-01-02T01:00:00Z")
+    _stage(fake_minio, "c", "2025-01-02", "2025-01-02T02:00:00Z")
+    _stage(fake_minio, "d", "2025-01-06", "2025-01-06T01:00:00Z")
+    _compact(settings, fake_minio, "2025-01-02", "2025-01-06")
+    source = ParquetEventSource(fake_minio, settings)
+    fake_minio.gets.clear()
+
+    rows = list(source.scan(_query(), _utc("2025-01-01"), _utc("2025-01-08"), limit=2))
+
+    assert [row["payload"]["interaction_id"] for row in rows] == ["b", "c"]
+    assert not any("dt=2025-01-06" in name for name in fake_minio.gets)
+
+
+class FakeHotSource:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+        self.calls: list[tuple[datetime, datetime]] = []
+
+    def scan(self, query, start, end, limit=None):
+        self.calls.append((start, end))
+        return iter(row for row in self.rows if start <= row["occurred_at"] < end)
+
+
+class FakeColdSource(FakeHotSource):
+    pass
+
+
+def _engine(hot, cold, **kwargs) -> HybridEventQuery:
+    return HybridEventQuery(hot, cold, hot_window=timedelta(days=3), **kwargs)
+
+
+def _rows(*stamps: str, source: str):
+    return [{"source": source, "occurred_at": _utc(stamp)} for stamp in stamps]
+
+
+def test_hybrid_routes_by_boundary_and_streams_in_order() -> None:
+    now = _utc("2025-01-10T00:00:00")
+    hot = FakeHotSource(_rows("2025-01-08T00:00:00", "2025-01-09T00:00:00", source="postgres"))
+    cold = FakeColdSource(_rows("2025-01-02T00:00:00", "2025-01-06T00:00:00", source="parquet"))
+    engine = _engine(hot, cold, clock=lambda: now)
+
+    rows = list(engine.run(_query(end=now)))
+
+    assert [row["source"] for row in rows] == ["parquet", "parquet", "postgres", "postgres"]
+    boundary = _utc("2025-01-07T00:00:00")
+    assert cold.calls == [(_utc("2025-01-01T00:00:00"), boundary)]
+    assert hot.calls == [(boundary, now)]
+
+
+def test_hybrid_skips_stores_outside_the_range_and_honours_limit() -> None:
+    now = _utc("2025-01-10T00:00:00")
+    hot = FakeHotSource([])
+    cold = FakeColdSource(_rows("2025-01-02T00:00:00", "2025-01-03T00:00:00", source="parquet"))
+    engine = _engine(hot, cold, clock=lambda: now)
+
+    assert len(list(engine.run(_query(), limit=1))) == 1
+    assert hot.calls == []
+
+    list(engine.run(_query(start=_utc("2025-01-08T00:00:00"), end=now)))
+    assert cold.calls == [(_utc("2025-01-01T00:00:00"), _utc("2025-01-07T00:00:00"))]
+
+
+def test_without_cold_store_postgres_serves_everything() -> None:
+    hot = FakeHotSource([])
+    engine = _engine(hot, None)
+
+    list(engine.run(_query()))
+
+    assert hot.calls == [(_utc("2025-01-01T00:00:00"), _utc("2025-01-10T00:00:00"))]
+
+
+def test_inverted_range_is_rejected() -> None:
+    engine = _engine(FakeHotSource([]), None)
+
+    with pytest.raises(ValueError):
+        list(engine.run(_query(start=_utc("2025-01-10T00:00:00"), end=_utc("2025-01-01T00:00:00"))))
+
+
+def test_ranges_longer_than_the_maximum_span_are_rejected() -> None:
+    hot = FakeHotSource([])
+    engine = _engine(hot, None, max_span=timedelta(days=7))
+
+    with pytest.raises(ValueError):
+        list(engine.run(_query()))
+    assert hot.calls == []
+
+
+def _authenticate(token: str):
+    return ACME if token == "acme-token" else None
+
+
+def test_events_endpoint_streams_ndjson(monkeypatch) -> None:
+    from fastapi.testclient import TestClient
+
+    from apps.collector.app import main
+
+    captured: list[EventQuery] = []
+
+    class FakeEngine:
+        def run(self, query, limit=None):
+            captured.append(query)
+            if query.start >= query.end:
+                raise ValueError("start must be before end")
+            return iter([{"source": "postgres", "occurred_at": query.start, "payload": {"n": 1}}])
+
+    monkeypatch.setattr(main, "events_query", FakeEngine())
+    monkeypatch.setattr(main.tenants, "authenticate", _authenticate)
+    monkeypatch.setattr(main.tenants, "is_cached", lambda **kwargs: True)
+    client = TestClient(main.app, headers={"Authorization": "Bearer acme-token"})
+
+    response = client.get(
+        "/v1/events",
+        params={"tenant_id": "acme", "start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z", "policy_id": "p1"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["payload"] for line in response.text.splitlines()] == [{"n": 1}]
+    assert captured[0].tenant == ACME and captured[0].policy_id == "p1"
+    inverted = client.get(
+        "/v1/events", params={"tenant_id": "acme", "start": "2025-01-02T00:00:00Z", "end": "2025-01-01T00:00:00Z"}
+    )
+    assert inverted.status_code == 400
+
+
+@pytest.mark.parametrize(
+    ("headers", "tenant_id", "status"),
+    [({}, "acme", 401), ({"Authorization": "Bearer wrong"}, "acme", 401), ({"Authorization": "Bearer acme-token"}, "globex", 403)],
+)
+def test_events_endpoint_requires_a_key_for_the_tenant(monkeypatch, headers, tenant_id, status) -> None:
+    from fastapi.testclient import TestClient
+
+    from apps.collector.app import main
+
+    class FailingEngine:
+        def run(self, query, limit=None):
+            raise AssertionError("query must not run")
+
+    monkeypatch.setattr(main, "events_query", FailingEngine())
+    monkeypatch.setattr(main.settings, "auth_required", False)
+    monkeypatch.setattr(main.tenants, "authenticate", _authenticate)
+    monkeypatch.setattr(main.tenants, "is_cached", lambda **kwargs: True)
+    monkeypatch.setattr(main.tenants, "resolve_slug", lambda slug: ACME)
+
+    response = TestClient(main.app).get(
+        "/v1/events", params={"tenant_id": tenant_id, "start": "2025-01-01T00:00:00Z"}, headers=headers
+    )
+
+    assert response.status_code == status
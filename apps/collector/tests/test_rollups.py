@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import json
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.collector.app import main
+from apps.collector.app.auth import TenantIdentity
+from apps.collector.app.rollups import (
+    UNATTRIBUTED,
+    EventRow,
+    LatencySketch,
+    PolicyStats,
+    RollupWorker,
+    fold,
+    summarize,
+)
+
+TENANT = "00000000-0000-0000-0000-000000000001"
+ACME = TenantIdentity(tenant_uuid=TENANT, tenant_slug="acme")
+AT = datetime(2025, 6, 1, 10, 17, tzinfo=timezone.utc)
+HOUR = datetime(2025, 6, 1, 10, tzinfo=timezone.utc)
+
+
+def _row(event_id: int, event_type: str, **fields) -> EventRow:
+    values: dict[str, Any] = {name: None for name in EventRow._fields}
+    values.update(id=event_id, tenant_id=TENANT, event_type=event_type, occurred_at=AT, **fields)
+    return EventRow(**values)
+
+
+ROWS = [
+    _row(1, "interaction.create", policy_id="p-1"),
+    _row(2, "interaction.output", policy_id="p-1", interaction_id="i-1", ms_total="120", tokens_in="10", tokens_out="40", dollars="0.002"),
+    _row(3, "interaction.output", policy_id="p-2", interaction_id="i-1", ms_total="300", status="shadow", match="true"),
+    _row(4, "interaction.output", policy_id="p-2", interaction_id="i-2", ms_total="280", status="shadow", match="false"),
+    _row(5, "feedback.submit", interaction_id="i-1", thumb="1", rating="4"),
+    _row(6, "feedback.submit", interaction_id="i-9", thumb="-1", escalated="true"),
+    _row(7, "task.result", interaction_id="i-1", correct="true"),
+]
+
+
+def test_sketch_quantiles_are_within_the_relative_accuracy() -> None:
+    sketch = LatencySketch()
+    for value in range(1, 1001):
+        sketch.add(value)
+
+    assert sketch.quantile(0.95) == pytest.approx(950, rel=0.011)
+    assert sketch.quantile(0.5) == pytest.approx(500, rel=0.011)
+    assert LatencySketch().quantile(0.5) is None
+
+
+def test_sketches_merge_like_one_sketch() -> None:
+    left, right, both = LatencySketch(), LatencySketch(), LatencySketch()
+    for value in range(1, 500):
+        (left if value % 2 else right).add(value * 3.7)
+        both.add(value * 3.7)
+
+    left.merge(LatencySketch.from_json(json.loads(json.dumps(right.to_json()))))
+
+    assert left.buckets == both.buckets
+
+
+def test_fold_credits_feedback_to_the_serving_policy() -> None:
+    stats = fold(ROWS, {(TENANT, "i-1"): "p-1"})
+
+    served, shadow = stats[(TENANT, "p-1", HOUR)], stats[(TENANT, "p-2", HOUR)]
+    assert (served.interactions, served.outputs, served.latency_sum_ms) == (1, 1, 120.0)
+    assert (served.tokens_in, served.tokens_out, served.cost_dollars) == (10, 40, 0.002)
+    assert (served.feedback, served.thumbs_up, served.rating_sum, served.task_correct) == (1, 1, 4, 1)
+    assert (shadow.shadow_outputs, shadow.shadow_comparisons, shadow.shadow_matches) == (2, 2, 1)
+    unattributed = stats[(TENANT, UNATTRIBUTED, HOUR)]
+    assert (unattributed.feedback, unattributed.thumbs_down, unattributed.escalations) == (1, 1, 1)
+
+
+def test_summary_merges_hours_per_policy() -> None:
+    stats = fold(ROWS, {(TENANT, "i-1"): "p-1"})
+    later = fold([_row(8, "interaction.output", policy_id="p-2", ms_total="500", status="shadow", match="true")], {})
+    rows = [(policy, hour, entry) for (_, policy, hour), entry in stats.items()]
+    rows += [(policy, hour.replace(hour=11), entry) for (_, policy, hour), entry in later.items()]
+
+    (p1,) = [entry for entry in summarize(rows) if entry["policy_id"] == "p-1"]
+    (p2,) = [entry for entry in summarize(rows, hourly=True) if entry["policy_id"] == "p-2"]
+
+    assert p1["feedback"]["thumbs_up_rate"] == 1.0 and p1["tasks"]["accuracy"] == 1.0
+    assert p2["shadow"]["match_rate"] == pytest.approx(2 / 3) and len(p2["hours"]) == 2
+    assert p2["latency_ms"]["p50"] == pytest.approx(300, rel=0.011) and p2["latency_ms"]["count"] == 3
+    assert any(entry["policy_id"] is None for entry in summarize(rows))
+
+
+class FakeRollupDB:
+    """Answers the worker's statements from an in-memory events list and watermark."""
+
+    def __init__(self, rows: list[EventRow]) -> None:
+        self.rows = rows
+        self.sequence = max(row.id for row in rows)
+        self.watermark = 0
+        self.upserts: list[dict] = []
+        self.transactions = 0
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    @contextmanager
+    def transaction(self):
+        self.transactions += 1
+        yield
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    def executemany(self, query, params) -> None:
+        assert "merge_latency_sketch" in query
+        self.upserts.extend(params)
+
+    def execute(self, query, params=()):
+        text = " ".join(query.split())
+        if "events_id_seq" in text:
+            rows = [(self.sequence,)]
+        elif "FOR UPDATE SKIP LOCKED" in text:
+            rows = [(self.watermark,)]
+        elif text.startswith("UPDATE rollup_watermarks"):
+            self.watermark = params[0]
+            rows = []
+        elif "FROM events WHERE id >" in text:
+            low, high, limit = params
+            rows = [tuple(row) for row in self.rows if low < row.id <= high][:limit]
+        elif "DISTINCT ON" in text:
+            rows = [("i-1", "p-1")] if "i-1" in params[1] else []
+        else:
+            rows = []
+        return type("Result", (), {"fetchone": lambda self: rows[0] if rows else None, "fetchall": lambda self: rows})()
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_worker_folds_from_the_watermark_in_batches() -> None:
+    db = FakeRollupDB(ROWS)
+    worker = RollupWorker(db.connection, batch_size=4, settle_seconds=0)
+
+    assert worker.run_until_caught_up() == 7
+    assert db.watermark == 7 and db.transactions >= 2
+    assert worker.run_once() == 0  # nothing above the watermark
+
+    merged = PolicyStats()
+    for params in db.upserts:
+        if params["policy_id"] == "p-1":
+            merged.merge(PolicyStats(**{k: v for k, v in params.items() if k in PolicyStats.__dataclass_fields__ and k != "latency_sketch"}))
+    # Feedback and the task result in the second batch still found their policy.
+    assert (merged.outputs, merged.feedback, merged.task_correct) == (1, 1, 1)
+
+
+def test_worker_waits_for_in_flight_ids_to_settle() -> None:
+    clock = FakeClock()
+    db = FakeRollupDB(ROWS[:3])
+    worker = RollupWorker(db.connection, settle_seconds=5, clock=clock)
+
+    assert worker.run_once() == 0  # id 3 was just handed out; its insert may not be visible yet
+    db.rows, db.sequence = ROWS, 7
+    clock.now = 5
+    assert worker.run_once() == 3  # up to the position seen five seconds ago, not beyond
+    assert db.watermark == 3
+
+
+@pytest.fixture()
+def api(monkeypatch):
+    monkeypatch.setattr(main.tenants, "authenticate", lambda token: ACME if token == "acme-token" else None)
+    monkeypatch.setattr(main.tenants, "is_cached", lambda **kwargs: True)
+    monkeypatch.setattr(main.tenants, "resolve_slug", lambda slug: ACME if slug == "acme" else None)
+    seen: list[tuple] = []
+
+    stats = fold(ROWS, {(TENANT, "i-1"): "p-1"})
+
+    def load(conn, tenant_uuid, start, end, policy_id=None):
+        seen.append((tenant_uuid, start, end, policy_id))
+        return [(policy, hour, entry) for (_, policy, hour), entry in stats.items() if policy_id in (None, policy)]
+
+    @contextmanager
+    def connection():
+        yield None
+
+    monkeypatch.setattr(main, "load_stats", load)
+    monkeypatch.setattr(main, "load_watermark", lambda conn: (7, AT))
+    monkeypatch.setattr(main.storage, "connection", connection)
+    client = TestClient(main.app, headers={"Authorization": "Bearer acme-token"})
+    client.seen = seen  # type: ignore[attr-defined]
+    return client
+
+
+def test_stats_endpoint_defaults_to_the_current_hour(api) -> None:
+    response = api.get("/v1/stats/policies", params={"tenant_id": "acme", "policy_id": "p-1"})
+
+    assert response.status_code == 200
+    body = response.json()
+    ((_, start, end, policy),) = api.seen
+    assert start == end.replace(minute=0, second=0, microsecond=0) and policy == "p-1"
+    assert [entry["policy_id"] for entry in body["policies"]] == ["p-1"]
+    assert body["policies"][0]["latency_ms"]["p95"] == pytest.approx(120, rel=0.011)
+    assert body["rolled_up_at"] == AT.isoformat()
+
+
+def test_stats_endpoint_bounds_the_range(api) -> None:
+    params = {"tenant_id": "acme", "start": "2025-01-01T00:00:00Z", "end": "2025-06-01T00:00:00Z"}
+
+    assert api.get("/v1/stats/policies", params=params).status_code == 400
+    assert api.get("/v1/stats/policies", params={"tenant_id": "nobody"}).status_code == 403
+
+
+def test_stats_endpoint_rejects_anonymous_reads(api, monkeypatch) -> None:
+    monkeypatch.setattr(main.settings, "auth_required", False)
+
+    anonymous = api.get("/v1/stats/policies", params={"tenant_id": "acme"}, headers={"Authorization": ""})
+    invalid = api.get("/v1/stats/policies", params={"tenant_id": "acme"}, headers={"Authorization": "Bearer wrong"})
+
+    assert anonymous.status_code == 401 and invalid.status_code == 401
+    assert api.seen == []
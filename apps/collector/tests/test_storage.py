@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager, contextmanager
+
+import pytest
+
+from apps.collector.app.storage import PersistenceLayer, PersistenceSettings
+
+
+class FakeCursor:
+    def __init__(self, db: "FakePool") -> None:
+        self._db = db
+        self._row: dict | None = None
+
+    def __enter__(self) -> "FakeCursor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def execute(self, query, params) -> None:
+        self._db.queries.append(query)
+        key = params["key"]
+        unique = (params["tenant_id"], params["event_type"], key)
+        if key is not None and unique in self._db.keys:
+            self._row = None
+            return
+        if key is not None:
+            self._db.keys.add(unique)
+        self._row = {"id": len(self._db.queries)}
+
+    def fetchone(self):
+        return self._row
+
+
+class FakeConnection:
+    def __init__(self, db: "FakePool") -> None:
+        self._db = db
+
+    def cursor(self, row_factory=None) -> FakeCursor:
+        return FakeCursor(self._db)
+
+
+class FakePool:
+    closed = False
+
+    def __init__(self) -> None:
+        self.queries: list[str] = []
+        self.keys: set[tuple] = set()
+
+    @contextmanager
+    def connection(self):
+        yield FakeConnection(self)
+
+    def close(self) -> None:
+        return None
+
+
+class FakeAsyncCursor(FakeCursor):
+    async def __aenter__(self) -> "FakeAsyncCursor":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def execute(self, query, params) -> None:  # type: ignore[override]
+        FakeCursor.execute(self, query, params)
+
+    async def fetchone(self):  # type: ignore[override]
+        return FakeCursor.fetchone(self)
+
+
+class FakeAsyncConnection:
+    def __init__(self, db: "FakePool") -> None:
+        self._db = db
+
+    def cursor(self, row_factory=None) -> FakeAsyncCursor:
+        return FakeAsyncCursor(self._db)
+
+
+class FakeAsyncPool(FakePool):
+    @asynccontextmanager
+    async def connection(self):  # type: ignore[override]
+        yield FakeAsyncConnection(self)
+
+
+@pytest.fixture()
+def layer(fake_minio) -> PersistenceLayer:
+    persistence = PersistenceLayer(
+        settings=PersistenceSettings(postgres_dsn="postgresql://test", minio_enabled=True, minio_bucket="bucket")
+    )
+    persistence._pool = FakePool()  # type: ignore[assignment]
+    persistence._async_pool = FakeAsyncPool()  # type: ignore[assignment]
+    persistence._minio = fake_minio
+    return persistence
+
+
+def _staged(layer: PersistenceLayer) -> list[str]:
+    return [name for name in layer._minio.objects if "/staging/" in name]  # type: ignore[union-attr]
+
+
+PAYLOAD = {"tenant_id": "acme", "interaction_id": "i-1", "label": {"correct": True}}
+
+
+def test_duplicate_is_answered_from_cache(layer: PersistenceLayer) -> None:
+    layer.write_event("task.result", PAYLOAD, idempotency_key="k1")
+    layer.write_event("task.result", PAYLOAD, idempotency_key="k1")
+
+    assert len(layer._pool.queries) == 1
+
+
+def test_insert_uses_no_write_conflict_path(layer: PersistenceLayer) -> None:
+    layer.write_event("task.result", PAYLOAD, idempotency_key="k1")
+
+    query = " ".join(layer._pool.queries[0].split())
+    assert "DO NOTHING" in query
+    assert "DO UPDATE" not in query
+
+
+def test_keys_are_claimed_outside_the_partitioned_events_table(layer: PersistenceLayer) -> None:
+    layer.write_event("task.result", PAYLOAD, idempotency_key="k1")
+    layer.write_event("task.result", PAYLOAD)
+
+    keyed, unkeyed = (" ".join(query.split()) for query in layer._pool.queries)
+    assert "INSERT INTO event_idempotency_keys" in keyed and "FROM claimed" in keyed
+    assert "event_idempotency_keys" not in unkeyed
+    assert "ON CONFLICT" not in unkeyed
+
+
+def test_events_without_keys_always_hit_postgres(layer: PersistenceLayer) -> None:
+    layer.write_event("task.result", PAYLOAD)
+    layer.write_event("task.result", PAYLOAD)
+
+    assert len(layer._pool.queries) == 2
+
+
+def test_write_event_reports_fresh_inserts_and_replays(layer: PersistenceLayer) -> None:
+    assert layer.write_event("task.result", PAYLOAD, idempotency_key="k1") is True
+    assert layer.write_event("task.result", PAYLOAD, idempotency_key="k1") is False
+
+
+def test_only_fresh_events_are_staged(layer: PersistenceLayer) -> None:
+    layer.write_event("task.result", PAYLOAD, idempotency_key="k1")
+    # Simulate a replay the cache has forgotten (another replica, restart): Postgres
+    # reports the conflict and the event must still not be staged twice.
+    layer._recent_keys = type(layer._recent_keys)(max_entries=0)
+    assert layer.write_event("task.result", PAYLOAD, idempotency_key="k1") is False
+
+    assert len(layer._pool.queries) == 2
+    assert len(_staged(layer)) == 1
+
+
+def test_postgres_and_minio_stages_are_timed(layer: PersistenceLayer) -> None:
+    from prometheus_client import REGISTRY
+
+    def count(stage: str) -> float:
+        labels = {"event_type": "task.result", "stage": stage}
+        return REGISTRY.get_sample_value("collector_stage_duration_seconds_count", labels) or 0.0
+
+    before = {stage: count(stage) for stage in ("postgres", "minio")}
+    layer.write_event("task.result", PAYLOAD, idempotency_key="k-timed")
+
+    assert count("postgres") == before["postgres"] + 1
+    assert count("minio") == before["minio"] + 1
+
+
+@pytest.mark.asyncio
+async def test_async_writes_share_dedupe_and_staging(layer: PersistenceLayer) -> None:
+    assert await layer.write_event_async("task.result", PAYLOAD, idempotency_key="k1") is True
+    assert await layer.write_event_async("task.result", PAYLOAD, idempotency_key="k1") is False
+    assert layer.write_event("task.result", PAYLOAD, idempotency_key="k1") is False
+
+    assert len(layer._async_pool.queries) == 1 and not layer._pool.queries
+    assert len(_staged(layer)) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_staging_runs_on_the_minio_executor(layer: PersistenceLayer, monkeypatch) -> None:
+    import threading
+
+    threads: list[str] = []
+    stage = layer._stage_to_minio
+
+    def record_thread(*args) -> None:
+        threads.append(threading.current_thread().name)
+        stage(*args)
+
+    monkeypatch.setattr(layer, "_stage_to_minio", record_thread)
+
+    await layer.write_event_async("task.result", PAYLOAD)
+
+    assert threads and threads[0].startswith("minio-stage")
+
+
+def test_payload_is_encoded_once_for_postgres_and_staging(layer: PersistenceLayer, monkeypatch) -> None:
+    import json
+
+    from apps.collector.app import storage
+
+    calls: list[dict] = []
+    encode = storage.encode_json
+
+    def record_encode(value: dict) -> bytes:
+        calls.append(value)
+        return encode(value)
+
+    monkeypatch.setattr(storage, "encode_json", record_encode)
+
+    layer.write_event("task.result", PAYLOAD, idempotency_key="k-bytes")
+
+    (staged,) = [layer._minio.objects[name] for name in _staged(layer)]  # type: ignore[union-attr]
+    line = json.loads(staged)
+    assert line["payload"] == {**PAYLOAD, "idempotency_key": "k-bytes"}
+    assert line["event_type"] == "task.result" and staged.endswith(b"}\n")
+    # One encode for the payload, one for the small staging envelope.
+    assert sum(1 for value in calls if "interaction_id" in value) == 1
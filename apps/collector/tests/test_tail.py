@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from apps.collector.app import main
+from apps.collector.app.auth import TenantIdentity
+from apps.collector.app.tail import EventTail, TailFilter, stream
+
+ACME = TenantIdentity(tenant_uuid="00000000-0000-0000-0000-000000000001", tenant_slug="acme")
+OTHER = "00000000-0000-0000-0000-000000000002"
+TASK = {"tenant_id": "acme", "interaction_id": "i-1", "label": {"correct": True}}
+AUTH = {"Authorization": "Bearer acme-token"}
+
+
+def _output(policy: str, n: int = 0) -> dict:
+    return {"tenant_id": "acme", "interaction_id": f"i-{n}", "version": {"policy_id": policy}}
+
+
+def _frames(chunk: bytes) -> list[dict]:
+    frames = []
+    for block in chunk.decode().strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if fields:
+            frames.append({**fields, "data": json.loads(fields["data"])})
+    return frames
+
+
+def test_ring_keeps_the_last_capacity_events_and_reports_skips() -> None:
+    tail = EventTail(4)
+    assert tail.read(0) == (0, [], 0)
+    for n in range(6):
+        tail.publish(ACME.tenant_uuid, "interaction.output", _output("p-1", n))
+
+    skipped, entries, cursor = tail.read(0)
+    assert (skipped, [entry.seq for entry in entries], cursor) == (2, [3, 4, 5, 6], 6)
+    assert tail.read(4, limit=1)[1][0].seq == 5
+    assert (tail.oldest, tail.latest, tail.buffered) == (3, 6, 4)
+
+
+def test_filters_select_tenant_type_and_policy() -> None:
+    tail = EventTail(8)
+    tail.publish(ACME.tenant_uuid, "interaction.output", _output("p-1"))
+    tail.publish(ACME.tenant_uuid, "interaction.output", _output("p-2"))
+    tail.publish(OTHER, "interaction.output", _output("p-1"))
+    tail.publish(ACME.tenant_uuid, "task.result", TASK)
+    _, entries, _ = tail.read(0)
+
+    def seqs(selector: TailFilter) -> list[int]:
+        return [entry.seq for entry in entries if selector.matches(entry)]
+
+    assert seqs(TailFilter(ACME.tenant_uuid)) == [1, 2, 4]
+    assert seqs(TailFilter(ACME.tenant_uuid, policy_id="p-1")) == [1]
+    assert seqs(TailFilter(ACME.tenant_uuid, event_types=frozenset({"task.result"}))) == [4]
+
+
+def test_subscriber_receives_new_events_as_sse() -> None:
+    async def run() -> None:
+        tail = EventTail(16)
+        tail.publish(ACME.tenant_uuid, "interaction.output", _output("p-1"))  # before subscribing
+        events = stream(tail, TailFilter(ACME.tenant_uuid), tail.resume_point(None), heartbeat=0.01)
+        assert await events.__anext__() == b": connected\n\n"
+        assert tail.subscribers == 1
+        assert await events.__anext__() == b": keep-alive\n\n"
+
+        waiting = asyncio.ensure_future(events.__anext__())
+        await asyncio.sleep(0)
+        tail.publish(OTHER, "interaction.output", _output("p-1"))
+        tail.publish(ACME.tenant_uuid, "task.result", TASK)
+        (frame,) = _frames(await asyncio.wait_for(waiting, 1))
+
+        assert (frame["id"], frame["event"]) == ("3", "task.result")
+        assert frame["data"]["payload"] == TASK and frame["data"]["seq"] == 3
+        await events.aclose()
+        assert tail.subscribers == 0
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_skips_ahead_without_blocking_ingest() -> None:
+    async def run() -> None:
+        tail = EventTail(4)
+        events = stream(tail, TailFilter(ACME.tenant_uuid), 0)
+        await events.__anext__()
+        for n in range(10):  # the subscriber is not reading; publishing never waits
+            tail.publish(ACME.tenant_uuid, "interaction.output", _output("p-1", n))
+
+        notice = _frames(await events.__anext__())
+        batch = _frames(await events.__anext__())
+
+        assert notice == [{"event": "skipped", "data": {"skipped": 6}}]
+        assert [frame["id"] for frame in batch] == ["7", "8", "9", "10"]
+        await events.aclose()
+
+    before = REGISTRY.get_sample_value("collector_tail_skipped_events_total") or 0.0
+    asyncio.run(run())
+    assert REGISTRY.get_sample_value("collector_tail_skipped_events_total") == before + 6
+
+
+def test_last_event_id_resumes_within_the_buffer() -> None:
+    tail = EventTail(4)
+    for n in range(3):
+        tail.publish(ACME.tenant_uuid, "interaction.output", _output("p-1", n))
+
+    assert tail.resume_point("1") == 1
+    assert tail.resume_point("99") == 3  # from before a restart: only new events
+    assert tail.resume_point("junk") == tail.resume_point(None) == 3
+
+
+@pytest.fixture()
+def api(monkeypatch):
+    monkeypatch.setattr(main.tenants, "authenticate", lambda token: ACME if token == "acme-token" else None)
+    monkeypatch.setattr(main.tenants, "is_cached", lambda **kwargs: True)
+    monkeypatch.setattr(main.tenants, "resolve_slug", lambda slug: ACME if slug == "acme" else None)
+    monkeypatch.setattr(main, "journal", None)
+    monkeypatch.setattr(main, "tail", EventTail(8, max_subscribers=1))
+
+    async def write_event_async(**kwargs):
+        return kwargs["idempotency_key"] != "dup"
+
+    monkeypatch.setattr(main.storage, "write_event_async", write_event_async)
+    return TestClient(main.app)
+
+
+def test_accepted_events_are_published_and_duplicates_are_not(api) -> None:
+    assert api.post("/v1/task_result", json=TASK).status_code == 202
+    assert api.post("/v1/task_result", json=TASK, headers={"Idempotency-Key": "dup"}).status_code == 202
+
+    assert main.tail is not None
+    _, entries, _ = main.tail.read(0)
+    assert [(entry.tenant_uuid, entry.event_type) for entry in entries] == [(ACME.tenant_uuid, "task.result")]
+
+
+def test_stream_endpoint_rejects_bad_requests(api) -> None:
+    assert api.get("/v1/events/stream", params={"tenant_id": "nobody"}, headers=AUTH).status_code == 403
+    bad_type = api.get(
+        "/v1/events/stream", params={"tenant_id": "acme", "event_type": ["task.result", "nope"]}, headers=AUTH
+    )
+    assert bad_type.status_code == 400 and "nope" in bad_type.json()["detail"]
+
+    assert main.tail is not None
+    main.tail.subscribers = 1
+    busy = api.get("/v1/events/stream", params={"tenant_id": "acme"}, headers=AUTH)
+    assert busy.status_code == 503 and busy.headers["Retry-After"] == "5"
+
+
+def test_stream_endpoint_rejects_anonymous_reads(api, monkeypatch) -> None:
+    monkeypatch.setattr(main.settings, "auth_required", False)
+
+    anonymous = api.get("/v1/events/stream", params={"tenant_id": "acme"})
+    invalid = api.get("/v1/events/stream", params={"tenant_id": "acme"}, headers={"Authorization": "Bearer wrong"})
+
+    assert anonymous.status_code == 401 and invalid.status_code == 401
+    assert main.tail is not None and main.tail.subscribers == 0
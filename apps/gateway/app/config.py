@@ -18,6 +18,8 @@ class GatewaySettings:
     inference_api_key: str = ""
     use_stub_backend: bool = False
     shadow_log_path: str | None = None
+    collector_compression: str | None = "gzip"
+    collector_compression_min_bytes: int = 1024
 
     @classmethod
     def from_env(cls) -> "GatewaySettings":
@@ -53,6 +55,8 @@ class GatewaySettings:
         inference_api_key = os.environ.get("INFERENCE_API_KEY", "")
         use_stub_backend = os.environ.get("GATEWAY_USE_STUB_BACKEND", "false").lower() == "true"
         shadow_log_path = os.environ.get("GATEWAY_SHADOW_LOG_PATH")
+        compression = os.environ.get("COLLECTOR_COMPRESSION", "gzip").strip().lower()
+        compression_min_bytes = int(os.environ.get("COLLECTOR_COMPRESSION_MIN_BYTES", "1024"))
 
         return cls(
             postgres_dsn=dsn,
@@ -64,6 +68,8 @@ class GatewaySettings:
             inference_api_key=inference_api_key,
             use_stub_backend=use_stub_backend,
             shadow_log_path=shadow_log_path,
+            collector_compression=None if compression in ("", "none", "identity") else compression,
+            collector_compression_min_bytes=compression_min_bytes,
         )
 
 
@@ -145,6 +145,7 @@ async def infer(
             "router_reason": decision.reason,
             "shadow_candidates": [p.policy_id for p in decision.shadow_candidates],
         },
+        interaction_id=interaction_id,
     )
     logger.info(
         "tenant=%s skill=%s selected_policy=%s shadow=%s",
@@ -35,6 +35,7 @@ class InferenceResponse(BaseModel):
     decision: PolicyDecision
     output: Dict[str, Any]
     version: Dict[str, Any]
+    interaction_id: Optional[str] = None
 
 
 class HealthResponse(BaseModel):
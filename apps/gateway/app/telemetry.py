@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import gzip
+import json
 import logging
 from typing import Any, Dict, Optional
 
@@ -9,13 +11,30 @@ import httpx
 
 from .config import GatewaySettings
 
+try:  # Optional dependency for COLLECTOR_COMPRESSION=zstd
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover - exercised only without zstandard
+    zstandard = None  # type: ignore
+
 logger = logging.getLogger("gateway.telemetry")
 
 
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
 class CollectorClient:
-    def __init__(self, settings: GatewaySettings) -> None:
+    def __init__(self, settings: GatewaySettings, *, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
         self._settings = settings
-        self._client = httpx.AsyncClient(base_url=settings.collector_url, timeout=5.0)
+        self._client = httpx.AsyncClient(base_url=settings.collector_url, timeout=5.0, transport=transport)
+        self._compression = settings.collector_compression
+        if self._compression not in (None, "gzip", "zstd"):
+            raise ValueError("COLLECTOR_COMPRESSION must be gzip, zstd or none")
+        if self._compression == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed; compressing collector requests with gzip")
+            self._compression = "gzip"
 
     async def log_output(self, payload: Dict[str, Any]) -> None:
         await self._post("/v1/interaction.output", payload)
@@ -26,7 +45,11 @@ class CollectorClient:
         }
         if self._settings.collector_api_key:
             headers["Authorization"] = f"Bearer {self._settings.collector_api_key}"
-        response = await self._client.post(path, json=payload)
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        if self._compression and len(body) >= self._settings.collector_compression_min_bytes:
+            headers["Content-Encoding"] = self._compression
+            body = _compress(body, self._compression)
+        response = await self._client.post(path, content=body, headers=headers)
         try:
             response.raise_for_status()
         except httpx.HTTPStatusError as exc:  # pragma: no cover - external failures
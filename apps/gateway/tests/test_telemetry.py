@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+import pytest
+from httpx import MockTransport, Request, Response
+
+from apps.gateway.app.config import GatewaySettings
+from apps.gateway.app.telemetry import CollectorClient
+
+
+def _settings(**overrides) -> GatewaySettings:
+    return GatewaySettings(postgres_dsn="postgresql://test", collector_url="http://collector", **overrides)
+
+
+@pytest.mark.asyncio
+async def test_large_payloads_are_gzipped_with_auth_header():
+    seen: list[Request] = []
+
+    async def handler(request: Request) -> Response:
+        seen.append(request)
+        return Response(202)
+
+    client = CollectorClient(
+        _settings(collector_api_key="secret", collector_compression_min_bytes=512), transport=MockTransport(handler)
+    )
+    await client.log_output({"tenant_id": "acme", "output": {"text": "hi"}})
+    await client.log_output({"tenant_id": "acme", "output": {"text": "retrieved chunk " * 100}})
+    await client.close()
+
+    small, large = seen
+    assert "Content-Encoding" not in small.headers and json.loads(small.content)["tenant_id"] == "acme"
+    assert large.headers["Content-Encoding"] == "gzip" and len(large.content) < 512
+    assert json.loads(gzip.decompress(large.content))["output"]["text"].startswith("retrieved chunk")
+    assert large.headers["Authorization"] == "Bearer secret"
+
+
+@pytest.mark.asyncio
+async def test_compression_can_be_disabled():
+    seen: list[Request] = []
+
+    async def handler(request: Request) -> Response:
+        seen.append(request)
+        return Response(202)
+
+    client = CollectorClient(_settings(collector_compression=None), transport=MockTransport(handler))
+    await client.log_output({"tenant_id": "acme", "output": {"text": "x" * 5000}})
+    await client.close()
+
+    assert "Content-Encoding" not in seen[0].headers
+    with pytest.raises(ValueError):
+        CollectorClient(_settings(collector_compression="br"))
@@ -0,0 +1 @@
+"""Reward computation service package."""
@@ -0,0 +1,128 @@
+"""Reward engine settings and per-tenant signal weights."""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field, fields, replace
+from typing import Dict, Mapping, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class RewardWeights:
+    """Weight of each normalised signal in an interaction's reward.
+
+    Every signal is scaled to ``[-1, 1]``. The reward is the weighted mean of the
+    signals an interaction actually has, so a missing signal counts as unknown,
+    not as neutral. A weight of 0 ignores the signal.
+    """
+
+    thumb: float = 1.0
+    rating: float = 1.0
+    sent: float = 0.5
+    escalated: float = 1.0
+    follow_ups: float = 0.25
+    time_to_send: float = 0.25
+    task_correct: float = 2.0
+    task_f1: float = 1.0
+    task_resolved: float = 1.0
+    kpi_delta: float = 0.5
+
+    @classmethod
+    def names(cls) -> Tuple[str, ...]:
+        return tuple(f.name for f in fields(cls))
+
+    def vector(self) -> Tuple[float, ...]:
+        return tuple(getattr(self, name) for name in self.names())
+
+    def updated(self, overrides: Mapping[str, float]) -> "RewardWeights":
+        unknown = sorted(set(overrides) - set(self.names()))
+        if unknown:
+            raise ValueError(f"Unknown reward signals: {', '.join(unknown)}")
+        if any(float(value) < 0 for value in overrides.values()):
+            raise ValueError("Reward weights must not be negative")
+        return replace(self, **{name: float(value) for name, value in overrides.items()})
+
+
+def _parse_json(raw: str, variable: str) -> dict:
+    if not raw.strip():
+        return {}
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"{variable} is not valid JSON: {exc}") from exc
+    if not isinstance(value, dict):
+        raise ValueError(f"{variable} must be a JSON object")
+    return value
+
+
+def parse_weights(default: str = "", tenants: str = "") -> Tuple[RewardWeights, Dict[str, RewardWeights]]:
+    """``REWARD_WEIGHTS`` overrides the defaults; ``REWARD_TENANT_WEIGHTS`` maps tenant -> overrides.
+
+    Tenant overrides apply on top of ``REWARD_WEIGHTS``, e.g.
+    ``{"acme-support": {"task_correct": 4, "sent": 0}}``.
+    """
+    base = RewardWeights().updated(_parse_json(default, "REWARD_WEIGHTS"))
+    per_tenant = {}
+    for tenant, overrides in _parse_json(tenants, "REWARD_TENANT_WEIGHTS").items():
+        if not isinstance(overrides, dict):
+            raise ValueError(f"REWARD_TENANT_WEIGHTS[{tenant!r}] must be a JSON object")
+        per_tenant[tenant] = base.updated(overrides)
+    return base, per_tenant
+
+
+@dataclass
+class RewardSettings:
+    # Bucket holding the collector's compacted Parquet, or a directory when ``local_dir`` is set.
+    root: str = ""
+    prefix: str = "events"
+    local_dir: Optional[str] = None
+    minio_endpoint: Optional[str] = None
+    minio_access_key: Optional[str] = None
+    minio_secret_key: Optional[str] = None
+    minio_secure: bool = False
+    minio_region: Optional[str] = None
+    # Feedback and task results ingested up to this many days after the output count.
+    window_days: int = 3
+    batch_rows: int = 65_536
+    max_days_per_run: int = 31
+    interval_seconds: float = 3600.0
+    weights: RewardWeights = field(default_factory=RewardWeights)
+    tenant_weights: Dict[str, RewardWeights] = field(default_factory=dict)
+
+    @property
+    def parquet_dir(self) -> str:
+        return f"{self.root}/{self.prefix}/parquet"
+
+    @property
+    def output_dir(self) -> str:
+        return f"{self.root}/{self.prefix}/rewards"
+
+    def weights_for(self, tenant: str) -> RewardWeights:
+        return self.tenant_weights.get(tenant, self.weights)
+
+    @classmethod
+    def from_env(cls) -> "RewardSettings":
+        local_dir = os.environ.get("REWARD_LOCAL_DIR") or None
+        weights, tenant_weights = parse_weights(
+            os.environ.get("REWARD_WEIGHTS", ""), os.environ.get("REWARD_TENANT_WEIGHTS", "")
+        )
+        return cls(
+            root=local_dir.rstrip("/") if local_dir else os.environ.get("MINIO_BUCKET", ""),
+            prefix=os.environ.get("MINIO_PREFIX", "events"),
+            local_dir=local_dir,
+            minio_endpoint=os.environ.get("MINIO_ENDPOINT"),
+            minio_access_key=os.environ.get("MINIO_ACCESS_KEY"),
+            minio_secret_key=os.environ.get("MINIO_SECRET_KEY"),
+            minio_secure=os.environ.get("MINIO_SECURE", "false").lower() == "true",
+            minio_region=os.environ.get("MINIO_REGION"),
+            window_days=int(os.environ.get("REWARD_WINDOW_DAYS", "3")),
+            batch_rows=int(os.environ.get("REWARD_BATCH_ROWS", "65536")),
+            max_days_per_run=int(os.environ.get("REWARD_MAX_DAYS_PER_RUN", "31")),
+            interval_seconds=float(os.environ.get("REWARD_INTERVAL", "3600")),
+            weights=weights,
+            tenant_weights=tenant_weights,
+        )
+
+
+__all__ = ["RewardSettings", "RewardWeights", "parse_weights"]
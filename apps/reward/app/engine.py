@@ -0,0 +1,492 @@
+"""Vectorized per-interaction rewards from the collector's compacted Parquet.
+
+The collector compacts events into ``{prefix}/parquet/dt=<ingest day>/event_type=<type>/
+tenant_id=<tenant>/`` files with typed columns (``apps/collector/app/columnar.py``).
+For each day ``d`` the engine takes the served ``interaction.output`` events of
+``dt=d``, i.e. those whose ``version.status`` (the ``version_status`` column) is not
+``shadow``. It joins them on ``(tenant_id, interaction_id)`` with the
+``feedback.submit`` and ``task.result`` events of ``dt=d .. d + window_days``.
+
+Signals are reduced per interaction batch by batch with Arrow hash aggregations,
+then scored with NumPy over whole columns. No Python code runs per row. The
+reward is the tenant-weighted mean of the signals an interaction has (see
+``RewardWeights``). Implicit signals the SDK sampled carry ``1 / rate`` in
+``labels.sample_weights``; each row reports it as ``<signal>_weight`` so that
+aggregates over interactions can reweight the sampled signals.
+
+A day is processed once its last signal day is over. Its rewards are written to
+``{prefix}/rewards/dt=<d>/tenant_id=<tenant>/rewards.parquet``, and then the
+watermark (``{prefix}/rewards/_watermark.json``) advances. Re-running a day
+rewrites its files, so a crash between the two steps only repeats work.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs as pafs
+
+from .config import RewardSettings, RewardWeights
+
+logger = logging.getLogger("reward.engine")
+
+OUTPUT = "interaction.output"
+FEEDBACK = "feedback.submit"
+TASK = "task.result"
+KEYS = ["tenant_id", "interaction_id"]
+MANIFEST_NAME = "_manifest.json"
+WATERMARK_NAME = "_watermark.json"
+REWARDS_FILE = "rewards.parquet"
+SHADOW_STATUS = "shadow"
+
+RATING_MIDPOINT = 3.0
+RATING_HALF_RANGE = 2.0
+FOLLOW_UP_CAP = 3.0
+TIME_TO_SEND_SCALE_MS = 120_000.0
+
+_STRING = pa.string()
+_PARTITIONING = ds.partitioning(
+    pa.schema([("dt", _STRING), ("event_type", _STRING), ("tenant_id", _STRING)]), flavor="hive"
+)
+
+# The columns each scan reads, typed as compaction writes them.
+_SCAN_COLUMNS: Dict[str, List[pa.Field]] = {
+    OUTPUT: [
+        pa.field("interaction_id", _STRING),
+        pa.field("policy_id", pa.dictionary(pa.int32(), _STRING)),
+        pa.field("occurred_at", pa.timestamp("us", tz="UTC")),
+        pa.field("version_status", pa.dictionary(pa.int32(), _STRING)),
+    ],
+    FEEDBACK: [
+        pa.field("interaction_id", _STRING),
+        pa.field("explicit_thumb", pa.int8()),
+        pa.field("explicit_rating", pa.int8()),
+        pa.field("implicit_sent", pa.bool_()),
+        pa.field("implicit_time_to_send_ms", pa.int64()),
+        pa.field("implicit_escalated", pa.bool_()),
+        pa.field("implicit_follow_up_count", pa.int64()),
+        pa.field("labels_sample_weights_sent", pa.float64()),
+        pa.field("labels_sample_weights_time_to_send_ms", pa.float64()),
+        pa.field("labels_sample_weights_escalated", pa.float64()),
+        pa.field("labels_sample_weights_follow_up_count", pa.float64()),
+    ],
+    TASK: [
+        pa.field("interaction_id", _STRING),
+        pa.field("label_correct", pa.bool_()),
+        pa.field("label_f1", pa.float64()),
+        pa.field("label_resolved", pa.bool_()),
+        pa.field("label_kpi_delta", pa.float64()),
+    ],
+}
+
+# Per-batch partial aggregates and how partials combine. Booleans are summed or
+# maxed as int8 so every partial merges with plain sum/max/min.
+PARTIALS: Dict[str, List[Tuple[str, str]]] = {
+    FEEDBACK: [
+        ("explicit_thumb", "sum"),
+        ("explicit_thumb", "count"),
+        ("explicit_rating", "sum"),
+        ("explicit_rating", "count"),
+        ("implicit_sent", "max"),
+        ("implicit_escalated", "max"),
+        ("implicit_follow_up_count", "max"),
+        ("implicit_time_to_send_ms", "min"),
+        ("labels_sample_weights_sent", "max"),
+        ("labels_sample_weights_time_to_send_ms", "max"),
+        ("labels_sample_weights_escalated", "max"),
+        ("labels_sample_weights_follow_up_count", "max"),
+    ],
+    TASK: [
+        ("label_correct", "sum"),
+        ("label_correct", "count"),
+        ("label_f1", "sum"),
+        ("label_f1", "count"),
+        ("label_resolved", "max"),
+        ("label_kpi_delta", "sum"),
+        ("label_kpi_delta", "count"),
+    ],
+}
+_COMBINE = {"sum": "sum", "count": "sum", "max": "max", "min": "min"}
+# Partial tables are folded together once this many have accumulated.
+_MAX_PENDING_PARTIALS = 64
+
+# Signals built from implicit feedback the SDK may sample, and the implicit fields
+# each needs; a signal's weight is the product of those fields' sample weights.
+SAMPLED_SIGNALS: Dict[str, Tuple[str, ...]] = {
+    "sent": ("sent",),
+    "escalated": ("escalated",),
+    "follow_ups": ("follow_up_count",),
+    "time_to_send": ("sent", "time_to_send_ms"),
+}
+
+REWARD_FIELDS = [
+    pa.field("tenant_id", _STRING),
+    pa.field("interaction_id", _STRING),
+    pa.field("policy_id", _STRING),
+    pa.field("output_at", pa.timestamp("us", tz="UTC")),
+    pa.field("reward", pa.float64()),
+    pa.field("signals", pa.int8()),
+    *(pa.field(name, pa.float64()) for name in RewardWeights.names()),
+    *(pa.field(f"{name}_weight", pa.float64()) for name in SAMPLED_SIGNALS),
+]
+REWARD_SCHEMA = pa.schema(REWARD_FIELDS)
+
+
+def build_filesystem(settings: RewardSettings) -> pafs.FileSystem:
+    if settings.local_dir:
+        return pafs.LocalFileSystem()
+    if not settings.minio_endpoint or not settings.root:
+        raise ValueError("MinIO endpoint and bucket must be configured")
+    return pafs.S3FileSystem(
+        access_key=settings.minio_access_key,
+        secret_key=settings.minio_secret_key,
+        endpoint_override=settings.minio_endpoint,
+        scheme="https" if settings.minio_secure else "http",
+        region=settings.minio_region or "us-east-1",
+    )
+
+
+def _read_json(filesystem: pafs.FileSystem, path: str) -> Optional[dict]:
+    try:
+        with filesystem.open_input_stream(path) as stream:
+            return json.loads(stream.read())
+    except FileNotFoundError:
+        return None
+
+
+def _write_json(filesystem: pafs.FileSystem, path: str, value: dict) -> None:
+    filesystem.create_dir(path.rsplit("/", 1)[0], recursive=True)
+    with filesystem.open_output_stream(path) as stream:
+        stream.write(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def _partial(table: pa.Table, spec: Sequence[Tuple[str, str]]) -> pa.Table:
+    for column in {column for column, _ in spec}:
+        if pa.types.is_boolean(table.schema.field(column).type):
+            table = table.set_column(table.schema.get_field_index(column), column, pc.cast(table[column], pa.int8()))
+    return table.group_by(KEYS).aggregate(list(spec))
+
+
+def _combine(partials: List[pa.Table], spec: Sequence[Tuple[str, str]]) -> pa.Table:
+    merged = pa.concat_tables(partials).group_by(KEYS).aggregate(
+        [(f"{column}_{agg}", _COMBINE[agg]) for column, agg in spec]
+    )
+    names = {f"{column}_{agg}_{_COMBINE[agg]}": f"{column}_{agg}" for column, agg in spec}
+    return merged.rename_columns([names.get(name, name) for name in merged.column_names])
+
+
+def _empty_partial(event_type: str) -> pa.Table:
+    fields = [pa.field("tenant_id", _STRING), *_SCAN_COLUMNS[event_type]]
+    return _partial(pa.schema(fields).empty_table(), PARTIALS[event_type])
+
+
+def reduce_signals(batches: Iterable[pa.RecordBatch], event_type: str) -> pa.Table:
+    """One row per ``(tenant_id, interaction_id)`` with the partial aggregates of ``PARTIALS``."""
+    spec = PARTIALS[event_type]
+    pending: List[pa.Table] = [_empty_partial(event_type)]
+    for batch in batches:
+        table = pa.Table.from_batches([batch]).filter(pc.is_valid(batch["interaction_id"]))
+        pending.append(_partial(table, spec))
+        if len(pending) >= _MAX_PENDING_PARTIALS:
+            pending = [_combine(pending, spec)]
+    return _combine(pending, spec)
+
+
+def served_outputs(batches: Iterable[pa.RecordBatch]) -> pa.Table:
+    """The last non-shadow output per interaction: its policy and ``output_at``."""
+    parts = [
+        pa.table(
+            {
+                "tenant_id": pa.array([], _STRING),
+                "interaction_id": pa.array([], _STRING),
+                "policy_id": pa.array([], _STRING),
+                "output_at": pa.array([], pa.timestamp("us", tz="UTC")),
+            }
+        )
+    ]
+    for batch in batches:
+        shadow = pc.fill_null(pc.equal(batch["version_status"], SHADOW_STATUS), False)
+        keep = pc.and_(pc.invert(shadow), pc.is_valid(batch["interaction_id"]))
+        served = pa.Table.from_batches([batch]).filter(keep)
+        parts.append(
+            pa.table(
+                {
+                    "tenant_id": served["tenant_id"],
+                    "interaction_id": served["interaction_id"],
+                    "policy_id": pc.cast(served["policy_id"], _STRING),
+                    "output_at": served["occurred_at"],
+                }
+            )
+        )
+    outputs = pa.concat_tables(parts)
+    outputs = outputs.take(pc.sort_indices(outputs, sort_keys=[("output_at", "ascending")]))
+    latest = outputs.group_by(KEYS, use_threads=False).aggregate([("policy_id", "last"), ("output_at", "last")])
+    return latest.rename_columns([name.removesuffix("_last") for name in latest.column_names])
+
+
+def _floats(table: pa.Table, column: str) -> np.ndarray:
+    """Column as float64 with NaN for nulls."""
+    return pc.cast(table[column], pa.float64()).to_numpy(zero_copy_only=False)
+
+
+def signal_matrix(table: pa.Table) -> np.ndarray:
+    """``(rows, len(RewardWeights.names()))`` signals in ``[-1, 1]``; NaN where absent."""
+    names = RewardWeights.names()
+    if not table.num_rows:
+        return np.empty((0, len(names)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sent = _floats(table, "implicit_sent_max")
+        columns = {
+            "thumb": _floats(table, "explicit_thumb_sum") / _floats(table, "explicit_thumb_count"),
+            "rating": (
+                _floats(table, "explicit_rating_sum") / _floats(table, "explicit_rating_count") - RATING_MIDPOINT
+            )
+            / RATING_HALF_RANGE,
+            "sent": 2.0 * sent - 1.0,
+            "escalated": 1.0 - 2.0 * _floats(table, "implicit_escalated_max"),
+            "follow_ups": 1.0 - 2.0 * np.minimum(_floats(table, "implicit_follow_up_count_max"), FOLLOW_UP_CAP) / FOLLOW_UP_CAP,
+            # Only a sent reply has a meaningful time to send.
+            "time_to_send": np.where(
+                sent == 1.0,
+                2.0 * np.exp(-_floats(table, "implicit_time_to_send_ms_min") / TIME_TO_SEND_SCALE_MS) - 1.0,
+                np.nan,
+            ),
+            "task_correct": 2.0 * _floats(table, "label_correct_sum") / _floats(table, "label_correct_count") - 1.0,
+            "task_f1": 2.0 * np.clip(_floats(table, "label_f1_sum") / _floats(table, "label_f1_count"), 0.0, 1.0) - 1.0,
+            "task_resolved": 2.0 * _floats(table, "label_resolved_max") - 1.0,
+            "kpi_delta": np.tanh(_floats(table, "label_kpi_delta_sum") / _floats(table, "label_kpi_delta_count")),
+        }
+    return np.column_stack([columns[name] for name in names])
+
+
+def sample_weights(table: pa.Table, signals: np.ndarray) -> Dict[str, np.ndarray]:
+    """Inverse sampling probability of each ``SAMPLED_SIGNALS`` entry; NaN where the signal is absent."""
+    names = RewardWeights.names()
+    weights = {}
+    for name, sources in SAMPLED_SIGNALS.items():
+        weight = np.ones(table.num_rows)
+        for source in sources:
+            weight = weight * np.nan_to_num(_floats(table, f"labels_sample_weights_{source}_max"), nan=1.0)
+        weights[name] = np.where(np.isnan(signals[:, names.index(name)]), np.nan, weight)
+    return weights
+
+
+def weight_matrix(tenants: pa.ChunkedArray, weights_for: Callable[[str], RewardWeights]) -> np.ndarray:
+    """Each row's tenant weights, looked up once per distinct tenant."""
+    encoded = pc.dictionary_encode(tenants).combine_chunks()
+    per_tenant = np.array(
+        [weights_for(tenant).vector() for tenant in encoded.dictionary.to_pylist()] or [RewardWeights().vector()],
+        dtype=np.float64,
+    )
+    return per_tenant[encoded.indices.to_numpy(zero_copy_only=False)]
+
+
+def score(signals: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Weighted mean of the present signals per row and how many contributed."""
+    present = ~np.isnan(signals) & (weights > 0)
+    numerator = np.where(present, signals * weights, 0.0).sum(axis=1)
+    denominator = np.where(present, weights, 0.0).sum(axis=1)
+    reward = np.divide(numerator, denominator, out=np.full(len(signals), np.nan), where=denominator > 0)
+    return reward, present.sum(axis=1)
+
+
+def compute_rewards(
+    outputs: pa.Table,
+    feedback: pa.Table,
+    tasks: pa.Table,
+    weights_for: Callable[[str], RewardWeights],
+) -> pa.Table:
+    joined = outputs.join(feedback, keys=KEYS, join_type="left outer").join(tasks, keys=KEYS, join_type="left outer")
+    signals = signal_matrix(joined)
+    reward, counts = score(signals, weight_matrix(joined["tenant_id"], weights_for))
+    sampled = sample_weights(joined, signals)
+    columns = [
+        joined["tenant_id"],
+        joined["interaction_id"],
+        joined["policy_id"],
+        joined["output_at"],
+        pa.array(reward, pa.float64(), from_pandas=True),
+        pa.array(counts, pa.int8()),
+        *(pa.array(signals[:, index], pa.float64(), from_pandas=True) for index in range(signals.shape[1])),
+        *(pa.array(sampled[name], pa.float64(), from_pandas=True) for name in SAMPLED_SIGNALS),
+    ]
+    return pa.Table.from_arrays(columns, schema=REWARD_SCHEMA)
+
+
+class RewardEngine:
+    """Computes each compacted day's rewards once, in day order, from the watermark on."""
+
+    def __init__(
+        self,
+        filesystem: pafs.FileSystem,
+        settings: RewardSettings,
+        *,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ) -> None:
+        self._filesystem = filesystem
+        self._settings = settings
+        self._clock = clock
+        self.interactions_total = 0
+        self.days_total = 0
+        self.last_run_at: Optional[float] = None
+        self.last_run_seconds = 0.0
+        self.last_throughput = 0.0
+
+    @property
+    def watermark_path(self) -> str:
+        return f"{self._settings.output_dir}/{WATERMARK_NAME}"
+
+    def load_watermark(self) -> Optional[date]:
+        data = _read_json(self._filesystem, self.watermark_path)
+        return date.fromisoformat(data["last_date"]) if data and data.get("last_date") else None
+
+    def save_watermark(self, day: date, interactions: int) -> None:
+        _write_json(
+            self._filesystem,
+            self.watermark_path,
+            {
+                "last_date": day.isoformat(),
+                "interactions": interactions,
+                "updated_at": self._clock().isoformat(timespec="seconds"),
+            },
+        )
+
+    def compacted_days(self) -> List[date]:
+        selector = pafs.FileSelector(self._settings.parquet_dir, allow_not_found=True)
+        days = []
+        for info in self._filesystem.get_file_info(selector):
+            if info.type == pafs.FileType.Directory and info.base_name.startswith("dt="):
+                try:
+                    days.append(date.fromisoformat(info.base_name[3:]))
+                except ValueError:
+                    continue
+        return sorted(days)
+
+    def pending_days(self) -> List[date]:
+        """Days after the watermark whose last signal day (``d + window_days``) is over."""
+        last_ready = self._clock().date() - timedelta(days=self._settings.window_days + 1)
+        watermark = self.load_watermark()
+        if watermark is not None:
+            first = watermark + timedelta(days=1)
+        else:
+            days = self.compacted_days()
+            if not days:
+                return []
+            first = days[0]
+        count = max(0, min((last_ready - first).days + 1, self._settings.max_days_per_run))
+        return [first + timedelta(days=offset) for offset in range(count)]
+
+    def _files(self, day: date, event_type: str) -> List[str]:
+        manifest = _read_json(self._filesystem, f"{self._settings.parquet_dir}/dt={day.isoformat()}/{MANIFEST_NAME}")
+        type_dir = f"/event_type={quote(event_type, safe='')}/"
+        return [f"{self._settings.root}/{name}" for name in (manifest or {}).get("files", []) if type_dir in name]
+
+    def scan(self, days: Iterable[date], event_type: str) -> Iterator[pa.RecordBatch]:
+        """Record batches of ``event_type`` from the ``dt`` partitions of ``days``."""
+        files = [path for day in days for path in self._files(day, event_type)]
+        if not files:
+            return
+        fields = _SCAN_COLUMNS[event_type]
+        dataset = ds.dataset(
+            files,
+            schema=pa.schema([*fields, *_PARTITIONING.schema]),
+            format="parquet",
+            filesystem=self._filesystem,
+            partitioning=_PARTITIONING,
+            partition_base_dir=self._settings.parquet_dir,
+        )
+        yield from dataset.to_batches(
+            columns=["tenant_id", *(field.name for field in fields)], batch_size=self._settings.batch_rows
+        )
+
+    def compute_day(self, day: date) -> pa.Table:
+        signal_days = [day + timedelta(days=offset) for offset in range(self._settings.window_days + 1)]
+        return compute_rewards(
+            served_outputs(self.scan([day], OUTPUT)),
+            reduce_signals(self.scan(signal_days, FEEDBACK), FEEDBACK),
+            reduce_signals(self.scan(signal_days, TASK), TASK),
+            self._settings.weights_for,
+        )
+
+    def write_day(self, day: date, rewards: pa.Table) -> List[str]:
+        day_dir = f"{self._settings.output_dir}/dt={day.isoformat()}"
+        self._filesystem.create_dir(day_dir, recursive=True)
+        self._filesystem.delete_dir_contents(day_dir, missing_dir_ok=True)
+        written = []
+        tenants = pc.dictionary_encode(rewards["tenant_id"]).combine_chunks()
+        for index, tenant in enumerate(tenants.dictionary.to_pylist()):
+            path = f"{day_dir}/tenant_id={quote(tenant, safe='')}/{REWARDS_FILE}"
+            self._filesystem.create_dir(path.rsplit("/", 1)[0], recursive=True)
+            pq.write_table(
+                rewards.filter(pc.equal(tenants.indices, index)), path, filesystem=self._filesystem, compression="zstd"
+            )
+            written.append(path)
+        return written
+
+    def process_day(self, day: date) -> int:
+        rewards = self.compute_day(day)
+        self.write_day(day, rewards)
+        return rewards.num_rows
+
+    def run_once(self) -> List[Tuple[date, int]]:
+        started = time.perf_counter()
+        processed = []
+        for day in self.pending_days():
+            count = self.process_day(day)
+            self.save_watermark(day, count)
+            processed.append((day, count))
+            logger.info("Rewards for dt=%s: %s interactions", day.isoformat(), count)
+        elapsed = time.perf_counter() - started
+        total = sum(count for _, count in processed)
+        self.interactions_total += total
+        self.days_total += len(processed)
+        self.last_run_at = time.time()
+        self.last_run_seconds = elapsed
+        if processed:
+            self.last_throughput = total / elapsed if elapsed > 0 else 0.0
+        return processed
+
+
+def read_rewards(filesystem: pafs.FileSystem, settings: RewardSettings, day: date) -> pa.Table:
+    """All tenants' rewards for ``day`` (empty when the day was not processed)."""
+    day_dir = f"{settings.output_dir}/dt={day.isoformat()}"
+    infos = filesystem.get_file_info(pafs.FileSelector(day_dir, recursive=True, allow_not_found=True))
+    paths = sorted(info.path for info in infos if info.base_name == REWARDS_FILE)
+    if not paths:
+        return REWARD_SCHEMA.empty_table()
+    tables = [pq.read_table(path, filesystem=filesystem) for path in paths]
+    return pa.concat_tables(tables).cast(REWARD_SCHEMA)
+
+
+def main() -> None:  # pragma: no cover - CLI wiring
+    parser = argparse.ArgumentParser(description="Compute per-interaction rewards from compacted events")
+    parser.add_argument("command", choices=("once", "day"))
+    parser.add_argument("--date", help="ISO date to (re)compute with `day`; the watermark is not moved")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    settings = RewardSettings.from_env()
+    engine = RewardEngine(build_filesystem(settings), settings)
+    if args.command == "day":
+        if not args.date:
+            parser.error("day needs --date")
+        count = engine.process_day(date.fromisoformat(args.date))
+        print(json.dumps({"date": args.date, "interactions": count}))
+        return
+    processed = engine.run_once()
+    print(json.dumps({"days": [day.isoformat() for day, _ in processed], "interactions": engine.interactions_total}))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
+
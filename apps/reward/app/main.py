@@ -1,5 +1,58 @@
-from http.server import BaseHTTPRequestHandler, HTTPServer
 import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from .config import RewardSettings
+from .engine import RewardEngine, build_filesystem
+
+logger = logging.getLogger("reward")
+
+settings = RewardSettings.from_env()
+
+
+class RewardScheduler:
+    """Runs the engine every ``interval`` seconds on a daemon thread."""
+
+    def __init__(self, engine: RewardEngine, interval: float) -> None:
+        self.engine = engine
+        self.failures = 0
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="reward-engine", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.engine.run_once()
+            except Exception:  # pragma: no cover - defensive logging
+                self.failures += 1
+                logger.exception("Reward run failed")
+            self._stop.wait(self._interval)
+
+    def render_metrics(self) -> str:
+        engine = self.engine
+        lines = [
+            ("reward_interactions_total", "counter", "Interactions scored", engine.interactions_total),
+            ("reward_days_total", "counter", "Compacted days processed", engine.days_total),
+            ("reward_run_failures_total", "counter", "Engine runs that raised", self.failures),
+            ("reward_last_run_seconds", "gauge", "Duration of the last run", engine.last_run_seconds),
+            ("reward_last_run_timestamp_seconds", "gauge", "When the last run finished", engine.last_run_at or 0),
+            ("reward_throughput_interactions_per_second", "gauge", "Last run's scoring rate", engine.last_throughput),
+        ]
+        return "".join(
+            f"# HELP {name} {doc}\n# TYPE {name} {kind}\n{name} {value}\n" for name, kind, doc, value in lines
+        )
+
+
+scheduler: "RewardScheduler | None" = None
 
 
 class RewardHandler(BaseHTTPRequestHandler):
@@ -7,7 +60,7 @@ class RewardHandler(BaseHTTPRequestHandler):
         if self.path == "/healthz":
             self._write_json({"status": "ok", "service": "reward"})
         elif self.path == "/metrics":
-            body = "reward_placeholder_metric 1\n"
+            body = scheduler.render_metrics() if scheduler is not None else ""
             self._write_response(body, content_type="text/plain; version=0.0.4")
         else:
             self.send_response(404)
@@ -29,9 +82,23 @@ class RewardHandler(BaseHTTPRequestHandler):
 
 
 def main() -> None:
+    global scheduler
+    logging.basicConfig(level=logging.INFO)
+    if settings.interval_seconds > 0:
+        try:
+            filesystem = build_filesystem(settings)
+        except ValueError as exc:
+            logger.warning("Reward engine disabled: %s", exc)
+        else:
+            scheduler = RewardScheduler(RewardEngine(filesystem, settings), settings.interval_seconds)
+            scheduler.start()
     server = HTTPServer(("0.0.0.0", 8080), RewardHandler)
-    print("[reward] Placeholder service running on :8080. Reward engines land in Phase 4.")
-    server.serve_forever()
+    logger.info("Reward service on :8080 (engine interval %ss)", settings.interval_seconds)
+    try:
+        server.serve_forever()
+    finally:
+        if scheduler is not None:
+            scheduler.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,201 @@
+"""Reward engine throughput in interactions/s: Arrow/NumPy kernels vs. a per-row loop.
+
+Writes a synthetic compacted day (typed Parquet in the collector's layout, with a
+manifest) to a temporary directory. About 70% of interactions get feedback, 30% a
+task result and 10% a shadow output. The benchmark then times
+``RewardEngine.process_day``, i.e. scan, reduce, join, score and write. With
+``--baseline`` the same day is also scored row by row in Python from
+``to_pylist()`` records, and the two results are checked for agreement. Run
+from the repository root::
+
+    python -m apps.reward.benchmarks.bench_engine --interactions 1000000
+    python -m apps.reward.benchmarks.bench_engine --interactions 200000 --baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import tempfile
+import time
+from datetime import date
+from typing import Dict
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import fs as pafs
+
+from apps.collector.app.columnar import arrow_schema
+from apps.reward.app.config import RewardSettings, RewardWeights
+from apps.reward.app.engine import (
+    FOLLOW_UP_CAP,
+    RATING_HALF_RANGE,
+    RATING_MIDPOINT,
+    TIME_TO_SEND_SCALE_MS,
+    RewardEngine,
+    read_rewards,
+)
+
+DAY = date(2025, 6, 1)
+TENANTS = ("acme", "globex", "initech")
+
+
+def _table(event_type: str, columns: Dict[str, pa.Array], rows: int) -> pa.Table:
+    schema = arrow_schema(event_type)
+    return pa.Table.from_arrays(
+        [columns[field.name].cast(field.type) if field.name in columns else pa.nulls(rows, field.type) for field in schema],
+        schema=schema,
+    )
+
+
+def _maybe(rng: np.random.Generator, values: np.ndarray, share: float) -> pa.Array:
+    return pa.array(values, mask=rng.random(len(values)) >= share)
+
+
+def synthetic_day(rng: np.random.Generator, interactions: int) -> Dict[str, pa.Table]:
+    ids = np.char.add("i-", np.arange(interactions).astype(str))
+    started = np.datetime64(DAY.isoformat(), "us")
+    shadow = rng.random(interactions) < 0.1
+    outputs = _table(
+        "interaction.output",
+        {
+            "interaction_id": pa.array(ids),
+            "policy_id": pa.array(np.where(shadow, "p-shadow", rng.choice(["p-1", "p-2"], interactions))),
+            "occurred_at": pa.array(started + rng.integers(0, 86_400_000_000, interactions).astype("timedelta64[us]")),
+            "version_status": pa.array(np.where(shadow, "shadow", "production")),
+        },
+        interactions,
+    )
+    rated = rng.random(interactions) < 0.7
+    n = int(rated.sum())
+    feedback = _table(
+        "feedback.submit",
+        {
+            "interaction_id": pa.array(ids[rated]),
+            "explicit_thumb": _maybe(rng, rng.choice([-1, 1], n), 0.5),
+            "explicit_rating": _maybe(rng, rng.integers(1, 6, n), 0.3),
+            "implicit_sent": _maybe(rng, rng.random(n) < 0.8, 0.6),
+            "implicit_time_to_send_ms": pa.array(rng.integers(0, 600_000, n)),
+            "implicit_escalated": _maybe(rng, rng.random(n) < 0.05, 0.6),
+            "implicit_follow_up_count": _maybe(rng, rng.integers(0, 5, n), 0.4),
+        },
+        n,
+    )
+    labelled = rng.random(interactions) < 0.3
+    m = int(labelled.sum())
+    tasks = _table(
+        "task.result",
+        {
+            "interaction_id": pa.array(ids[labelled]),
+            "label_correct": pa.array(rng.random(m) < 0.6),
+            "label_f1": _maybe(rng, rng.random(m), 0.5),
+        },
+        m,
+    )
+    return {"interaction.output": outputs, "feedback.submit": feedback, "task.result": tasks}
+
+
+def write_day(root: str, tables: Dict[str, pa.Table]) -> None:
+    files = []
+    for event_type, table in tables.items():
+        # Spread rows over the tenants' partitions the way compaction splits them.
+        for index, tenant in enumerate(TENANTS):
+            name = f"events/parquet/dt={DAY.isoformat()}/event_type={event_type}/tenant_id={tenant}/events-0.parquet"
+            pafs.LocalFileSystem().create_dir(f"{root}/{name.rsplit('/', 1)[0]}")
+            pq.write_table(table.take(np.arange(index, table.num_rows, len(TENANTS))), f"{root}/{name}")
+            files.append(name)
+    with open(f"{root}/events/parquet/dt={DAY.isoformat()}/_manifest.json", "w") as fh:
+        json.dump({"date": DAY.isoformat(), "files": files}, fh)
+
+
+def baseline(settings: RewardSettings) -> Dict[tuple, float]:
+    """The same rewards, one Python dict per event."""
+    root = f"{settings.parquet_dir}/dt={DAY.isoformat()}"
+
+    def rows(event_type: str):
+        for tenant in TENANTS:
+            path = f"{root}/event_type={event_type}/tenant_id={tenant}/events-0.parquet"
+            for row in pq.read_table(path).to_pylist():
+                yield tenant, row
+
+    served = {(t, r["interaction_id"]) for t, r in rows("interaction.output") if r["version_status"] != "shadow"}
+    sums: Dict[tuple, Dict[str, list]] = {}
+    for tenant, row in rows("feedback.submit"):
+        entry = sums.setdefault((tenant, row["interaction_id"]), {})
+        for column in ("explicit_thumb", "explicit_rating", "implicit_sent", "implicit_escalated",
+                       "implicit_follow_up_count", "implicit_time_to_send_ms"):
+            if row[column] is not None:
+                entry.setdefault(column, []).append(row[column])
+    for tenant, row in rows("task.result"):
+        entry = sums.setdefault((tenant, row["interaction_id"]), {})
+        for column in ("label_correct", "label_f1", "label_resolved", "label_kpi_delta"):
+            if row[column] is not None:
+                entry.setdefault(column, []).append(row[column])
+
+    weights = dict(zip(RewardWeights.names(), RewardWeights().vector()))
+    rewards = {}
+    for key in served:
+        values = sums.get(key, {})
+        mean = lambda column: sum(values[column]) / len(values[column])  # noqa: E731
+        signals = {}
+        if "explicit_thumb" in values:
+            signals["thumb"] = mean("explicit_thumb")
+        if "explicit_rating" in values:
+            signals["rating"] = (mean("explicit_rating") - RATING_MIDPOINT) / RATING_HALF_RANGE
+        if "implicit_sent" in values:
+            sent = max(values["implicit_sent"])
+            signals["sent"] = 1.0 if sent else -1.0
+            if sent and "implicit_time_to_send_ms" in values:
+                signals["time_to_send"] = 2 * math.exp(-min(values["implicit_time_to_send_ms"]) / TIME_TO_SEND_SCALE_MS) - 1
+        if "implicit_escalated" in values:
+            signals["escalated"] = -1.0 if max(values["implicit_escalated"]) else 1.0
+        if "implicit_follow_up_count" in values:
+            signals["follow_ups"] = 1 - 2 * min(max(values["implicit_follow_up_count"]), FOLLOW_UP_CAP) / FOLLOW_UP_CAP
+        if "label_correct" in values:
+            signals["task_correct"] = 2 * mean("label_correct") - 1
+        if "label_f1" in values:
+            signals["task_f1"] = 2 * min(max(mean("label_f1"), 0.0), 1.0) - 1
+        total = sum(weights[name] for name in signals)
+        rewards[key] = sum(weights[name] * value for name, value in signals.items()) / total if total else math.nan
+    return rewards
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interactions", type=int, default=1_000_000)
+    parser.add_argument("--batch-rows", type=int, default=65_536)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", action="store_true", help="also score row by row and compare")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as root:
+        write_day(root, synthetic_day(rng, args.interactions))
+        settings = RewardSettings(root=root, local_dir=root, window_days=0, batch_rows=args.batch_rows)
+        engine = RewardEngine(pafs.LocalFileSystem(), settings)
+
+        started = time.perf_counter()
+        scored = engine.process_day(DAY)
+        elapsed = time.perf_counter() - started
+        print(f"{'path':<12}{'served':>12}{'seconds':>10}{'interactions/s':>17}")
+        print(f"{'vectorized':<12}{scored:>12}{elapsed:>10.2f}{scored / elapsed:>17,.0f}")
+
+        if args.baseline:
+            started = time.perf_counter()
+            expected = baseline(settings)
+            slow = time.perf_counter() - started
+            print(f"{'per-row':<12}{len(expected):>12}{slow:>10.2f}{len(expected) / slow:>17,.0f}")
+            print(f"speedup: {slow / elapsed:.1f}x")
+            table = read_rewards(pafs.LocalFileSystem(), settings, DAY)
+            got = {(t, i): r for t, i, r in zip(*(table[c].to_pylist() for c in ("tenant_id", "interaction_id", "reward")))}
+            assert got.keys() == expected.keys()
+            assert all(
+                (got[key] is None and math.isnan(value)) or math.isclose(got[key], value, abs_tol=1e-9)
+                for key, value in expected.items()
+            )
+
+
+if __name__ == "__main__":
+    main()
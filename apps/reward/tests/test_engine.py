@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import math
+from datetime import date, datetime, timezone
+from typing import Any
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from pyarrow import fs as pafs
+
+from apps.collector.app.columnar import partition_records, records_to_table
+from apps.reward.app.config import RewardSettings, RewardWeights, parse_weights
+from apps.reward.app.engine import (
+    FEEDBACK,
+    RewardEngine,
+    read_rewards,
+    reduce_signals,
+    score,
+    served_outputs,
+)
+
+DAY = date(2025, 6, 1)
+
+
+def _output(interaction: str, policy: str = "p-1", tenant: str = "acme", status: str = "production") -> dict:
+    return {
+        "tenant_id": tenant,
+        "interaction_id": interaction,
+        "output": {"text": "Hello"},
+        "timings": {"ms_total": 120},
+        "costs": {"tokens_in": 10, "tokens_out": 20},
+        "version": {"policy_id": policy, "base_model": "m", "status": status},
+    }
+
+
+def _feedback(interaction: str, tenant: str = "acme", **fields) -> dict:
+    payload: dict[str, Any] = {"tenant_id": tenant, "interaction_id": interaction}
+    explicit = {k: fields[k] for k in ("thumb", "rating") if k in fields}
+    implicit = {k: fields[k] for k in ("sent", "escalated", "follow_up_count", "time_to_send_ms") if k in fields}
+    if explicit:
+        payload["explicit"] = explicit
+    if implicit:
+        payload["implicit"] = implicit
+    return payload
+
+
+def _task(interaction: str, tenant: str = "acme", **label) -> dict:
+    return {"tenant_id": tenant, "interaction_id": interaction, "label": label}
+
+
+def _compact(root: str, day: date, events: list[tuple[str, dict]]) -> None:
+    """Lay out ``events`` the way collector compaction does, manifest included."""
+    filesystem = pafs.LocalFileSystem()
+    ingested = datetime(day.year, day.month, day.day, 12, tzinfo=timezone.utc).isoformat()
+    records = [{"event_type": kind, "ingested_at": ingested, "payload": payload} for kind, payload in events]
+    files = []
+    for index, ((event_type, tenant), group) in enumerate(sorted(partition_records(records).items())):
+        name = f"events/parquet/dt={day.isoformat()}/event_type={event_type}/tenant_id={tenant}/events-{index}.parquet"
+        filesystem.create_dir(f"{root}/{name.rsplit('/', 1)[0]}")
+        pq.write_table(records_to_table(event_type, group), f"{root}/{name}")
+        files.append(name)
+    with open(f"{root}/events/parquet/dt={day.isoformat()}/_manifest.json", "w") as fh:
+        json.dump({"date": day.isoformat(), "files": files}, fh)
+
+
+def _settings(tmp_path, **overrides) -> RewardSettings:
+    return RewardSettings(root=str(tmp_path), local_dir=str(tmp_path), window_days=1, batch_rows=2, **overrides)
+
+
+def _engine(settings: RewardSettings, today: date) -> RewardEngine:
+    return RewardEngine(
+        pafs.LocalFileSystem(), settings, clock=lambda: datetime(today.year, today.month, today.day, tzinfo=timezone.utc)
+    )
+
+
+def _by_interaction(table: pa.Table) -> dict[str, dict]:
+    return {row["interaction_id"]: row for row in table.to_pylist()}
+
+
+def test_signals_combine_across_batches() -> None:
+    rows = [_feedback("i-1", thumb=1), _feedback("i-1", thumb=-1, rating=5), _feedback("i-1", follow_up_count=2)]
+    table = records_to_table(FEEDBACK, [{"payload": row} for row in rows])
+    table = table.append_column("tenant_id", pa.array(["acme"] * 3))
+
+    split = reduce_signals(table.to_batches(max_chunksize=1), FEEDBACK)
+    whole = reduce_signals(table.to_batches(), FEEDBACK)
+
+    assert split.sort_by("interaction_id").equals(whole.sort_by("interaction_id"))
+    (row,) = split.to_pylist()
+    assert (row["explicit_thumb_sum"], row["explicit_thumb_count"], row["explicit_rating_count"]) == (0, 2, 1)
+    assert row["implicit_follow_up_count_max"] == 2
+
+
+def test_shadow_outputs_are_not_rewarded() -> None:
+    nested = _output("i-2", "p-3")
+    nested["output"]["metadata"] = {"status": "shadow"}  # not the version status
+    outputs = records_to_table(
+        "interaction.output",
+        [{"payload": _output("i-1", "p-1")}, {"payload": _output("i-1", "p-2", status="shadow")}, {"payload": nested}],
+    )
+    outputs = outputs.append_column("tenant_id", pa.array(["acme"] * 3))
+
+    served = _by_interaction(served_outputs(outputs.to_batches()))
+
+    assert served["i-1"]["policy_id"] == "p-1" and served["i-2"]["policy_id"] == "p-3"
+
+
+def test_engine_scores_days_once_their_signal_window_closes(tmp_path) -> None:
+    day2 = date(2025, 6, 2)
+    _compact(
+        str(tmp_path),
+        DAY,
+        [
+            ("interaction.output", _output("up")),
+            ("interaction.output", _output("down")),
+            ("interaction.output", _output("quiet")),
+            ("interaction.output", _output("up", "p-9", status="shadow")),
+            ("interaction.output", _output("globex-1", tenant="globex")),
+            ("feedback.submit", _feedback("up", thumb=1, rating=5, sent=True, time_to_send_ms=0)),
+            ("feedback.submit", _feedback("globex-1", tenant="globex", thumb=1, escalated=True)),
+        ],
+    )
+    _compact(
+        str(tmp_path),
+        day2,
+        [
+            ("feedback.submit", _feedback("down", thumb=-1, escalated=True, follow_up_count=5)),
+            ("task.result", _task("up", correct=True, f1=1.0)),
+            ("interaction.output", _output("next-day")),
+        ],
+    )
+    _compact(str(tmp_path), date(2025, 6, 3), [("task.result", _task("down", correct=True))])  # outside the window
+
+    # Globex only counts escalations, so its thumbs-up does not offset one.
+    settings = _settings(tmp_path, tenant_weights={"globex": RewardWeights(thumb=0.0)})
+    assert _engine(settings, date(2025, 6, 2)).pending_days() == []  # dt=2025-06-02 is not over yet
+    engine = _engine(settings, date(2025, 6, 3))
+
+    assert engine.run_once() == [(DAY, 4)]
+    assert engine.load_watermark() == DAY and engine.run_once() == []
+
+    rewards = _by_interaction(read_rewards(pafs.LocalFileSystem(), settings, DAY))
+    assert set(rewards) == {"up", "down", "quiet", "globex-1"}
+    assert rewards["up"]["reward"] == pytest.approx(1.0) and rewards["up"]["policy_id"] == "p-1"
+    assert rewards["up"]["signals"] == 6 and rewards["up"]["task_f1"] == 1.0
+    assert rewards["down"]["reward"] == pytest.approx(-1.0) and rewards["down"]["task_correct"] is None
+    assert rewards["quiet"]["reward"] is None and rewards["quiet"]["signals"] == 0
+    assert rewards["globex-1"]["reward"] == -1.0
+    assert (tmp_path / "events/rewards/dt=2025-06-01/tenant_id=globex/rewards.parquet").exists()
+
+
+def test_sampled_signals_report_their_sample_weight(tmp_path) -> None:
+    sampled = _feedback("sampled", sent=True, time_to_send_ms=1000)
+    sampled["labels"] = {"sample_weights": {"sent": 10.0, "time_to_send_ms": 2.0}}
+    _compact(
+        str(tmp_path),
+        DAY,
+        [
+            ("interaction.output", _output("sampled")),
+            ("interaction.output", _output("kept")),
+            ("interaction.output", _output("quiet")),
+            ("feedback.submit", sampled),
+            ("feedback.submit", _feedback("kept", sent=False, escalated=True)),
+        ],
+    )
+
+    rewards = _by_interaction(_engine(_settings(tmp_path), date(2025, 6, 3)).compute_day(DAY))
+
+    assert (rewards["sampled"]["sent_weight"], rewards["sampled"]["time_to_send_weight"]) == (10.0, 20.0)
+    assert rewards["sampled"]["escalated_weight"] is None
+    assert (rewards["kept"]["sent_weight"], rewards["kept"]["escalated_weight"]) == (1.0, 1.0)
+    assert rewards["kept"]["time_to_send_weight"] is None  # only a sent reply has one
+    assert rewards["quiet"]["sent_weight"] is None
+
+
+def test_weighted_mean_uses_only_present_signals() -> None:
+    weights = np.array([RewardWeights().vector()] * 2)
+    signals = np.full(weights.shape, np.nan)
+    signals[0, 0] = 1.0  # thumb up
+    signals[0, 3] = -1.0  # escalated
+    reward, counts = score(signals, weights)
+
+    assert reward[0] == pytest.approx(0.0) and counts.tolist() == [2, 0]
+    assert math.isnan(reward[1])
+
+
+def test_weights_parse_and_validate() -> None:
+    base, tenants = parse_weights('{"sent": 0}', '{"acme": {"task_correct": 4}}')
+
+    assert base.sent == 0 and tenants["acme"].task_correct == 4 and tenants["acme"].sent == 0
+    with pytest.raises(ValueError, match="Unknown reward signals: bogus"):
+        parse_weights('{"bogus": 1}')
+    with pytest.raises(ValueError, match="must not be negative"):
+        parse_weights("", '{"acme": {"thumb": -1}}')
@@ -0,0 +1,164 @@
+"""Gateway round trips with and without ``InferenceClient``.
+
+Runs against a gateway started with ``GATEWAY_USE_STUB_BACKEND=true`` (see
+docs/SMOKE_TEST.md), so the numbers reflect client and gateway overhead around a
+fixed ~50 ms stub call. Three modes are compared at the same concurrency:
+
+* ``per-call``: a fresh ``httpx.Client`` per request, then a blocking
+  ``interaction.create`` post to the collector. This is what hand-written
+  integrations tend to do.
+* ``pooled``: ``InferenceClient`` with keep-alive connections and a background
+  ``TelemetryClient``.
+* ``async``: ``AsyncInferenceClient`` with the same background telemetry.
+
+Without ``--collector-url`` nothing is logged and only the connection reuse is
+measured. Run from the repository root::
+
+    PYTHONPATH=apps/sdk-python/src python apps/sdk-python/benchmarks/bench_inference.py \\
+        --url http://localhost:8000 --collector-url http://localhost:8100 --requests 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import httpx
+
+from rl_sdk import (
+    AsyncInferenceClient,
+    ClientConfig,
+    InferenceClient,
+    InferenceConfig,
+    TelemetryClient,
+)
+
+
+def _telemetry(args: argparse.Namespace) -> Optional[TelemetryClient]:
+    if not args.collector_url:
+        return None
+    config = ClientConfig(base_url=args.collector_url, api_key=args.api_key, background=True)
+    return TelemetryClient(config)
+
+
+def _report(mode: str, latencies: List[float], elapsed: float, errors: int) -> None:
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+    median = statistics.median(latencies) if latencies else 0.0
+    print(f"{mode:<10}{len(latencies):>9}{len(latencies) / elapsed:>9.1f}{median:>9.1f}{p99:>9.1f}{errors:>8}")
+
+
+def _threaded(args: argparse.Namespace, call: Callable[[int], object]) -> tuple[List[float], float, int]:
+    latencies: List[float] = []
+    errors = 0
+
+    def timed(n: int) -> None:
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            call(n)
+        except httpx.HTTPError:
+            errors += 1
+            return
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(timed, range(args.requests)))
+    return latencies, time.perf_counter() - started, errors
+
+
+def per_call(args: argparse.Namespace) -> None:
+    def call(n: int) -> None:
+        interaction_id = uuid.uuid4().hex
+        with httpx.Client(base_url=args.url, timeout=20.0) as client:
+            response = client.post(
+                "/v1/infer",
+                json={"tenant_id": args.tenant, "skill": args.skill, "input": {"text": f"ticket {n}"}, "interaction_id": interaction_id},
+            )
+            response.raise_for_status()
+            data = response.json()
+        if args.collector_url:
+            with httpx.Client(base_url=args.collector_url, timeout=5.0) as collector:
+                collector.post(
+                    "/v1/interaction.create",
+                    content=json.dumps(
+                        {
+                            "tenant_id": args.tenant,
+                            "user_id": "bench",
+                            "skill": args.skill,
+                            "input": {"text": f"ticket {n}"},
+                            "context": {},
+                            "version": {"policy_id": data["version"]["policy_id"], "base_model": data["version"]["base_model"]},
+                            "timings": {"ms_total": 1},
+                            "costs": {"tokens_in": 0, "tokens_out": 0},
+                            "idempotency_key": interaction_id,
+                        }
+                    ),
+                    headers={"Content-Type": "application/json", "Authorization": f"Bearer {args.api_key}"},
+                ).raise_for_status()
+
+    _report("per-call", *_threaded(args, call))
+
+
+def pooled(args: argparse.Namespace) -> None:
+    telemetry = _telemetry(args)
+    config = InferenceConfig(base_url=args.url, max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    with InferenceClient(config, telemetry=telemetry) as client:
+        _report("pooled", *_threaded(args, lambda n: client.infer(args.tenant, args.skill, {"text": f"ticket {n}"}, user_id="bench")))
+    if telemetry is not None:
+        telemetry.close()
+
+
+async def async_mode(args: argparse.Namespace) -> None:
+    telemetry = _telemetry(args)
+    config = InferenceConfig(base_url=args.url, max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(args.requests))
+    async with AsyncInferenceClient(config, telemetry=telemetry) as client:
+
+        async def worker() -> None:
+            nonlocal errors
+            for n in counter:
+                started = time.perf_counter()
+                try:
+                    await client.infer(args.tenant, args.skill, {"text": f"ticket {n}"}, user_id="bench")
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    if telemetry is not None:
+        telemetry.close()
+    _report("async", latencies, elapsed, errors)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000", help="gateway base URL")
+    parser.add_argument("--collector-url", default=None, help="log interaction.create to this collector")
+    parser.add_argument("--api-key", default="acme-support-key", help="collector API key from config/db/seed.sql")
+    parser.add_argument("--tenant", default="acme-support", help="tenant slug from config/db/seed.sql")
+    parser.add_argument("--skill", default="support_draft_email")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    per_call(args)
+    pooled(args)
+    asyncio.run(async_mode(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,23 @@
 """RLaaS Python SDK."""
 
+from .async_client import AsyncTelemetryClient
 from .client import TelemetryClient
-from .config import ClientConfig
+from .config import ClientConfig, InferenceConfig
+from .export import ExportClient, ExportCursor
+from .feedback import FeedbackAggregator
+from .inference import AsyncInferenceClient, InferenceClient, InferenceResult
+from .sender import SenderStats
 
-__all__ = ["TelemetryClient", "ClientConfig"]
+__all__ = [
+    "TelemetryClient",
+    "AsyncTelemetryClient",
+    "ClientConfig",
+    "ExportClient",
+    "ExportCursor",
+    "SenderStats",
+    "FeedbackAggregator",
+    "InferenceClient",
+    "AsyncInferenceClient",
+    "InferenceConfig",
+    "InferenceResult",
+]
@@ -0,0 +1,129 @@
+"""asyncio client for the RLaaS telemetry collector."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .client import FEEDBACK_PATH, _BaseTelemetryClient
+from .config import ClientConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+
+class AsyncTelemetryClient(_BaseTelemetryClient):
+    """Non-blocking counterpart of :class:`~rl_sdk.client.TelemetryClient`.
+
+    Requests share one pooled ``httpx.AsyncClient``; retries back off with
+    ``asyncio.sleep`` and spool file I/O runs in a worker thread, so the
+    event loop is never blocked.
+    """
+
+    def __init__(
+        self,
+        config: ClientConfig,
+        *,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        limits: httpx.Limits = DEFAULT_LIMITS,
+    ) -> None:
+        super().__init__(config)
+        self._client = httpx.AsyncClient(
+            base_url=config.base_url, timeout=config.timeout, transport=transport, limits=limits
+        )
+        self._feedback_task: Optional["asyncio.Task[None]"] = None
+
+    async def __aenter__(self) -> "AsyncTelemetryClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def _post(self, path: str, payload: Dict[str, Any]) -> None:
+        outgoing, body, headers = self._prepare_request(payload)
+        try:
+            await self._deliver(path, body, headers)
+        except (httpx.HTTPError, httpx.TimeoutException):
+            await asyncio.to_thread(self._spool.append, {"path": path, "payload": outgoing})
+            raise
+
+    async def _deliver(self, path: str, body: bytes, headers: Dict[str, str]) -> None:
+        attempt = 0
+        while True:
+            try:
+                response = await self._client.post(path, content=body, headers=headers)
+                response.raise_for_status()
+                return
+            except (httpx.HTTPError, httpx.TimeoutException) as exc:
+                attempt += 1
+                if attempt > self._config.max_retries:
+                    raise
+                await asyncio.sleep(self._retry_delay(attempt, exc))
+
+    async def log_interaction(self, event: Dict[str, Any]) -> None:
+        await self._post("/v1/interaction.create", event)
+
+    async def log_output(self, event: Dict[str, Any]) -> None:
+        await self._post("/v1/interaction.output", event)
+
+    async def submit_feedback(self, event: Dict[str, Any]) -> None:
+        if self._feedback is None:
+            await self._post(FEEDBACK_PATH, event)
+            return
+        if self._feedback_task is None:
+            self._feedback_task = asyncio.get_running_loop().create_task(self._feedback_loop())
+        for merged in self._feedback.add(event):
+            await self._post(FEEDBACK_PATH, merged)
+
+    async def _feedback_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._feedback_tick())
+            await self._emit_feedback(self._feedback.due())  # type: ignore[union-attr]
+
+    async def _emit_feedback(self, events: list) -> None:
+        for event in events:
+            try:
+                await self._post(FEEDBACK_PATH, event)
+            except httpx.HTTPError:
+                logger.warning("Merged feedback for %s was spooled", event["interaction_id"], exc_info=True)
+
+    async def log_task_result(self, event: Dict[str, Any]) -> None:
+        await self._post("/v1/task_result", event)
+
+    async def validate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self._client.post(
+            "/v1/validate",
+            content=json.dumps(payload, separators=(",", ":")),
+            headers=self._headers(),
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def flush_offline(self) -> int:
+        """Replay spooled events; they stay spooled until the collector accepts them."""
+
+        async def sender(item: Dict[str, Any]) -> None:
+            _, body, headers = self._prepare_request(item["payload"])
+            await self._deliver(item["path"], body, headers)
+
+        return await self._spool.areplay(
+            sender,
+            concurrency=self._config.offline_replay_concurrency,
+            rate=self._config.offline_replay_rate,
+        )
+
+    async def aclose(self) -> None:
+        if self._feedback_task is not None:
+            self._feedback_task.cancel()
+            self._feedback_task = None
+        if self._feedback is not None:
+            await self._emit_feedback(self._feedback.drain())
+        await self._client.aclose()
+
+
+__all__ = ["AsyncTelemetryClient"]
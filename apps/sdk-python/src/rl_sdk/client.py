@@ -2,28 +2,52 @@
 
 from __future__ import annotations
 
+import atexit
 import json
+import logging
+import threading
 import time
 from typing import Any, Dict, Optional
 from uuid import uuid4
 
 import httpx
 
-from .buffer import OfflineBuffer
+from .compression import compressor
 from .config import ClientConfig
+from .feedback import AggregatorStats, FeedbackAggregator
+from .sender import BackgroundSender, SenderStats
+from .spool import Spool
 
+logger = logging.getLogger(__name__)
+FEEDBACK_PATH = "/v1/feedback.submit"
 
-class TelemetryClient:
-    def __init__(self, config: ClientConfig, *, transport: Optional[httpx.BaseTransport] = None) -> None:
-        self._config = config
-        self._client = httpx.Client(base_url=config.base_url, timeout=config.timeout, transport=transport)
-        self._buffer = OfflineBuffer(config.offline_path)
 
-    def __enter__(self) -> "TelemetryClient":
-        return self
+class _BaseTelemetryClient:
+    """Request building shared by the blocking and asyncio clients."""
 
-    def __exit__(self, exc_type, exc, tb) -> None:
-        self.close()
+    def __init__(self, config: ClientConfig) -> None:
+        self._config = config
+        self._spool = Spool(
+            config.offline_path,
+            segment_bytes=config.offline_segment_bytes,
+            max_bytes=config.offline_max_bytes,
+            eviction=config.offline_eviction,
+        )
+        self._compress = compressor(config.compression)
+        self._feedback: Optional[FeedbackAggregator] = None
+        if config.feedback_window:
+            self._feedback = FeedbackAggregator(
+                config.feedback_window,
+                sample_rates=config.feedback_sample_rates,
+                max_open=config.feedback_max_open,
+            )
+
+    def feedback_stats(self) -> Optional[AggregatorStats]:
+        """Implicit feedback aggregation counters, or ``None`` when aggregation is off."""
+        return self._feedback.stats() if self._feedback is not None else None
+
+    def _feedback_tick(self) -> float:
+        return max(0.05, self._feedback.window / 4) if self._feedback is not None else 0.0
 
     def _headers(self) -> Dict[str, str]:
         headers = {
@@ -42,14 +66,69 @@ class TelemetryClient:
             outgoing["idempotency_key"] = idempotency_key
         return outgoing, idempotency_key
 
-    def _post(self, path: str, payload: Dict[str, Any]) -> None:
+    def _prepare_request(self, payload: Dict[str, Any]) -> tuple[Dict[str, Any], bytes, Dict[str, str]]:
         outgoing, idempotency_key = self._prepare_payload(payload)
         headers = self._headers()
         if idempotency_key:
             headers["Idempotency-Key"] = idempotency_key
-        body = json.dumps(outgoing, separators=(",", ":"))
+        body = json.dumps(outgoing, separators=(",", ":")).encode("utf-8")
+        if self._compress is not None and len(body) >= self._config.compression_threshold:
+            headers["Content-Encoding"] = self._config.compression  # type: ignore[assignment]
+            body = self._compress(body)
+        return outgoing, body, headers
+
+    def _backoff(self, attempt: int) -> float:
+        return self._config.backoff_seconds * (2 ** (attempt - 1))
+
+    def _retry_delay(self, attempt: int, exc: httpx.HTTPError) -> float:
+        """Exponential backoff, stretched to the collector's ``Retry-After`` (429/503) if longer."""
+        delay = self._backoff(attempt)
+        if isinstance(exc, httpx.HTTPStatusError):
+            retry_after = exc.response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+        return delay
+
+
+class TelemetryClient(_BaseTelemetryClient):
+    def __init__(self, config: ClientConfig, *, transport: Optional[httpx.BaseTransport] = None) -> None:
+        super().__init__(config)
+        self._client = httpx.Client(base_url=config.base_url, timeout=config.timeout, transport=transport)
+        self._sender: Optional[BackgroundSender] = None
+        if config.background:
+            self._sender = BackgroundSender(
+                self._post,
+                self._spool,
+                queue_size=config.queue_size,
+                batch_size=config.batch_size,
+                flush_interval=config.flush_interval,
+                concurrency=config.sender_concurrency,
+            )
+        self._feedback_stop = threading.Event()
+        if self._feedback is not None:
+            # Registered after the sender's hook, so at exit windows drain before it closes.
+            threading.Thread(target=self._feedback_loop, name="rl-sdk-feedback", daemon=True).start()
+            atexit.register(self._close_feedback)
+
+    def __enter__(self) -> "TelemetryClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> None:
+        outgoing, body, headers = self._prepare_request(payload)
+        try:
+            self._deliver(path, body, headers)
+        except Exception:
+            # Includes the RuntimeError httpx raises when close() shut the client
+            # while a background send was still in flight or retrying.
+            self._spool.append({"path": path, "payload": outgoing})
+            raise
+
+    def _deliver(self, path: str, body: bytes, headers: Dict[str, str]) -> None:
         attempt = 0
-        while attempt <= self._config.max_retries:
+        while True:
             try:
                 response = self._client.post(path, content=body, headers=headers)
                 response.raise_for_status()
@@ -57,22 +136,41 @@ class TelemetryClient:
             except (httpx.HTTPError, httpx.TimeoutException) as exc:
                 attempt += 1
                 if attempt > self._config.max_retries:
-                    self._buffer.append({"path": path, "payload": outgoing})
                     raise
-                sleep_for = self._config.backoff_seconds * (2 ** (attempt - 1))
-                time.sleep(sleep_for)
+                time.sleep(self._retry_delay(attempt, exc))
+
+    def _send(self, path: str, payload: Dict[str, Any]) -> None:
+        if self._sender is None:
+            self._post(path, payload)
+            return
+        # Copy and key the event now: the caller may reuse the dict, and a spilled
+        # event must replay under the key a queued one would have been sent with.
+        outgoing, _ = self._prepare_payload(payload)
+        self._sender.submit(path, outgoing)
 
     def log_interaction(self, event: Dict[str, Any]) -> None:
-        self._post("/v1/interaction.create", event)
+        self._send("/v1/interaction.create", event)
 
     def log_output(self, event: Dict[str, Any]) -> None:
-        self._post("/v1/interaction.output", event)
+        self._send("/v1/interaction.output", event)
 
     def submit_feedback(self, event: Dict[str, Any]) -> None:
-        self._post("/v1/feedback.submit", event)
+        if self._feedback is None:
+            self._send(FEEDBACK_PATH, event)
+            return
+        for merged in self._feedback.add(event):
+            self._send(FEEDBACK_PATH, merged)
 
     def log_task_result(self, event: Dict[str, Any]) -> None:
-        self._post("/v1/task_result", event)
+        self._send("/v1/task_result", event)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for queued background events; ``False`` if ``timeout`` expired first."""
+        return self._sender.flush(timeout) if self._sender is not None else True
+
+    def stats(self) -> Optional[SenderStats]:
+        """Background queue depth and delivery counters, or ``None`` outside background mode."""
+        return self._sender.stats() if self._sender is not None else None
 
     def validate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         response = self._client.post(
@@ -84,15 +182,41 @@ class TelemetryClient:
         return response.json()
 
     def flush_offline(self) -> int:
-        if not self._buffer.enabled():
-            return 0
+        """Replay spooled events; they stay spooled until the collector accepts them."""
 
         def sender(item: Dict[str, Any]) -> None:
-            self._post(item["path"], item["payload"])
+            _, body, headers = self._prepare_request(item["payload"])
+            self._deliver(item["path"], body, headers)
 
-        return self._buffer.replay(sender)
+        return self._spool.replay(
+            sender,
+            concurrency=self._config.offline_replay_concurrency,
+            rate=self._config.offline_replay_rate,
+        )
+
+    def _feedback_loop(self) -> None:
+        while not self._feedback_stop.wait(self._feedback_tick()):
+            self._emit_feedback(self._feedback.due())  # type: ignore[union-attr]
 
-    def close(self) -> None:
+    def _emit_feedback(self, events: list) -> None:
+        for event in events:
+            try:
+                self._send(FEEDBACK_PATH, event)
+            except httpx.HTTPError:
+                logger.warning("Merged feedback for %s was spooled", event["interaction_id"], exc_info=True)
+
+    def _close_feedback(self) -> None:
+        if self._feedback is None or self._feedback_stop.is_set():
+            return
+        atexit.unregister(self._close_feedback)
+        self._feedback_stop.set()
+        self._emit_feedback(self._feedback.drain())
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Flush background events for up to ``timeout``; later sends spool instead."""
+        self._close_feedback()
+        if self._sender is not None:
+            self._sender.close(timeout)
         self._client.close()
 
 
@@ -0,0 +1,39 @@
+"""Request body compression for telemetry posts."""
+
+from __future__ import annotations
+
+import gzip
+from typing import Callable, Optional
+
+try:  # Optional dependency for zstd bodies (pip install rl-sdk[zstd])
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover - exercised only without zstandard
+    zstandard = None  # type: ignore
+
+ENCODINGS = ("gzip", "zstd")
+
+
+def _gzip(body: bytes) -> bytes:
+    # Level 6 gets nearly all of level 9's ratio on JSON at a fraction of the CPU.
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def _zstd(body: bytes) -> bytes:
+    # Compressor objects are not thread-safe, and the background sender posts from a pool.
+    return zstandard.ZstdCompressor(level=3).compress(body)
+
+
+def compressor(encoding: Optional[str]) -> Optional[Callable[[bytes], bytes]]:
+    """Return the compress function for ``encoding``; ``None`` disables compression."""
+    if encoding is None:
+        return None
+    if encoding == "gzip":
+        return _gzip
+    if encoding == "zstd":
+        if zstandard is None:
+            raise ImportError("zstandard is required for zstd compression; install rl-sdk[zstd]")
+        return _zstd
+    raise ValueError(f"compression must be one of {ENCODINGS} or None")
+
+
+__all__ = ["ENCODINGS", "compressor"]
@@ -15,8 +15,43 @@ class ClientConfig:
     backoff_seconds: float = 0.5
     user_agent: str = "rl-sdk-python/0.1.0"
     headers: Dict[str, str] = field(default_factory=dict)
+    # Spool directory for undelivered events; see rl_sdk.spool.
     offline_path: Optional[str] = None
+    offline_max_bytes: int = 64 * 1024 * 1024
+    offline_segment_bytes: int = 4 * 1024 * 1024
+    offline_eviction: str = "drop_oldest"
+    offline_replay_concurrency: int = 4
+    offline_replay_rate: Optional[float] = None
     auto_idempotency: bool = True
+    # Content-Encoding for bodies of at least compression_threshold bytes: "gzip", "zstd" or None.
+    compression: Optional[str] = "gzip"
+    compression_threshold: int = 1024
+    # Background mode (TelemetryClient only): log_* calls enqueue and return immediately.
+    background: bool = False
+    queue_size: int = 10_000
+    batch_size: int = 100
+    flush_interval: float = 1.0
+    sender_concurrency: int = 8
+    # Implicit feedback coalescing per interaction_id (seconds; None sends every event).
+    feedback_window: Optional[float] = None
+    feedback_sample_rates: Dict[str, float] = field(default_factory=dict)
+    feedback_max_open: int = 10_000
 
 
-__all__ = ["ClientConfig"]
+@dataclass(frozen=True)
+class InferenceConfig:
+    base_url: str
+    api_key: Optional[str] = None
+    # Default per-call deadline in seconds; infer(timeout=...) overrides it.
+    timeout: float = 20.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    user_agent: str = "rl-sdk-python/0.1.0"
+    headers: Dict[str, str] = field(default_factory=dict)
+    # Log interaction.create through the attached telemetry client after each call.
+    log_interactions: bool = True
+    default_user_id: str = "anonymous"
+
+
+__all__ = ["ClientConfig", "InferenceConfig"]
@@ -0,0 +1,196 @@
+"""Streaming client for the collector's bulk event export."""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from io import BufferedReader, RawIOBase
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar, Union
+
+import httpx
+
+from .config import ClientConfig
+
+try:  # Optional dependency for Arrow IPC exports (pip install rl-sdk[arrow])
+    import pyarrow as pa  # type: ignore
+except ImportError:  # pragma: no cover - exercised only without pyarrow
+    pa = None  # type: ignore
+
+T = TypeVar("T")
+Timestamp = Union[datetime, str]
+
+
+@dataclass(frozen=True)
+class ExportCursor:
+    """Position after the last delivered event; persist it to resume an export later."""
+
+    occurred_at: str
+    event_id: int
+
+    def params(self) -> Dict[str, Any]:
+        return {"after_time": self.occurred_at, "after_id": self.event_id}
+
+
+class _ChunkReader(RawIOBase):
+    """File-like view over an iterator of byte chunks, so Arrow can read incrementally."""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self._chunks = chunks
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            try:
+                self._pending = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def _isoformat(value: Timestamp) -> str:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class ExportClient:
+    """Pulls a tenant's events in ``(occurred_at, id)`` order without buffering the result.
+
+    Responses are consumed as they arrive, so memory stays flat regardless of export
+    size. Dropped connections and 5xx responses are retried from :attr:`cursor`.
+    """
+
+    def __init__(self, config: ClientConfig, *, transport: Optional[httpx.BaseTransport] = None) -> None:
+        self._config = config
+        # Exports can legitimately run for minutes; only connecting and idle reads time out.
+        self._client = httpx.Client(
+            base_url=config.base_url,
+            timeout=httpx.Timeout(config.timeout, read=max(config.timeout, 60.0)),
+            transport=transport,
+        )
+        self.cursor: Optional[ExportCursor] = None
+
+    def __enter__(self) -> "ExportClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {
+            "Authorization": f"Bearer {self._config.api_key}",
+            "User-Agent": self._config.user_agent,
+        }
+        headers.update(self._config.headers)
+        return headers
+
+    def iter_events(
+        self,
+        tenant_id: str,
+        start: Timestamp,
+        end: Optional[Timestamp] = None,
+        *,
+        event_type: Optional[str] = None,
+        cursor: Optional[ExportCursor] = None,
+        batch_size: int = 5000,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield events as dicts; ``payload`` is decoded from JSON."""
+
+        def consume(response: httpx.Response) -> Iterator[Dict[str, Any]]:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                self.cursor = ExportCursor(event["occurred_at"], event["id"])
+                yield event
+
+        params = self._params(tenant_id, start, end, event_type, batch_size, "ndjson")
+        return self._stream(params, cursor, consume)
+
+    def iter_record_batches(
+        self,
+        tenant_id: str,
+        start: Timestamp,
+        end: Optional[Timestamp] = None,
+        *,
+        event_type: Optional[str] = None,
+        cursor: Optional[ExportCursor] = None,
+        batch_size: int = 5000,
+    ) -> Iterator["pa.RecordBatch"]:
+        """Yield Arrow record batches (``payload`` stays a JSON string column)."""
+        if pa is None:
+            raise ImportError("pyarrow is required for Arrow exports; install rl-sdk[arrow]")
+
+        def consume(response: httpx.Response) -> Iterator["pa.RecordBatch"]:
+            # BufferedReader turns short chunk reads into the full reads Arrow expects.
+            source = BufferedReader(_ChunkReader(response.iter_bytes()))
+            reader = pa.ipc.open_stream(pa.PythonFile(source, mode="r"))
+            for batch in reader:
+                if batch.num_rows:
+                    last = batch.num_rows - 1
+                    self.cursor = ExportCursor(
+                        batch.column("occurred_at")[last].as_py().isoformat(),
+                        batch.column("id")[last].as_py(),
+                    )
+                yield batch
+
+        params = self._params(tenant_id, start, end, event_type, batch_size, "arrow")
+        return self._stream(params, cursor, consume)
+
+    @staticmethod
+    def _params(
+        tenant_id: str,
+        start: Timestamp,
+        end: Optional[Timestamp],
+        event_type: Optional[str],
+        batch_size: int,
+        output: str,
+    ) -> Dict[str, Any]:
+        params: Dict[str, Any] = {
+            "tenant_id": tenant_id,
+            "start": _isoformat(start),
+            "format": output,
+            "batch_size": batch_size,
+        }
+        if end is not None:
+            params["end"] = _isoformat(end)
+        if event_type:
+            params["event_type"] = event_type
+        return params
+
+    def _stream(
+        self,
+        params: Dict[str, Any],
+        cursor: Optional[ExportCursor],
+        consume: Callable[[httpx.Response], Iterator[T]],
+    ) -> Iterator[T]:
+        self.cursor = cursor
+        attempt = 0
+        while True:
+            query = {**params, **(self.cursor.params() if self.cursor else {})}
+            try:
+                with self._client.stream("GET", "/v1/export", params=query, headers=self._headers()) as response:
+                    response.raise_for_status()
+                    for item in consume(response):
+                        attempt = 0
+                        yield item
+                return
+            except (httpx.TransportError, httpx.HTTPStatusError, OSError) as exc:
+                if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code < 500:
+                    raise
+                attempt += 1
+                if attempt > self._config.max_retries:
+                    raise
+                time.sleep(self._config.backoff_seconds * (2 ** (attempt - 1)))
+
+    def close(self) -> None:
+        self._client.close()
+
+
+__all__ = ["ExportClient", "ExportCursor"]
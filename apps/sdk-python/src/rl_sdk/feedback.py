@@ -0,0 +1,154 @@
+"""Client-side coalescing of implicit feedback signals."""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+IMPLICIT_SIGNALS = ("edited_text", "sent", "time_to_send_ms", "escalated", "follow_up_count")
+
+# How repeated values of one signal combine within a window. Counts are treated as
+# running totals reported by the UI, so the largest wins.
+_MERGE: Dict[str, Callable[[Any, Any], Any]] = {
+    "edited_text": lambda old, new: new,
+    "sent": lambda old, new: old or new,
+    "escalated": lambda old, new: old or new,
+    "time_to_send_ms": min,
+    "follow_up_count": max,
+}
+
+
+@dataclass
+class _Window:
+    tenant_id: str
+    interaction_id: str
+    opened_at: float
+    implicit: Dict[str, Any] = field(default_factory=dict)
+    labels: Dict[str, Any] = field(default_factory=dict)
+    weights: Dict[str, float] = field(default_factory=dict)
+    events: int = 0
+
+    def merged(self) -> Dict[str, Any]:
+        labels = dict(self.labels)
+        labels["implicit_events"] = self.events
+        if self.weights:
+            labels["sample_weights"] = dict(self.weights)
+        event: Dict[str, Any] = {"tenant_id": self.tenant_id, "interaction_id": self.interaction_id, "labels": labels}
+        if self.implicit:
+            event["implicit"] = dict(self.implicit)
+        return event
+
+
+@dataclass(frozen=True)
+class AggregatorStats:
+    received: int
+    emitted: int
+    sampled_out: int
+    open_windows: int
+
+
+class FeedbackAggregator:
+    """Merges implicit feedback per ``(tenant_id, interaction_id)`` into one ``feedback.submit``.
+
+    Events are buffered for ``window`` seconds from the first signal of an
+    interaction, then emitted as a single event whose ``labels.implicit_events``
+    counts what was merged. Events carrying ``explicit`` feedback are passed through
+    untouched. ``sample_rates`` maps an implicit signal to the fraction of
+    interactions that keep it. The choice hashes the interaction id, so every event
+    of an interaction agrees, and kept signals record ``1 / rate`` under
+    ``labels.sample_weights``. Reward code should weight by that value to stay
+    unbiased. The aggregator has no thread of its own: clients call :meth:`due`
+    periodically and :meth:`drain` on close.
+    """
+
+    def __init__(
+        self,
+        window: float = 5.0,
+        *,
+        sample_rates: Optional[Mapping[str, float]] = None,
+        max_open: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        rates = dict(sample_rates or {})
+        unknown = set(rates) - set(IMPLICIT_SIGNALS)
+        if unknown:
+            raise ValueError(f"Unknown implicit signals in sample_rates: {sorted(unknown)}")
+        if any(not 0.0 < rate <= 1.0 for rate in rates.values()):
+            raise ValueError("sample rates must be in (0, 1]")
+        self._window = window
+        self._rates = rates
+        self._max_open = max_open
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._open: Dict[Tuple[str, str], _Window] = {}
+        self._received = self._emitted = self._sampled_out = 0
+
+    def add(self, event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Buffer an event; returns events to send now (pass-through or evicted windows)."""
+        with self._lock:
+            self._received += 1
+            if event.get("explicit") or "interaction_id" not in event:
+                self._emitted += 1
+                return [event]
+            key = (event.get("tenant_id", ""), event["interaction_id"])
+            ready: List[Dict[str, Any]] = []
+            window = self._open.get(key)
+            if window is None:
+                if len(self._open) >= self._max_open:
+                    # Dicts keep insertion order, so the first key is the oldest window.
+                    ready.extend(self._close([next(iter(self._open))]))
+                window = self._open[key] = _Window(key[0], key[1], self._clock())
+            window.events += 1
+            for signal, value in (event.get("implicit") or {}).items():
+                if value is None:
+                    continue
+                rate = self._rates.get(signal, 1.0)
+                if rate < 1.0:
+                    if not _keep(window.interaction_id, signal, rate):
+                        self._sampled_out += 1
+                        continue
+                    window.weights[signal] = 1.0 / rate
+                merge = _MERGE.get(signal)
+                window.implicit[signal] = merge(window.implicit[signal], value) if signal in window.implicit and merge else value
+            window.labels.update(event.get("labels") or {})
+            return ready
+
+    def due(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Close and return windows older than ``window`` seconds."""
+        now = self._clock() if now is None else now
+        with self._lock:
+            expired = [key for key, window in self._open.items() if now - window.opened_at >= self._window]
+            return self._close(expired)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Close every open window, e.g. on shutdown."""
+        with self._lock:
+            return self._close(list(self._open))
+
+    def stats(self) -> AggregatorStats:
+        with self._lock:
+            return AggregatorStats(self._received, self._emitted, self._sampled_out, len(self._open))
+
+    @property
+    def window(self) -> float:
+        return self._window
+
+    def _close(self, keys: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        merged = []
+        for key in keys:
+            window = self._open.pop(key)
+            if window.implicit or window.labels:
+                merged.append(window.merged())
+        self._emitted += len(merged)
+        return merged
+
+
+def _keep(interaction_id: str, signal: str, rate: float) -> bool:
+    digest = hashlib.blake2b(f"{signal}:{interaction_id}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64 < rate
+
+
+__all__ = ["AggregatorStats", "FeedbackAggregator", "IMPLICIT_SIGNALS"]
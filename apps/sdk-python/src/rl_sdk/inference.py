@@ -0,0 +1,274 @@
+"""Clients for the inference gateway's ``/v1/infer`` endpoint."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Union
+from uuid import uuid4
+
+import httpx
+
+from .async_client import AsyncTelemetryClient
+from .client import TelemetryClient
+from .config import InferenceConfig
+
+logger = logging.getLogger(__name__)
+
+INFER_PATH = "/v1/infer"
+
+
+@dataclass(frozen=True)
+class InferenceResult:
+    interaction_id: str
+    text: str
+    output: Dict[str, Any]
+    decision: Dict[str, Any]
+    version: Dict[str, Any]
+    latency_ms: int
+
+    @property
+    def policy_id(self) -> Optional[str]:
+        return self.version.get("policy_id")
+
+
+class _BaseInferenceClient:
+    """Request building and interaction logging shared by the blocking and asyncio clients."""
+
+    def __init__(self, config: InferenceConfig) -> None:
+        self._config = config
+        self._limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        )
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"User-Agent": self._config.user_agent, "Content-Type": "application/json"}
+        if self._config.api_key:
+            headers["Authorization"] = f"Bearer {self._config.api_key}"
+        headers.update(self._config.headers)
+        return headers
+
+    def _deadline(self, timeout: Optional[float]) -> float:
+        return self._config.timeout if timeout is None else timeout
+
+    def _request_body(
+        self,
+        tenant_id: str,
+        skill: str,
+        input: Dict[str, Any],
+        *,
+        interaction_id: str,
+        context: Optional[Dict[str, Any]],
+        metadata: Optional[Dict[str, Any]],
+    ) -> bytes:
+        request: Dict[str, Any] = {
+            "tenant_id": tenant_id,
+            "skill": skill,
+            "input": input,
+            "interaction_id": interaction_id,
+        }
+        if context is not None:
+            request["context"] = context
+        if metadata is not None:
+            request["metadata"] = metadata
+        return json.dumps(request, separators=(",", ":")).encode("utf-8")
+
+    def _result(self, response: httpx.Response, interaction_id: str, started: float) -> InferenceResult:
+        latency_ms = max(int((time.perf_counter() - started) * 1000), 1)
+        response.raise_for_status()
+        data = response.json()
+        output = data.get("output") or {}
+        return InferenceResult(
+            interaction_id=data.get("interaction_id") or interaction_id,
+            text=output.get("text", ""),
+            output=output,
+            decision=data.get("decision") or {},
+            version=data.get("version") or {},
+            latency_ms=latency_ms,
+        )
+
+    def _interaction_event(
+        self,
+        result: InferenceResult,
+        tenant_id: str,
+        skill: str,
+        input: Dict[str, Any],
+        *,
+        user_id: Optional[str],
+        context: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        metadata = result.output.get("metadata")
+        costs = metadata.get("costs") if isinstance(metadata, dict) else None
+        return {
+            "tenant_id": tenant_id,
+            "user_id": user_id or self._config.default_user_id,
+            "skill": skill,
+            "input": input,
+            "context": context or {},
+            "version": {
+                "policy_id": result.version.get("policy_id", ""),
+                "base_model": result.version.get("base_model", ""),
+            },
+            "timings": {"ms_total": result.latency_ms},
+            "costs": costs if isinstance(costs, dict) else {"tokens_in": 0, "tokens_out": 0},
+            # interaction.create has no interaction_id field; the key carries it, as in the examples.
+            "idempotency_key": result.interaction_id,
+        }
+
+
+class InferenceClient(_BaseInferenceClient):
+    """Blocking gateway client over one pooled keep-alive ``httpx.Client``.
+
+    Each call sends an ``interaction_id`` (generated unless given) and returns it on
+    the result. With ``telemetry`` attached, ``interaction.create`` is logged
+    through it after the call. Use a ``TelemetryClient`` in background mode so
+    logging only enqueues. ``timeout`` bounds each phase of the request (connect,
+    send, response) rather than the call as a whole.
+    """
+
+    def __init__(
+        self,
+        config: InferenceConfig,
+        *,
+        telemetry: Optional[TelemetryClient] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+    ) -> None:
+        super().__init__(config)
+        self._telemetry = telemetry
+        self._client = httpx.Client(
+            base_url=config.base_url,
+            timeout=config.timeout,
+            limits=self._limits,
+            transport=transport,
+        )
+
+    def __enter__(self) -> "InferenceClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def infer(
+        self,
+        tenant_id: str,
+        skill: str,
+        input: Dict[str, Any],
+        *,
+        user_id: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        interaction_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> InferenceResult:
+        interaction_id = interaction_id or uuid4().hex
+        body = self._request_body(
+            tenant_id, skill, input, interaction_id=interaction_id, context=context, metadata=metadata
+        )
+        started = time.perf_counter()
+        response = self._client.post(
+            INFER_PATH, content=body, headers=self._headers(), timeout=self._deadline(timeout)
+        )
+        result = self._result(response, interaction_id, started)
+        if self._telemetry is not None and self._config.log_interactions:
+            event = self._interaction_event(result, tenant_id, skill, input, user_id=user_id, context=context)
+            try:
+                self._telemetry.log_interaction(event)
+            except httpx.HTTPError:
+                logger.warning("interaction.create for %s was spooled", result.interaction_id, exc_info=True)
+        return result
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class AsyncInferenceClient(_BaseInferenceClient):
+    """asyncio gateway client over one pooled keep-alive ``httpx.AsyncClient``.
+
+    ``timeout`` is a deadline for the whole call. Attached telemetry is never
+    awaited on the call path. A background ``TelemetryClient`` only enqueues the
+    event. An ``AsyncTelemetryClient`` send runs as a task that :meth:`aclose`
+    waits for.
+    """
+
+    def __init__(
+        self,
+        config: InferenceConfig,
+        *,
+        telemetry: Union[TelemetryClient, AsyncTelemetryClient, None] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        super().__init__(config)
+        self._telemetry = telemetry
+        self._client = httpx.AsyncClient(
+            base_url=config.base_url,
+            timeout=config.timeout,
+            limits=self._limits,
+            transport=transport,
+        )
+        self._pending: Set["asyncio.Task[None]"] = set()
+
+    async def __aenter__(self) -> "AsyncInferenceClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def infer(
+        self,
+        tenant_id: str,
+        skill: str,
+        input: Dict[str, Any],
+        *,
+        user_id: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        interaction_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> InferenceResult:
+        interaction_id = interaction_id or uuid4().hex
+        body = self._request_body(
+            tenant_id, skill, input, interaction_id=interaction_id, context=context, metadata=metadata
+        )
+        deadline = self._deadline(timeout)
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                self._client.post(INFER_PATH, content=body, headers=self._headers(), timeout=deadline),
+                deadline,
+            )
+        except asyncio.TimeoutError:
+            raise httpx.TimeoutException(f"Inference deadline of {deadline}s exceeded") from None
+        result = self._result(response, interaction_id, started)
+        if self._telemetry is not None and self._config.log_interactions:
+            event = self._interaction_event(result, tenant_id, skill, input, user_id=user_id, context=context)
+            self._log_interaction(event)
+        return result
+
+    def _log_interaction(self, event: Dict[str, Any]) -> None:
+        if isinstance(self._telemetry, TelemetryClient):
+            try:
+                self._telemetry.log_interaction(event)
+            except httpx.HTTPError:
+                logger.warning("interaction.create for %s was spooled", event["idempotency_key"], exc_info=True)
+            return
+        task = asyncio.get_running_loop().create_task(self._telemetry.log_interaction(event))  # type: ignore[union-attr]
+        self._pending.add(task)
+        task.add_done_callback(self._logged)
+
+    def _logged(self, task: "asyncio.Task[None]") -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("interaction.create was spooled", exc_info=task.exception())
+
+    async def aclose(self) -> None:
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        await self._client.aclose()
+
+
+__all__ = ["AsyncInferenceClient", "InferenceClient", "InferenceResult"]
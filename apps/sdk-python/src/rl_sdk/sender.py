@@ -0,0 +1,164 @@
+"""Background batching sender used by ``TelemetryClient`` in background mode."""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .spool import Spool
+
+logger = logging.getLogger(__name__)
+
+Item = Tuple[str, Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class SenderStats:
+    """Point-in-time counters; everything except ``queue_depth`` is cumulative."""
+
+    queue_depth: int
+    enqueued: int
+    sent: int
+    failed: int
+    spilled: int
+    dropped: int
+
+
+class BackgroundSender:
+    """Queues events in memory and posts them from a worker thread.
+
+    A batch is dispatched once ``batch_size`` events are waiting or ``flush_interval``
+    seconds after its first event arrived. The collector has no bulk endpoint, so
+    the events of a batch are posted concurrently with ``concurrency`` threads. When
+    the queue is full, events spill to the offline spool, or are dropped when no
+    spool is configured or it rejects them. ``post`` is expected to retry and spool
+    failures itself.
+    """
+
+    def __init__(
+        self,
+        post: Callable[[str, Dict[str, Any]], None],
+        spool: Spool,
+        *,
+        queue_size: int = 10_000,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        concurrency: int = 8,
+    ) -> None:
+        self._post = post
+        self._spool = spool
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = flush_interval
+        self._queue: "queue.Queue[Item]" = queue.Queue(maxsize=queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="rl-sdk-send")
+        self._idle = threading.Condition()
+        self._pending = 0
+        self._counts = {"enqueued": 0, "sent": 0, "failed": 0, "spilled": 0, "dropped": 0}
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rl-sdk-sender", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, path: str, payload: Dict[str, Any]) -> bool:
+        """Enqueue an event without blocking; returns ``False`` if it was spilled or dropped."""
+        if not self._closed.is_set():
+            with self._idle:
+                self._pending += 1
+            try:
+                self._queue.put_nowait((path, payload))
+            except queue.Full:
+                self._settle(1)
+            else:
+                self._count("enqueued")
+                return True
+        self._spill([(path, payload)])
+        return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued event was sent or failed; ``False`` on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Flush, stop the worker, and spill whatever did not go out in time.
+
+        Sends still in flight are not awaited past ``timeout``; ``post`` spools them
+        when they fail because the owner closed its HTTP client.
+        """
+        if self._closed.is_set():
+            return
+        atexit.unregister(self.close)
+        self.flush(timeout)
+        self._closed.set()
+        self._thread.join(timeout)
+        leftover: List[Item] = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftover:
+            self._settle(len(leftover))
+            self._spill(leftover)
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> SenderStats:
+        with self._idle:
+            return SenderStats(queue_depth=self._queue.qsize(), **self._counts)
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            futures = [self._executor.submit(self._send, path, payload) for path, payload in batch]
+            wait(futures)
+            self._settle(len(batch))
+
+    def _collect(self) -> List[Item]:
+        try:
+            batch = [self._queue.get(timeout=self._flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self._flush_interval
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._closed.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _send(self, path: str, payload: Dict[str, Any]) -> None:
+        try:
+            self._post(path, payload)
+        except Exception:  # noqa: BLE001 - already retried and spooled by ``post``
+            logger.warning("Background send to %s failed", path, exc_info=True)
+            self._count("failed")
+        else:
+            self._count("sent")
+
+    def _spill(self, items: List[Item]) -> None:
+        for path, payload in items:
+            self._count("spilled" if self._spool.append({"path": path, "payload": payload}) else "dropped")
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._idle:
+            self._counts[name] += amount
+
+    def _settle(self, amount: int) -> None:
+        with self._idle:
+            self._pending -= amount
+            if self._pending == 0:
+                self._idle.notify_all()
+
+
+__all__ = ["BackgroundSender", "SenderStats"]
@@ -0,0 +1,432 @@
+"""Crash-safe, segmented on-disk spool for events that could not be delivered.
+
+The spool is a directory of newline-delimited JSON segments (``{seq:020d}.ndjson``)
+plus a ``committed`` file recording the position up to which events have been
+acknowledged by the collector. Replay streams segments from that position and
+only advances it past a contiguous run of acknowledged events, so a crash or a
+failure mid-replay re-sends (at-least-once, deduplicated by idempotency keys)
+instead of losing events. Fully consumed segments are deleted.
+
+Appends and commits take an ``fcntl`` lock on ``.lock`` so several processes
+(e.g. gunicorn workers) can share one directory. Only one of them replays at a
+time, guarded by ``.replay.lock``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+try:  # POSIX only; elsewhere the spool is safe across threads but not processes
+    import fcntl
+except ImportError:  # pragma: no cover - exercised only on Windows
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".ndjson"
+COMMITTED_FILE = "committed"
+EVICTION_POLICIES = ("drop_oldest", "drop_newest")
+
+
+class Position(NamedTuple):
+    segment: int
+    offset: int
+
+
+class SpoolEntry(NamedTuple):
+    position: Position
+    next_position: Position
+    event: Dict[str, Any]
+
+
+class Spool:
+    """Stores failed events locally so they can be replayed later."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        *,
+        segment_bytes: int = 4 * 1024 * 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        eviction: str = "drop_oldest",
+        fsync: bool = False,
+    ) -> None:
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"eviction must be one of {EVICTION_POLICIES}")
+        self._enabled = bool(directory)
+        self._dir = Path(directory) if directory else None
+        self._segment_bytes = segment_bytes
+        self._max_bytes = max_bytes
+        self._eviction = eviction
+        self._fsync = fsync
+        self._lock = threading.RLock()
+        self._replaying = threading.Lock()
+        self.evicted = 0
+        self.rejected = 0
+        if self._enabled:
+            _migrate_legacy_file(self._dir)  # type: ignore[arg-type]
+            self._dir.mkdir(parents=True, exist_ok=True)  # type: ignore[union-attr]
+            legacy = self._dir.with_name(self._dir.name + ".legacy")  # type: ignore[union-attr]
+            if legacy.exists():
+                self._import_legacy(legacy)
+
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def committed(self) -> Position:
+        with self._locked():
+            return self._load_committed()
+
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes not yet acknowledged, across all segments."""
+        if not self._enabled:
+            return 0
+        with self._locked():
+            return self._pending_bytes(self._load_committed(), self._sizes())
+
+    def append(self, event: Dict[str, Any]) -> bool:
+        """Spool an event; ``False`` when the spool is disabled or the event was rejected."""
+        if not self._enabled:
+            return False
+        line = (json.dumps(event, separators=(",", ":")) + "\n").encode("utf-8")
+        if len(line) > self._max_bytes:
+            self.rejected += 1
+            return False
+        with self._locked():
+            committed = self._load_committed()
+            sizes = self._sizes()
+            if self._pending_bytes(committed, sizes) + len(line) > self._max_bytes:
+                if self._eviction == "drop_newest":
+                    self.rejected += 1
+                    return False
+                committed, sizes = self._evict(committed, sizes, len(line))
+            path = self._tail_for(sizes, committed, len(line))
+            with open(path, "ab") as fh:
+                fh.write(line)
+                fh.flush()
+                if self._fsync:
+                    os.fsync(fh.fileno())
+        return True
+
+    def read(self, start: Optional[Position] = None) -> Generator[SpoolEntry, None, None]:
+        """Stream entries from ``start`` (default: the committed position) without loading segments."""
+        if not self._enabled:
+            return
+        position = start if start is not None else self.committed
+        while True:
+            later = [seq for seq in self._segment_ids() if seq >= position.segment]
+            if not later:
+                return
+            seq = later[0]
+            offset = position.offset if seq == position.segment else 0
+            try:
+                fh = open(self._segment_path(seq), "rb")
+            except FileNotFoundError:  # evicted meanwhile
+                position = Position(seq + 1, 0)
+                continue
+            with fh:
+                fh.seek(offset)
+                for line in fh:
+                    if not line.endswith(b"\n"):
+                        break  # torn write, or an append still in progress
+                    start_offset, offset = offset, offset + len(line)
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        logger.warning("Skipping corrupt spool record in segment %s at %s", seq, start_offset)
+                        continue
+                    yield SpoolEntry(Position(seq, start_offset), Position(seq, offset), event)
+            if not any(other > seq for other in self._segment_ids()):
+                return
+            position = Position(seq + 1, 0)
+
+    def commit(self, position: Position) -> None:
+        """Acknowledge everything before ``position`` and delete consumed segments."""
+        with self._locked():
+            if position <= self._load_committed():
+                return
+            self._store_committed(position)
+            sizes = self._sizes()
+            for seq, size in sizes.items():
+                consumed = seq == position.segment and position.offset >= size and seq < max(sizes)
+                if seq < position.segment or consumed:
+                    self._segment_path(seq).unlink(missing_ok=True)
+
+    def replay(
+        self,
+        sender: Callable[[Dict[str, Any]], None],
+        *,
+        concurrency: int = 1,
+        rate: Optional[float] = None,
+        commit_every: int = 100,
+    ) -> int:
+        """Send spooled events with up to ``concurrency`` threads and ``rate`` events/second.
+
+        Stops at the first failure, commits what was acknowledged and re-raises.
+        Returns 0 without sending if another thread or process is already replaying.
+        """
+        with self._replay_guard() as acquired:
+            if not acquired:
+                return 0
+            acker = _Acker(commit_every)
+            pacer = _Pacer(rate)
+            error: Optional[BaseException] = None
+            in_flight: Set["Future[None]"] = set()
+            with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="rl-sdk-replay") as pool:
+
+                def settle(done: Set["Future[None]"]) -> None:
+                    nonlocal error
+                    for future in done:
+                        if future.exception() is not None:
+                            error = error or future.exception()
+                        elif (position := acker.ack(future.entry)) is not None:  # type: ignore[attr-defined]
+                            self.commit(position)
+
+                try:
+                    for entry in self.read():
+                        time.sleep(pacer.delay())
+                        acker.track(entry)
+                        future = pool.submit(sender, entry.event)
+                        future.entry = entry  # type: ignore[attr-defined]
+                        in_flight.add(future)
+                        if len(in_flight) >= max(1, concurrency):
+                            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                            settle(done)
+                            if error is not None:
+                                break
+                finally:
+                    done, _ = wait(in_flight)
+                    settle(done)
+                    if acker.mark is not None:
+                        self.commit(acker.mark)
+            if error is not None:
+                raise error
+            return acker.acked
+
+    async def areplay(
+        self,
+        sender: Callable[[Dict[str, Any]], Awaitable[None]],
+        *,
+        concurrency: int = 1,
+        rate: Optional[float] = None,
+        commit_every: int = 100,
+    ) -> int:
+        """asyncio counterpart of :meth:`replay`; file I/O runs in worker threads."""
+        with self._replay_guard() as acquired:
+            if not acquired:
+                return 0
+            acker = _Acker(commit_every)
+            pacer = _Pacer(rate)
+            error: Optional[BaseException] = None
+            in_flight: Set["asyncio.Task[None]"] = set()
+            entries = self.read()
+
+            async def settle(done: Set["asyncio.Task[None]"]) -> None:
+                nonlocal error
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                    elif (position := acker.ack(task.entry)) is not None:  # type: ignore[attr-defined]
+                        await asyncio.to_thread(self.commit, position)
+
+            try:
+                while (entry := await asyncio.to_thread(next, entries, None)) is not None:
+                    await asyncio.sleep(pacer.delay())
+                    acker.track(entry)
+                    task = asyncio.ensure_future(sender(entry.event))
+                    task.entry = entry  # type: ignore[attr-defined]
+                    in_flight.add(task)
+                    if len(in_flight) >= max(1, concurrency):
+                        done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                        await settle(done)
+                        if error is not None:
+                            break
+            finally:
+                entries.close()
+                if in_flight:
+                    done, _ = await asyncio.wait(in_flight)
+                    await settle(done)
+                if acker.mark is not None:
+                    await asyncio.to_thread(self.commit, acker.mark)
+            if error is not None:
+                raise error
+            return acker.acked
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock:
+            if fcntl is None or not self._enabled:
+                yield
+                return
+            with open(self._dir / ".lock", "a+b") as fh:  # type: ignore[operator]
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+                yield  # closing the file releases the lock
+
+    @contextlib.contextmanager
+    def _replay_guard(self) -> Iterator[bool]:
+        if not self._enabled or not self._replaying.acquire(blocking=False):
+            yield False
+            return
+        try:
+            with open(self._dir / ".replay.lock", "a+b") as fh:  # type: ignore[operator]
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        yield False
+                        return
+                yield True
+        finally:
+            self._replaying.release()
+
+    def _segment_path(self, seq: int) -> Path:
+        return self._dir / f"{seq:020d}{SEGMENT_SUFFIX}"  # type: ignore[operator]
+
+    def _segment_ids(self) -> List[int]:
+        return sorted(
+            int(name[: -len(SEGMENT_SUFFIX)])
+            for name in os.listdir(self._dir)  # type: ignore[arg-type]
+            if name.endswith(SEGMENT_SUFFIX) and name[: -len(SEGMENT_SUFFIX)].isdigit()
+        )
+
+    def _sizes(self) -> Dict[int, int]:
+        sizes = {}
+        for seq in self._segment_ids():
+            with contextlib.suppress(FileNotFoundError):
+                sizes[seq] = self._segment_path(seq).stat().st_size
+        return sizes
+
+    @staticmethod
+    def _pending_bytes(committed: Position, sizes: Dict[int, int]) -> int:
+        pending = sum(size for seq, size in sizes.items() if seq >= committed.segment)
+        return pending - (committed.offset if committed.segment in sizes else 0)
+
+    def _load_committed(self) -> Position:
+        try:
+            raw = json.loads((self._dir / COMMITTED_FILE).read_text(encoding="utf-8"))  # type: ignore[operator]
+            return Position(int(raw["segment"]), int(raw["offset"]))
+        except FileNotFoundError:
+            return Position(0, 0)
+
+    def _store_committed(self, position: Position) -> None:
+        tmp = self._dir / f"{COMMITTED_FILE}.tmp"  # type: ignore[operator]
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"segment": position.segment, "offset": position.offset}, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self._dir / COMMITTED_FILE)  # type: ignore[operator]
+
+    def _evict(self, committed: Position, sizes: Dict[int, int], needed: int) -> Tuple[Position, Dict[int, int]]:
+        """Delete the oldest segments until ``needed`` more bytes fit under the cap."""
+        sizes = dict(sizes)
+        for seq in sorted(sizes):
+            if self._pending_bytes(committed, sizes) + needed <= self._max_bytes:
+                break
+            offset = committed.offset if seq == committed.segment else 0
+            with contextlib.suppress(FileNotFoundError), open(self._segment_path(seq), "rb") as fh:
+                fh.seek(offset)
+                dropped = sum(chunk.count(b"\n") for chunk in iter(lambda: fh.read(1 << 16), b""))
+                self.evicted += dropped
+                logger.warning("Offline spool full; evicted %s events from segment %s", dropped, seq)
+            self._segment_path(seq).unlink(missing_ok=True)
+            del sizes[seq]
+            committed = Position(seq + 1, 0)
+            self._store_committed(committed)
+        return committed, sizes
+
+    def _tail_for(self, sizes: Dict[int, int], committed: Position, incoming: int) -> Path:
+        if not sizes:
+            return self._segment_path(committed.segment + (1 if committed.offset else 0))
+        seq = max(sizes)
+        size = sizes[seq]
+        if size and (size + incoming > self._segment_bytes or not self._ends_with_newline(seq)):
+            seq += 1
+        return self._segment_path(seq)
+
+    def _ends_with_newline(self, seq: int) -> bool:
+        with open(self._segment_path(seq), "rb") as fh:
+            fh.seek(-1, os.SEEK_END)
+            return fh.read(1) == b"\n"
+
+    def _import_legacy(self, legacy: Path) -> None:
+        with open(legacy, "rb") as fh:
+            for line in fh:
+                with contextlib.suppress(ValueError):
+                    self.append(json.loads(line))
+        legacy.unlink(missing_ok=True)
+
+
+def _migrate_legacy_file(directory: Path) -> None:
+    """Move a pre-spool single-file buffer at ``directory`` aside so it can be imported."""
+    if directory.is_file():
+        with contextlib.suppress(FileNotFoundError):  # another process got there first
+            os.replace(directory, directory.with_name(directory.name + ".legacy"))
+
+
+class _Acker:
+    """Tracks out-of-order acknowledgements and yields the contiguous committed prefix."""
+
+    def __init__(self, commit_every: int) -> None:
+        self._order: Deque[SpoolEntry] = deque()
+        self._done: Set[Position] = set()
+        self._commit_every = max(1, commit_every)
+        self._since_commit = 0
+        self.mark: Optional[Position] = None
+        self.acked = 0
+
+    def track(self, entry: SpoolEntry) -> None:
+        self._order.append(entry)
+
+    def ack(self, entry: SpoolEntry) -> Optional[Position]:
+        """Record a delivered entry; returns a position to commit every ``commit_every`` entries."""
+        self.acked += 1
+        self._done.add(entry.position)
+        while self._order and self._order[0].position in self._done:
+            head = self._order.popleft()
+            self._done.discard(head.position)
+            self.mark = head.next_position
+            self._since_commit += 1
+        if self._since_commit >= self._commit_every:
+            self._since_commit = 0
+            return self.mark
+        return None
+
+
+class _Pacer:
+    def __init__(self, rate: Optional[float]) -> None:
+        self._interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+
+    def delay(self) -> float:
+        now = time.monotonic()
+        delay = max(0.0, self._next - now)
+        self._next = max(now, self._next) + self._interval
+        return delay
+
+
+__all__ = ["Position", "Spool", "SpoolEntry", "EVICTION_POLICIES"]
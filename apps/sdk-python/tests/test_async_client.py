@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import pytest
+
+from rl_sdk.async_client import AsyncTelemetryClient
+from rl_sdk.config import ClientConfig
+from rl_sdk.spool import Spool
+
+
+def _config(tmp_path: Optional[Path] = None, **overrides) -> ClientConfig:
+    offline_path = str(tmp_path / "spool") if tmp_path else None
+    return ClientConfig(base_url="https://api.example.com", api_key="test", offline_path=offline_path, **overrides)
+
+
+def test_log_interaction_success(tmp_path: Path) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        assert "Authorization" in request.headers
+        assert request.headers["User-Agent"].startswith("rl-sdk-python")
+        assert payload.get("idempotency_key") == request.headers["Idempotency-Key"]
+        return httpx.Response(202, json={"status": "accepted"})
+
+    async def run() -> None:
+        async with AsyncTelemetryClient(_config(tmp_path), transport=httpx.MockTransport(handler)) as client:
+            await client.log_interaction({"tenant_id": "acme", "user_id": "user", "skill": "support"})
+
+    asyncio.run(run())
+
+
+def test_retry_and_buffer(tmp_path: Path, monkeypatch) -> None:
+    keys: list[Optional[str]] = []
+    sleeps: list[float] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        keys.append(request.headers.get("Idempotency-Key"))
+        return httpx.Response(503, text="Service Unavailable")
+
+    async def fake_sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    client = AsyncTelemetryClient(
+        _config(tmp_path, max_retries=2, backoff_seconds=0.5), transport=httpx.MockTransport(handler)
+    )
+
+    async def run() -> None:
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.log_output({"tenant_id": "acme", "interaction_id": "123", "output": {"text": "hi"}})
+        await client.aclose()
+
+    asyncio.run(run())
+
+    (buffered,) = Spool(str(tmp_path / "spool")).read()
+    assert buffered.event["path"] == "/v1/interaction.output"
+    assert len(keys) == 3 and len(set(keys)) == 1
+    assert sleeps == [0.5, 1.0]
+
+
+def test_flush_replays_buffer(tmp_path: Path) -> None:
+    cfg = _config(tmp_path, max_retries=0)
+    client = AsyncTelemetryClient(cfg, transport=httpx.MockTransport(lambda request: httpx.Response(500)))
+    replayed: list[dict] = []
+
+    def success_handler(request: httpx.Request) -> httpx.Response:
+        replayed.append(json.loads(request.content))
+        assert request.headers.get("Idempotency-Key") == replayed[-1]["idempotency_key"]
+        return httpx.Response(202)
+
+    async def run() -> int:
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.log_task_result({"tenant_id": "acme", "interaction_id": "1", "label": {"correct": True}})
+        await client.aclose()
+        client._client = httpx.AsyncClient(base_url=cfg.base_url, transport=httpx.MockTransport(success_handler))
+        async with client:
+            return await client.flush_offline()
+
+    assert asyncio.run(run()) == 1
+    assert Spool(str(tmp_path / "spool")).pending_bytes == 0
+    assert replayed[0]["interaction_id"] == "1"
+
+
+def test_disable_auto_idempotency() -> None:
+    headers: list[Optional[str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        headers.append(request.headers.get("Idempotency-Key"))
+        return httpx.Response(202)
+
+    async def run() -> None:
+        cfg = _config(max_retries=0, auto_idempotency=False)
+        async with AsyncTelemetryClient(cfg, transport=httpx.MockTransport(handler)) as client:
+            await client.submit_feedback({"tenant_id": "acme", "interaction_id": "1"})
+
+    asyncio.run(run())
+    assert headers == [None]
+
+
+def test_concurrent_posts_do_not_block_each_other() -> None:
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return httpx.Response(202)
+
+    async def run() -> None:
+        async with AsyncTelemetryClient(_config(), transport=httpx.MockTransport(handler)) as client:
+            await asyncio.gather(*(client.log_task_result({"interaction_id": str(n)}) for n in range(10)))
+
+    asyncio.run(run())
+    assert in_flight["peak"] == 10
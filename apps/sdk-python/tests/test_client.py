@@ -1,19 +1,21 @@
 from __future__ import annotations
 
+import gzip
 import json
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 import httpx
 import pytest
 
 from rl_sdk.client import TelemetryClient
 from rl_sdk.config import ClientConfig
+from rl_sdk.spool import Spool
 
 
 @pytest.fixture()
 def client(tmp_path: Path) -> TelemetryClient:
-    buffer_path = tmp_path / "buffer.ndjson"
+    buffer_path = tmp_path / "spool"
 
     def handler(request: httpx.Request) -> httpx.Response:
         payload = json.loads(request.content)
@@ -43,7 +45,7 @@ def test_log_interaction_success(client: TelemetryClient) -> None:
 
 
 def test_retry_and_buffer(tmp_path: Path) -> None:
-    attempts = {"count": 0, "keys": []}
+    attempts: dict[str, Any] = {"count": 0, "keys": []}
 
     def handler(request: httpx.Request) -> httpx.Response:
         attempts["count"] += 1
@@ -51,7 +53,7 @@ def test_retry_and_buffer(tmp_path: Path) -> None:
         return httpx.Response(503, text="Service Unavailable")
 
     transport = httpx.MockTransport(handler)
-    buffer_path = tmp_path / "buffer.ndjson"
+    buffer_path = tmp_path / "spool"
     cfg = ClientConfig(
         base_url="https://api.example.com",
         api_key="test",
@@ -73,9 +75,8 @@ def test_retry_and_buffer(tmp_path: Path) -> None:
     with pytest.raises(httpx.HTTPStatusError):
         client.log_output(payload)
 
-    assert buffer_path.exists()
-    buffered = buffer_path.read_text().strip()
-    assert "/v1/interaction.output" in buffered
+    (buffered,) = Spool(str(buffer_path)).read()
+    assert buffered.event["path"] == "/v1/interaction.output"
     assert attempts["count"] == 2
     assert attempts["keys"][0] == attempts["keys"][1]
 
@@ -89,7 +90,7 @@ def test_flush_replays_buffer(tmp_path: Path) -> None:
         return httpx.Response(500, text="boom")
 
     fail_transport = httpx.MockTransport(failing_handler)
-    buffer_path = tmp_path / "buffer.ndjson"
+    buffer_path = tmp_path / "spool"
     cfg = ClientConfig(
         base_url="https://api.example.com",
         api_key="test",
@@ -107,34 +108,74 @@ def test_flush_replays_buffer(tmp_path: Path) -> None:
     with pytest.raises(httpx.HTTPStatusError):
         client.log_task_result(payload)
 
-    assert buffer_path.exists()
-    buffered = json.loads(buffer_path.read_text().strip().splitlines()[0])
-    assert "idempotency_key" in buffered["payload"]
+    (buffered,) = Spool(str(buffer_path)).read()
+    assert "idempotency_key" in buffered.event["payload"]
 
     def success_handler(request: httpx.Request) -> httpx.Response:
         assert request.headers.get("Idempotency-Key") == json.loads(request.content)["idempotency_key"]
         return httpx.Response(202)
 
-	success_transport = httpx.MockTransport(success_handler)
-	client._client = httpx.Client(base_url=cfg.base_url, timeout=cfg.timeout, transport=success_transport)
-	flushed = client.flush_offline()
-	assert flushed == 1
+    success_transport = httpx.MockTransport(success_handler)
+    client._client = httpx.Client(base_url=cfg.base_url, timeout=cfg.timeout, transport=success_transport)
+    flushed = client.flush_offline()
+    assert flushed == 1
+    assert Spool(str(buffer_path)).pending_bytes == 0
 
 
 def test_disable_auto_idempotency(tmp_path: Path) -> None:
-	headers: list[Optional[str]] = []
-
-	def handler(request: httpx.Request) -> httpx.Response:
-		headers.append(request.headers.get("Idempotency-Key"))
-		return httpx.Response(202)
-
-	transport = httpx.MockTransport(handler)
-	cfg = ClientConfig(
-		base_url="https://api.example.com",
-		api_key="test",
-		max_retries=0,
-		auto_idempotency=False,
-	)
-	client = TelemetryClient(cfg, transport=transport)
-	client.submit_feedback({"tenant_id": "acme", "interaction_id": "1"})
-	assert headers == [None]
+    headers: list[Optional[str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        headers.append(request.headers.get("Idempotency-Key"))
+        return httpx.Response(202)
+
+    transport = httpx.MockTransport(handler)
+    cfg = ClientConfig(
+        base_url="https://api.example.com",
+        api_key="test",
+        max_retries=0,
+        auto_idempotency=False,
+    )
+    client = TelemetryClient(cfg, transport=transport)
+    client.submit_feedback({"tenant_id": "acme", "interaction_id": "1"})
+    assert headers == [None]
+
+
+def test_large_bodies_are_compressed(tmp_path: Path) -> None:
+    seen: list[tuple[Optional[str], int]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        encoding = request.headers.get("Content-Encoding")
+        body = gzip.decompress(request.content) if encoding == "gzip" else request.content
+        seen.append((encoding, len(request.content)))
+        assert json.loads(body)["tenant_id"] == "acme"
+        return httpx.Response(202)
+
+    cfg = ClientConfig(base_url="https://api.example.com", api_key="test", compression_threshold=256)
+    client = TelemetryClient(cfg, transport=httpx.MockTransport(handler))
+    client.log_output({"tenant_id": "acme", "output": {"text": "short"}})
+    client.log_output({"tenant_id": "acme", "output": {"text": "retrieved chunk " * 200}})
+
+    assert seen[0] == (None, seen[0][1])
+    assert seen[1][0] == "gzip" and seen[1][1] < 256
+
+
+def test_compression_can_be_disabled_and_requires_known_encoding() -> None:
+    cfg = ClientConfig(base_url="https://api.example.com", api_key="test", compression=None)
+    _, body, headers = TelemetryClient(cfg)._prepare_request({"text": "x" * 5000})
+
+    assert "Content-Encoding" not in headers and len(body) > 5000
+    with pytest.raises(ValueError):
+        TelemetryClient(ClientConfig(base_url="https://api.example.com", api_key="test", compression="br"))
+
+
+def test_retries_wait_for_retry_after(monkeypatch: pytest.MonkeyPatch) -> None:
+    responses = iter([httpx.Response(429, headers={"Retry-After": "3"}), httpx.Response(202)])
+    slept: list[float] = []
+    monkeypatch.setattr("rl_sdk.client.time.sleep", slept.append)
+    cfg = ClientConfig(base_url="https://api.example.com", api_key="test", backoff_seconds=0.5)
+    client = TelemetryClient(cfg, transport=httpx.MockTransport(lambda request: next(responses)))
+
+    client.log_task_result({"tenant_id": "acme", "interaction_id": "i-1", "label": {"correct": True}})
+
+    assert slept == [3.0]
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List
+
+import httpx
+import pytest
+
+from rl_sdk.config import ClientConfig
+from rl_sdk.export import ExportClient, ExportCursor
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _event(event_id: int) -> dict:
+    occurred_at = (T0 + timedelta(seconds=event_id)).isoformat()
+    return {"id": event_id, "event_type": "task.result", "occurred_at": occurred_at, "payload": {"n": event_id}}
+
+
+def _lines(ids) -> List[bytes]:
+    return [(json.dumps(_event(i)) + "\n").encode() for i in ids]
+
+
+class DroppingStream(httpx.SyncByteStream):
+    """Delivers some chunks, then fails the way a dropped connection does."""
+
+    def __init__(self, chunks: List[bytes]) -> None:
+        self._chunks = chunks
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._chunks
+        raise httpx.ReadError("connection reset")
+
+
+def _config(**overrides) -> ClientConfig:
+    return ClientConfig(base_url="https://api.example.com", api_key="k", backoff_seconds=0, **overrides)
+
+
+def test_iter_events_resumes_after_dropped_connection() -> None:
+    requests: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if len(requests) == 1:
+            return httpx.Response(200, stream=DroppingStream(_lines([1, 2])))
+        return httpx.Response(200, content=b"".join(_lines([3])))
+
+    client = ExportClient(_config(), transport=httpx.MockTransport(handler))
+
+    events = list(client.iter_events("acme", T0, T0 + timedelta(days=1)))
+
+    assert [event["id"] for event in events] == [1, 2, 3]
+    assert "after_id" not in requests[0].url.params
+    assert requests[1].url.params["after_id"] == "2"
+    assert requests[1].url.params["after_time"] == _event(2)["occurred_at"]
+    assert requests[0].headers["Authorization"] == "Bearer k"
+    assert client.cursor == ExportCursor(_event(3)["occurred_at"], 3)
+
+
+def test_explicit_cursor_is_sent_and_client_errors_are_not_retried() -> None:
+    requests: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(400, json={"detail": "bad cursor"})
+
+    client = ExportClient(_config(), transport=httpx.MockTransport(handler))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        list(client.iter_events("acme", "2025-01-01T00:00:00+00:00", cursor=ExportCursor("x", 9)))
+    assert len(requests) == 1
+    assert requests[0].url.params["after_id"] == "9"
+
+
+def test_server_errors_give_up_after_max_retries() -> None:
+    calls = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        return httpx.Response(503)
+
+    client = ExportClient(_config(max_retries=2), transport=httpx.MockTransport(handler))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        list(client.iter_events("acme", T0))
+    assert calls["count"] == 3
+
+
+def test_iter_record_batches_reads_arrow_stream_incrementally() -> None:
+    pa = pytest.importorskip("pyarrow")
+    schema = pa.schema([("id", pa.int64()), ("occurred_at", pa.timestamp("us", tz="UTC")), ("payload", pa.string())])
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for ids in ([1, 2], [3]):
+            writer.write_batch(
+                pa.record_batch(
+                    [
+                        pa.array(ids, pa.int64()),
+                        pa.array([T0 + timedelta(seconds=i) for i in ids], schema.field("occurred_at").type),
+                        pa.array([json.dumps({"n": i}) for i in ids]),
+                    ],
+                    schema=schema,
+                )
+            )
+    body = sink.getvalue().to_pybytes()
+    # Deliver the stream in small pieces so batches straddle chunk boundaries.
+    chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.params["format"] == "arrow"
+        return httpx.Response(200, stream=_Chunks(chunks))
+
+    client = ExportClient(_config(), transport=httpx.MockTransport(handler))
+
+    batches = list(client.iter_record_batches("acme", T0))
+
+    assert [batch.num_rows for batch in batches] == [2, 1]
+    assert client.cursor == ExportCursor((T0 + timedelta(seconds=3)).isoformat(), 3)
+
+
+class _Chunks(httpx.SyncByteStream):
+    def __init__(self, chunks: List[bytes]) -> None:
+        self._chunks = chunks
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._chunks
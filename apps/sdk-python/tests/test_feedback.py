@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from rl_sdk.async_client import AsyncTelemetryClient
+from rl_sdk.client import TelemetryClient
+from rl_sdk.config import ClientConfig
+from rl_sdk.feedback import FeedbackAggregator
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _implicit(interaction_id: str, **signals) -> dict:
+    return {"tenant_id": "acme", "interaction_id": interaction_id, "implicit": signals}
+
+
+def test_signals_merge_into_one_event_per_window() -> None:
+    clock = FakeClock()
+    aggregator = FeedbackAggregator(window=5, clock=clock)
+
+    assert aggregator.add(_implicit("i-1", edited_text="draft 1")) == []
+    aggregator.add(_implicit("i-1", edited_text="draft 2", follow_up_count=1))
+    aggregator.add(_implicit("i-1", sent=True, time_to_send_ms=4200, follow_up_count=2))
+    aggregator.add({**_implicit("i-1", sent=False), "labels": {"surface": "gmail"}})
+    aggregator.add(_implicit("i-2", escalated=True))
+    clock.now = 4.9
+    assert aggregator.due() == []
+
+    clock.now = 5.0
+    merged = {event["interaction_id"]: event for event in aggregator.due()}
+
+    assert merged["i-1"]["implicit"] == {
+        "edited_text": "draft 2",
+        "follow_up_count": 2,
+        "sent": True,
+        "time_to_send_ms": 4200,
+    }
+    assert merged["i-1"]["labels"] == {"surface": "gmail", "implicit_events": 4}
+    assert merged["i-2"]["implicit"] == {"escalated": True}
+    assert aggregator.stats().received == 5 and aggregator.stats().emitted == 2
+
+
+def test_explicit_feedback_passes_through() -> None:
+    aggregator = FeedbackAggregator(window=5)
+    explicit = {"tenant_id": "acme", "interaction_id": "i-1", "explicit": {"thumb": 1}}
+
+    assert aggregator.add(explicit) == [explicit]
+    assert aggregator.stats().open_windows == 0
+
+
+def test_overflow_evicts_the_oldest_window() -> None:
+    aggregator = FeedbackAggregator(window=60, max_open=2)
+    aggregator.add(_implicit("i-1", sent=True))
+    aggregator.add(_implicit("i-2", sent=True))
+
+    (evicted,) = aggregator.add(_implicit("i-3", sent=True))
+
+    assert evicted["interaction_id"] == "i-1"
+    assert [event["interaction_id"] for event in aggregator.drain()] == ["i-2", "i-3"]
+
+
+def test_sampling_is_per_interaction_and_records_weights() -> None:
+    aggregator = FeedbackAggregator(window=60, sample_rates={"edited_text": 0.25})
+    for n in range(2000):
+        for draft in range(3):
+            aggregator.add(_implicit(f"i-{n}", edited_text=f"draft {draft}", sent=True))
+
+    merged = aggregator.drain()
+    edited = [event for event in merged if "edited_text" in event["implicit"]]
+
+    assert len(merged) == 2000 and all(event["implicit"]["sent"] for event in merged)
+    assert 400 < len(edited) < 600
+    assert all(event["labels"]["sample_weights"] == {"edited_text": 4.0} for event in edited)
+    # Weighted count estimates the unsampled total.
+    assert abs(sum(event["labels"]["sample_weights"]["edited_text"] for event in edited) - 2000) < 400
+    assert aggregator.stats().sampled_out == 3 * (2000 - len(edited))
+
+
+def test_invalid_sample_rates_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        FeedbackAggregator(sample_rates={"thumb": 0.5})
+    with pytest.raises(ValueError):
+        FeedbackAggregator(sample_rates={"sent": 0})
+
+
+def _recording_transport(sent: list) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content))
+        return httpx.Response(202)
+
+    return httpx.MockTransport(handler)
+
+
+def test_client_coalesces_until_close() -> None:
+    sent: list[dict] = []
+    cfg = ClientConfig(base_url="https://api.example.com", api_key="test", feedback_window=60)
+    client = TelemetryClient(cfg, transport=_recording_transport(sent))
+
+    for count in range(10):
+        client.submit_feedback(_implicit("i-1", follow_up_count=count))
+    assert sent == []
+
+    client.close()
+
+    (merged,) = sent
+    assert merged["implicit"] == {"follow_up_count": 9} and merged["labels"]["implicit_events"] == 10
+    assert merged["idempotency_key"]
+    stats = client.feedback_stats()
+    assert stats is not None and stats.emitted == 1
+
+
+def test_async_client_flushes_windows_in_the_background() -> None:
+    sent: list[dict] = []
+    cfg = ClientConfig(base_url="https://api.example.com", api_key="test", feedback_window=0.05)
+
+    async def run() -> None:
+        async with AsyncTelemetryClient(cfg, transport=_recording_transport(sent)) as client:
+            await client.submit_feedback(_implicit("i-1", sent=True))
+            await client.submit_feedback(_implicit("i-1", time_to_send_ms=900))
+            for _ in range(100):
+                if sent:
+                    break
+                await asyncio.sleep(0.02)
+            assert sent, "window should have been flushed without close()"
+
+    asyncio.run(run())
+    assert sent == [
+        {
+            "tenant_id": "acme",
+            "interaction_id": "i-1",
+            "labels": {"implicit_events": 2},
+            "implicit": {"sent": True, "time_to_send_ms": 900},
+            "idempotency_key": sent[0]["idempotency_key"],
+        }
+    ]
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from rl_sdk.async_client import AsyncTelemetryClient
+from rl_sdk.client import TelemetryClient
+from rl_sdk.config import ClientConfig, InferenceConfig
+from rl_sdk.inference import AsyncInferenceClient, InferenceClient
+
+
+def _gateway_response(request: httpx.Request) -> httpx.Response:
+    body = json.loads(request.content)
+    return httpx.Response(
+        200,
+        json={
+            "decision": {"selected": {"policy_id": "p-1", "status": "active", "base_model": "m"}, "reason": "active"},
+            "output": {"text": f"reply to {body['input']['text']}", "metadata": {"costs": {"tokens_in": 3, "tokens_out": 5}}},
+            "version": {"policy_id": "p-1", "base_model": "m", "router_reason": "active", "shadow_candidates": []},
+            "interaction_id": body["interaction_id"],
+        },
+    )
+
+
+def _collector(sent: list) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append((request.url.path, json.loads(request.content)))
+        return httpx.Response(202)
+
+    return httpx.MockTransport(handler)
+
+
+def test_infer_generates_and_propagates_interaction_id() -> None:
+    requests: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        assert request.headers["Authorization"] == "Bearer gw-key"
+        return _gateway_response(request)
+
+    cfg = InferenceConfig(base_url="http://gateway", api_key="gw-key")
+    with InferenceClient(cfg, transport=httpx.MockTransport(handler)) as client:
+        first = client.infer("acme", "support", {"text": "hi"})
+        second = client.infer("acme", "support", {"text": "again"}, interaction_id="fixed-id")
+
+    assert first.interaction_id == requests[0]["interaction_id"] and len(first.interaction_id) == 32
+    assert second.interaction_id == "fixed-id" == requests[1]["interaction_id"]
+    assert first.text == "reply to hi" and first.policy_id == "p-1" and first.latency_ms >= 1
+    assert "context" not in requests[0]
+
+
+def test_infer_logs_interaction_create_through_telemetry() -> None:
+    sent: list = []
+    telemetry = TelemetryClient(
+        ClientConfig(base_url="http://collector", api_key="test", background=True, flush_interval=0.01),
+        transport=_collector(sent),
+    )
+    cfg = InferenceConfig(base_url="http://gateway")
+    with InferenceClient(cfg, telemetry=telemetry, transport=httpx.MockTransport(_gateway_response)) as client:
+        result = client.infer("acme", "support", {"text": "hi"}, user_id="agent-7", context={"channel": "email"})
+    telemetry.close()
+
+    ((path, event),) = sent
+    assert path == "/v1/interaction.create"
+    assert event == {
+        "tenant_id": "acme",
+        "user_id": "agent-7",
+        "skill": "support",
+        "input": {"text": "hi"},
+        "context": {"channel": "email"},
+        "version": {"policy_id": "p-1", "base_model": "m"},
+        "timings": {"ms_total": result.latency_ms},
+        "costs": {"tokens_in": 3, "tokens_out": 5},
+        "idempotency_key": result.interaction_id,
+    }
+
+
+def test_per_call_timeout_overrides_the_default() -> None:
+    seen: list = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.extensions["timeout"])
+        return _gateway_response(request)
+
+    with InferenceClient(InferenceConfig(base_url="http://gateway", timeout=20), transport=httpx.MockTransport(handler)) as client:
+        client.infer("acme", "support", {"text": "hi"})
+        client.infer("acme", "support", {"text": "hi"}, timeout=0.25)
+
+    assert seen[0]["read"] == 20 and seen[1] == {"connect": 0.25, "read": 0.25, "write": 0.25, "pool": 0.25}
+
+
+def test_gateway_errors_are_raised() -> None:
+    transport = httpx.MockTransport(lambda request: httpx.Response(404, json={"detail": "No policies"}))
+    with InferenceClient(InferenceConfig(base_url="http://gateway"), transport=transport) as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            client.infer("acme", "support", {"text": "hi"})
+
+
+def test_async_deadline_covers_the_whole_call() -> None:
+    async def slow(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(1)
+        return _gateway_response(request)
+
+    async def run() -> None:
+        async with AsyncInferenceClient(InferenceConfig(base_url="http://gateway"), transport=httpx.MockTransport(slow)) as client:
+            with pytest.raises(httpx.TimeoutException):
+                await client.infer("acme", "support", {"text": "hi"}, timeout=0.05)
+
+    asyncio.run(run())
+
+
+def test_async_client_logs_without_awaiting_the_collector() -> None:
+    sent: list = []
+
+    async def run() -> None:
+        gate = asyncio.Event()
+
+        async def collector(request: httpx.Request) -> httpx.Response:
+            await gate.wait()
+            sent.append(json.loads(request.content))
+            return httpx.Response(202)
+
+        telemetry = AsyncTelemetryClient(
+            ClientConfig(base_url="http://collector", api_key="test"), transport=httpx.MockTransport(collector)
+        )
+        client = AsyncInferenceClient(
+            InferenceConfig(base_url="http://gateway"), telemetry=telemetry, transport=httpx.MockTransport(_gateway_response)
+        )
+        result = await client.infer("acme", "support", {"text": "hi"})
+        assert sent == []  # the call returned while the collector was still blocked
+        gate.set()
+        await client.aclose()
+        await telemetry.aclose()
+        assert sent[0]["idempotency_key"] == result.interaction_id
+        assert sent[0]["user_id"] == "anonymous"
+
+    asyncio.run(run())
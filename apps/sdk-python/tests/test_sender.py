@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from rl_sdk.client import TelemetryClient
+from rl_sdk.config import ClientConfig
+from rl_sdk.sender import BackgroundSender, SenderStats
+from rl_sdk.spool import Spool
+
+
+def _background_config(tmp_path: Path, **overrides) -> ClientConfig:
+    return ClientConfig(
+        base_url="https://api.example.com",
+        api_key="test",
+        offline_path=str(tmp_path / "spool"),
+        background=True,
+        **overrides,
+    )
+
+
+def _stats(client: TelemetryClient) -> SenderStats:
+    stats = client.stats()
+    assert stats is not None, "background sending is enabled"
+    return stats
+
+
+def test_log_calls_return_before_the_collector_answers(tmp_path: Path) -> None:
+    release = threading.Event()
+    received: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        release.wait(5)
+        received.append(json.loads(request.content))
+        return httpx.Response(202)
+
+    client = TelemetryClient(_background_config(tmp_path, flush_interval=0.01), transport=httpx.MockTransport(handler))
+    event = {"tenant_id": "acme", "interaction_id": "1", "label": {"correct": True}}
+
+    started = time.perf_counter()
+    client.log_task_result(event)
+    event["interaction_id"] = "mutated"
+    assert time.perf_counter() - started < 0.5
+
+    release.set()
+    assert client.flush(timeout=5)
+    assert received[0]["interaction_id"] == "1" and received[0]["idempotency_key"]
+    assert _stats(client).sent == 1 and _stats(client).queue_depth == 0
+    client.close()
+
+
+def test_batches_are_posted_concurrently(tmp_path: Path) -> None:
+    in_flight = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        time.sleep(0.02)
+        with lock:
+            in_flight["now"] -= 1
+        return httpx.Response(202)
+
+    cfg = _background_config(tmp_path, batch_size=8, sender_concurrency=4, flush_interval=0.05)
+    with TelemetryClient(cfg, transport=httpx.MockTransport(handler)) as client:
+        for n in range(16):
+            client.submit_feedback({"tenant_id": "acme", "interaction_id": str(n)})
+        assert client.flush(timeout=5)
+        assert _stats(client).sent == 16
+    assert 1 < in_flight["peak"] <= 4
+
+
+def test_overflow_spills_to_offline_spool(tmp_path: Path) -> None:
+    release = threading.Event()
+    posted: list[str] = []
+
+    def post(path: str, payload: dict) -> None:
+        release.wait(5)
+        posted.append(payload["n"])
+
+    spool = Spool(str(tmp_path / "spool"))
+    sender = BackgroundSender(post, spool, queue_size=2, batch_size=1, flush_interval=0.01)
+    accepted = [sender.submit("/v1/task_result", {"n": n}) for n in range(6)]
+
+    assert accepted.count(False) >= 3
+    release.set()
+    assert sender.flush(timeout=5)
+    sender.close()
+
+    spilled = [event["payload"]["n"] for _, _, event in spool.read()]
+    stats = sender.stats()
+    assert sorted(posted + spilled) == list(range(6))
+    assert stats.spilled == len(spilled) and stats.dropped == 0
+
+
+def test_close_spills_unsent_events_and_counts_drops_without_spool(tmp_path: Path) -> None:
+    release = threading.Event()
+
+    def post(path: str, payload: dict) -> None:
+        release.wait(5)
+
+    sender = BackgroundSender(post, Spool(None), queue_size=1, batch_size=1, flush_interval=0.01)
+    sender.submit("/v1/task_result", {"n": 0})
+    time.sleep(0.05)  # let the worker pick the first event up
+    sender.submit("/v1/task_result", {"n": 1})
+    sender.submit("/v1/task_result", {"n": 2})
+
+    assert sender.stats().dropped == 1
+    release.set()
+    sender.close()
+    assert sender.stats().sent == 2
+
+
+def test_failed_sends_are_counted(tmp_path: Path) -> None:
+    cfg = _background_config(tmp_path, max_retries=0, flush_interval=0.01)
+    client = TelemetryClient(cfg, transport=httpx.MockTransport(lambda request: httpx.Response(500)))
+
+    client.log_output({"tenant_id": "acme", "interaction_id": "1"})
+    client.close()
+
+    assert _stats(client).failed == 1
+    (spilled,) = Spool(str(tmp_path / "spool")).read()
+    assert spilled.event["path"] == "/v1/interaction.output"
+
+
+def test_close_spools_events_still_in_flight(tmp_path: Path) -> None:
+    release = threading.Event()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        release.wait(5)  # the collector stalls past the close timeout
+        return httpx.Response(503)
+
+    cfg = _background_config(tmp_path, max_retries=1, backoff_seconds=0, flush_interval=0.01)
+    client = TelemetryClient(cfg, transport=httpx.MockTransport(handler))
+    client.log_output({"tenant_id": "acme", "interaction_id": "1"})
+
+    client.close(timeout=0.1)
+    release.set()  # the retry now finds the HTTP client closed
+    deadline = time.monotonic() + 5
+    while not _stats(client).failed and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    (spilled,) = Spool(str(tmp_path / "spool")).read()
+    assert spilled.event["payload"]["interaction_id"] == "1"
+    assert _stats(client).failed == 1 and _stats(client).sent == 0
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import multiprocessing
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from rl_sdk import spool as spool_module
+from rl_sdk.spool import Position, Spool
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def _fill(spool: Spool, count: int, **extra) -> None:
+    for n in range(count):
+        assert spool.append({"path": "/v1/task_result", "payload": {"n": n, **extra}})
+
+
+def _numbers(spool: Spool) -> list[int]:
+    return [entry.event["payload"]["n"] for entry in spool.read()]
+
+
+def test_replay_failure_keeps_unacknowledged_events(tmp_path: Path) -> None:
+    spool = Spool(str(tmp_path))
+    _fill(spool, 5)
+    sent: list[int] = []
+
+    def sender(item: dict) -> None:
+        if item["payload"]["n"] == 2:
+            raise ConnectionError("collector down")
+        sent.append(item["payload"]["n"])
+
+    with pytest.raises(ConnectionError):
+        spool.replay(sender)
+
+    assert sent == [0, 1]
+    assert _numbers(Spool(str(tmp_path))) == [2, 3, 4]
+    assert spool.replay(lambda item: None) == 3
+    assert spool.pending_bytes == 0 and _numbers(spool) == []
+
+
+def test_crash_mid_replay_resends_only_unacknowledged_events(tmp_path: Path) -> None:
+    spool = Spool(str(tmp_path / "spool"), segment_bytes=120)
+    _fill(spool, 6)
+    delivered = tmp_path / "delivered.ndjson"
+    script = textwrap.dedent(
+        f"""
+        import os, sys
+        sys.path.insert(0, {str(SRC)!r})
+        from rl_sdk.spool import Spool
+
+        def sender(item):
+            if item["payload"]["n"] == 3:
+                os._exit(1)  # killed mid-replay: no finally blocks, no final commit
+            with open({str(delivered)!r}, "a") as fh:
+                fh.write(str(item["payload"]["n"]) + "\\n")
+
+        Spool({str(tmp_path / "spool")!r}, segment_bytes=120).replay(sender, commit_every=1)
+        """
+    )
+
+    result = subprocess.run([sys.executable, "-c", script], timeout=30)
+
+    assert result.returncode == 1
+    assert delivered.read_text().split() == ["0", "1", "2"]
+    assert _numbers(Spool(str(tmp_path / "spool"))) == [3, 4, 5]
+
+
+def test_out_of_order_acks_commit_only_the_contiguous_prefix(tmp_path: Path) -> None:
+    spool = Spool(str(tmp_path))
+    _fill(spool, 6)
+    slow = threading.Event()
+
+    def sender(item: dict) -> None:
+        n = item["payload"]["n"]
+        if n == 1:
+            slow.wait(1)
+            raise TimeoutError("slow request failed")
+        if n == 4:
+            slow.set()
+
+    with pytest.raises(TimeoutError):
+        spool.replay(sender, concurrency=4, commit_every=1)
+
+    # 0 was acknowledged; 2 and 3 were too, but behind the failed 1, so they are re-sent.
+    assert _numbers(spool) == [1, 2, 3, 4, 5]
+
+
+def test_replay_is_concurrent_and_rate_limited(tmp_path: Path) -> None:
+    spool = Spool(str(tmp_path))
+    _fill(spool, 10)
+    in_flight = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def sender(item: dict) -> None:
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        time.sleep(0.03)
+        with lock:
+            in_flight["now"] -= 1
+
+    assert spool.replay(sender, concurrency=4) == 10
+    assert in_flight["peak"] > 1
+
+    _fill(spool, 6)
+    started = time.perf_counter()
+    assert spool.replay(lambda item: None, rate=50) == 6
+    assert time.perf_counter() - started >= 0.09
+
+
+def test_only_one_replay_runs_at_a_time(tmp_path: Path) -> None:
+    spool = Spool(str(tmp_path))
+    _fill(spool, 2)
+    entered, release = threading.Event(), threading.Event()
+
+    def sender(item: dict) -> None:
+        entered.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=spool.replay, args=(sender,))
+    worker.start()
+    entered.wait(5)
+
+    assert Spool(str(tmp_path)).replay(lambda item: None) == 0
+    release.set()
+    worker.join()
+    assert spool.pending_bytes == 0
+
+
+def test_torn_tail_is_skipped_and_appends_start_a_new_segment(tmp_path: Path) -> None:
+    spool = Spool(str(tmp_path))
+    _fill(spool, 2)
+    (segment,) = sorted(tmp_path.glob("*.ndjson"))
+    with segment.open("ab") as fh:
+        fh.write(b'{"path": "/v1/task_res')  # crash halfway through a write
+
+    spool.append({"path": "/v1/task_result", "payload": {"n": 2}})
+
+    assert len(list(tmp_path.glob("*.ndjson"))) == 2
+    assert _numbers(spool) == [0, 1, 2]
+
+
+def test_drop_oldest_evicts_whole_segments(tmp_path: Path) -> None:
+    spool = Spool(str(tmp_path), segment_bytes=200, max_bytes=600)
+    _fill(spool, 40)
+
+    remaining = _numbers(spool)
+
+    assert spool.pending_bytes <= 600
+    assert spool.evicted == 40 - len(remaining) > 0
+    assert remaining == list(range(40 - len(remaining), 40))
+    assert spool.committed > Position(0, 0)
+
+
+def test_drop_newest_rejects_when_full(tmp_path: Path) -> None:
+    spool = Spool(str(tmp_path), segment_bytes=200, max_bytes=600, eviction="drop_newest")
+    accepted = [spool.append({"path": "/v1/task_result", "payload": {"n": n}}) for n in range(40)]
+
+    remaining = _numbers(spool)
+
+    assert spool.rejected == accepted.count(False) > 0
+    assert remaining == list(range(len(remaining)))
+    assert not spool.append({"payload": "x" * 1000})
+
+
+def _append_from_process(directory: str, worker: int) -> None:
+    spool = Spool(directory, segment_bytes=512)
+    for n in range(50):
+        spool.append({"path": "/v1/task_result", "payload": {"n": n, "worker": worker, "pad": "x" * 40}})
+
+
+@pytest.mark.skipif(spool_module.fcntl is None, reason="cross-process locking needs fcntl")
+def test_processes_share_a_spool(tmp_path: Path) -> None:
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_append_from_process, args=(str(tmp_path), w)) for w in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+
+    entries = list(Spool(str(tmp_path)).read())
+
+    assert len(entries) == 200
+    for worker in range(4):
+        assert [e.event["payload"]["n"] for e in entries if e.event["payload"]["worker"] == worker] == list(range(50))
+
+
+def test_legacy_buffer_file_is_imported(tmp_path: Path) -> None:
+    legacy = tmp_path / "buffer.ndjson"
+    legacy.write_text("".join(json.dumps({"path": "/v1/task_result", "payload": {"n": n}}) + "\n" for n in range(3)))
+
+    spool = Spool(str(legacy))
+
+    assert legacy.is_dir() and _numbers(spool) == [0, 1, 2]
+    assert not (tmp_path / "buffer.ndjson.legacy").exists()
+
+
+def test_async_replay_commits_acknowledged_prefix(tmp_path: Path) -> None:
+    spool = Spool(str(tmp_path))
+    _fill(spool, 4)
+    sent: list[int] = []
+
+    async def sender(item: dict) -> None:
+        await asyncio.sleep(0)
+        if item["payload"]["n"] == 2:
+            raise ConnectionError("collector down")
+        sent.append(item["payload"]["n"])
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(spool.areplay(sender, concurrency=1))
+
+    assert sent == [0, 1]
+    assert _numbers(spool) == [2, 3]
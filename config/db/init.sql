@@ -29,23 +29,248 @@ CREATE TABLE IF NOT EXISTS policies (
     UNIQUE (tenant_id, policy_id)
 );
 
+-- Databases created before events was partitioned hold a plain events table, which
+-- CREATE TABLE IF NOT EXISTS below would silently keep. Move it aside (with its index
+-- and sequence names, which are schema-wide) so the partitioned table is created; the
+-- rows are copied back at the end of this file. Re-running the file resumes a
+-- migration that stopped midway.
+DO $$
+DECLARE
+    v_index TEXT;
+BEGIN
+    IF to_regclass('events') IS NULL
+        OR (SELECT relkind FROM pg_class WHERE oid = to_regclass('events')) <> 'r' THEN
+        RETURN;
+    END IF;
+    ALTER TABLE events RENAME TO events_legacy;
+    ALTER TABLE events_legacy RENAME CONSTRAINT events_pkey TO events_legacy_pkey;
+    FOR v_index IN
+        SELECT i.relname FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = 'events_legacy'::regclass AND NOT x.indisprimary
+    LOOP
+        EXECUTE format('DROP INDEX %I', v_index);
+    END LOOP;
+    IF to_regclass('events_id_seq') IS NOT NULL THEN
+        ALTER SEQUENCE events_id_seq RENAME TO events_legacy_id_seq;
+    END IF;
+END $$;
+
+-- Events are range partitioned on occurred_at; apps/collector/app/partitions.py keeps
+-- future partitions pre-created and drops expired ones. Rows outside every partition
+-- (backfills, skewed clocks) land in events_default until a matching partition exists.
 CREATE TABLE IF NOT EXISTS events (
-    id BIGSERIAL PRIMARY KEY,
+    id BIGSERIAL,
     tenant_id UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
     event_type TEXT NOT NULL,
     payload JSONB NOT NULL,
     policy_id TEXT,
     skill TEXT,
     occurred_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-    idempotency_key TEXT
-);
+    idempotency_key TEXT,
+    PRIMARY KEY (id, occurred_at)
+) PARTITION BY RANGE (occurred_at);
+
+CREATE TABLE IF NOT EXISTS events_default PARTITION OF events DEFAULT;
 
 CREATE INDEX IF NOT EXISTS idx_events_tenant_type_time
     ON events (tenant_id, event_type, occurred_at DESC);
 
+-- Keyset order for exports: (occurred_at, id) > cursor resumes with an index range scan.
+CREATE INDEX IF NOT EXISTS idx_events_tenant_time_id
+    ON events (tenant_id, occurred_at, id);
+
 CREATE INDEX IF NOT EXISTS idx_events_policy_time
     ON events (policy_id, occurred_at DESC);
 
-CREATE UNIQUE INDEX IF NOT EXISTS uniq_events_idempotency
-    ON events (tenant_id, event_type, idempotency_key)
-    WHERE idempotency_key IS NOT NULL;
+-- Rows arrive roughly in occurred_at order, so a BRIN summary serves time-range scans
+-- at a fraction of a B-tree's size and write cost.
+CREATE INDEX IF NOT EXISTS brin_events_occurred_at
+    ON events USING BRIN (occurred_at);
+
+-- A unique index on a partitioned table must include the partition key, which would
+-- make (tenant, type, key) unique only per occurred_at. Idempotency keys therefore live
+-- in their own narrow table, claimed in the same statement that inserts the event.
+CREATE TABLE IF NOT EXISTS event_idempotency_keys (
+    tenant_id UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    event_type TEXT NOT NULL,
+    idempotency_key TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (tenant_id, event_type, idempotency_key)
+);
+
+CREATE INDEX IF NOT EXISTS brin_event_idempotency_keys_created_at
+    ON event_idempotency_keys USING BRIN (created_at);
+
+-- Days of events to keep per tenant; NULL falls back to the maintenance default.
+ALTER TABLE tenants ADD COLUMN IF NOT EXISTS retention_days INTEGER CHECK (retention_days > 0);
+
+-- Retrieval chunks and large texts are stored once per tenant and content hash
+-- (apps/collector/app/blobs.py). Payloads hold {"$blob": digest} references, listed
+-- in events.blob_refs. refcount is the number of events that point at the body.
+CREATE TABLE IF NOT EXISTS event_blobs (
+    tenant_id UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    digest TEXT NOT NULL,
+    body TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    refcount BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_referenced_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (tenant_id, digest)
+);
+
+ALTER TABLE events ADD COLUMN IF NOT EXISTS blob_refs TEXT[];
+
+-- Deleted events release their references. Partition drops bypass row triggers, so
+-- partitions.py releases a partition's references before dropping it, and moves out
+-- of events_default set rl.keep_event_blobs because the rows are re-inserted.
+CREATE OR REPLACE FUNCTION release_event_blobs()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('rl.keep_event_blobs', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    UPDATE event_blobs b
+    SET refcount = b.refcount - r.n
+    FROM (SELECT ref, count(*) AS n FROM unnest(OLD.blob_refs) AS ref GROUP BY ref) r
+    WHERE b.tenant_id = OLD.tenant_id AND b.digest = r.ref;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER events_release_blobs
+    AFTER DELETE ON events
+    FOR EACH ROW WHEN (OLD.blob_refs IS NOT NULL)
+    EXECUTE FUNCTION release_event_blobs();
+
+-- Feedback and task results are credited to the policy that served the interaction,
+-- found through its interaction.output event (apps/collector/app/rollups.py).
+CREATE INDEX IF NOT EXISTS idx_events_output_interaction
+    ON events (tenant_id, (payload->>'interaction_id'))
+    WHERE event_type = 'interaction.output';
+
+-- Hourly per-policy rollups, folded from events above rollup_watermarks.last_event_id
+-- in the same transaction that advances the watermark. Every column except the
+-- latency sketch is an additive counter; sketches merge with merge_latency_sketch().
+CREATE TABLE IF NOT EXISTS policy_hourly_stats (
+    tenant_id UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    -- '' collects feedback and task results whose interaction was not found.
+    policy_id TEXT NOT NULL,
+    hour TIMESTAMPTZ NOT NULL,
+    interactions BIGINT NOT NULL DEFAULT 0,
+    outputs BIGINT NOT NULL DEFAULT 0,
+    shadow_outputs BIGINT NOT NULL DEFAULT 0,
+    latency_count BIGINT NOT NULL DEFAULT 0,
+    latency_sum_ms DOUBLE PRECISION NOT NULL DEFAULT 0,
+    tokens_in BIGINT NOT NULL DEFAULT 0,
+    tokens_out BIGINT NOT NULL DEFAULT 0,
+    cost_dollars DOUBLE PRECISION NOT NULL DEFAULT 0,
+    feedback BIGINT NOT NULL DEFAULT 0,
+    thumbs_up BIGINT NOT NULL DEFAULT 0,
+    thumbs_down BIGINT NOT NULL DEFAULT 0,
+    rating_count BIGINT NOT NULL DEFAULT 0,
+    rating_sum BIGINT NOT NULL DEFAULT 0,
+    escalations BIGINT NOT NULL DEFAULT 0,
+    shadow_comparisons BIGINT NOT NULL DEFAULT 0,
+    shadow_matches BIGINT NOT NULL DEFAULT 0,
+    task_results BIGINT NOT NULL DEFAULT 0,
+    task_correct BIGINT NOT NULL DEFAULT 0,
+    latency_sketch JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (tenant_id, policy_id, hour)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+    name TEXT PRIMARY KEY,
+    last_event_id BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO rollup_watermarks (name) VALUES ('policy_hourly_stats') ON CONFLICT (name) DO NOTHING;
+
+-- Sketches are {"<bucket>": count} objects; merging adds counts bucket by bucket.
+CREATE OR REPLACE FUNCTION merge_latency_sketch(a JSONB, b JSONB)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_object_agg(bucket, total), '{}'::jsonb)
+    FROM (
+        SELECT bucket, sum(n::bigint) AS total
+        FROM (
+            SELECT * FROM jsonb_each_text(COALESCE(a, '{}'::jsonb))
+            UNION ALL
+            SELECT * FROM jsonb_each_text(COALESCE(b, '{}'::jsonb))
+        ) AS counts(bucket, n)
+        GROUP BY bucket
+    ) AS merged;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Create (or adopt) the partition covering [p_from, p_to). Rows already parked in
+-- events_default for that range are moved first so the ATTACH validation succeeds.
+CREATE OR REPLACE FUNCTION create_events_partition(p_name TEXT, p_from TIMESTAMPTZ, p_to TIMESTAMPTZ)
+RETURNS BOOLEAN AS $$
+BEGIN
+    IF to_regclass(p_name) IS NOT NULL THEN
+        RETURN FALSE;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE events INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', p_name);
+    PERFORM set_config('rl.keep_event_blobs', 'on', true);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM events_default WHERE occurred_at >= %L AND occurred_at < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        p_from, p_to, p_name
+    );
+    PERFORM set_config('rl.keep_event_blobs', 'off', true);
+    EXECUTE format('ALTER TABLE events ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', p_name, p_from, p_to);
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Bootstrap a week of daily partitions; the maintenance job extends the window.
+DO $$
+DECLARE
+    v_day DATE;
+BEGIN
+    FOR v_day IN SELECT generate_series((NOW() AT TIME ZONE 'UTC')::date - 1, (NOW() AT TIME ZONE 'UTC')::date + 7, INTERVAL '1 day')::date LOOP
+        PERFORM create_events_partition(
+            'events_p' || to_char(v_day, 'YYYYMMDD'),
+            v_day::timestamp AT TIME ZONE 'UTC',
+            (v_day + 1)::timestamp AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+END $$;
+
+-- Second half of the legacy migration started at the top of this file: create daily
+-- partitions for the legacy range, backfill idempotency keys so duplicates of old
+-- events are still recognised, copy the rows with their ids, and move the id sequence
+-- past them. Runs in one transaction, so a failure leaves events_legacy intact.
+DO $$
+DECLARE
+    v_day DATE;
+    v_first DATE;
+    v_last DATE;
+BEGIN
+    IF to_regclass('events_legacy') IS NULL THEN
+        RETURN;
+    END IF;
+    SELECT min(occurred_at AT TIME ZONE 'UTC')::date, max(occurred_at AT TIME ZONE 'UTC')::date
+    INTO v_first, v_last
+    FROM events_legacy;
+    IF v_first IS NOT NULL THEN
+        FOR v_day IN SELECT generate_series(v_first, v_last, INTERVAL '1 day')::date LOOP
+            PERFORM create_events_partition(
+                'events_p' || to_char(v_day, 'YYYYMMDD'),
+                v_day::timestamp AT TIME ZONE 'UTC',
+                (v_day + 1)::timestamp AT TIME ZONE 'UTC'
+            );
+        END LOOP;
+    END IF;
+    INSERT INTO event_idempotency_keys (tenant_id, event_type, idempotency_key, created_at)
+    SELECT tenant_id, event_type, idempotency_key, min(occurred_at)
+    FROM events_legacy
+    WHERE idempotency_key IS NOT NULL
+    GROUP BY tenant_id, event_type, idempotency_key
+    ON CONFLICT DO NOTHING;
+    INSERT INTO events (id, tenant_id, event_type, payload, policy_id, skill, occurred_at, idempotency_key)
+    SELECT id, tenant_id, event_type, payload, policy_id, skill, occurred_at, idempotency_key
+    FROM events_legacy;
+    PERFORM setval(pg_get_serial_sequence('events', 'id'), GREATEST((SELECT max(id) FROM events), 1));
+    DROP TABLE events_legacy;
+END $$;
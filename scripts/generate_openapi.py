@@ -142,6 +142,22 @@ def build_openapi(schemas: dict[str, dict]) -> dict:
         "/v1/validate": {
             "post": {
                 "summary": "Validate payload against supported schemas",
+                "description": (
+                    "The schema is chosen by the `event_type` query parameter or payload key, "
+                    "otherwise by the fields only one schema requires (`label`, `output`, "
+                    "`user_id`/`input`/`skill`/`context`); anything else is checked as feedback."
+                ),
+                "parameters": [
+                    {
+                        "name": "event_type",
+                        "in": "query",
+                        "required": False,
+                        "schema": {
+                            "type": "string",
+                            "enum": ["interaction.create", "interaction.output", "feedback.submit", "task.result"],
+                        },
+                    }
+                ],
                 "requestBody": {
                     "required": True,
                     "content": {